@@ -5,18 +5,24 @@
 마크다운 텍스트 출력 방식에 최적화된 API를 구현합니다.
 """
 
+import re
 import time
 import uuid
 import logging
 from typing import Optional, List, Union
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Query, Request, Response, Header
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from models.portfolio import (
     AnalysisResponse, AnalysisRequest, 
-    ErrorResponse, StructuredAnalysisResponse
+    ErrorResponse, StructuredAnalysisResponse,
+    JobStatusResponse, ProgressChannelResponse
 )
 from services.gemini_service import get_gemini_service, GeminiService
+from services.job_manager import get_job_manager, JobManager, AnalysisJob, JobQueueFullError, describe_job_error
+from services.progress_events import get_progress_broker, format_sse_event, format_sse, PROGRESS_HISTORY_TTL
+from services.errors import GeminiCapacityError
+from services.circuit_breaker import CircuitOpenError
 from utils.image_utils import validate_image, is_supported_image_type, get_image_info
 
 # 로깅 설정
@@ -25,6 +31,95 @@ logger = logging.getLogger(__name__)
 # 라우터 생성
 router = APIRouter()
 
+# 요청 ID 허용 형식 (X-Request-ID, 서버 발급 uuid4)
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# SSE 진행 이벤트 스트림 최대 유지 시간 (초, Gemini 타임아웃보다 약간 길게)
+EVENT_STREAM_TIMEOUT = 660
+
+def _resolve_request_id(x_request_id: Optional[str]) -> str:
+    """요청 ID 결정 (POST /api/analyze/events로 발급받은 X-Request-ID 우선, 없으면 발급)"""
+    broker = get_progress_broker()
+    if x_request_id is None:
+        return broker.open()
+    if not _REQUEST_ID_PATTERN.match(x_request_id) or not broker.has_channel(x_request_id):
+        raise HTTPException(
+            status_code=400,
+            detail="X-Request-ID는 POST /api/analyze/events로 발급받은 요청 ID여야 합니다 (만료 시 다시 발급)."
+        )
+    return x_request_id
+
+def _collect_upload_files(
+    files: Optional[List[UploadFile]], file: Optional[UploadFile]
+) -> List[UploadFile]:
+    """업로드 필드 정리 (하위호환: 단일 파일 필드 file -> files 승격)"""
+    if files:
+        return list(files)
+    if file is not None:
+        return [file]
+    return []
+
+async def _read_image_uploads(incoming_files: List[UploadFile], request_id: str) -> List[bytes]:
+    """
+    업로드 파일 개수/형식 검증 및 이미지 데이터 읽기
+    
+    Raises:
+        HTTPException: 파일 개수, 형식, 이미지 검증 실패 시
+    """
+    # 1. 파일 개수 검증
+    if not incoming_files or len(incoming_files) == 0:
+        raise HTTPException(
+            status_code=422,
+            detail="최소 1개의 파일이 필요합니다."
+        )
+
+    if len(incoming_files) > 5:
+        raise HTTPException(
+            status_code=400,
+            detail="최대 5개의 파일만 업로드 가능합니다."
+        )
+
+    # 2. 파일 유효성 검사 및 데이터 읽기
+    image_data_list = []
+    for i, file in enumerate(incoming_files):
+        if not file.filename:
+            raise HTTPException(
+                status_code=400,
+                detail=f"파일 {i+1}의 파일명이 없습니다."
+            )
+
+        # Content-Type 검증
+        if not is_supported_image_type(file.content_type):
+            raise HTTPException(
+                status_code=400,
+                detail=f"파일 {i+1}: 지원하지 않는 파일 형식입니다. (지원: JPEG, PNG)"
+            )
+
+        # 파일 데이터 읽기
+        try:
+            image_data = await file.read()
+        except Exception as e:
+            logger.error(f"파일 {i+1} 읽기 실패 (ID: {request_id}): {str(e)}")
+            raise HTTPException(
+                status_code=400,
+                detail=f"파일 {i+1}을 읽을 수 없습니다."
+            )
+
+        # 이미지 검증
+        try:
+            await validate_image(image_data, file.filename)
+            logger.info(f"이미지 {i+1} 검증 성공 (ID: {request_id})")
+        except ValueError as e:
+            logger.warning(f"이미지 {i+1} 검증 실패 (ID: {request_id}): {str(e)}")
+            raise HTTPException(
+                status_code=400,
+                detail=f"파일 {i+1}: {str(e)}"
+            )
+
+        image_data_list.append(image_data)
+    
+    return image_data_list
+
 @router.post(
     "/analyze",
     response_model=Union[AnalysisResponse, StructuredAnalysisResponse],
@@ -51,6 +146,10 @@ async def analyze_portfolio(
         description="출력 형식: 'json' (구조화된 출력) 또는 'markdown' (기존 방식)",
         regex="^(json|markdown)$"
     ),
+    x_request_id: Optional[str] = Header(
+        default=None,
+        description="POST /api/analyze/events로 발급받은 요청 ID (GET /api/analyze/{request_id}/events로 진행 상황 구독)"
+    ),
     background_tasks: BackgroundTasks = BackgroundTasks(),
     gemini_service: GeminiService = Depends(get_gemini_service)
 ):
@@ -60,88 +159,47 @@ async def analyze_portfolio(
     Args:
         files: 업로드된 이미지 파일들 (1-5개)
         format: 출력 형식 ('json' | 'markdown')
+        x_request_id: 발급받은 요청 ID (진행 이벤트 채널)
         background_tasks: 백그라운드 작업
         gemini_service: Gemini 서비스 인스턴스
     
     Returns:
         AnalysisResponse | StructuredAnalysisResponse
     """
-    request_id = str(uuid.uuid4())
+    request_id = _resolve_request_id(x_request_id)
     start_time = time.time()
     
     try:
-        # 하위호환: 단일 파일 필드 지원(file -> files 승격)
-        incoming_files: List[UploadFile] = []
-        if files:
-            incoming_files = list(files)
-        elif file is not None:
-            incoming_files = [file]
-
+        incoming_files = _collect_upload_files(files, file)
         logger.info(
             f"포트폴리오 분석 요청 시작 (ID: {request_id}, 파일 수: {len(incoming_files)}, format: {format})"
         )
-        
-        # 1. 파일 개수 검증
-        if not incoming_files or len(incoming_files) == 0:
-            raise HTTPException(
-                status_code=422,
-                detail="최소 1개의 파일이 필요합니다."
-            )
-        
-        if len(incoming_files) > 5:
-            raise HTTPException(
-                status_code=400,
-                detail="최대 5개의 파일만 업로드 가능합니다."
-            )
-        
-        # 2. 파일 유효성 검사 및 데이터 읽기
-        image_data_list = []
-        for i, file in enumerate(incoming_files):
-            if not file.filename:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"파일 {i+1}의 파일명이 없습니다."
-                )
-            
-            # Content-Type 검증
-            if not is_supported_image_type(file.content_type):
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"파일 {i+1}: 지원하지 않는 파일 형식입니다. (지원: JPEG, PNG)"
-                )
-            
-            # 파일 데이터 읽기
-            try:
-                image_data = await file.read()
-            except Exception as e:
-                logger.error(f"파일 {i+1} 읽기 실패 (ID: {request_id}): {str(e)}")
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"파일 {i+1}을 읽을 수 없습니다."
-                )
-            
-            # 이미지 검증
-            try:
-                await validate_image(image_data, file.filename)
-                logger.info(f"이미지 {i+1} 검증 성공 (ID: {request_id})")
-            except ValueError as e:
-                logger.warning(f"이미지 {i+1} 검증 실패 (ID: {request_id}): {str(e)}")
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"파일 {i+1}: {str(e)}"
-                )
-            
-            image_data_list.append(image_data)
+        image_data_list = await _read_image_uploads(incoming_files, request_id)
         
         # 3. Gemini API를 통한 분석 (format에 따라 구조화/마크다운 통합 처리)
         try:
             logger.info(f"Gemini 분석 시작 (ID: {request_id}, 이미지 수: {len(image_data_list)}, format: {format})")
             result = await gemini_service.analyze_portfolio_structured(
                 image_data_list=image_data_list,
-                format_type=format
+                format_type=format,
+                request_id=request_id
             )
             logger.info(f"Gemini 분석 완료 (ID: {request_id})")
             
+        except CircuitOpenError as e:
+            logger.warning(f"Gemini 회로 열림으로 즉시 거절 (ID: {request_id}): {str(e)}")
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        except GeminiCapacityError as e:
+            logger.warning(f"Gemini 호출 용량 부족으로 거절 (ID: {request_id}): {str(e)}")
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
         except TimeoutError as e:
             logger.error(f"Gemini API 타임아웃 (ID: {request_id}): {str(e)}")
             if len(image_data_list) > 1:
@@ -203,6 +261,271 @@ async def analyze_portfolio(
             detail="서버 내부 오류가 발생했습니다."
         )
 
+def _format_timestamp(value: Optional[float]) -> Optional[str]:
+    """epoch 초 → 표시용 시각 문자열"""
+    if value is None:
+        return None
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(value))
+
+def _build_job_status(job: AnalysisJob, job_manager: JobManager) -> JobStatusResponse:
+    """작업 상태 응답 생성"""
+    return JobStatusResponse(
+        job_id=job.job_id,
+        status=job.status,
+        format=job.format_type,
+        status_url=f"/api/analyze/jobs/{job.job_id}",
+        events_url=f"/api/analyze/{job.job_id}/events",
+        created_at=_format_timestamp(job.created_at),
+        started_at=_format_timestamp(job.started_at),
+        finished_at=_format_timestamp(job.finished_at),
+        queue_position=job_manager.queue_position(job),
+        preview=job.preview,
+        preview_at=_format_timestamp(job.preview_at),
+        result=job.result,
+        error=job.error
+    )
+
+@router.post(
+    "/analyze/jobs",
+    response_model=JobStatusResponse,
+    status_code=202,
+    responses={
+        202: {"description": "작업 등록됨"},
+        400: {"model": ErrorResponse, "description": "잘못된 요청"},
+        429: {"model": ErrorResponse, "description": "대기열 초과"},
+    },
+    summary="포트폴리오 분석 작업 등록 (비동기)",
+    description=(
+        "분석을 백그라운드 작업으로 등록하고 즉시 작업 ID를 반환합니다. 결과는 GET /api/analyze/jobs/{job_id}로 조회합니다. "
+        "format=json&preview=true이면 Step 1 완료 시 preview에 그라운딩 마크다운이 먼저 채워지고, "
+        "Step 2 검증이 끝나면 같은 작업의 result에 리포트가 추가됩니다."
+    )
+)
+async def create_analysis_job(
+    response: Response,
+    files: List[UploadFile] = File(
+        default=[],
+        description="포트폴리오 스크린샷 파일들 (1-5개), 필드명: files"
+    ),
+    file: Optional[UploadFile] = File(
+        default=None,
+        description="단일 파일 업로드 하위호환 필드명: file"
+    ),
+    format: str = Query(
+        default="markdown",
+        description="출력 형식: 'json' (구조화된 출력) 또는 'markdown' (기존 방식)",
+        regex="^(json|markdown)$"
+    ),
+    preview: bool = Query(
+        default=False,
+        description="JSON 모드에서 Step 1 마크다운을 미리보기로 먼저 제공 (2단계 응답)"
+    ),
+    gemini_service: GeminiService = Depends(get_gemini_service),
+    job_manager: JobManager = Depends(get_job_manager)
+):
+    """
+    비동기 분석 작업 등록 엔드포인트
+    
+    업로드 검증은 요청 시점에 수행하고, Gemini 분석은 제한된 워커 풀에서 실행합니다.
+    
+    Returns:
+        JobStatusResponse: 202 Accepted + Location 헤더
+    """
+    request_id = str(uuid.uuid4())
+    incoming_files = _collect_upload_files(files, file)
+    logger.info(
+        f"분석 작업 등록 요청 (ID: {request_id}, 파일 수: {len(incoming_files)}, format: {format})"
+    )
+    image_data_list = await _read_image_uploads(incoming_files, request_id)
+    
+    async def run_analysis(job: AnalysisJob):
+        return await gemini_service.analyze_portfolio_structured(
+            image_data_list=image_data_list,
+            format_type=format,
+            request_id=job.job_id,
+            on_grounded=job.set_preview if preview and format == "json" else None
+        )
+    
+    try:
+        job = await job_manager.submit(run_analysis, format_type=format)
+        get_progress_broker().open(job.job_id)  # 첫 이벤트 전에도 events_url 구독 가능
+    except JobQueueFullError as e:
+        logger.warning(f"분석 작업 거절 - 대기열 초과 (ID: {request_id})")
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    status = _build_job_status(job, job_manager)
+    response.headers["Location"] = status.status_url
+    return status
+
+@router.get(
+    "/analyze/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    responses={
+        404: {"model": ErrorResponse, "description": "작업 없음"},
+    },
+    summary="분석 작업 상태 조회",
+    description="작업 상태를 조회합니다. 완료 시 result에 분석 결과가 포함됩니다."
+)
+async def get_analysis_job(
+    job_id: str,
+    job_manager: JobManager = Depends(get_job_manager)
+):
+    """분석 작업 상태/결과 조회"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return _build_job_status(job, job_manager)
+
+@router.delete(
+    "/analyze/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    responses={
+        404: {"model": ErrorResponse, "description": "작업 없음"},
+        409: {"model": ErrorResponse, "description": "이미 종료된 작업"},
+    },
+    summary="분석 작업 취소",
+    description="대기 중이거나 실행 중인 작업을 취소합니다."
+)
+async def cancel_analysis_job(
+    job_id: str,
+    job_manager: JobManager = Depends(get_job_manager)
+):
+    """분석 작업 취소"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    if job.finished:
+        raise HTTPException(status_code=409, detail=f"이미 종료된 작업입니다. (상태: {job.status.value})")
+    job_manager.cancel(job_id)
+    return _build_job_status(job, job_manager)
+
+@router.post(
+    "/analyze/stream",
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "마크다운 토큰 스트림"},
+        400: {"model": ErrorResponse, "description": "잘못된 요청"},
+    },
+    summary="포트폴리오 이미지 분석 (스트리밍)",
+    description=(
+        "분석 결과를 생성되는 즉시 Server-Sent Events로 전달합니다. "
+        "markdown: started → delta(텍스트 조각)/section(필수 섹션 감지) → done. "
+        "json: started → grounded(Step 1 완료) → tab(완성·검증된 탭, 최대 4회) → report. "
+        "실패 시 error 이벤트로 종료합니다."
+    )
+)
+async def analyze_portfolio_stream(
+    files: List[UploadFile] = File(
+        default=[],
+        description="포트폴리오 스크린샷 파일들 (1-5개), 필드명: files"
+    ),
+    file: Optional[UploadFile] = File(
+        default=None,
+        description="단일 파일 업로드 하위호환 필드명: file"
+    ),
+    format: str = Query(
+        default="markdown",
+        description="출력 형식: 'markdown' (토큰 스트리밍) 또는 'json' (탭 단위 스트리밍)",
+        regex="^(json|markdown)$"
+    ),
+    x_request_id: Optional[str] = Header(
+        default=None,
+        description="POST /api/analyze/events로 발급받은 요청 ID (GET /api/analyze/{request_id}/events로 진행 상황 구독)"
+    ),
+    gemini_service: GeminiService = Depends(get_gemini_service)
+):
+    """
+    스트리밍 분석 엔드포인트 (마크다운 토큰 / JSON 탭 단위)
+    
+    업로드/이미지 검증 오류는 스트림 시작 전에 HTTP 오류로, 이후 오류는 error 이벤트로 전달합니다.
+    """
+    request_id = _resolve_request_id(x_request_id)
+    incoming_files = _collect_upload_files(files, file)
+    logger.info(f"스트리밍 분석 요청 시작 (ID: {request_id}, 파일 수: {len(incoming_files)}, format: {format})")
+    image_data_list = await _read_image_uploads(incoming_files, request_id)
+    
+    if format == "json":
+        events = gemini_service.stream_portfolio_structured(image_data_list, request_id=request_id)
+    else:
+        events = gemini_service.stream_portfolio_markdown(image_data_list, request_id=request_id)
+    try:
+        first_event = await events.__anext__()
+    except ValueError as e:
+        logger.warning(f"스트리밍 입력 검증 실패 (ID: {request_id}): {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def event_source():
+        yield format_sse(*first_event)
+        try:
+            async for event, data in events:
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"스트리밍 분석 실패 (ID: {request_id}, format: {format}): {str(e)}")
+            error = {"error": describe_job_error(e)}
+            if isinstance(e, GeminiCapacityError):
+                error["retry_after"] = e.retry_after
+            yield format_sse("error", error)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Request-ID": request_id}
+    )
+
+@router.post(
+    "/analyze/events",
+    response_model=ProgressChannelResponse,
+    status_code=201,
+    summary="분석 진행 이벤트 채널 발급",
+    description=(
+        "추측할 수 없는 요청 ID(uuid4)를 발급하고 진행 이벤트 채널을 엽니다. "
+        "events_url을 먼저 구독한 뒤 같은 ID를 X-Request-ID 헤더로 분석을 요청합니다. "
+        f"사용하지 않은 채널은 {PROGRESS_HISTORY_TTL}초 후 만료됩니다."
+    )
+)
+async def open_analysis_events():
+    """진행 이벤트 채널 발급"""
+    request_id = get_progress_broker().open()
+    return ProgressChannelResponse(request_id=request_id, events_url=f"/api/analyze/{request_id}/events")
+
+@router.get(
+    "/analyze/{request_id}/events",
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "진행 이벤트 스트림"},
+        400: {"model": ErrorResponse, "description": "잘못된 요청 ID"},
+        404: {"model": ErrorResponse, "description": "발급되지 않았거나 만료된 요청 ID"},
+    },
+    summary="분석 진행 이벤트 스트림 (SSE)",
+    description=(
+        "서버가 발급한 요청 ID(POST /api/analyze/events 또는 작업 ID)의 분석 진행 단계를 Server-Sent Events로 전달합니다. "
+        "분석 요청 전에 연결해도 되며, 지난 이벤트를 먼저 재생한 뒤 completed/failed 이벤트에서 종료합니다."
+    )
+)
+async def stream_analysis_events(request_id: str, request: Request):
+    """분석 진행 이벤트 SSE 스트림"""
+    if not _REQUEST_ID_PATTERN.match(request_id):
+        raise HTTPException(status_code=400, detail="올바르지 않은 요청 ID입니다.")
+    
+    broker = get_progress_broker()
+    if not broker.has_channel(request_id):
+        raise HTTPException(status_code=404, detail="발급되지 않았거나 만료된 요청 ID입니다.")
+    
+    async def event_source():
+        async for event in broker.subscribe(request_id, timeout=EVENT_STREAM_TIMEOUT):
+            if await request.is_disconnected():
+                logger.info(f"진행 이벤트 구독 종료 - 클라이언트 연결 해제 (ID: {request_id})")
+                return
+            yield format_sse_event(event)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get(
     "/analyze/sample",
     response_model=AnalysisResponse,
@@ -0,0 +1,7 @@
+"""
+Portfolio Evaluation MVP - 벤치마크 패키지
+
+이 패키지는 Gemini 호출 경로의 지연 시간/비용을 측정하는 수동 실행 스크립트들을 포함합니다.
+실제 Gemini API를 호출하므로 GEMINI_API_KEY가 필요하며, pytest 수집 대상이 아닙니다.
+실행: backend 디렉터리에서 `python -m benchmarks.<스크립트명> ...`
+"""
@@ -0,0 +1,103 @@
+"""
+Step 2 입력 압축 전후 입력 토큰/지연 시간 벤치마크
+
+저장해 둔 Step 1 결과(그라운딩 마크다운 파일)마다 압축 전후 Step 2 프롬프트의 입력 토큰을 비교하고,
+--runs가 1 이상이면 압축 사용/미사용으로 Step 2(_generate_structured_json)를 반복 호출하여
+지연 시간, 실제 입력 토큰(usage_metadata의 prompt_token_count), 첫 시도 검증 통과율을 비교합니다.
+
+- 입력 토큰: Gemini count_tokens 결과 (--offline이면 로컬 추정치)
+
+실행 예:
+    python -m benchmarks.bench_facts_compactor recorded/*.md --runs 2
+    python -m benchmarks.bench_facts_compactor recorded/*.md --offline --runs 0
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.gemini_service import GeminiService
+from services.model_router import ModelRouter, default_model
+from services.rate_limiter import estimate_input_tokens
+from services.result_cache import ResultCache
+
+
+async def _prompt_tokens(service: GeminiService, model: str, prompt: str, offline: bool) -> int:
+    """프롬프트 입력 토큰 (오프라인이면 로컬 추정)"""
+    if offline:
+        return estimate_input_tokens([prompt])
+    response = await service.client.aio.models.count_tokens(model=model, contents=[prompt])
+    return response.total_tokens
+
+
+def _summary(label: str, latencies: List[float], input_tokens: float, first_pass: int, ok: int) -> str:
+    """설정별 요약 문자열"""
+    if not latencies:
+        return f"{label:<12} 측정값 없음"
+    runs = len(latencies)
+    return (
+        f"{label:<12} n={runs}  평균 {statistics.mean(latencies):6.2f}s  중앙값 {statistics.median(latencies):6.2f}s  "
+        f"최대 {max(latencies):6.2f}s  입력 토큰 {input_tokens:8.1f}/응답  "
+        f"첫 시도 통과 {first_pass / runs * 100:5.1f}%  최종 성공 {ok / runs * 100:5.1f}%"
+    )
+
+
+async def run_benchmark(paths: List[str], model: str, runs: int, offline: bool) -> None:
+    """입력별 압축 전후 토큰 비교 + 설정 × 입력 × 반복 Step 2 측정"""
+    inputs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            inputs.append(f.read())
+
+    service = GeminiService()
+    for path, grounded_facts in zip(paths, inputs):
+        service.compact_facts = False
+        before = await _prompt_tokens(service, model, service._get_json_generation_prompt(grounded_facts), offline)
+        service.compact_facts = True
+        after = await _prompt_tokens(service, model, service._get_json_generation_prompt(grounded_facts), offline)
+        print(f"{path}: 입력 토큰 {before} → {after} ({(1 - after / before) * 100:.1f}% 감소)")
+
+    for compact in (False, True):
+        label = "compact" if compact else "original"
+        service.compact_facts = compact
+        # 폴백 없이 측정 (입력 압축 자체의 효과만 비교)
+        service.models = ModelRouter(default=service.model_name, step_models={"step2": model}, small_model="", fallbacks=[])
+        latencies: List[float] = []
+        first_pass = ok = 0
+        for run in range(runs):
+            for index, grounded_facts in enumerate(inputs):
+                service._cache = ResultCache()
+                schema_failures = service.retry_policy.failures["schema"]
+                start = time.perf_counter()
+                try:
+                    await service._generate_structured_json(grounded_facts)
+                    ok += 1
+                    first_pass += service.retry_policy.failures["schema"] == schema_failures
+                except Exception as e:
+                    print(f"[{label}] 입력 {index + 1} 실패: {str(e)[:200]}")
+                latencies.append(time.perf_counter() - start)
+                print(f"[{label}] {run + 1}/{runs} 입력 {index + 1}: {latencies[-1]:.2f}s")
+        if runs:
+            usage = service.models.snapshot()["usage"].get("step2", {})
+            tokens = usage.get("input_tokens", 0) / max(1, usage.get("responses", 0))
+            print(_summary(label, latencies, tokens, first_pass, ok))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Step 2 입력 압축 전후 입력 토큰/지연 시간 비교")
+    parser.add_argument("inputs", nargs="+", help="저장해 둔 Step 1 결과 마크다운 파일")
+    parser.add_argument("--model", default=default_model(), help="Step 2 모델")
+    parser.add_argument("--runs", type=int, default=1, help="Step 2 반복 횟수 (0이면 토큰 비교만)")
+    parser.add_argument("--offline", action="store_true", help="count_tokens 대신 로컬 추정치 사용")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.inputs, args.model, args.runs, args.offline))
+
+
+if __name__ == "__main__":
+    main()
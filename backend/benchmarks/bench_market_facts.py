@@ -0,0 +1,80 @@
+"""
+Google Search 그라운딩 vs 로컬 시장 정보 주입 지연 시간 벤치마크
+
+동일한 포트폴리오 이미지로 Step 1(_generate_grounded_facts)을 반복 호출하여
+1) Google Search 그라운딩 경로와 2) 저장소 스니펫 주입 경로(검색 생략)의 지연 시간을 비교합니다.
+
+실행 예:
+    python -m benchmarks.bench_market_facts tests/fixtures/sample_portfolio.png --runs 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.gemini_service import GeminiService
+
+
+def _summary(label: str, samples: List[float]) -> str:
+    """지연 시간 요약 문자열"""
+    if not samples:
+        return f"{label:<12} 측정값 없음"
+    return (
+        f"{label:<12} n={len(samples)}  평균 {statistics.mean(samples):6.2f}s  "
+        f"중앙값 {statistics.median(samples):6.2f}s  최대 {max(samples):6.2f}s"
+    )
+
+
+async def run_benchmark(image_paths: List[str], runs: int) -> None:
+    """그라운딩/주입 경로를 번갈아 측정"""
+    image_data_list = []
+    for path in image_paths:
+        with open(path, "rb") as f:
+            image_data_list.append(f.read())
+
+    service = GeminiService()
+    cache_key = service._generate_grounded_cache_key(image_data_list)
+    grounded: List[float] = []
+    injected: List[float] = []
+
+    for run in range(runs):
+        # 1) 그라운딩 경로: 종목 기록을 지워 저장소를 사용하지 못하게 함
+        service._image_tickers.clear()
+        service._cache.pop(cache_key, None)
+        start = time.perf_counter()
+        await service._generate_grounded_facts(image_data_list)
+        grounded.append(time.perf_counter() - start)
+
+        # 2) 주입 경로: 직전 그라운딩 결과로 기록된 종목/스니펫 사용
+        service._cache.pop(cache_key, None)
+        context, use_search = service._plan_grounding(image_data_list)
+        if use_search:
+            print(f"[{run + 1}] 일부 종목의 스니펫이 없어 검색이 유지됩니다 (주입 경로 측정 제외)")
+            continue
+        start = time.perf_counter()
+        await service._generate_grounded_facts(image_data_list)
+        injected.append(time.perf_counter() - start)
+        print(f"[{run + 1}] 그라운딩 {grounded[-1]:.2f}s / 주입 {injected[-1]:.2f}s (컨텍스트 {len(context or '')}자)")
+
+    print(_summary("grounded", grounded))
+    print(_summary("injected", injected))
+    if grounded and injected:
+        print(f"지연 시간 감소: {(1 - statistics.mean(injected) / statistics.mean(grounded)) * 100:.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="그라운딩 vs 저장소 주입 Step 1 지연 시간 비교")
+    parser.add_argument("images", nargs="+", help="포트폴리오 스크린샷 경로 (1-5개)")
+    parser.add_argument("--runs", type=int, default=3, help="반복 횟수")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.images, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Step 2 모델 라우팅 정책별 지연 시간/비용/검증 통과율 벤치마크
+
+저장해 둔 Step 1 결과(그라운딩 마크다운 파일)를 입력으로 Step 2(_generate_structured_json)를
+라우팅 정책마다 반복 호출하여 다음 항목을 비교합니다. Step 1은 검색 결과가 매번 달라 비교 입력으로 쓰지 않습니다.
+
+- 지연 시간: 보정 재시도를 포함한 Step 2 전체 시간
+- 비용: usage_metadata의 입력/출력(사고 토큰 포함) 토큰 × 모델 단가 (USD / 1M 토큰, --price로 변경)
+- 검증 통과율: 첫 시도 통과율(보정 재시도 없음)과 최종 성공률
+
+정책은 --models의 모델마다 "Step 2 = 해당 모델"로 만들고, --small-model을 지정하면
+"기본 모델 + 소형 포트폴리오(--small-max 종목 이하)는 소형 모델" 정책을 추가합니다.
+
+실행 예:
+    python -m benchmarks.bench_model_routing recorded/*.md --models gemini-2.5-flash gemini-2.5-flash-lite --runs 2
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.gemini_service import GeminiService
+from services.model_router import ModelRouter
+from services.result_cache import ResultCache
+
+# 모델 단가 (USD / 1M 토큰, 입력/출력) - 변경 시 --price로 덮어쓰기
+_DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+}
+
+
+def _summary(label: str, latencies: List[float], costs: List[float], first_pass: int, ok: int, runs: int) -> str:
+    """정책별 요약 문자열"""
+    if not latencies:
+        return f"{label:<28} 측정값 없음"
+    return (
+        f"{label:<28} n={runs}  평균 {statistics.mean(latencies):6.2f}s  중앙값 {statistics.median(latencies):6.2f}s  "
+        f"최대 {max(latencies):6.2f}s  비용 ${statistics.mean(costs):.5f}/건  "
+        f"첫 시도 통과 {first_pass / runs * 100:5.1f}%  최종 성공 {ok / runs * 100:5.1f}%"
+    )
+
+
+def _track_usage(service: GeminiService, usage: Counter) -> None:
+    """스트리밍 호출의 모델별 입력/출력 토큰 집계 (마지막 조각의 usage_metadata)"""
+    original = service._generate_content_stream
+
+    async def tracked(**kwargs):
+        stream = original(**kwargs)
+        metadata = None
+        try:
+            async for chunk in stream:
+                metadata = getattr(chunk, "usage_metadata", None) or metadata
+                yield chunk
+        finally:
+            await stream.aclose()
+            if metadata is not None:
+                model = kwargs.get("model")
+                usage[(model, "input")] += metadata.prompt_token_count or 0
+                usage[(model, "output")] += (metadata.candidates_token_count or 0) + (metadata.thoughts_token_count or 0)
+
+    service._generate_content_stream = tracked
+
+
+def _cost(usage: Counter, prices: Dict[str, Tuple[float, float]]) -> float:
+    total = 0.0
+    for (model, kind), tokens in usage.items():
+        input_price, output_price = prices.get(model, (0.0, 0.0))
+        total += tokens * (input_price if kind == "input" else output_price) / 1_000_000
+    return total
+
+
+async def run_benchmark(
+    paths: List[str], policies: Dict[str, ModelRouter], runs: int, prices: Dict[str, Tuple[float, float]]
+) -> None:
+    """정책 × 입력 × 반복 측정"""
+    inputs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            inputs.append(f.read())
+
+    service = GeminiService()
+    usage: Counter = Counter()
+    _track_usage(service, usage)
+
+    for label, router in policies.items():
+        service.models = router
+        latencies: List[float] = []
+        costs: List[float] = []
+        first_pass = ok = 0
+        for run in range(runs):
+            for index, grounded_facts in enumerate(inputs):
+                service._cache = ResultCache()
+                usage.clear()
+                schema_failures = service.retry_policy.failures["schema"]
+                start = time.perf_counter()
+                try:
+                    await service._generate_structured_json(grounded_facts)
+                    ok += 1
+                    first_pass += service.retry_policy.failures["schema"] == schema_failures
+                except Exception as e:
+                    print(f"[{label}] 입력 {index + 1} 실패: {str(e)[:200]}")
+                latencies.append(time.perf_counter() - start)
+                costs.append(_cost(usage, prices))
+                models = ", ".join(sorted({model for model, _ in usage}))
+                print(f"[{label}] {run + 1}/{runs} 입력 {index + 1}: {latencies[-1]:.2f}s ${costs[-1]:.5f} ({models})")
+        print(_summary(label, latencies, costs, first_pass, ok, len(latencies)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Step 2 모델 라우팅 정책별 지연 시간/비용/검증 통과율 비교")
+    parser.add_argument("inputs", nargs="+", help="저장해 둔 Step 1 결과 마크다운 파일")
+    parser.add_argument("--models", nargs="+", default=["gemini-2.5-flash", "gemini-2.5-flash-lite"], help="Step 2 모델 (정책별 1개)")
+    parser.add_argument("--small-model", default="", help="소형 포트폴리오 모델 (지정 시 정책 추가)")
+    parser.add_argument("--small-max", type=int, default=5, help="소형 포트폴리오 기준 종목 수")
+    parser.add_argument("--runs", type=int, default=1, help="반복 횟수")
+    parser.add_argument("--price", action="append", default=[], help="모델 단가 MODEL=INPUT,OUTPUT (USD / 1M 토큰)")
+    args = parser.parse_args()
+
+    prices = dict(_DEFAULT_PRICES)
+    for spec in args.price:
+        model, values = spec.split("=", 1)
+        input_price, output_price = values.split(",")
+        prices[model] = (float(input_price), float(output_price))
+
+    # 폴백 없이 측정 (정책 모델 자체의 지연/통과율 비교)
+    policies: Dict[str, ModelRouter] = {
+        f"step2={model}": ModelRouter(step_models={"step2": model}, small_model="", fallbacks=[])
+        for model in args.models
+    }
+    if args.small_model:
+        policies[f"small<={args.small_max}:{args.small_model}"] = ModelRouter(
+            step_models={}, small_model=args.small_model, small_max_holdings=args.small_max, fallbacks=[]
+        )
+    asyncio.run(run_benchmark(args.inputs, policies, args.runs, prices))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+RPM/TPM 제한기 예약 오버헤드 벤치마크
+
+프로세스 내부 제한기(GeminiRateLimiter)와 SQLite 공유 제한기(SharedRateLimiter)의
+acquire + reconcile 1회 비용을 측정합니다. 공유 제한기는 여러 프로세스가 같은 DB 파일에
+동시에 예약하는 경우(워커 경합)도 측정합니다. 한도는 대기가 발생하지 않도록 충분히 크게 잡으므로
+순수 예약 오버헤드만 측정되며, Gemini API는 호출하지 않습니다.
+
+실행 예:
+    python -m benchmarks.bench_rate_limiter --calls 5000 --workers 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.rate_limiter import GeminiRateLimiter, SharedRateLimiter
+
+# 대기가 발생하지 않는 한도
+_UNLIMITED = dict(rpm=10**9, tpm=10**12, headroom=1.0)
+
+
+def _summary(label: str, samples: List[float]) -> str:
+    """예약 오버헤드 요약 문자열 (밀리초)"""
+    if not samples:
+        return f"{label:<16} 측정값 없음"
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return (
+        f"{label:<16} n={len(samples)}  평균 {statistics.mean(samples) * 1000:6.3f}ms  "
+        f"중앙값 {statistics.median(samples) * 1000:6.3f}ms  p99 {p99 * 1000:6.3f}ms  "
+        f"최대 {max(samples) * 1000:6.3f}ms"
+    )
+
+
+async def _measure(limiter: GeminiRateLimiter, calls: int) -> List[float]:
+    """acquire + reconcile 1회 소요 시간 측정"""
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        reservation = await limiter.acquire(1000)
+        limiter.reconcile(reservation, 800)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _worker(db_path: str, calls: int, start_event, results) -> None:
+    """공유 제한기 경합 측정용 워커 프로세스"""
+    limiter = SharedRateLimiter(db_path, **_UNLIMITED)
+    start_event.wait()
+    results.put(asyncio.run(_measure(limiter, calls)))
+    limiter.close()
+
+
+def run_benchmark(calls: int, workers: int) -> None:
+    """프로세스 내부 / 공유(단일) / 공유(다중 프로세스) 순서로 측정"""
+    local = asyncio.run(_measure(GeminiRateLimiter(**_UNLIMITED), calls))
+    print(_summary("in-process", local))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "rate_limiter.sqlite3")
+        limiter = SharedRateLimiter(db_path, **_UNLIMITED)
+        shared = asyncio.run(_measure(limiter, calls))
+        limiter.close()
+        print(_summary("shared x1", shared))
+
+        context = multiprocessing.get_context("spawn")
+        start_event = context.Event()
+        results = context.Queue()
+        processes = [
+            context.Process(target=_worker, args=(db_path, calls, start_event, results)) for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        start_event.set()
+        contended: List[float] = []
+        for _ in processes:
+            contended.extend(results.get())
+        for process in processes:
+            process.join()
+        print(_summary(f"shared x{workers}", contended))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="RPM/TPM 제한기 예약 오버헤드 측정")
+    parser.add_argument("--calls", type=int, default=5000, help="프로세스당 예약 횟수")
+    parser.add_argument("--workers", type=int, default=4, help="공유 제한기 경합 측정 프로세스 수")
+    args = parser.parse_args()
+    run_benchmark(args.calls, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Step 2 출력 형식별(compact / full) 출력 토큰·디코드 시간 벤치마크
+
+저장해 둔 Step 1 결과(그라운딩 마크다운 파일)를 입력으로 Step 2(_generate_structured_json)를
+출력 형식마다 반복 호출하여 다음 항목을 비교합니다.
+
+- 출력 토큰: usage_metadata의 candidates_token_count (응답당 평균)
+- 디코드 시간: 첫 조각부터 마지막 조각까지의 시간 (출력 토큰 수에 비례하는 구간)
+- 전체 지연 시간과 첫 시도 검증 통과율(보정 재시도 없음), 최종 성공률
+
+실행 예:
+    python -m benchmarks.bench_step2_format recorded/*.md --runs 2
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.gemini_service import GeminiService
+from services.model_router import ModelRouter, default_model
+from services.result_cache import ResultCache
+
+
+def _summary(label: str, latencies: List[float], decodes: List[float], tokens: float, first_pass: int, ok: int) -> str:
+    """형식별 요약 문자열"""
+    if not latencies:
+        return f"{label:<10} 측정값 없음"
+    runs = len(latencies)
+    decode = statistics.mean(decodes) if decodes else 0.0
+    return (
+        f"{label:<10} n={runs}  평균 {statistics.mean(latencies):6.2f}s  중앙값 {statistics.median(latencies):6.2f}s  "
+        f"디코드 {decode:6.2f}s  출력 토큰 {tokens:8.1f}/응답  "
+        f"첫 시도 통과 {first_pass / runs * 100:5.1f}%  최종 성공 {ok / runs * 100:5.1f}%"
+    )
+
+
+def _track_decode(service: GeminiService, decodes: List[float]) -> None:
+    """스트리밍 호출의 첫 조각 → 마지막 조각 시간 기록"""
+    original = service._generate_content_stream
+
+    async def tracked(**kwargs):
+        stream = original(**kwargs)
+        first = last = None
+        try:
+            async for chunk in stream:
+                last = time.perf_counter()
+                first = first or last
+                yield chunk
+        finally:
+            await stream.aclose()
+            if first is not None:
+                decodes.append(last - first)
+
+    service._generate_content_stream = tracked
+
+
+async def run_benchmark(paths: List[str], model: str, formats: List[str], runs: int) -> None:
+    """형식 × 입력 × 반복 측정"""
+    inputs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            inputs.append(f.read())
+
+    service = GeminiService()
+    decodes: List[float] = []
+    _track_decode(service, decodes)
+    for step2_format in formats:
+        service.step2_format = step2_format
+        service._register_cached_prompts()
+        # 폴백 없이 측정 (형식 자체의 효과만 비교)
+        service.models = ModelRouter(default=service.model_name, step_models={"step2": model}, small_model="", fallbacks=[])
+        decodes.clear()
+        latencies: List[float] = []
+        first_pass = ok = 0
+        for run in range(runs):
+            for index, grounded_facts in enumerate(inputs):
+                service._cache = ResultCache()
+                schema_failures = service.retry_policy.failures["schema"]
+                start = time.perf_counter()
+                try:
+                    await service._generate_structured_json(grounded_facts)
+                    ok += 1
+                    first_pass += service.retry_policy.failures["schema"] == schema_failures
+                except Exception as e:
+                    print(f"[{step2_format}] 입력 {index + 1} 실패: {str(e)[:200]}")
+                latencies.append(time.perf_counter() - start)
+                print(f"[{step2_format}] {run + 1}/{runs} 입력 {index + 1}: {latencies[-1]:.2f}s")
+        usage = service.models.snapshot()["usage"].get("step2", {})
+        tokens = usage.get("output_tokens", 0) / max(1, usage.get("responses", 0))
+        print(_summary(step2_format, latencies, decodes, tokens, first_pass, ok))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Step 2 출력 형식별 출력 토큰/디코드 시간 비교")
+    parser.add_argument("inputs", nargs="+", help="저장해 둔 Step 1 결과 마크다운 파일")
+    parser.add_argument("--model", default=default_model(), help="Step 2 모델")
+    parser.add_argument("--formats", nargs="+", default=["full", "compact"], help="출력 형식 (full, compact)")
+    parser.add_argument("--runs", type=int, default=1, help="반복 횟수")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.inputs, args.model, args.formats, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Step 2 사고(thinking) 예산별 지연 시간/검증 통과율 벤치마크
+
+저장해 둔 Step 1 결과(그라운딩 마크다운 파일)를 입력으로 Step 2(_generate_structured_json)를
+사고 예산마다 반복 호출하여 지연 시간, 응답당 사고 토큰, 첫 시도 검증 통과율(보정 재시도 없음)과
+최종 성공률을 비교합니다. 예산 -1은 모델 자동 결정입니다.
+
+실행 예:
+    python -m benchmarks.bench_thinking_budget recorded/*.md --budgets 0 512 2048 -1 --runs 2
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.gemini_service import GeminiService
+from services.model_router import ModelRouter, default_model
+from services.result_cache import ResultCache
+
+
+def _summary(label: str, latencies: List[float], thoughts: float, first_pass: int, ok: int) -> str:
+    """예산별 요약 문자열"""
+    if not latencies:
+        return f"{label:<14} 측정값 없음"
+    runs = len(latencies)
+    return (
+        f"{label:<14} n={runs}  평균 {statistics.mean(latencies):6.2f}s  중앙값 {statistics.median(latencies):6.2f}s  "
+        f"최대 {max(latencies):6.2f}s  사고 토큰 {thoughts:8.1f}/응답  "
+        f"첫 시도 통과 {first_pass / runs * 100:5.1f}%  최종 성공 {ok / runs * 100:5.1f}%"
+    )
+
+
+async def run_benchmark(paths: List[str], model: str, budgets: List[int], runs: int) -> None:
+    """예산 × 입력 × 반복 측정"""
+    inputs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            inputs.append(f.read())
+
+    service = GeminiService()
+    for budget in budgets:
+        # 폴백 없이 측정 (예산 자체의 효과만 비교)
+        service.models = ModelRouter(
+            default=service.model_name, step_models={"step2": model}, small_model="", fallbacks=[],
+            thinking_budgets={"step2": budget}
+        )
+        latencies: List[float] = []
+        first_pass = ok = 0
+        for run in range(runs):
+            for index, grounded_facts in enumerate(inputs):
+                service._cache = ResultCache()
+                schema_failures = service.retry_policy.failures["schema"]
+                start = time.perf_counter()
+                try:
+                    await service._generate_structured_json(grounded_facts)
+                    ok += 1
+                    first_pass += service.retry_policy.failures["schema"] == schema_failures
+                except Exception as e:
+                    print(f"[budget={budget}] 입력 {index + 1} 실패: {str(e)[:200]}")
+                latencies.append(time.perf_counter() - start)
+                print(f"[budget={budget}] {run + 1}/{runs} 입력 {index + 1}: {latencies[-1]:.2f}s")
+        usage = service.models.snapshot()["usage"].get("step2", {})
+        print(_summary(f"budget={budget}", latencies, usage.get("thought_tokens_avg", 0.0), first_pass, ok))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Step 2 사고 예산별 지연 시간/검증 통과율 비교")
+    parser.add_argument("inputs", nargs="+", help="저장해 둔 Step 1 결과 마크다운 파일")
+    parser.add_argument("--model", default=default_model(), help="Step 2 모델")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 512, 2048, -1], help="사고 예산 (토큰, -1은 자동)")
+    parser.add_argument("--runs", type=int, default=1, help="반복 횟수")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.inputs, args.model, args.budgets, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,29 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
 import logging
-from api.analyze import router as analyze_router
 
-# 환경변수 로드
+# 환경변수 로드 (서비스 모듈이 import 시점에 설정값을 읽으므로 프로젝트 모듈 import보다 먼저)
 load_dotenv()
 
+from api.analyze import router as analyze_router
+from services.gemini_service import get_gemini_service
+from services.prewarm_scheduler import PrewarmScheduler, PREWARM_ENABLED
+from services.job_manager import get_job_manager
+from services.admission_control import peek_admission_controller
+from services.rate_limiter import peek_rate_limiter
+from services.circuit_breaker import peek_circuit_breaker
+from services.retry_policy import peek_retry_policy
+from services.hedging import peek_hedge_policy
+from services.key_pool import peek_api_key_pool, load_api_keys
+from services.model_router import peek_model_router
+from services.context_cache import peek_prompt_cache
+from services.prompt_registry import peek_prompt_registry
+from utils.ticker_resolver import get_ticker_resolver
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -16,13 +31,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """앱 수명주기: 시작 시 단일 워커 확인, 티커 사전 로드 및 프리워밍 스케줄러 시작, 종료 시 작업 워커/스케줄러 정리"""
+    get_job_manager().claim_single_worker()  # 작업 상태가 프로세스 메모리에 있어 워커가 2개 이상이면 시작 거부
+    get_ticker_resolver()
+    
+    scheduler = None
+    if PREWARM_ENABLED:
+        try:
+            scheduler = PrewarmScheduler(await get_gemini_service())
+            scheduler.start()
+        except ValueError as e:
+            logger.warning(f"프리워밍 스케줄러 비활성화: {str(e)}")
+    
+    yield
+    
+    await get_job_manager().shutdown()
+    if scheduler is not None:
+        await scheduler.stop()
+
 # FastAPI 앱 생성
 app = FastAPI(
     title="Portfolio Evaluation MVP API",
     description="AI 포트폴리오 분석 API - Gemini 2.5 Flash 기반 마크다운 리포트 생성",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -78,15 +114,32 @@ async def health_check():
     """헬스 체크 엔드포인트"""
     try:
         # Gemini API 키 확인
-        api_key = os.getenv("GEMINI_API_KEY")
-        api_key_status = "configured" if api_key else "missing"
+        api_key_status = "configured" if load_api_keys() else "missing"
+        admission = peek_admission_controller()
+        rate_limiter = peek_rate_limiter()
+        breaker = peek_circuit_breaker()
+        retry_policy = peek_retry_policy()
+        hedging = peek_hedge_policy()
+        key_pool = peek_api_key_pool()
+        model_router = peek_model_router()
+        prompt_cache = peek_prompt_cache()
+        prompt_registry = peek_prompt_registry()
         
         return {
             "status": "healthy", 
             "version": "0.1.0",
             "gemini_api_key": api_key_status,
             "environment": os.getenv("ENVIRONMENT", "development"),
-            "output_format": "markdown_text"
+            "output_format": "markdown_text",
+            "gemini_admission": admission.snapshot() if admission is not None else None,
+            "gemini_rate_limit": rate_limiter.snapshot() if rate_limiter is not None else None,
+            "gemini_circuit": breaker.snapshot() if breaker is not None else None,
+            "gemini_retry": retry_policy.snapshot() if retry_policy is not None else None,
+            "gemini_hedging": hedging.snapshot() if hedging is not None else None,
+            "gemini_keys": key_pool.snapshot() if key_pool is not None else None,
+            "gemini_models": model_router.snapshot() if model_router is not None else None,
+            "gemini_context_cache": prompt_cache.snapshot() if prompt_cache is not None else None,
+            "gemini_prompts": prompt_registry.snapshot() if prompt_registry is not None else None
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -17,6 +17,7 @@ class AnalysisStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 class AnalysisRequest(BaseModel):
     """분석 요청 정보"""
@@ -30,6 +31,7 @@ class AnalysisResponse(BaseModel):
     processing_time: float = Field(..., description="처리 시간 (초)")
     request_id: str = Field(..., description="요청 ID")
     images_processed: int = Field(default=1, description="처리된 이미지 수")
+    stale: bool = Field(default=False, description="유예 구간 캐시 결과 여부 (백그라운드 갱신 진행 중)")
     
     @field_validator('content')
     @classmethod
@@ -173,6 +175,7 @@ class StockScoreRow(BaseModel):
     거시경제: int = Field(..., ge=0, le=100, description="거시경제 점수")
     시장심리: int = Field(..., ge=0, le=100, description="시장심리 점수")
     CEO_리더십: int = Field(..., ge=0, le=100, alias="CEO/리더십", description="CEO/리더십 점수")
+    ticker: Optional[str] = Field(None, description="정규화된 티커 (서버에서 종목명 해석 후 채움)")
 
     class Config:
         populate_by_name = True  # alias와 field name 모두 허용
@@ -211,6 +214,7 @@ class DetailedScore(BaseModel):
 class AnalysisCard(BaseModel):
     """종목 분석 카드"""
     stockName: str = Field(..., description="종목명")
+    ticker: Optional[str] = Field(None, description="정규화된 티커 (서버에서 종목명 해석 후 채움)")
     overallScore: int = Field(..., ge=0, le=100, description="종합 점수")
     detailedScores: List[DetailedScore] = Field(
         ..., min_items=5, max_items=5, description="5개 기준별 점수"
@@ -224,6 +228,16 @@ class KeyStockAnalysisContent(BaseModel):
     )
 
 
+# 탭 순서 및 탭별 컨텐츠 모델 (Step 2 프롬프트의 출력 순서와 동일)
+TAB_ORDER = ["dashboard", "deepDive", "allStockScores", "keyStockAnalysis"]
+TAB_CONTENT_MODELS = {
+    "dashboard": DashboardContent,
+    "deepDive": DeepDiveContent,
+    "allStockScores": AllStockScoresContent,
+    "keyStockAnalysis": KeyStockAnalysisContent,
+}
+
+
 class Tab(BaseModel):
     """탭 데이터"""
     tabId: str = Field(
@@ -250,24 +264,16 @@ class Tab(BaseModel):
         if not (tab_id and isinstance(content, dict)):
             return data
 
-        model_map = {
-            "dashboard": DashboardContent,
-            "deepDive": DeepDiveContent,
-            "allStockScores": AllStockScoresContent,
-            "keyStockAnalysis": KeyStockAnalysisContent,
-        }
-
-        if tab_id in model_map:
-            data["content"] = model_map[tab_id].model_validate(content)
+        if tab_id in TAB_CONTENT_MODELS:
+            data["content"] = TAB_CONTENT_MODELS[tab_id].model_validate(content)
 
         return data
 
     @field_validator("tabId")
     @classmethod
     def validate_tab_id(cls, v):
-        valid_ids = ["dashboard", "deepDive", "allStockScores", "keyStockAnalysis"]
-        if v not in valid_ids:
-            raise ValueError(f"유효하지 않은 탭 ID: {v}. 허용값: {valid_ids}")
+        if v not in TAB_ORDER:
+            raise ValueError(f"유효하지 않은 탭 ID: {v}. 허용값: {TAB_ORDER}")
         return v
 
 
@@ -290,10 +296,9 @@ class PortfolioReport(BaseModel):
     @classmethod
     def validate_tabs(cls, v):
         tab_ids = [tab.tabId for tab in v]
-        required_ids = ["dashboard", "deepDive", "allStockScores", "keyStockAnalysis"]
-        if set(tab_ids) != set(required_ids):
+        if set(tab_ids) != set(TAB_ORDER):
             raise ValueError(
-                f"필수 탭 누락. 필요: {required_ids}, 현재: {tab_ids}"
+                f"필수 탭 누락. 필요: {TAB_ORDER}, 현재: {tab_ids}"
             )
         return v
 
@@ -304,3 +309,31 @@ class StructuredAnalysisResponse(BaseModel):
     processing_time: float = Field(..., description="처리 시간 (초)")
     request_id: str = Field(..., description="요청 ID")
     images_processed: int = Field(default=1, description="처리된 이미지 수")
+    stale: bool = Field(default=False, description="유예 구간 캐시 결과 여부 (백그라운드 갱신 진행 중)")
+
+
+class JobStatusResponse(BaseModel):
+    """비동기 분석 작업 상태 응답"""
+    job_id: str = Field(..., description="작업 ID")
+    status: AnalysisStatus = Field(..., description="작업 상태: pending, processing, completed, failed, cancelled")
+    format: str = Field(..., description="출력 형식: json | markdown")
+    status_url: str = Field(..., description="상태 조회 URL")
+    events_url: str = Field(..., description="진행 이벤트 스트림 URL (SSE)")
+    created_at: str = Field(..., description="등록 시각")
+    started_at: Optional[str] = Field(None, description="실행 시작 시각")
+    finished_at: Optional[str] = Field(None, description="종료 시각")
+    queue_position: Optional[int] = Field(None, description="대기 순번 (대기 중일 때만)")
+    preview: Optional[str] = Field(
+        None, description="미리보기 마크다운 (preview=true인 JSON 작업의 Step 1 결과, 최종 결과 전 제공)"
+    )
+    preview_at: Optional[str] = Field(None, description="미리보기 준비 시각")
+    result: Optional[Union[StructuredAnalysisResponse, AnalysisResponse]] = Field(
+        None, description="분석 결과 (완료 시)"
+    )
+    error: Optional[str] = Field(None, description="실패 사유 (실패 시)")
+
+
+class ProgressChannelResponse(BaseModel):
+    """진행 이벤트 채널 발급 응답"""
+    request_id: str = Field(..., description="요청 ID (분석 요청의 X-Request-ID 헤더로 전달)")
+    events_url: str = Field(..., description="진행 이벤트 스트림 URL (SSE)")
@@ -5,8 +5,55 @@ Portfolio Evaluation MVP - 서비스 패키지
 """
 
 from .gemini_service import GeminiService, get_gemini_service
+from .market_facts_store import MarketFactsStore, MarketFact, get_market_facts_store
+from .job_manager import JobManager, AnalysisJob, JobQueueFullError, get_job_manager
+from .progress_events import ProgressBroker, ProgressEvent, get_progress_broker, emit
+from .admission_control import AdmissionController, get_admission_controller
+from .rate_limiter import GeminiRateLimiter, SharedRateLimiter, get_rate_limiter
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker
+from .retry_policy import RetryPolicy, RetryableResponseError, get_retry_policy
+from .hedging import HedgePolicy, get_hedge_policy
+from .key_pool import ApiKeyPool, ApiKeyPoolExhaustedError, get_api_key_pool
+from .model_router import ModelRouter, get_model_router
+from .context_cache import PromptCache, get_prompt_cache
+from .prompt_registry import PromptRegistry, get_prompt_registry
+from .errors import GeminiCapacityError
 
 __all__ = [
     "GeminiService",
-    "get_gemini_service"
+    "get_gemini_service",
+    "MarketFactsStore",
+    "MarketFact",
+    "get_market_facts_store",
+    "JobManager",
+    "AnalysisJob",
+    "JobQueueFullError",
+    "get_job_manager",
+    "ProgressBroker",
+    "ProgressEvent",
+    "get_progress_broker",
+    "emit",
+    "AdmissionController",
+    "get_admission_controller",
+    "GeminiRateLimiter",
+    "SharedRateLimiter",
+    "get_rate_limiter",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "get_circuit_breaker",
+    "RetryPolicy",
+    "RetryableResponseError",
+    "get_retry_policy",
+    "HedgePolicy",
+    "get_hedge_policy",
+    "ApiKeyPool",
+    "ApiKeyPoolExhaustedError",
+    "get_api_key_pool",
+    "ModelRouter",
+    "get_model_router",
+    "PromptCache",
+    "get_prompt_cache",
+    "PromptRegistry",
+    "get_prompt_registry",
+    "GeminiCapacityError"
 ]
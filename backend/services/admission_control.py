@@ -0,0 +1,195 @@
+"""
+Gemini 호출 동시 실행 제어 - 승인 제어(admission control)
+
+이 모듈은 모든 Gemini 호출을 고정된 동시 실행 한도 안에서 실행되도록 제한합니다.
+한도를 넘는 호출은 FIFO 대기열에서 순서대로 슬롯을 기다리며, 대기열이 가득 차거나
+대기 시간이 초과되면 GeminiCapacityError로 즉시 거절되어 API 계층에서 429로 변환됩니다.
+
+업로드가 몰려도 Gemini에는 한도만큼의 호출만 나가므로 할당량 오류가 한꺼번에 발생하지 않습니다.
+"""
+
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, Deque, AsyncIterator
+
+from services.errors import GeminiCapacityError
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+GEMINI_MAX_IN_FLIGHT = int(os.getenv("GEMINI_MAX_IN_FLIGHT", "4"))  # 동시 실행 Gemini 호출 수
+GEMINI_ADMISSION_QUEUE = int(os.getenv("GEMINI_ADMISSION_QUEUE", "32"))  # 슬롯 대기열 최대 길이
+GEMINI_ADMISSION_TIMEOUT = float(os.getenv("GEMINI_ADMISSION_TIMEOUT", "30"))  # 슬롯 대기 최대 시간 (초)
+
+# 대기/점유 시간 통계에 사용할 최근 표본 수
+_SAMPLE_SIZE = 256
+
+
+class AdmissionRejectedError(GeminiCapacityError):
+    """대기열 초과로 즉시 거절"""
+
+
+class AdmissionTimeoutError(GeminiCapacityError):
+    """슬롯 대기 시간 초과"""
+
+
+def _percentile(samples, ratio: float) -> float:
+    """표본 백분위수 (최근접 순위)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(math.ceil(ratio * len(ordered))) - 1)]
+
+
+class AdmissionController:
+    """동시 실행 한도 + FIFO 대기열 기반 승인 제어기"""
+
+    def __init__(
+        self,
+        max_in_flight: int = GEMINI_MAX_IN_FLIGHT,
+        max_queue: int = GEMINI_ADMISSION_QUEUE,
+        wait_timeout: float = GEMINI_ADMISSION_TIMEOUT
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.wait_timeout = wait_timeout
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # 지표
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waits: Deque[float] = deque(maxlen=_SAMPLE_SIZE)
+        self._holds: Deque[float] = deque(maxlen=_SAMPLE_SIZE)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def retry_after(self) -> int:
+        """현재 대기열이 빠지는 데 걸릴 예상 시간 (초, 최소 1)"""
+        if not self._holds:
+            return 5
+        average_hold = sum(self._holds) / len(self._holds)
+        return max(1, math.ceil(average_hold * (self.queue_depth + 1) / self.max_in_flight))
+
+    async def acquire(self, timeout: Optional[float] = None) -> float:
+        """
+        실행 슬롯 획득 (대기열이 비어 있고 여유가 있으면 즉시, 아니면 FIFO 대기)
+
+        Returns:
+            float: 대기 시간 (초)
+
+        Raises:
+            AdmissionRejectedError: 대기열 초과
+            AdmissionTimeoutError: 대기 시간 초과
+        """
+        if self._in_flight < self.max_in_flight and not self.queue_depth:
+            self._in_flight += 1
+            self._record_admission(0.0)
+            return 0.0
+
+        if self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            retry_after = self.retry_after()
+            logger.warning(
+                f"Gemini 호출 대기열 초과로 거절 (실행 {self._in_flight}/{self.max_in_flight}, "
+                f"대기 {self.queue_depth}/{self.max_queue})"
+            )
+            raise AdmissionRejectedError(
+                f"요청이 많아 분석을 시작하지 못했습니다. {retry_after}초 후 다시 시도해 주세요.",
+                retry_after=retry_after
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        wait_timeout = self.wait_timeout if timeout is None else timeout
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), wait_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # 슬롯을 넘겨받은 직후 타임아웃/취소 - 다음 대기자에게 반납
+                self.release()
+            else:
+                waiter.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.timed_out += 1
+            retry_after = self.retry_after()
+            logger.warning(f"Gemini 호출 슬롯 대기 시간 초과 ({wait_timeout:.1f}초)")
+            raise AdmissionTimeoutError(
+                f"요청이 많아 분석 대기 시간이 초과되었습니다. {retry_after}초 후 다시 시도해 주세요.",
+                retry_after=retry_after
+            )
+
+        waited = time.monotonic() - started
+        self._record_admission(waited)
+        return waited
+
+    def release(self, held: Optional[float] = None) -> None:
+        """슬롯 반납 (대기자가 있으면 가장 오래 기다린 대기자에게 직접 전달)"""
+        if held is not None:
+            self._holds.append(held)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight = max(0, self._in_flight - 1)
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None) -> AsyncIterator[float]:
+        """슬롯 점유 컨텍스트 (블록 종료 시 반납)"""
+        waited = await self.acquire(timeout)
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - started)
+
+    def _record_admission(self, waited: float) -> None:
+        self.admitted += 1
+        self._waits.append(waited)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """현재 상태 및 지표 (대기 시간은 최근 표본 기준, 밀리초)"""
+        waits = list(self._waits)
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "wait_ms_p95": round(_percentile(waits, 0.95) * 1000, 1),
+            "wait_ms_max": round(max(waits) * 1000, 1) if waits else 0.0,
+        }
+
+
+# 싱글톤 인스턴스
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """AdmissionController 싱글톤 인스턴스 반환"""
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController()
+    return _admission_controller
+
+
+def peek_admission_controller() -> Optional[AdmissionController]:
+    """생성된 AdmissionController 반환 (없으면 None, 헬스 체크용)"""
+    return _admission_controller
@@ -0,0 +1,250 @@
+"""
+Gemini 백엔드 회로 차단기 (circuit breaker)
+
+이 모듈은 Gemini 호출 결과를 최근 구간(GEMINI_BREAKER_WINDOW초) 동안 집계하여, 오류율이나 느린 호출 비율이
+임계값을 넘으면 회로를 열고 이후 호출을 즉시 CircuitOpenError로 거절합니다.
+Gemini 장애 중에도 모든 요청이 재시도 일정(지수 대기 × 재시도 횟수)을 끝까지 기다리며 워커를 점유하는 일을 막습니다.
+
+- 닫힘(closed): 정상 호출, 결과를 구간에 기록하고 임계값 초과 시 열림으로 전환
+- 열림(open): GEMINI_BREAKER_OPEN_SECONDS 동안 호출 없이 즉시 거절 (재시도 루프도 바로 중단)
+- 반열림(half_open): 열림 시간이 지나면 시험 호출(probe)만 허용, 성공 시 닫힘 / 실패 시 다시 열림
+
+지연 시간은 일괄 호출은 응답까지, 스트리밍 호출은 첫 조각까지의 시간을 사용하며,
+승인 제어/RPM 대기처럼 로컬에서 보낸 시간은 포함하지 않습니다.
+요청 자체의 오류(429 이외의 4xx)는 백엔드 상태와 무관하므로 집계에서 제외합니다.
+"""
+
+import os
+import math
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Deque, Iterator, Tuple
+
+from google.genai import errors as genai_errors
+
+from services.errors import GeminiCapacityError
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+GEMINI_BREAKER_WINDOW = float(os.getenv("GEMINI_BREAKER_WINDOW", "60"))  # 집계 구간 (초)
+GEMINI_BREAKER_MIN_CALLS = int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "10"))  # 판단에 필요한 최소 호출 수
+GEMINI_BREAKER_ERROR_RATE = float(os.getenv("GEMINI_BREAKER_ERROR_RATE", "0.5"))  # 열림 오류율
+GEMINI_BREAKER_SLOW_CALL = float(os.getenv("GEMINI_BREAKER_SLOW_CALL", "120"))  # 느린 호출 기준 (초)
+GEMINI_BREAKER_SLOW_RATE = float(os.getenv("GEMINI_BREAKER_SLOW_RATE", "0.8"))  # 열림 느린 호출 비율
+GEMINI_BREAKER_OPEN_SECONDS = float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", "30"))  # 열림 유지 시간 (초)
+GEMINI_BREAKER_PROBES = int(os.getenv("GEMINI_BREAKER_PROBES", "1"))  # 반열림 시험 호출 수
+
+# 상태
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(GeminiCapacityError):
+    """회로 열림으로 Gemini 호출 없이 즉시 거절"""
+
+
+def is_backend_failure(exc: BaseException) -> bool:
+    """백엔드 상태 판단에 포함할 실패인지 (429 이외의 4xx 요청 오류는 제외)"""
+    if isinstance(exc, genai_errors.ClientError):
+        return exc.code == 429
+    return isinstance(exc, Exception) and not isinstance(exc, GeminiCapacityError)
+
+
+class _CallTimer:
+    """보호 구간 내 호출 시간 측정 (스트리밍은 첫 조각 시점 기록)"""
+
+    __slots__ = ("started", "first_byte")
+
+    def __init__(self, started: float):
+        self.started = started
+        self.first_byte: Optional[float] = None
+
+    def mark_first_byte(self, now: float) -> None:
+        if self.first_byte is None:
+            self.first_byte = now
+
+
+class CircuitBreaker:
+    """최근 구간 오류율/지연 시간 기반 회로 차단기"""
+
+    def __init__(
+        self,
+        window: float = GEMINI_BREAKER_WINDOW,
+        min_calls: int = GEMINI_BREAKER_MIN_CALLS,
+        error_rate: float = GEMINI_BREAKER_ERROR_RATE,
+        slow_call: float = GEMINI_BREAKER_SLOW_CALL,
+        slow_rate: float = GEMINI_BREAKER_SLOW_RATE,
+        open_seconds: float = GEMINI_BREAKER_OPEN_SECONDS,
+        probes: int = GEMINI_BREAKER_PROBES,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.window = window
+        self.min_calls = max(1, min_calls)
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.probes = max(1, probes)
+        self.clock = clock
+        self._state = CIRCUIT_CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._calls: Deque[Tuple[float, bool, float]] = deque()  # (완료 시각, 실패 여부, 지연 시간)
+        # 지표
+        self.rejected = 0
+        self.opened = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        """현재 상태 (열림 시간이 지났으면 반열림으로 전환)"""
+        if self._state == CIRCUIT_OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            self._state = CIRCUIT_HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            logger.info("Gemini 회로 반열림 - 시험 호출 허용")
+        return self._state
+
+    def retry_after(self) -> int:
+        """열림 해제까지 남은 시간 (초, 최소 1)"""
+        remaining = self.open_seconds - (self.clock() - self._opened_at)
+        return max(1, math.ceil(remaining))
+
+    def allows_calls(self) -> bool:
+        """지금 호출을 시작할 수 있는지 (상태 변경 없음)"""
+        state = self.state
+        if state == CIRCUIT_OPEN:
+            return False
+        return state == CIRCUIT_CLOSED or self._probes_in_flight < self.probes
+
+    def check(self) -> None:
+        """
+        호출 가능 여부 확인 (대기열 진입 전 빠른 거절용)
+
+        Raises:
+            CircuitOpenError: 회로 열림 또는 반열림 시험 호출이 모두 진행 중
+        """
+        if not self.allows_calls():
+            self.rejected += 1
+            retry_after = self.retry_after()
+            raise CircuitOpenError(
+                f"AI 분석 서비스가 일시적으로 불안정합니다. {retry_after}초 후 다시 시도해 주세요.",
+                retry_after=retry_after
+            )
+
+    @contextmanager
+    def guard(self) -> Iterator[_CallTimer]:
+        """
+        Gemini 호출 보호 구간 - 허용 여부 확인 후 결과/지연 시간 기록
+
+        스트리밍 호출은 첫 조각을 받을 때 timer.mark_first_byte(clock())를 호출합니다.
+        취소/스트림 닫기는 첫 조각 이후면 성공, 이전이면 집계하지 않습니다.
+
+        Raises:
+            CircuitOpenError: 호출 불가 상태
+        """
+        self.check()
+        probe = self._state == CIRCUIT_HALF_OPEN
+        if probe:
+            self._probes_in_flight += 1
+        timer = _CallTimer(self.clock())
+        try:
+            yield timer
+        except BaseException as e:
+            if is_backend_failure(e):
+                self._record(probe, failed=True, timer=timer, error=e)
+            elif timer.first_byte is not None or isinstance(e, genai_errors.ClientError):
+                # 요청 오류(4xx) 또는 응답 수신 후 중단 - 백엔드는 정상 응답
+                self._record(probe, failed=False, timer=timer)
+            elif probe:
+                self._probes_in_flight -= 1
+            raise
+        else:
+            self._record(probe, failed=False, timer=timer)
+
+    def _record(self, probe: bool, failed: bool, timer: _CallTimer, error: Optional[BaseException] = None) -> None:
+        now = self.clock()
+        latency = (timer.first_byte if timer.first_byte is not None else now) - timer.started
+        if error is not None:
+            self.last_error = f"{type(error).__name__}: {str(error)[:200]}"
+
+        if probe:
+            self._probes_in_flight -= 1
+            if self._state != CIRCUIT_HALF_OPEN:
+                return
+            if failed or latency >= self.slow_call:
+                self._open(f"시험 호출 {'실패' if failed else '지연'}")
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.probes:
+                self._state = CIRCUIT_CLOSED
+                self._calls.clear()
+                logger.info("Gemini 회로 닫힘 - 시험 호출 성공")
+            return
+
+        self._calls.append((now, failed, latency))
+        self._evict(now)
+        if self._state != CIRCUIT_CLOSED or len(self._calls) < self.min_calls:
+            return
+        failures, slow = self._counts()
+        if failures / len(self._calls) >= self.error_rate:
+            self._open(f"오류율 {failures}/{len(self._calls)}")
+        elif slow / len(self._calls) >= self.slow_rate:
+            self._open(f"느린 호출 {slow}/{len(self._calls)} (기준 {self.slow_call:.0f}초)")
+
+    def _open(self, reason: str) -> None:
+        self._state = CIRCUIT_OPEN
+        self._opened_at = self.clock()
+        self.opened += 1
+        logger.warning(f"Gemini 회로 열림 ({reason}) - {self.open_seconds:.0f}초 동안 호출 즉시 거절")
+
+    def _evict(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window:
+            self._calls.popleft()
+
+    def _counts(self) -> Tuple[int, int]:
+        failures = sum(1 for _, failed, _ in self._calls if failed)
+        slow = sum(1 for _, _, latency in self._calls if latency >= self.slow_call)
+        return failures, slow
+
+    def snapshot(self) -> Dict[str, Any]:
+        """현재 상태 및 최근 구간 지표 (지연 시간은 밀리초)"""
+        state = self.state
+        self._evict(self.clock())
+        calls = len(self._calls)
+        failures, slow = self._counts()
+        latencies = [latency for _, _, latency in self._calls]
+        return {
+            "state": state,
+            "window_seconds": self.window,
+            "calls": calls,
+            "error_rate": round(failures / calls, 3) if calls else 0.0,
+            "slow_rate": round(slow / calls, 3) if calls else 0.0,
+            "latency_ms_avg": round(sum(latencies) / calls * 1000, 1) if calls else 0.0,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_after": self.retry_after() if state == CIRCUIT_OPEN else None,
+            "last_error": self.last_error,
+        }
+
+
+# 싱글톤 인스턴스
+_circuit_breaker: Optional[CircuitBreaker] = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """CircuitBreaker 싱글톤 인스턴스 반환"""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
+
+
+def peek_circuit_breaker() -> Optional[CircuitBreaker]:
+    """생성된 CircuitBreaker 반환 (없으면 None, 헬스 체크용)"""
+    return _circuit_breaker
@@ -0,0 +1,232 @@
+"""
+Gemini 명시적 컨텍스트 캐시 (고정 분석 프롬프트)
+
+이 모듈은 그라운딩·마크다운·JSON 변환의 고정 지시문을 Gemini 캐시 콘텐츠(cachedContents)로 만들어 두고,
+호출 contents의 첫 문자열이 등록된 고정 프롬프트로 시작하면 그 부분을 캐시 참조(config.cached_content)로 바꿉니다.
+고정 프롬프트는 호출과 재시도마다 다시 전송되지만, 캐시 적중분은 입력 토큰 단가가 할인됩니다.
+
+- 캐시는 (API 키 클라이언트, 모델, 프롬프트 이름, 프롬프트 버전, 도구 구성)마다 처음 사용할 때 만듭니다.
+  프롬프트 문구가 바뀌면 버전(프롬프트 레지스트리 버전 또는 문구 해시)이 달라져 새 캐시를 사용합니다.
+- 남은 TTL이 GEMINI_CONTEXT_CACHE_REFRESH_MARGIN 이하이면 사용 시점에 TTL을 연장하고, 연장에 실패하면 새로 만듭니다.
+- 캐시 요청은 도구(Google Search)를 따로 지정할 수 없으므로 도구는 캐시에 함께 저장합니다.
+- 폴백: 캐시 비활성, 최소 토큰 미만(GEMINI_CONTEXT_CACHE_MIN_TOKENS), 생성 실패(미지원 모델 등) 시 원래 요청을 그대로 보냅니다.
+  생성에 실패한 캐시는 GEMINI_CONTEXT_CACHE_RETRY_SECONDS 동안 다시 만들지 않습니다.
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Any, Callable, Tuple
+
+from google.genai import errors as genai_errors
+from google.genai.types import GenerateContentConfig, CreateCachedContentConfig, UpdateCachedContentConfig
+
+from services.rate_limiter import estimate_input_tokens
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+GEMINI_CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE_ENABLED", "false").lower() == "true"  # 명시적 캐시 사용 여부
+GEMINI_CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))  # 캐시 TTL (초)
+GEMINI_CONTEXT_CACHE_REFRESH_MARGIN = int(os.getenv("GEMINI_CONTEXT_CACHE_REFRESH_MARGIN", "300"))  # 만료 전 연장 기준 (초)
+GEMINI_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "1024"))  # 캐시 최소 토큰 (추정)
+GEMINI_CONTEXT_CACHE_RETRY_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_RETRY_SECONDS", "600"))  # 생성 실패 후 재시도 간격 (초)
+
+CacheKey = Tuple[int, str, str, str, bool]
+
+
+@dataclass
+class CachedPrompt:
+    """생성된 캐시 콘텐츠 1건"""
+    name: str  # cachedContents/...
+    prompt: str  # 프롬프트 이름
+    model: str
+    expires_at: float
+
+
+def is_cache_reference_error(exc: BaseException) -> bool:
+    """캐시 참조가 거절된 오류인지 (만료/삭제된 캐시 콘텐츠)"""
+    return (
+        isinstance(exc, genai_errors.APIError)
+        and exc.code in (400, 403, 404)
+        and "cache" in str(exc).lower()
+    )
+
+
+class PromptCache:
+    """고정 프롬프트 → Gemini 캐시 콘텐츠 (지연 생성, 만료 전 연장, 실패 시 인라인 전송)"""
+
+    def __init__(
+        self,
+        enabled: bool = GEMINI_CONTEXT_CACHE_ENABLED,
+        ttl: int = GEMINI_CONTEXT_CACHE_TTL,
+        refresh_margin: int = GEMINI_CONTEXT_CACHE_REFRESH_MARGIN,
+        min_tokens: int = GEMINI_CONTEXT_CACHE_MIN_TOKENS,
+        retry_seconds: int = GEMINI_CONTEXT_CACHE_RETRY_SECONDS,
+        clock: Callable[[], float] = time.time
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl // 2)
+        self.min_tokens = min_tokens
+        self.retry_seconds = retry_seconds
+        self.clock = clock
+        self._prompts: Dict[str, str] = {}  # 이름 → 고정 프롬프트
+        self._versions: Dict[str, Tuple[str, int]] = {}  # 이름 → (버전, 토큰 추정치)
+        self._entries: Dict[CacheKey, CachedPrompt] = {}
+        self._blocked_until: Dict[CacheKey, float] = {}
+        self._locks: Dict[CacheKey, asyncio.Lock] = {}
+        # 지표
+        self.hits: Counter = Counter()
+        self.created = 0
+        self.refreshed = 0
+        self.failures = 0
+        self.invalidated = 0
+
+    def register(self, name: str, prompt: str, version: Optional[str] = None, tokens: Optional[int] = None) -> None:
+        """고정 프롬프트 등록 (같은 이름이면 최신 문구로 교체, 버전/토큰 추정치가 없으면 여기서 계산)"""
+        self._prompts[name] = prompt
+        self._versions[name] = (
+            version or hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16],
+            tokens if tokens is not None else estimate_input_tokens([prompt])
+        )
+
+    def _match(self, text: str) -> Optional[Tuple[str, str]]:
+        """text가 시작하는 등록 프롬프트 중 가장 긴 것 (이름, 프롬프트)"""
+        best = None
+        for name, prompt in self._prompts.items():
+            if text.startswith(prompt) and (best is None or len(prompt) > len(best[1])):
+                best = (name, prompt)
+        return best
+
+    async def apply(self, client: Any, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        generate_content 요청 인자에 캐시 참조 적용
+
+        contents의 첫 문자열이 등록 프롬프트로 시작하면 그 부분을 빼고 config.cached_content를 지정한
+        새 인자를 반환합니다. 적용할 수 없으면 원래 인자(request)를 그대로 반환합니다.
+        """
+        if not self.enabled or not self._prompts:
+            return request
+        contents = request.get("contents")
+        config = request.get("config")
+        if not isinstance(contents, list) or not contents or not isinstance(contents[0], str):
+            return request
+        if config is not None and (
+            not isinstance(config, GenerateContentConfig) or config.cached_content or config.system_instruction
+        ):
+            return request
+        match = self._match(contents[0])
+        if match is None:
+            return request
+        name, prompt = match
+        rest = contents[0][len(prompt):]
+        remaining: List[Any] = ([rest] if rest.strip() else []) + contents[1:]
+        if not remaining:
+            return request
+
+        tools = config.tools if config is not None else None
+        entry = await self._entry(client, request["model"], name, prompt, tools)
+        if entry is None:
+            return request
+        self.hits[name] += 1
+        update = {"cached_content": entry.name, "tools": None, "tool_config": None}
+        cached_config = config.model_copy(update=update) if config is not None else GenerateContentConfig(**update)
+        return {**request, "contents": remaining, "config": cached_config}
+
+    def invalidate(self, cache_name: Optional[str]) -> None:
+        """거절된 캐시 콘텐츠를 버림 (다음 사용 시 새로 생성)"""
+        for key, entry in list(self._entries.items()):
+            if entry.name == cache_name:
+                del self._entries[key]
+                self.invalidated += 1
+                logger.warning(f"컨텍스트 캐시 무효화: {entry.prompt} ({entry.model})")
+
+    async def _entry(
+        self, client: Any, model: str, name: str, prompt: str, tools: Optional[List[Any]]
+    ) -> Optional[CachedPrompt]:
+        """사용할 캐시 콘텐츠 (없으면 생성, 만료가 가까우면 연장, 불가하면 None)"""
+        digest, tokens = self._versions[name]
+        key: CacheKey = (id(client), model, name, digest, bool(tools))
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at - self.clock() > self.refresh_margin:
+            return entry
+        if self._blocked_until.get(key, 0.0) > self.clock():
+            return None
+        if tokens < self.min_tokens:
+            self._blocked_until[key] = float("inf")  # 문구가 바뀌기 전에는 계속 최소 토큰 미만
+            logger.info(f"컨텍스트 캐시 생략: {name} 프롬프트가 최소 토큰({self.min_tokens}) 미만")
+            return None
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            # 대기 중 다른 호출이 생성/연장했으면 그대로 사용
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at - self.clock() > self.refresh_margin:
+                return entry
+            ttl = f"{self.ttl}s"
+            if entry is not None and entry.expires_at > self.clock():
+                try:
+                    await client.aio.caches.update(name=entry.name, config=UpdateCachedContentConfig(ttl=ttl))
+                    entry.expires_at = self.clock() + self.ttl
+                    self.refreshed += 1
+                    logger.info(f"컨텍스트 캐시 TTL 연장: {name} ({model})")
+                    return entry
+                except Exception as e:
+                    logger.warning(f"컨텍스트 캐시 TTL 연장 실패, 새로 생성: {name} ({model}) - {str(e)[:200]}")
+            self._entries.pop(key, None)
+            try:
+                cached = await client.aio.caches.create(
+                    model=model,
+                    config=CreateCachedContentConfig(
+                        contents=[prompt], tools=tools or None, ttl=ttl, display_name=f"{name}-{digest}"
+                    )
+                )
+            except Exception as e:
+                self.failures += 1
+                self._blocked_until[key] = self.clock() + self.retry_seconds
+                logger.warning(f"컨텍스트 캐시 생성 실패, 프롬프트 직접 전송: {name} ({model}) - {str(e)[:200]}")
+                return None
+            entry = CachedPrompt(name=cached.name, prompt=name, model=model, expires_at=self.clock() + self.ttl)
+            self._entries[key] = entry
+            self.created += 1
+            logger.info(f"컨텍스트 캐시 생성: {name} ({model}) → {cached.name}")
+            return entry
+
+    def snapshot(self) -> Dict[str, Any]:
+        """캐시 콘텐츠 목록과 적중/생성/연장/실패 횟수 (남은 TTL은 초)"""
+        now = self.clock()
+        return {
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "prompts": sorted(self._prompts),
+            "entries": [
+                {"prompt": entry.prompt, "model": entry.model, "expires_in": max(0, round(entry.expires_at - now))}
+                for entry in self._entries.values()
+            ],
+            "hits": dict(self.hits),
+            "created": self.created,
+            "refreshed": self.refreshed,
+            "failures": self.failures,
+            "invalidated": self.invalidated,
+        }
+
+
+# 싱글톤 인스턴스
+_prompt_cache: Optional[PromptCache] = None
+
+
+def get_prompt_cache() -> PromptCache:
+    """PromptCache 싱글톤 인스턴스 반환"""
+    global _prompt_cache
+    if _prompt_cache is None:
+        _prompt_cache = PromptCache()
+    return _prompt_cache
+
+
+def peek_prompt_cache() -> Optional[PromptCache]:
+    """생성된 PromptCache 반환 (없으면 None, 헬스 체크용)"""
+    return _prompt_cache
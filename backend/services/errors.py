@@ -0,0 +1,18 @@
+"""
+서비스 공통 예외
+
+이 모듈은 여러 서비스 계층에서 공유하는 예외를 정의합니다.
+"""
+
+
+class GeminiCapacityError(Exception):
+    """
+    Gemini 호출 용량 부족 (동시 실행 한도, 대기열, 요청 한도 등)
+
+    일시적인 과부하 신호이므로 서비스 내부 재시도 루프는 이 예외를 재시도하지 않고 그대로 전파하며,
+    API 계층에서 HTTP 429 + Retry-After로 변환합니다.
+    """
+
+    def __init__(self, message: str, retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
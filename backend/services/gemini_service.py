@@ -6,42 +6,148 @@ expected_result.md와 동일한 형식의 마크다운 텍스트를 생성합니
 """
 
 import os
+import re
 import asyncio
 import base64
 import hashlib
-from typing import Optional, Dict, List, Union
+from typing import Optional, Dict, List, Union, Tuple, Any, AsyncIterator, Callable, ContextManager
 from io import BytesIO
 import logging
 import uuid
 import time
+import contextvars
+from contextlib import nullcontext
 from google import genai
-from google.genai.types import GenerateContentConfig, Part
+from google.genai.types import GenerateContentConfig, Part, Content, FinishReason
+from pydantic import ValidationError
 
-from models.portfolio import AnalysisResponse, SAMPLE_MARKDOWN_CONTENT, StructuredAnalysisResponse, PortfolioReport
+from models.portfolio import AnalysisResponse, SAMPLE_MARKDOWN_CONTENT, StructuredAnalysisResponse, PortfolioReport, Tab
 from utils.image_utils import validate_image, optimize_image
+from utils.ticker_resolver import get_ticker_resolver
+from utils.json_stream import IncrementalJsonScanner
+from utils.report_guard import ReportStreamGuard, StreamSchemaError, format_json_path
+from utils.report_wire import parse_step2_report, parse_step2_tab, STEP2_TABS_KEYS
+from utils.facts_compactor import compact_grounded_facts
+from services.market_facts_store import (
+    get_market_facts_store, MarketFact, MARKET_FACTS_MAX_AGE, GROUNDED_SOURCES,
+    MARKET_FACTS_IMAGE_TICKERS_TTL, MARKET_FACTS_IMAGE_TICKERS_MAX
+)
+from services.prewarm_scheduler import get_ticker_popularity
+from services.result_cache import ResultCache, CACHE_FRESH
+from services.progress_events import emit, bind_request, reset_request, get_progress_broker
+from services.job_manager import describe_job_error
+from services.admission_control import get_admission_controller
+from services.rate_limiter import get_rate_limiter, estimate_request_tokens, estimate_input_tokens, usage_total_tokens
+from services.circuit_breaker import get_circuit_breaker, CircuitBreaker
+from services.retry_policy import get_retry_policy, RetryableResponseError, ERROR_QUOTA, ERROR_INVALID
+from services.hedging import get_hedge_policy, hedged_call, hedged_stream
+from services.key_pool import get_api_key_pool, load_api_keys, KeyLease
+from services.model_router import get_model_router, is_fallback_error, default_model
+from services.context_cache import get_prompt_cache, is_cache_reference_error
+from services.prompt_registry import get_prompt_registry, registered_prompt
+from services.errors import GeminiCapacityError
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
 
+# 마크다운 리포트 필수 섹션 (일괄/스트리밍 검증 공통)
+REQUIRED_MARKDOWN_SECTIONS = [
+    "**AI 총평:**",
+    "**포트폴리오 종합 리니아 스코어:",
+    "**3대 핵심 기준 스코어:**",
+    "**성장 잠재력:**",
+    "**안정성 및 방어력:**",
+    "**전략적 일관성:**"
+]
+_MAX_SECTION_LENGTH = max(len(section) for section in REQUIRED_MARKDOWN_SECTIONS)
+
+# 분석 카드 헤더: "**1. 팔란티어 (PLTR) - Overall: 78 / 100**"
+_STOCK_CARD_HEADER = re.compile(r"^\**\s*\d+\.\s*(.+?)\s*-\s*Overall:\s*(\d+)\s*/\s*100\s*\**$")
+
+# 검색 생략 시 그라운딩 프롬프트의 Google Search 지시 → 참고 자료(로컬 시장 정보 저장소) 지시
+_OFFLINE_GROUNDING_REPLACEMENTS = [
+    ("Google Search를 활용하여 최신 시장 정보, 재무 데이터, 뉴스를 반영하세요.",
+     "맨 아래 참고 자료(로컬 시장 정보 저장소)를 최신 시장 정보로 사용하세요. 별도의 검색은 하지 마세요."),
+    ("Google Search로 최신 성장 전망 반영", "참고 자료의 최신 성장 전망 반영"),
+    ("Google Search로 각 종목의", "참고 자료로 각 종목의"),
+]
+
+# 현재 작업이 보낸 Gemini API 요청 수 (폴백·캐시 재요청 포함, 집계하지 않으면 None) - 프리워밍 예산 차감용
+_api_call_count: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar("gemini_api_calls", default=None)
+
+# Step 2 보정 재시도 프롬프트에 포함할 검증 오류 최대 길이
+_MAX_CORRECTION_LENGTH = 1500
+
+# 출력 길이 제한으로 중단된 응답의 이어쓰기 지시 (모델 턴에 기존 출력을 넣고 이어서 생성)
+_CONTINUATION_PROMPT = (
+    "이전 응답이 출력 길이 제한으로 중단되었습니다. 중단된 바로 다음 문자부터 이어서 작성하세요. "
+    "이미 출력한 내용을 반복하거나 설명·코드 블록을 추가하지 마세요."
+)
+# 이어쓰기 응답 앞부분과 기존 출력 끝부분의 중복 검사 범위 (글자 수)
+_CONTINUATION_OVERLAP_WINDOW = 256
+_MIN_CONTINUATION_OVERLAP = 8
+
 class GeminiService:
     """Gemini API 연동 서비스 - 마크다운 텍스트 출력"""
     
     def __init__(self):
         """서비스 초기화"""
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
+        api_keys = load_api_keys()
+        if not api_keys:
             raise ValueError("GEMINI_API_KEY 환경변수가 설정되지 않았습니다.")
+        self.api_key = api_keys[0]
         
-        # Gemini 클라이언트 초기화
+        # Gemini 클라이언트 초기화 (단일 키 모드)
         self.client = genai.Client(api_key=self.api_key)
+        # API 키 풀 (GEMINI_API_KEYS에 키가 2개 이상이면 키별 클라이언트로 최소 부하 배정, 아니면 None)
+        self.key_pool = get_api_key_pool()
         
         # 설정값
-        self.model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        self.model_name = default_model()
         self.timeout = int(os.getenv("GEMINI_TIMEOUT", "600"))  # Two-step 전략 통합 타임아웃 (10분)
         self.max_retries = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+        self.max_continuations = int(os.getenv("GEMINI_MAX_CONTINUATIONS", "2"))  # MAX_TOKENS 중단 시 이어쓰기 횟수
+        # Step 2 출력 형식 (compact: 짧은 키·위치 기반 점수 배열 후 로컬 확장, full: PortfolioReport 그대로)
+        self.step2_format = os.getenv("GEMINI_STEP2_FORMAT", "compact").lower()
+        # Step 2 입력 압축 (Step 1 마크다운의 장식 제거, 점수·분석 문장 유지)
+        self.compact_facts = os.getenv("GEMINI_STEP2_COMPACT_FACTS", "true").lower() == "true"
+        
+        # Gemini 호출 승인 제어 (동시 실행 한도 + 대기열, 모든 호출이 _generate_content*를 거침)
+        self.admission = get_admission_controller()
+        # RPM/TPM 선제 제한 (호출별 토큰 추정 → 예약 → usage_metadata로 정산)
+        self.rate_limiter = get_rate_limiter()
+        # 회로 차단기 (Gemini 장애 시 재시도/대기 없이 즉시 거절)
+        self.breaker = get_circuit_breaker()
+        # 재시도 정책 (오류 분류, decorrelated jitter, 요청 단위 예산, 전역 재시도 비율 상한)
+        self.retry_policy = get_retry_policy()
+        # 헤지 요청 (Step 1/Step 2가 최근 지연 백분위수를 넘기면 중복 요청, 먼저 온 응답 사용)
+        self.hedging = get_hedge_policy()
+        # 단계별 모델 라우팅 + 폴백 체인 (과부하/할당량 오류 시 다음 모델)
+        self.models = get_model_router(default=self.model_name)
+        # 고정 프롬프트 레지스트리 (시작 시 1회 적재, 공백 최소화 문구 + 버전 + 토큰 추정치)
+        self.prompts = get_prompt_registry()
+        # 고정 프롬프트 명시적 컨텍스트 캐시 (GEMINI_CONTEXT_CACHE_ENABLED, 불가 시 프롬프트 직접 전송)
+        self.prompt_cache = get_prompt_cache()
+        self._register_cached_prompts()
+        
+        # 결과 캐시 (신선/유예 구간 지원, 실제 환경에서는 Redis 등 사용)
+        self._cache = ResultCache()
+        # 유예 구간 리포트의 백그라운드 갱신 태스크 (키당 1개)
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
         
-        # 캐시 딕셔너리 (실제 환경에서는 Redis 등 사용)
-        self._cache: Dict[str, str] = {}
+        # 종목명 → 티커 해석기 (번들 심볼 사전, 시작 시 1회 로드)
+        self.ticker_resolver = get_ticker_resolver()
+        
+        # 로컬 시장 정보 저장소 (신선한 티커는 Google Search 대신 컨텍스트로 주입)
+        self.facts_store = get_market_facts_store()
+        self.facts_max_age = MARKET_FACTS_MAX_AGE
+        # 이미지 조합 캐시 키 → 해당 이미지에서 식별된 티커 목록
+        # (리포트 캐시보다 오래 보관하여 캐시 만료 후 재업로드도 저장소로 그라운딩, TTL·항목 수 제한)
+        self._image_tickers = ResultCache(
+            fresh_ttl=MARKET_FACTS_IMAGE_TICKERS_TTL, stale_ttl=0, max_entries=MARKET_FACTS_IMAGE_TICKERS_MAX
+        )
+        # 완료된 리포트 기반 티커 인기도 (프리워밍 스케줄러가 사용)
+        self.popularity = get_ticker_popularity()
         
         logger.info(f"GeminiService 초기화 완료 - 모델: {self.model_name}, 출력: 마크다운 텍스트, Google Search: 활성화, 다중 이미지: 지원")
 
@@ -60,11 +166,180 @@ class GeminiService:
         return f"multiple_{len(image_data_list)}_{combined_hash.hexdigest()}"
 
     def _generate_step2_cache_key(self, grounded_facts: str) -> str:
-        """Step 2용 캐시 키 생성 (grounded_facts 해시 기반)"""
+        """Step 2용 캐시 키 생성 (grounded_facts 해시 + Step 2 지시문 버전 + 입력 압축 여부)"""
         # grounded_facts의 해시 생성
         facts_hash = hashlib.md5(grounded_facts.encode('utf-8')).hexdigest()
-        return f"step2_json_{facts_hash}"
+        compact = "c" if self.compact_facts else "r"
+        return f"step2_json_{facts_hash}@{self.prompts.version(self._step2_prompt_name())}{compact}"
+
+    def _generate_markdown_cache_key(self, image_data_list: List[bytes]) -> str:
+        """마크다운 분석 결과 캐시 키 (단일/다중 이미지 키 + 해당 프롬프트 버전)"""
+        if len(image_data_list) == 1:
+            return f"{self._generate_image_hash(image_data_list[0])}@{self.prompts.version('markdown')}"
+        return f"{self._generate_multiple_cache_key(image_data_list)}@{self.prompts.version('markdown_multiple')}"
+
+    def _generate_grounded_cache_key(self, image_data_list: List[bytes]) -> str:
+        """Step 1 그라운딩 결과 캐시 키 (이미지 조합 키 + 그라운딩 프롬프트 버전)"""
+        version = self.prompts.version("grounding", "grounding_offline")
+        return f"grounded_{self._generate_multiple_cache_key(image_data_list)}@{version}"
+
+    def _annotate_tickers(self, portfolio_report: PortfolioReport) -> PortfolioReport:
+        """리포트의 종목명(주식, stockName)을 정규화된 티커로 해석하여 ticker 필드에 기록"""
+        for tab in portfolio_report.tabs:
+            self._annotate_tab_tickers(tab)
+        return portfolio_report
+
+    def _annotate_tab_tickers(self, tab: Tab) -> Tab:
+        """탭 단위 티커 기록 (스트리밍 시 완성된 탭마다 적용)"""
+        content = tab.content
+        if tab.tabId == "allStockScores":
+            for row in content.scoreTable.rows:
+                row.ticker = self.ticker_resolver.resolve(row.주식)
+        elif tab.tabId == "keyStockAnalysis":
+            for card in content.analysisCards:
+                card.ticker = self.ticker_resolver.resolve(card.stockName)
+        return tab
+
+    def _extract_stock_snippets(self, markdown_text: str) -> Dict[str, str]:
+        """
+        마크다운 리포트에서 종목별 분석 스니펫 추출
+        
+        스코어 테이블의 종목명과 분석 카드("1. [종목명] - Overall: [점수] / 100" + 하위 항목)를 파싱합니다.
+        
+        Returns:
+            Dict[str, str]: 종목명 → 분석 스니펫 (카드가 없는 종목은 빈 문자열)
+        """
+        snippets: Dict[str, str] = {}
+        
+        # 1) 스코어 테이블 종목명 (헤더/구분선 제외)
+        for line in markdown_text.splitlines():
+            stripped = line.strip()
+            if not stripped.startswith("|"):
+                continue
+            first_cell = stripped.strip("|").split("|")[0].replace("*", "").strip()
+            if not first_cell or first_cell == "주식" or set(first_cell) <= set(":- "):
+                continue
+            snippets.setdefault(first_cell, "")
+        
+        # 2) 분석 카드 (헤더 다음의 글머리표 항목들을 스니펫으로 사용)
+        current_name: Optional[str] = None
+        current_lines: List[str] = []
+        for line in markdown_text.splitlines() + [""]:
+            header = _STOCK_CARD_HEADER.match(line.strip())
+            bullet = line.strip().startswith(("*", "-")) and not header
+            if current_name and bullet:
+                current_lines.append(line.strip().lstrip("*- ").replace("**", ""))
+                continue
+            if current_name and (header or line.strip()):
+                snippets[current_name] = " / ".join(current_lines)
+                current_name = None
+            if header:
+                current_name = header.group(1).strip()
+                current_lines = [f"Overall {header.group(2)}/100"]
+        if current_name:
+            snippets[current_name] = " / ".join(current_lines)
+        
+        return snippets
+
+    def _known_tickers_for_images(self, image_data_list: List[bytes]) -> Optional[List[str]]:
+        """이전 분석에서 기록된 이미지들의 티커 목록 반환 (처음 보는 이미지가 있으면 None)"""
+        combined = self._image_tickers.get(self._generate_multiple_cache_key(image_data_list))
+        if combined is not None:
+            return combined
+        
+        tickers: List[str] = []
+        for image_data in image_data_list:
+            single = self._image_tickers.get(self._generate_multiple_cache_key([image_data]))
+            if single is None:
+                return None
+            for ticker in single:
+                if ticker not in tickers:
+                    tickers.append(ticker)
+        return tickers
+
+    def _format_facts_context(self, facts: Dict[str, MarketFact], search_enabled: bool) -> str:
+        """저장소의 신선한 스니펫을 프롬프트 컨텍스트로 변환"""
+        lines = ["", "## 참고 자료: 로컬 시장 정보 저장소 (티커별 최신 스니펫)"]
+        for ticker, fact in facts.items():
+            updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(fact.updated_at))
+            name = self.ticker_resolver.display_name(ticker)
+            lines.append(f"- {name} ({ticker}, {updated} 기준): {fact.snippet}")
+        if search_enabled:
+            lines.append("위 자료에 있는 종목은 이 자료를 최신 정보로 사용하고, 나머지 종목만 Google Search로 확인하세요.")
+        else:
+            lines.append("위 자료를 최신 시장 정보로 사용하세요. 별도의 검색 없이 이 자료와 이미지 정보를 근거로 분석하세요.")
+        return "\n".join(lines)
+
+    def _plan_grounding(self, image_data_list: List[bytes]) -> Tuple[Optional[str], bool]:
+        """
+        로컬 시장 정보 저장소 기반 그라운딩 계획
+        
+        이전 분석으로 이미지의 종목이 알려져 있고 모든 종목의 스니펫이 신선하면
+        Google Search 없이 컨텍스트 주입만으로 분석합니다.
+        
+        Returns:
+            Tuple[Optional[str], bool]: (프롬프트에 추가할 컨텍스트, Google Search 사용 여부)
+        """
+        tickers = self._known_tickers_for_images(image_data_list)
+        if not tickers:
+            return None, True
+        
+        fresh, stale = self.facts_store.partition(tickers, self.facts_max_age, sources=GROUNDED_SOURCES)
+        use_search = bool(stale)
+        context = self._format_facts_context(fresh, search_enabled=use_search) if fresh else None
+        logger.info(
+            f"그라운딩 계획: 종목 {len(tickers)}개 중 저장소 신선 {len(fresh)}개, "
+            f"갱신 필요 {len(stale)}개 → Google Search {'활성화' if use_search else '생략'}"
+        )
+        return context, use_search
+
+    def _record_grounding_results(
+        self, image_data_list: List[bytes], markdown_text: str, grounded: bool
+    ) -> None:
+        """
+        분석 결과의 종목을 이미지 조합에 기록하고, Step 1 검색 그라운딩 결과이면 종목별 스니펫을 저장소에 저장
+        
+        마크다운 리포트 본문과 컨텍스트 주입으로 생성된 Step 1 결과는 새 검색 정보가 아니므로 (grounded=False)
+        종목만 기록합니다. 모델이 쓴 리포트가 다음 분석의 그라운딩 자료로 되먹임되지 않도록 하기 위함입니다.
+        """
+        try:
+            snippets = self._extract_stock_snippets(markdown_text)
+            tickers: List[str] = []
+            for name, snippet in snippets.items():
+                ticker = self.ticker_resolver.resolve(name)
+                if not ticker:
+                    continue
+                if ticker not in tickers:
+                    tickers.append(ticker)
+                if grounded and snippet:
+                    self.facts_store.upsert(ticker, snippet, source="grounding")
+            
+            if tickers:
+                self._image_tickers[self._generate_multiple_cache_key(image_data_list)] = tickers
+                logger.info(f"분석 종목 기록: {', '.join(tickers)} (스니펫 저장: {grounded})")
+        except Exception as e:
+            # 기록 실패는 분석 결과에 영향을 주지 않음
+            logger.warning(f"시장 정보 기록 실패: {str(e)}")
 
+    def _holdings_for_images(self, image_data_list: List[bytes]) -> Optional[int]:
+        """이전 분석으로 알려진 이미지 조합의 종목 수 (모르면 None)"""
+        tickers = self._known_tickers_for_images(image_data_list)
+        return len(tickers) if tickers else None
+
+    def _count_holdings(self, markdown_text: str) -> Optional[int]:
+        """Step 1 결과의 종목 수 (파싱 실패 시 None)"""
+        try:
+            return len(self._extract_stock_snippets(markdown_text)) or None
+        except Exception:
+            return None
+
+    def _record_popularity(self, image_data_list: List[bytes]) -> None:
+        """완료된 리포트의 티커를 인기도에 반영 (캐시 적중 포함)"""
+        tickers = self._known_tickers_for_images(image_data_list)
+        if tickers:
+            self.popularity.record(tickers)
+
+    @registered_prompt("markdown")
     def _get_portfolio_analysis_prompt(self) -> str:
         """포트폴리오 분석용 마크다운 프롬프트 생성"""
         return """
@@ -146,10 +421,11 @@ class GeminiService:
 **반드시 마크다운 형식만 출력하고, JSON이나 다른 형식은 사용하지 마세요.**
 """
 
+    @registered_prompt("markdown_multiple")
     def _get_multiple_image_prompt(self) -> str:
         """다중 이미지 분석용 프롬프트"""
         return """
-        당신은 포트폴리오 분석 전문가입니다. 위에 제공된 여러 포트폴리오 이미지들을 종합적으로 분석해주세요.
+        당신은 포트폴리오 분석 전문가입니다. 함께 제공된 여러 포트폴리오 이미지들을 종합적으로 분석해주세요.
 
         각 이미지를 개별적으로 분석한 후, 전체적인 포트폴리오 상황을 종합하여 
         다음 마크다운 형식으로 정확히 출력하세요 (추가 텍스트 없이):
@@ -235,16 +511,42 @@ class GeminiService:
         try:
             # 이미지 최적화
             optimized_data = await optimize_image(image_data)
+            emit("image_optimized", original_bytes=len(image_data), optimized_bytes=len(optimized_data))
             return base64.b64encode(optimized_data).decode('utf-8')
         except Exception as e:
             logger.error(f"이미지 Base64 인코딩 실패: {str(e)}")
             raise ValueError(f"이미지 인코딩 실패: {str(e)}")
 
-    async def _call_gemini_api(self, prompt: str, image_base64: str) -> str:
-        """Gemini API 호출 - 마크다운 텍스트 반환"""
-        for attempt in range(self.max_retries):
+    def _get_markdown_config(self, use_search: bool, multiple: bool) -> GenerateContentConfig:
+        """마크다운 생성 설정 (일괄/스트리밍 공통)"""
+        if multiple:
+            config = GenerateContentConfig(
+                temperature=0.1,
+                max_output_tokens=32768,  # 16384 → 32768로 증가 (최대 제한)
+            )
+        else:
+            config = GenerateContentConfig(
+                temperature=0.3,  # 일관된 분석을 위해 낮은 온도
+                top_p=0.9,
+                top_k=40,
+                max_output_tokens=32768,  # 16384 → 32768로 증가 (최대 제한)
+                response_mime_type="text/plain"  # 플레인 텍스트 (마크다운)
+            )
+        
+        # Google Search 도구 활성화 (올바른 방식)
+        if use_search:
+            from google.genai import types
+            config.tools = [types.Tool(google_search=types.GoogleSearch())]
+        return config
+
+    async def _call_gemini_api(
+        self, prompt: str, image_base64: str, use_search: bool = True, holdings: Optional[int] = None
+    ) -> str:
+        """Gemini API 호출 - 마크다운 텍스트 반환 (use_search=False 시 Google Search 생략)"""
+        retry = self.retry_policy.attempts("Gemini API 호출", max_attempts=self.max_retries)
+        for attempt in retry:
             try:
-                logger.info(f"Gemini API 호출 시도 {attempt + 1}/{self.max_retries} (Google Search 활성화)")
+                logger.info(f"Gemini API 호출 시도 {attempt + 1}/{self.max_retries} (Google Search {'활성화' if use_search else '생략'})")
                 
                 # 이미지 파트 생성
                 image_part = Part.from_bytes(
@@ -252,27 +554,14 @@ class GeminiService:
                     mime_type="image/jpeg"
                 )
                 
-                # 설정 생성 - 마크다운 텍스트 생성에 최적화
-                config = GenerateContentConfig(
-                    temperature=0.3,  # 일관된 분석을 위해 낮은 온도
-                    top_p=0.9,
-                    top_k=40,
-                    max_output_tokens=32768,  # 16384 → 32768로 증가 (최대 제한)
-                    response_mime_type="text/plain"  # 플레인 텍스트 (마크다운)
-                )
-                
-                # Google Search 도구 활성화 (올바른 방식)
-                from google.genai import types
-                grounding_tool = types.Tool(
-                    google_search=types.GoogleSearch()
-                )
-                
-                # config에 tools 추가
-                config.tools = [grounding_tool]
+                # 설정 생성 - 마크다운 텍스트 생성에 최적화 (Google Search는 저장소 컨텍스트로 충분하면 생략)
+                config = self._get_markdown_config(use_search, multiple=False)
                 
-                # API 호출 (동기 호출)
-                response = self.client.models.generate_content(
-                    model=self.model_name,
+                # API 호출 (비동기 클라이언트 - 이벤트 루프 블로킹 방지)
+                response = await self._generate_content_routed(
+                    "markdown",
+                    self.models.route("markdown", holdings=holdings),
+                    hedge=False,
                     contents=[prompt, image_part],
                     config=config
                 )
@@ -282,39 +571,42 @@ class GeminiService:
                     logger.info("Gemini API 마크다운 응답 성공 (Google Search 통합)")
                     return markdown_text
                 else:
-                    raise ValueError("Gemini API에서 빈 응답 받음")
+                    raise RetryableResponseError("Gemini API에서 빈 응답 받음")
                     
-            except asyncio.TimeoutError:
-                logger.warning(f"Gemini API 타임아웃 (시도 {attempt + 1})")
-                if attempt == self.max_retries - 1:
-                    raise TimeoutError(f"API 호출 타임아웃: {self.timeout}초 초과")
-                await asyncio.sleep(2 ** attempt)  # 지수적 백오프
-                
             except Exception as e:
-                logger.error(f"Gemini API 호출 실패 (시도 {attempt + 1}): {str(e)}")
-                
                 # Google Search 관련 오류인 경우 특별 처리
                 if "search" in str(e).lower():
                     logger.warning("Google Search 기능 관련 오류, 기본 분석으로 계속 진행")
                 
-                if attempt == self.max_retries - 1:
-                    raise
-                await asyncio.sleep(2 ** attempt)
+                if await retry.backoff(e):
+                    continue
+                if isinstance(e, asyncio.TimeoutError):
+                    raise TimeoutError(f"API 호출 타임아웃: {self.timeout}초 초과")
+                raise
 
-    async def _call_gemini_api_multiple(self, image_data_list: List[bytes]) -> str:
+    async def _call_gemini_api_multiple(
+        self,
+        image_data_list: List[bytes],
+        facts_context: Optional[str] = None,
+        use_search: bool = True
+    ) -> str:
         """
         Gemini API 다중 이미지 호출
         
         참고: https://ai.google.dev/gemini-api/docs/image-understanding?hl=ko
         - 요청당 최대 3,600개 이미지 지원 (우리는 5개로 제한)
         - 각 이미지는 768x768 타일로 처리되며 타일당 258 토큰
+        - facts_context: 로컬 시장 정보 저장소 컨텍스트 (이미지 뒤 마지막 파트로 추가)
+        - use_search: False 시 Google Search 생략
         """
-        for attempt in range(self.max_retries):
+        retry = self.retry_policy.attempts("Gemini API 다중 이미지 호출", max_attempts=self.max_retries)
+        for attempt in retry:
             try:
-                logger.info(f"Gemini API 다중 이미지 호출 시도 {attempt + 1}/{self.max_retries} (Google Search 활성화)")
+                logger.info(f"Gemini API 다중 이미지 호출 시도 {attempt + 1}/{self.max_retries} (Google Search {'활성화' if use_search else '생략'})")
                 
-                # contents 배열 구성 - 이미지들 먼저, 프롬프트는 마지막
-                contents = []
+                # contents 배열 구성 - 고정 프롬프트를 맨 앞에 두어 요청 간 공유 접두부(암묵적 캐시) 유지,
+                # 이미지와 저장소 컨텍스트처럼 요청마다 다른 내용은 뒤에 배치
+                contents: List[Union[str, Part]] = [self._get_multiple_image_prompt()]
                 
                 # 1. 이미지들을 contents에 추가
                 for i, image_data in enumerate(image_data_list):
@@ -329,67 +621,45 @@ class GeminiService:
                         logger.error(f"이미지 {i+1} 처리 실패: {str(e)}")
                         raise ValueError(f"이미지 {i+1} 처리 중 오류가 발생했습니다.")
                 
-                # 2. 다중 이미지 분석 프롬프트 추가
-                prompt = self._get_multiple_image_prompt()
-                contents.append(prompt)
+                # 2. 저장소 컨텍스트 (있으면 마지막에)
+                if facts_context:
+                    contents.append(facts_context)
                 
-                # 3. Google Search 도구 설정
-                from google.genai import types
-                grounding_tool = types.Tool(
-                    google_search=types.GoogleSearch()
-                )
+                # 3. 모델 설정 (Google Search 도구 포함)
+                config = self._get_markdown_config(use_search, multiple=True)
                 
-                # 4. 모델 설정
-                config = GenerateContentConfig(
-                    temperature=0.1,
-                    max_output_tokens=32768,  # 16384 → 32768로 증가 (최대 제한)
-                    tools=[grounding_tool]
+                # 4. API 호출
+                response = await self._generate_content_routed(
+                    "markdown",
+                    self.models.route("markdown", holdings=self._holdings_for_images(image_data_list)),
+                    hedge=False,
+                    contents=contents,
+                    config=config
                 )
                 
-                # 5. API 호출 (타임아웃 설정)
-                try:
-                    response = self.client.models.generate_content(
-                        model=self.model_name,
-                        contents=contents,
-                        config=config
-                    )
-                except asyncio.TimeoutError:
-                    logger.error(f"Gemini API 다중 이미지 호출 타임아웃 (시도 {attempt + 1})")
-                    if attempt == self.max_retries - 1:
-                        raise TimeoutError(f"API 호출 타임아웃: {self.timeout}초 초과")
-                    await asyncio.sleep(2 ** attempt)
-                    continue
-                
                 if response and response.text:
                     logger.info("Gemini API 다중 이미지 마크다운 응답 성공 (Google Search 통합)")
                     return response.text
                 else:
-                    raise ValueError("Gemini API가 빈 응답을 반환했습니다.")
+                    raise RetryableResponseError("Gemini API가 빈 응답을 반환했습니다.")
                     
-            except TimeoutError:
-                # TimeoutError는 이미 처리됨
-                raise
-            except ValueError as e:
-                # ValueError는 재시도하지 않고 즉시 전파
-                logger.error(f"Gemini API 다중 이미지 호출 값 오류: {str(e)}")
-                raise
             except Exception as e:
-                logger.error(f"Gemini API 다중 이미지 호출 실패 (시도 {attempt + 1}): {str(e)}")
-                
-                # 특정 에러 타입별 처리
-                error_str = str(e).lower()
-                if "search" in error_str:
+                if "search" in str(e).lower():
                     logger.warning("Google Search 기능 관련 오류, 기본 분석으로 계속 진행")
-                elif "quota" in error_str or "limit" in error_str:
+                
+                if await retry.backoff(e):
+                    continue
+                
+                # 재시도 포기 - 분류별 사용자 메시지
+                if isinstance(e, asyncio.TimeoutError):
+                    raise TimeoutError(f"API 호출 타임아웃: {self.timeout}초 초과")
+                if retry.last_kind == ERROR_QUOTA:
                     logger.error("API 할당량 초과 또는 제한 도달")
                     raise ValueError("API 사용량이 한도를 초과했습니다. 잠시 후 다시 시도해 주세요.")
-                elif "invalid" in error_str or "malformed" in error_str:
+                if retry.last_kind == ERROR_INVALID and not isinstance(e, ValueError):
                     logger.error("잘못된 요청 형식")
                     raise ValueError("요청 형식이 올바르지 않습니다.")
-                
-                if attempt == self.max_retries - 1:
-                    raise
-                await asyncio.sleep(2 ** attempt)
+                raise
 
     def _validate_markdown_response(self, markdown_text: str) -> str:
         """마크다운 응답 검증 및 정제"""
@@ -399,16 +669,7 @@ class GeminiService:
                 raise ValueError("마크다운 텍스트가 너무 짧습니다.")
             
             # 필수 섹션 확인
-            required_sections = [
-                "**AI 총평:**",
-                "**포트폴리오 종합 리니아 스코어:",
-                "**3대 핵심 기준 스코어:**",
-                "**성장 잠재력:**",
-                "**안정성 및 방어력:**",
-                "**전략적 일관성:**"
-            ]
-            
-            for section in required_sections:
+            for section in REQUIRED_MARKDOWN_SECTIONS:
                 if section not in markdown_text:
                     logger.warning(f"필수 섹션 누락: {section}")
             
@@ -445,22 +706,31 @@ class GeminiService:
             
             # 캐시 확인
             if use_cache:
-                image_hash = self._generate_image_hash(image_data)
+                image_hash = self._generate_markdown_cache_key([image_data])
                 if image_hash in self._cache:
                     logger.info("캐시된 분석 결과 반환")
+                    emit("cache_hit", level="markdown")
                     return self._cache[image_hash]
             
             # 이미지 Base64 인코딩
             image_base64 = await self._encode_image_to_base64(image_data)
             
-            # 프롬프트 생성
+            # 프롬프트 생성 (로컬 시장 정보 저장소 컨텍스트 포함)
             prompt = self._get_portfolio_analysis_prompt()
+            facts_context, use_search = self._plan_grounding([image_data])
+            if facts_context:
+                prompt = prompt + facts_context
             
             # Gemini API 호출
-            markdown_text = await self._call_gemini_api(prompt, image_base64)
+            emit("step1_started", search=use_search)
+            markdown_text = await self._call_gemini_api(
+                prompt, image_base64, use_search=use_search, holdings=self._holdings_for_images([image_data])
+            )
+            emit("step1_finished", chars=len(markdown_text))
             
             # 마크다운 응답 검증
             validated_markdown = self._validate_markdown_response(markdown_text)
+            self._record_grounding_results([image_data], validated_markdown, grounded=False)
             
             # 캐시 저장
             if use_cache:
@@ -505,18 +775,24 @@ class GeminiService:
                     raise ValueError(f"이미지 {i+1} 검증 실패: {str(e)}")
             
             # 캐시 키 생성 (모든 이미지의 해시 조합)
-            cache_key = self._generate_multiple_cache_key(image_data_list)
+            cache_key = self._generate_markdown_cache_key(image_data_list)
             if cache_key in self._cache:
                 logger.info("다중 이미지 분석 결과 캐시에서 반환")
+                emit("cache_hit", level="markdown")
                 return self._cache[cache_key]
             
-            # 다중 이미지 API 호출
+            # 다중 이미지 API 호출 (로컬 시장 정보 저장소 컨텍스트 포함)
+            facts_context, use_search = self._plan_grounding(image_data_list)
+            emit("step1_started", search=use_search)
             try:
-                result = await self._call_gemini_api_multiple(image_data_list)
+                result = await self._call_gemini_api_multiple(
+                    image_data_list, facts_context=facts_context, use_search=use_search
+                )
+                emit("step1_finished", chars=len(result))
             except TimeoutError as e:
                 logger.error(f"다중 이미지 분석 타임아웃: {str(e)}")
                 raise TimeoutError(f"분석 시간이 초과되었습니다. 복잡한 포트폴리오의 경우 최대 10분까지 소요될 수 있습니다. 다시 시도해 주세요.")
-            except ValueError as e:
+            except (ValueError, GeminiCapacityError) as e:
                 logger.error(f"다중 이미지 분석 값 오류: {str(e)}")
                 raise
             except Exception as e:
@@ -531,17 +807,313 @@ class GeminiService:
                 raise ValueError(f"분석 결과 형식이 올바르지 않습니다. 다시 시도해 주세요.")
             
             self._cache[cache_key] = validated_result
+            self._record_grounding_results(image_data_list, validated_result, grounded=False)
             
             logger.info(f"다중 이미지 분석 완료 ({len(image_data_list)}개 이미지)")
             return validated_result
             
-        except (ValueError, TimeoutError):
+        except (ValueError, TimeoutError, GeminiCapacityError):
             # 이미 처리된 예외는 그대로 전파
             raise
         except Exception as e:
             logger.error(f"다중 이미지 분석 예상치 못한 오류: {str(e)}", exc_info=True)
             raise ValueError(f"분석 중 예상치 못한 오류가 발생했습니다. 다시 시도해 주세요.")
 
+    def _scan_markdown_sections(self, window: str, found: List[str]) -> List[str]:
+        """스트리밍 중 필수 섹션 감지 - window에 새로 나타난 섹션 목록 (found에 추가)"""
+        new_sections = [
+            section for section in REQUIRED_MARKDOWN_SECTIONS
+            if section not in found and section in window
+        ]
+        found.extend(new_sections)
+        return new_sections
+
+    async def stream_portfolio_markdown(
+        self, image_data_list: List[bytes], request_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        마크다운 리포트 토큰 스트리밍 - (이벤트명, 데이터)를 생성 순서대로 반환
+        
+        이벤트:
+        - started: 스트림 시작 (입력 검증 완료)
+        - delta: Gemini가 생성한 텍스트 조각
+        - section: 필수 섹션 감지 (점진적 검증)
+        - done: 완료 (글자 수, 누락 섹션, 캐시 적중 여부)
+        
+        리포트 캐시(신선/유예 구간)와 마크다운 캐시 키를 일괄 분석과 공유합니다.
+        첫 조각 수신 전 실패만 재시도하며, 이후 실패는 예외로 전파됩니다.
+        
+        Raises:
+            ValueError: 입력/이미지 검증 실패 (첫 이벤트 전) 또는 응답 검증 실패
+        """
+        start_time = time.time()
+        request_id = request_id or str(uuid.uuid4())
+        broker = get_progress_broker()
+        
+        # 입력 검증
+        if not image_data_list or len(image_data_list) == 0:
+            raise ValueError("분석할 이미지가 없습니다.")
+        if len(image_data_list) > 5:
+            raise ValueError("최대 5개의 이미지만 분석 가능합니다.")
+        for image_data in image_data_list:
+            await validate_image(image_data)
+        broker.publish(
+            request_id, "ingest",
+            images=len(image_data_list), total_bytes=sum(len(data) for data in image_data_list)
+        )
+        yield "started", {"request_id": request_id}
+        
+        try:
+            # 리포트 캐시 확인 (유예 구간이면 기존 결과 전달 후 백그라운드 갱신)
+            report_key = self._generate_report_cache_key(image_data_list, "markdown")
+            cached = self._cache.lookup(report_key)
+            if cached is not None:
+                payload, state = cached
+                stale = state != CACHE_FRESH
+                logger.info(f"스트리밍: 리포트 캐시 적중 (상태: {state})")
+                broker.publish(request_id, "cache_hit", level="report", state=state)
+                if stale:
+                    self._schedule_report_refresh(image_data_list, "markdown")
+                yield "delta", {"text": payload}
+                found: List[str] = []
+                for section in self._scan_markdown_sections(payload, found):
+                    yield "section", {"section": section}
+                self._record_popularity(image_data_list)
+                
+                processing_time = round(time.time() - start_time, 3)
+                broker.publish(request_id, "completed", processing_time=processing_time, stale=stale)
+                yield "done", {
+                    "chars": len(payload),
+                    "missing_sections": [s for s in REQUIRED_MARKDOWN_SECTIONS if s not in found],
+                    "cached": True,
+                    "stale": stale,
+                    "processing_time": processing_time,
+                }
+                return
+            
+            # 요청 구성 (일괄 분석과 동일한 프롬프트/설정)
+            facts_context, use_search = self._plan_grounding(image_data_list)
+            multiple = len(image_data_list) > 1
+            # 고정 프롬프트 → 이미지 → 저장소 컨텍스트 순 (요청 간 공유 접두부 유지)
+            if multiple:
+                contents: List[Union[str, Part]] = [self._get_multiple_image_prompt()]
+                contents.extend(
+                    Part.from_bytes(data=image_data, mime_type="image/jpeg") for image_data in image_data_list
+                )
+            else:
+                optimized_data = await optimize_image(image_data_list[0])
+                broker.publish(
+                    request_id, "image_optimized",
+                    original_bytes=len(image_data_list[0]), optimized_bytes=len(optimized_data)
+                )
+                contents = [
+                    self._get_portfolio_analysis_prompt(),
+                    Part.from_bytes(data=optimized_data, mime_type="image/jpeg"),
+                ]
+            if facts_context:
+                contents.append(facts_context)
+            config = self._get_markdown_config(use_search, multiple=multiple)
+            models = self.models.route("markdown", holdings=self._holdings_for_images(image_data_list))
+            broker.publish(request_id, "step1_started", search=use_search)
+            
+            chunks: List[str] = []
+            found = []
+            tail = ""  # 조각 경계에 걸친 섹션 감지를 위한 직전 꼬리
+            retry = self.retry_policy.attempts("Gemini 스트리밍 호출", max_attempts=self.max_retries)
+            for attempt in retry:
+                try:
+                    logger.info(f"Gemini 스트리밍 호출 시도 {attempt + 1}/{self.max_retries} (Google Search {'활성화' if use_search else '생략'})")
+                    stream = self._stream_content_routed(
+                        "markdown",
+                        models,
+                        hedge=False,
+                        contents=contents,
+                        config=config
+                    )
+                    try:
+                        async for chunk in stream:
+                            text = getattr(chunk, "text", None)
+                            if not text:
+                                continue
+                            if not chunks:
+                                logger.info(f"스트리밍 첫 조각 수신 ({time.time() - start_time:.2f}초)")
+                            chunks.append(text)
+                            yield "delta", {"text": text}
+                            
+                            window = tail + text
+                            for section in self._scan_markdown_sections(window, found):
+                                yield "section", {"section": section}
+                            tail = window[-(_MAX_SECTION_LENGTH - 1):]
+                    finally:
+                        # 클라이언트 연결 종료 시에도 Gemini 스트림과 실행 슬롯 반납
+                        await self._close_stream(stream)
+                    break
+                except Exception as e:
+                    # 이미 전달된 조각이 있으면 재시도하지 않음 (클라이언트 출력 중복 방지)
+                    if chunks:
+                        logger.error(f"Gemini 스트리밍 호출 실패 (조각 {len(chunks)}개 전달 후): {str(e)}")
+                        raise
+                    if not await retry.backoff(e):
+                        raise
+            
+            # 최종 검증 및 캐시 저장 (일괄 분석과 같은 키)
+            validated_markdown = self._validate_markdown_response("".join(chunks))
+            broker.publish(request_id, "step1_finished", chars=len(validated_markdown))
+            self._cache[self._generate_markdown_cache_key(image_data_list)] = validated_markdown
+            self._cache[report_key] = validated_markdown
+            self._record_grounding_results(image_data_list, validated_markdown, grounded=False)
+            self._record_popularity(image_data_list)
+            
+            processing_time = time.time() - start_time
+            logger.info(f"마크다운 스트리밍 완료 ({len(validated_markdown)}자, {processing_time:.2f}초)")
+            broker.publish(request_id, "completed", processing_time=round(processing_time, 3), stale=False)
+            yield "done", {
+                "chars": len(validated_markdown),
+                "missing_sections": [s for s in REQUIRED_MARKDOWN_SECTIONS if s not in found],
+                "cached": False,
+                "stale": False,
+                "processing_time": round(processing_time, 3),
+            }
+        except Exception as e:
+            broker.publish(request_id, "failed", error=describe_job_error(e))
+            raise
+
+    async def stream_portfolio_structured(
+        self, image_data_list: List[bytes], request_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        구조화 JSON 리포트 탭 단위 스트리밍 - (이벤트명, 데이터)를 생성 순서대로 반환
+        
+        Step 2를 스트리밍으로 호출하고, tabs[i] 객체가 완성되는 즉시 해당 탭 컨텐츠 모델로 검증해 전달합니다.
+        
+        이벤트:
+        - started: 스트림 시작 (입력 검증 완료)
+        - grounded: Step 1 완료 (글자 수)
+        - tab: 완성·검증된 탭 (index, tab)
+        - report: 전체 리포트 (최종 기준, 앞서 전달된 탭과 다르면 이 값을 사용)
+        
+        스트리밍 중 탭 검증/파싱에 실패하면 일괄 Step 2(보정 재시도 포함)로 전환하여
+        아직 전달하지 않은 탭과 최종 리포트를 전달합니다.
+        
+        Raises:
+            ValueError: 입력/이미지 검증 실패 (첫 이벤트 전) 또는 생성 실패
+        """
+        start_time = time.time()
+        request_id = request_id or str(uuid.uuid4())
+        broker = get_progress_broker()
+        
+        # 입력 검증
+        if not image_data_list or len(image_data_list) == 0:
+            raise ValueError("분석할 이미지가 없습니다.")
+        if len(image_data_list) > 5:
+            raise ValueError("최대 5개의 이미지만 분석 가능합니다.")
+        for image_data in image_data_list:
+            await validate_image(image_data)
+        broker.publish(
+            request_id, "ingest",
+            images=len(image_data_list), total_bytes=sum(len(data) for data in image_data_list)
+        )
+        yield "started", {"request_id": request_id}
+        
+        try:
+            report_key = self._generate_report_cache_key(image_data_list, "json")
+            cached = self._cache.lookup(report_key)
+            sent: set = set()
+            stale = False
+            if cached is not None:
+                payload, state = cached
+                stale = state != CACHE_FRESH
+                logger.info(f"탭 스트리밍: 리포트 캐시 적중 (상태: {state})")
+                broker.publish(request_id, "cache_hit", level="report", state=state)
+                if stale:
+                    self._schedule_report_refresh(image_data_list, "json")
+                portfolio_report = PortfolioReport.model_validate_json(payload)
+            else:
+                # Step 1: 검색·그라운딩 (일괄 경로와 동일, 진행 이벤트는 request_id 채널)
+                # 재시도 예산은 Step 1/Step 2가 공유 (yield를 사이에 두지 않도록 호출마다 바인딩)
+                budget = self.retry_policy.new_budget()
+                token = bind_request(request_id)
+                try:
+                    with self.retry_policy.request_scope(budget):
+                        grounded_facts = await self._generate_grounded_facts(image_data_list)
+                finally:
+                    reset_request(token)
+                yield "grounded", {"chars": len(grounded_facts)}
+                
+                # Step 2: 탭 단위 스트리밍
+                portfolio_report = None
+                step2_key = self._generate_step2_cache_key(grounded_facts)
+                if step2_key in self._cache:
+                    logger.info("Step 2 캐시된 결과 반환")
+                    broker.publish(request_id, "cache_hit", level="step2")
+                    portfolio_report = PortfolioReport.model_validate_json(self._cache[step2_key])
+                else:
+                    broker.publish(request_id, "step2_started", input_chars=len(grounded_facts))
+                    scanner = IncrementalJsonScanner(STEP2_TABS_KEYS, on_value=ReportStreamGuard())
+                    correction = None
+                    stream = self._stream_with_continuation(
+                        [self._get_json_generation_prompt(grounded_facts)], self._get_step2_config(), "step2",
+                        models=self.models.route("step2", holdings=self._count_holdings(grounded_facts))
+                    )
+                    try:
+                        async for text in stream:
+                            for index, raw_tab in scanner.feed(text):
+                                tab = self._annotate_tab_tickers(parse_step2_tab(index, raw_tab))
+                                sent.add(index)
+                                logger.info(f"Step 2 스트리밍: 탭 {index + 1} 완성 ({tab.tabId}, {time.time() - start_time:.2f}초)")
+                                broker.publish(request_id, "step2_tab", index=index, tabId=tab.tabId)
+                                yield "tab", {"index": index, "tab": tab.model_dump(mode="json", by_alias=True)}
+                        
+                        portfolio_report = self._annotate_tickers(
+                            parse_step2_report(self._strip_trailing_fence(scanner.text))
+                        )
+                        self._cache[step2_key] = portfolio_report.model_dump_json()
+                        broker.publish(request_id, "step2_validated", tabs=len(portfolio_report.tabs))
+                    except StreamSchemaError as e:
+                        # 구조 오류 즉시 중단 - 오류 지시를 포함해 일괄 생성으로 전환
+                        logger.warning(f"Step 2 스트리밍 구조 오류로 중단 ({len(scanner.text)}자 시점): {str(e)}")
+                        broker.publish(request_id, "step2_aborted", attempt=1, path=format_json_path(e.path))
+                        correction = e.hint
+                    except GeminiCapacityError:
+                        raise
+                    except Exception as e:
+                        logger.warning(f"Step 2 스트리밍 실패 - 일괄 생성으로 전환 (전달된 탭 {len(sent)}개): {str(e)}")
+                    finally:
+                        await self._close_stream(stream)
+                
+                if portfolio_report is None:
+                    token = bind_request(request_id)
+                    try:
+                        with self.retry_policy.request_scope(budget):
+                            portfolio_report = await self._generate_structured_json(grounded_facts, correction)
+                    finally:
+                        reset_request(token)
+                self._cache[report_key] = portfolio_report.model_dump_json()
+            
+            # 아직 전달하지 않은 탭 전달 후 최종 리포트
+            for index, tab in enumerate(portfolio_report.tabs):
+                if index not in sent:
+                    yield "tab", {"index": index, "tab": tab.model_dump(mode="json", by_alias=True)}
+            self._record_popularity(image_data_list)
+            
+            processing_time = round(time.time() - start_time, 3)
+            broker.publish(request_id, "completed", processing_time=processing_time, stale=stale)
+            yield "report", {
+                "portfolioReport": portfolio_report.model_dump(mode="json", by_alias=True),
+                "processing_time": processing_time,
+                "request_id": request_id,
+                "images_processed": len(image_data_list),
+                "stale": stale,
+            }
+        except ValueError as e:
+            # Step 1 또는 Step 2 실패 시 사용자 친화적 에러 (일괄 경로와 동일)
+            logger.error(f"탭 스트리밍 생성 실패: {str(e)}")
+            broker.publish(request_id, "failed", error="AI 응답이 예상 형식과 다릅니다. 다시 시도해 주세요.")
+            raise ValueError("AI 응답이 예상 형식과 다릅니다. 다시 시도해 주세요.")
+        except Exception as e:
+            broker.publish(request_id, "failed", error=describe_job_error(e))
+            raise
+
     async def get_sample_analysis(self) -> str:
         """샘플 분석 결과 반환 (테스트용) - 마크다운 텍스트"""
         try:
@@ -551,10 +1123,94 @@ class GeminiService:
             logger.error(f"샘플 분석 결과 생성 실패: {str(e)}")
             raise ValueError(f"샘플 데이터 오류: {str(e)}")
 
+    # ============================================
+    # 로컬 시장 정보 저장소 갱신 (백그라운드 작업용)
+    # ============================================
+
+    def _get_ticker_facts_prompt(self, ticker: str) -> str:
+        """티커별 시장 정보 스니펫 갱신용 프롬프트"""
+        name = self.ticker_resolver.display_name(ticker)
+        return f"""
+당신은 전문 주식 애널리스트입니다. Google Search로 {name} ({ticker})의 최신 뉴스, 재무 데이터, 시장 동향을 확인하고
+아래 형식으로만 요약하세요.
+
+* **펀더멘탈:** [최근 실적 및 재무 데이터, 1-2문장]
+* **기술 잠재력:** [기술 경쟁력 및 최근 제품/연구 동향, 1-2문장]
+* **거시경제:** [금리·환율·정책 등 거시 요인의 영향, 1-2문장]
+* **시장심리:** [최근 주가 흐름과 투자 심리, 1-2문장]
+* **CEO/리더십:** [경영진 및 전략 관련 최신 소식, 1-2문장]
+
+규칙: 한국어로 작성, 구체적인 수치와 날짜 포함, 위 형식 외의 설명은 넣지 마세요.
+"""
+
+    async def refresh_market_facts(self, tickers: List[str], max_calls: Optional[int] = None) -> Tuple[int, int]:
+        """
+        티커별 시장 정보 스니펫을 Google Search 그라운딩으로 갱신
+        
+        Args:
+            tickers: 갱신할 티커 목록
+            max_calls: Gemini API 요청 수 상한 (도달하면 남은 티커는 다음 주기로 미룸, None이면 제한 없음)
+            
+        Returns:
+            Tuple[int, int]: (갱신에 성공한 티커 수, 실제로 보낸 Gemini API 요청 수 - 실패·모델 폴백 포함)
+        """
+        calls = [0]
+        token = _api_call_count.set(calls)
+        try:
+            refreshed = await self._refresh_market_facts(tickers, max_calls)
+        finally:
+            _api_call_count.reset(token)
+        logger.info(f"시장 정보 갱신 완료: {refreshed}/{len(tickers)}개 티커 (Gemini 요청 {calls[0]}회)")
+        return refreshed, calls[0]
+
+    async def _refresh_market_facts(self, tickers: List[str], max_calls: Optional[int]) -> int:
+        """refresh_market_facts 본체 (요청 수는 _api_call_count로 집계)"""
+        from google.genai import types
+        refreshed = 0
+        calls = _api_call_count.get()
+        for ticker in tickers:
+            if max_calls is not None and calls[0] >= max_calls:
+                logger.info(f"시장 정보 갱신 중단 (요청 상한 {max_calls}회 도달)")
+                break
+            try:
+                config = GenerateContentConfig(
+                    temperature=0.1,
+                    max_output_tokens=8192,
+                    tools=[types.Tool(google_search=types.GoogleSearch())],
+                )
+                response = await self._generate_content_routed(
+                    "refresh",
+                    self.models.route("refresh"),
+                    hedge=False,
+                    contents=[self._get_ticker_facts_prompt(ticker)],
+                    config=config
+                )
+                if response and getattr(response, "text", None):
+                    self.facts_store.upsert(ticker, response.text.strip(), source="grounding")
+                    refreshed += 1
+                else:
+                    logger.warning(f"시장 정보 갱신 빈 응답: {ticker}")
+            except GeminiCapacityError as e:
+                # 사용자 요청이 몰린 상황 - 남은 티커 갱신은 다음 주기로 미룸
+                logger.warning(f"시장 정보 갱신 중단 (Gemini 용량 부족): {str(e)}")
+                break
+            except Exception as e:
+                logger.warning(f"시장 정보 갱신 실패 ({ticker}): {str(e)}")
+        return refreshed
+
+    async def refresh_stale_market_facts(self, limit: int = 10) -> int:
+        """저장소에서 오래된 티커를 골라 갱신 (오래된 순, 최대 limit개)"""
+        stale = self.facts_store.stale_tickers(self.facts_max_age)[:limit]
+        if not stale:
+            return 0
+        refreshed, _ = await self.refresh_market_facts(stale)
+        return refreshed
+
     # ============================================
     # 구조화된 출력 메서드 (Phase 6 추가)
     # ============================================
 
+    @registered_prompt("grounding")
     def _get_grounding_prompt(self) -> str:
         """Step 1: 검색·그라운딩용 프롬프트 (구조화된 마크다운 출력)"""
         return """
@@ -627,6 +1283,14 @@ class GeminiService:
 5. 위 마크다운 형식을 정확히 따르되, 추가 설명이나 코멘트는 넣지 마세요
 """
 
+    @registered_prompt("grounding_offline")
+    def _get_offline_grounding_prompt(self) -> str:
+        """Step 1: 저장소 스니펫만으로 분석할 때의 그라운딩 프롬프트 (Google Search 지시를 참고 자료 지시로 대체)"""
+        prompt = self._get_grounding_prompt()
+        for search, offline in _OFFLINE_GROUNDING_REPLACEMENTS:
+            prompt = prompt.replace(search, offline)
+        return prompt
+
     async def _generate_grounded_facts(self, image_data_list: List[bytes]) -> str:
         """
         Step 1: Google Search Tool로 최신 정보 수집 및 구조화된 마크다운 생성
@@ -641,19 +1305,28 @@ class GeminiService:
             ValueError: API 호출 실패
         """
         # 캐시 키 생성 (이미지 해시 기반)
-        cache_key = f"grounded_{self._generate_multiple_cache_key(image_data_list)}"
+        cache_key = self._generate_grounded_cache_key(image_data_list)
         if cache_key in self._cache:
             logger.info("Step 1 캐시된 결과 반환")
+            emit("cache_hit", level="step1")
             return self._cache[cache_key]
         
-        for attempt in range(self.max_retries):
+        # 로컬 시장 정보 저장소 확인 (모든 종목이 신선하면 Google Search 생략)
+        facts_context, use_search = self._plan_grounding(image_data_list)
+        models = self.models.route("step1", holdings=self._holdings_for_images(image_data_list))
+        emit("step1_started", search=use_search)
+        
+        retry = self.retry_policy.attempts("Step 1", max_attempts=self.max_retries)
+        for attempt in retry:
             try:
                 logger.info(
                     f"Step 1: 검색·그라운딩 호출 시도 {attempt + 1}/{self.max_retries}"
                 )
                 
-                # Contents 배열 구성
-                contents: List[Union[str, Part]] = []
+                # Contents 배열 구성 - 고정 그라운딩 프롬프트를 맨 앞에 (요청 간 공유 접두부, 암묵적 캐시)
+                # 검색을 생략하면 Google Search 지시가 없는 프롬프트 사용
+                grounding_prompt = self._get_grounding_prompt() if use_search else self._get_offline_grounding_prompt()
+                contents: List[Union[str, Part]] = [grounding_prompt]
                 
                 # 1) 이미지 파트들 추가
                 for i, image_data in enumerate(image_data_list):
@@ -661,35 +1334,32 @@ class GeminiService:
                     contents.append(image_part)
                     logger.debug(f"Step 1: 이미지 {i+1}/{len(image_data_list)} 추가")
                 
-                # 2) 그라운딩 프롬프트 추가
-                contents.append(self._get_grounding_prompt())
+                # 2) 저장소 컨텍스트 (있으면 마지막에)
+                if facts_context:
+                    contents.append(facts_context)
                 
-                # 3) Google Search Tool 설정
+                # 3) Google Search Tool 설정 (저장소 스니펫이 모두 신선하면 생략)
                 from google.genai import types
-                grounding_tool = types.Tool(google_search=types.GoogleSearch())
+                tools = [types.Tool(google_search=types.GoogleSearch())] if use_search else None
                 
                 # 4) 설정: Google Search 활성화, response_mime_type 미지정
                 config = GenerateContentConfig(
                     temperature=0.1,  # 일관된 정보 수집을 위해 낮은 온도
                     max_output_tokens=32768,  # 8192 → 16384로 증가
-                    tools=[grounding_tool],
+                    tools=tools,
                     # response_mime_type 미지정 - 텍스트 응답
                 )
                 
-                # 5) API 호출
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=contents,
-                    config=config
-                )
+                # 5) API 호출 (출력 길이 제한으로 중단되면 이어쓰기)
+                response_text = await self._generate_with_continuation(contents, config, "step1", models=models)
                 
                 # 6) 응답 검증 및 반환
-                if response and getattr(response, "text", None):
-                    result_text = response.text.strip()
+                if response_text:
+                    result_text = response_text.strip()
                     
                     # 기본 검증 (최소 길이, 필수 섹션 확인)
                     if len(result_text) < 500:
-                        raise ValueError("Step 1 응답이 너무 짧습니다.")
+                        raise RetryableResponseError("Step 1 응답이 너무 짧습니다.")
                     
                     # 필수 섹션 확인
                     required_sections = [
@@ -705,108 +1375,144 @@ class GeminiService:
                         if section not in result_text:
                             logger.warning(f"Step 1: 필수 섹션 누락 - {section}")
                     
-                    # 캐시 저장
+                    # 캐시 저장 및 종목/스니펫 기록
                     self._cache[cache_key] = result_text
+                    self._record_grounding_results(image_data_list, result_text, grounded=use_search)
+                    emit("step1_finished", chars=len(result_text))
                     
                     return result_text
                 
-                raise ValueError("Step 1: Gemini API에서 빈 응답 받음")
+                raise RetryableResponseError("Step 1: Gemini API에서 빈 응답 받음")
                 
             except Exception as e:
-                logger.error(f"Step 1 호출 실패 (시도 {attempt + 1}): {str(e)}")
-                if attempt == self.max_retries - 1:
+                if not await retry.backoff(e):
                     raise ValueError(f"Step 1 검색·그라운딩 실패: {str(e)}")
-                await asyncio.sleep(2 ** attempt)
-
-    def _get_json_generation_prompt(self, grounded_facts: str) -> str:
-        """Step 2: JSON 스키마 생성용 프롬프트 (필드명 명시)"""
-        return f"""
-당신은 데이터 변환 전문가입니다. 아래 분석 결과를 읽고 정확히 JSON으로 변환하세요.
 
+    def _get_json_generation_prompt(self, grounded_facts: str, correction: Optional[str] = None) -> str:
+        """
+        Step 2: JSON 스키마 생성용 프롬프트 (필드명 명시, 보정 재시도 시 이전 오류 지시 추가)
+        
+        고정 지시문을 앞에 두고 입력 데이터와 보정 지시는 끝에 붙여, 요청마다 같은 접두부가
+        Gemini 암묵적/명시적 컨텍스트 캐시에 적중하도록 합니다.
+        """
+        prompt = self._get_json_generation_instructions()
+        prompt += f"""
 ## 입력 데이터 (Step 1에서 수집된 분석 결과):
 ```
-{grounded_facts}
+{self._step2_facts(grounded_facts)}
 ```
+"""
+        if correction:
+            prompt += f"""
+## 이전 시도 오류 (반드시 수정):
+{correction}
+"""
+        return prompt
+
+    def _step2_facts(self, grounded_facts: str) -> str:
+        """Step 2 프롬프트에 넣을 그라운딩 결과 (압축 활성 시 장식 제거, 전후 입력 토큰 추정치 기록)"""
+        if not self.compact_facts:
+            return grounded_facts
+        compacted = compact_grounded_facts(grounded_facts)
+        before, after = estimate_input_tokens([grounded_facts]), estimate_input_tokens([compacted])
+        logger.info(f"Step 2 입력 압축: {before} → {after} 토큰 (추정, {len(grounded_facts)} → {len(compacted)}자)")
+        return compacted
+
+    def _get_json_generation_instructions(self) -> str:
+        """Step 2 고정 지시문 (출력 JSON 구조와 변환 규칙, 요청과 무관한 공유 접두부)"""
+        if self.step2_format == "compact":
+            return self._get_compact_json_instructions()
+        return self._get_full_json_instructions()
+
+    def _step2_prompt_name(self) -> str:
+        """현재 Step 2 출력 형식의 지시문 레지스트리 이름"""
+        return "step2_compact" if self.step2_format == "compact" else "step2_full"
+
+    @registered_prompt("step2_full")
+    def _get_full_json_instructions(self) -> str:
+        """Step 2 전체 출력 형식 지시문 (PortfolioReport 필드명 그대로)"""
+        return """
+당신은 데이터 변환 전문가입니다. 맨 아래 입력 데이터의 분석 결과를 읽고 정확히 JSON으로 변환하세요.
 
 ## 출력 JSON 구조 (정확히 이 필드명과 타입 사용):
-{{
+{
   "version": "1.0",
   "reportDate": "2025-10-01",
   "tabs": [
-    {{
+    {
       "tabId": "dashboard",
       "tabTitle": "총괄 요약",
-      "content": {{
-        "overallScore": {{"title": "포트폴리오 종합 리니아 스코어", "score": 72, "maxScore": 100}},
+      "content": {
+        "overallScore": {"title": "포트폴리오 종합 리니아 스코어", "score": 72, "maxScore": 100},
         "coreCriteriaScores": [
-          {{"criterion": "성장 잠재력", "score": 88, "maxScore": 100}},
-          {{"criterion": "안정성 및 방어력", "score": 55, "maxScore": 100}},
-          {{"criterion": "전략적 일관성", "score": 74, "maxScore": 100}}
+          {"criterion": "성장 잠재력", "score": 88, "maxScore": 100},
+          {"criterion": "안정성 및 방어력", "score": 55, "maxScore": 100},
+          {"criterion": "전략적 일관성", "score": 74, "maxScore": 100}
         ],
         "strengths": ["선구적인 미래 기술 투자", "명확한 투자 테마"],
         "weaknesses": ["극심한 변동성 노출", "섹터 집중 리스크"]
-      }}
-    }},
-    {{
+      }
+    },
+    {
       "tabId": "deepDive",
       "tabTitle": "포트폴리오 심층 분석",
-      "content": {{
+      "content": {
         "inDepthAnalysis": [
-          {{"title": "성장 잠재력 분석: 제목", "score": 88, "description": "최소 50자 이상의 상세 분석 내용"}},
-          {{"title": "안정성 및 방어력 분석: 제목", "score": 55, "description": "최소 50자 이상의 상세 분석 내용"}},
-          {{"title": "전략적 일관성 분석: 제목", "score": 74, "description": "최소 50자 이상의 상세 분석 내용"}}
+          {"title": "성장 잠재력 분석: 제목", "score": 88, "description": "최소 50자 이상의 상세 분석 내용"},
+          {"title": "안정성 및 방어력 분석: 제목", "score": 55, "description": "최소 50자 이상의 상세 분석 내용"},
+          {"title": "전략적 일관성 분석: 제목", "score": 74, "description": "최소 50자 이상의 상세 분석 내용"}
         ],
-        "opportunities": {{
+        "opportunities": {
           "title": "기회 및 개선 방안",
           "items": [
-            {{"summary": "안정적인 핵심 자산 추가", "details": "최소 30자 이상의 상세 설명"}},
-            {{"summary": "유사 테마 내 분산", "details": "최소 30자 이상의 상세 설명"}}
+            {"summary": "안정적인 핵심 자산 추가", "details": "최소 30자 이상의 상세 설명"},
+            {"summary": "유사 테마 내 분산", "details": "최소 30자 이상의 상세 설명"}
           ]
-        }}
-      }}
-    }},
-    {{
+        }
+      }
+    },
+    {
       "tabId": "allStockScores",
       "tabTitle": "개별 종목 스코어",
-      "content": {{
-        "scoreTable": {{
+      "content": {
+        "scoreTable": {
           "headers": ["주식", "Overall", "펀더멘탈", "기술 잠재력", "거시경제", "시장심리", "CEO/리더십"],
           "rows": [
-            {{"주식": "팔란티어 (PLTR)", "Overall": 78, "펀더멘탈": 70, "기술 잠재력": 95, "거시경제": 75, "시장심리": 85, "CEO/리더십": 85}},
-            {{"주식": "브로드컴 (AVGO)", "Overall": 82, "펀더멘탈": 85, "기술 잠재력": 80, "거시경제": 80, "시장심리": 80, "CEO/리더십": 85}}
+            {"주식": "팔란티어 (PLTR)", "Overall": 78, "펀더멘탈": 70, "기술 잠재력": 95, "거시경제": 75, "시장심리": 85, "CEO/리더십": 85},
+            {"주식": "브로드컴 (AVGO)", "Overall": 82, "펀더멘탈": 85, "기술 잠재력": 80, "거시경제": 80, "시장심리": 80, "CEO/리더십": 85}
           ]
-        }}
-      }}
-    }},
-    {{
+        }
+      }
+    },
+    {
       "tabId": "keyStockAnalysis",
       "tabTitle": "핵심 종목 상세 분석",
-      "content": {{
+      "content": {
         "analysisCards": [
-          {{
+          {
             "stockName": "팔란티어 (PLTR)",
             "overallScore": 78,
             "detailedScores": [
-              {{"category": "펀더멘탈", "score": 70, "analysis": "최소 30자 이상의 분석"}},
-              {{"category": "기술 잠재력", "score": 95, "analysis": "최소 30자 이상의 분석"}},
-              {{"category": "거시경제", "score": 75, "analysis": "최소 30자 이상의 분석"}},
-              {{"category": "시장심리", "score": 85, "analysis": "최소 30자 이상의 분석"}},
-              {{"category": "CEO/리더십", "score": 85, "analysis": "최소 30자 이상의 분석"}}
+              {"category": "펀더멘탈", "score": 70, "analysis": "최소 30자 이상의 분석"},
+              {"category": "기술 잠재력", "score": 95, "analysis": "최소 30자 이상의 분석"},
+              {"category": "거시경제", "score": 75, "analysis": "최소 30자 이상의 분석"},
+              {"category": "시장심리", "score": 85, "analysis": "최소 30자 이상의 분석"},
+              {"category": "CEO/리더십", "score": 85, "analysis": "최소 30자 이상의 분석"}
             ]
-          }}
+          }
         ]
-      }}
-    }}
+      }
+    }
   ]
-}}
+}
 
 ## 중요한 필드명 규칙 (정확히 지켜야 함):
-- coreCriteriaScores: [{{"criterion": "이름", "score": 숫자, "maxScore": 100}}]  ← criterion 필드 사용
+- coreCriteriaScores: [{"criterion": "이름", "score": 숫자, "maxScore": 100}]  ← criterion 필드 사용
 - strengths: ["문자열1", "문자열2"]  ← 문자열 배열
 - weaknesses: ["문자열1", "문자열2"]  ← 문자열 배열
-- opportunities: {{"title": "...", "items": [...]}}  ← 객체 (배열 아님!)
-- rows: [{{"주식": "이름", "Overall": 숫자, "펀더멘탈": 숫자, ...}}]  ← 객체 배열 (단순 배열 아님!)
-- detailedScores: [{{"category": "이름", "score": 숫자, "analysis": "텍스트"}}]  ← 반드시 포함
+- opportunities: {"title": "...", "items": [...]}  ← 객체 (배열 아님!)
+- rows: [{"주식": "이름", "Overall": 숫자, "펀더멘탈": 숫자, ...}]  ← 객체 배열 (단순 배열 아님!)
+- detailedScores: [{"category": "이름", "score": 숫자, "analysis": "텍스트"}]  ← 반드시 포함
 
 ## 변환 규칙:
 1. **null 값 절대 금지**: 모든 점수는 0-100 사이의 정수로 채워야 함 (null, None 사용 금지)
@@ -825,12 +1531,66 @@ class GeminiService:
 **중요**: 정보가 부족해도 합리적인 추정값(정수)과 최소 길이를 충족하는 텍스트로 채워야 합니다.
 """
 
-    async def _generate_structured_json(self, grounded_facts: str) -> PortfolioReport:
+    @registered_prompt("step2_compact")
+    def _get_compact_json_instructions(self) -> str:
+        """
+        Step 2 압축 출력 형식 지시문 (utils.report_wire)
+        
+        반복되는 긴 필드명과 상수를 생략해 출력 토큰을 줄이며, 서버에서 전체 PortfolioReport로 확장합니다.
+        """
+        return """
+당신은 데이터 변환 전문가입니다. 맨 아래 입력 데이터의 분석 결과를 읽고 아래 압축 JSON 형식으로 정확히 변환하세요.
+키 이름과 상수(탭 제목, 헤더, 최대 점수)는 서버가 채우므로 출력하지 마세요.
+
+## 출력 JSON 구조 (정확히 이 키와 순서 사용):
+{"d":"2025-10-01","t":[
+{"o":72,"c":[88,55,74],"s":["선구적인 미래 기술 투자","명확한 투자 테마"],"w":["극심한 변동성 노출","섹터 집중 리스크"]},
+{"a":[{"h":"소제목","s":88,"d":"최소 50자 이상의 상세 분석 내용"},{"h":"소제목","s":55,"d":"최소 50자 이상의 상세 분석 내용"},{"h":"소제목","s":74,"d":"최소 50자 이상의 상세 분석 내용"}],"p":[{"m":"안정적인 핵심 자산 추가","d":"최소 30자 이상의 상세 설명"}]},
+{"r":[{"n":"팔란티어 (PLTR)","s":[78,70,95,75,85,85]},{"n":"브로드컴 (AVGO)","s":[82,85,80,80,80,85]}]},
+{"k":[{"n":"팔란티어 (PLTR)","o":78,"s":[70,95,75,85,85],"a":["최소 30자 이상의 분석","최소 30자 이상의 분석","최소 30자 이상의 분석","최소 30자 이상의 분석","최소 30자 이상의 분석"]}]}
+]}
+
+## 키 설명:
+- d: 리포트 날짜 (오늘, YYYY-MM-DD)
+- t: 탭 4개를 정확히 이 순서로 - [총괄 요약, 포트폴리오 심층 분석, 개별 종목 스코어, 핵심 종목 상세 분석]
+- t[0] 총괄 요약: o=포트폴리오 종합 점수, c=[성장 잠재력, 안정성 및 방어력, 전략적 일관성] 점수 3개, s=강점 목록, w=약점 목록
+- t[1] 심층 분석: a=[성장 잠재력, 안정성 및 방어력, 전략적 일관성] 순서의 분석 3개 (h=소제목, s=점수, d=상세 분석),
+  p=기회 및 개선 방안 목록 (m=요약, d=What-if 시나리오를 포함한 상세 설명)
+- t[2] 종목 스코어: r=보유 종목 전체, 종목마다 n=종목명, s=[Overall, 펀더멘탈, 기술 잠재력, 거시경제, 시장심리, CEO/리더십] 점수 6개
+- t[3] 핵심 종목: k=핵심 종목 카드, 카드마다 n=종목명, o=종합 점수,
+  s=[펀더멘탈, 기술 잠재력, 거시경제, 시장심리, CEO/리더십] 점수 5개, a=같은 순서의 분석 5개
+
+## 변환 규칙:
+1. **null 값 절대 금지**: 모든 점수는 0-100 사이의 정수 (범위 표기, null 금지)
+2. **점수/분석 개수 정확히**: c 3개, a(심층 분석) 3개, r의 s 6개, k의 s 5개와 a 5개
+3. **최소 문자 수 필수**: t[1].a의 d 50자 이상, p의 d 30자 이상, k의 a 각 30자 이상
+   - 짧을 경우 "...에 대한 분석입니다" 등으로 늘릴 것
+4. 모든 텍스트는 한국어 유지
+5. 공백·줄바꿈 없는 순수 JSON만 출력 (코드 블록 없이)
+
+**중요**: 정보가 부족해도 합리적인 추정값(정수)과 최소 길이를 충족하는 텍스트로 채워야 합니다.
+"""
+
+    def _get_step2_config(self) -> GenerateContentConfig:
+        """Step 2 JSON 생성 설정 (일괄/스트리밍 공통)"""
+        return GenerateContentConfig(
+            temperature=0.0,  # 결정론적 변환을 위해 온도 0
+            max_output_tokens=32768,  # 16384 → 32768로 증가 (최대 제한)
+            response_mime_type="application/json",  # JSON 모드
+            # response_schema 미사용 - Union[..., dict] 타입이 additionalProperties 생성
+            # tools 없음 - Google Search Tool 비활성화
+        )
+
+    async def _generate_structured_json(self, grounded_facts: str, correction: Optional[str] = None) -> PortfolioReport:
         """
         Step 2: 구조화된 JSON 생성 (캐싱 추가)
         
+        응답은 스트리밍으로 받으며, 생성 도중 복구 불가 구조 오류(탭 순서, 객체/배열 형태, 필수 값 null)가
+        발견되면 즉시 중단하고 오류 지시를 추가한 프롬프트로 재시도합니다.
+        
         Args:
             grounded_facts: Step 1에서 생성된 구조화된 마크다운 텍스트
+            correction: 첫 시도부터 프롬프트에 추가할 보정 지시 (탭 스트리밍 전환 시)
             
         Returns:
             PortfolioReport: Pydantic 검증된 포트폴리오 리포트
@@ -842,74 +1602,440 @@ class GeminiService:
         cache_key = self._generate_step2_cache_key(grounded_facts)
         if cache_key in self._cache:
             logger.info("Step 2 캐시된 결과 반환")
+            emit("cache_hit", level="step2")
             cached_json = self._cache[cache_key]
             # 캐시된 JSON을 PortfolioReport로 변환
             return PortfolioReport.model_validate_json(cached_json)
         
-        for attempt in range(self.max_retries):
+        emit("step2_started", input_chars=len(grounded_facts))
+        models = self.models.route("step2", holdings=self._count_holdings(grounded_facts))
+        retry = self.retry_policy.attempts("Step 2", max_attempts=self.max_retries)
+        for attempt in retry:
             try:
                 logger.info(
                     f"Step 2: JSON 생성 호출 시도 {attempt + 1}/{self.max_retries}"
                 )
                 
-                # 1) 프롬프트 생성 (Step 1 결과를 컨텍스트로 포함)
-                prompt = self._get_json_generation_prompt(grounded_facts)
+                # 1) 프롬프트 생성 (Step 1 결과를 컨텍스트로 포함, 보정 재시도 시 이전 오류 지시)
+                prompt = self._get_json_generation_prompt(grounded_facts, correction)
                 
                 # 2) 설정: response_mime_type만 사용 (response_schema는 복잡한 Union 타입 미지원)
-                config = GenerateContentConfig(
-                    temperature=0.0,  # 결정론적 변환을 위해 온도 0
-                    max_output_tokens=32768,  # 16384 → 32768로 증가 (최대 제한)
-                    response_mime_type="application/json",  # JSON 모드
-                    # response_schema 미사용 - Union[..., dict] 타입이 additionalProperties 생성
-                    # tools 없음 - Google Search Tool 비활성화
-                )
+                config = self._get_step2_config()
                 
-                # 3) API 호출 (텍스트만 전달, 이미지 없음)
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=[prompt],
-                    config=config
-                )
+                # 3) 스트리밍 호출 + 점진적 구조 검증 (복구 불가 구조 오류 발견 즉시 생성 중단)
+                response_text = await self._stream_step2_json(prompt, config, models)
                 
                 # 4) JSON 텍스트 수동 파싱 (response_schema 미사용)
-                if response and getattr(response, "text", None):
-                    logger.info("Step 2: JSON 응답 수신, 수동 파싱 시작")
-                    response_text = response.text.strip()
-                    
-                    try:
-                        portfolio_report = PortfolioReport.model_validate_json(response_text)
-                        logger.info("Step 2: 수동 Pydantic 검증 성공")
-                        
-                        # 🆕 성공 시 캐시 저장 (JSON 문자열로 저장)
-                        portfolio_json = portfolio_report.model_dump_json()
-                        self._cache[cache_key] = portfolio_json
-                        logger.info(f"Step 2: 캐시 저장 완료 (키: {cache_key[:16]}...)")
-                        
-                        return portfolio_report
-                    except Exception as validation_error:
-                        logger.error(f"Step 2: Pydantic 검증 실패 - {str(validation_error)}")
-                        
-                        # 검증 실패 시 1회 보정 재시도 (첫 시도에서만)
-                        if attempt == 0:
-                            logger.info("Step 2: 보정 재시도 (누락 필드/범위 오류 수정 유도)")
-                            await asyncio.sleep(1)
-                            continue
-                        
-                        # JSON 끝부분 확인
-                        if len(response_text) > 100:
-                            logger.error(f"Step 2: JSON 끝부분 (마지막 100자): {response_text[-100:]}")
-                        raise ValueError(
-                            f"JSON이 스키마와 일치하지 않습니다: {str(validation_error)}"
-                        )
-                else:
-                    raise ValueError("Step 2: Gemini API에서 응답을 받지 못했습니다.")
+                if not response_text:
+                    raise RetryableResponseError("Step 2: Gemini API에서 응답을 받지 못했습니다.")
+                logger.info("Step 2: JSON 응답 수신, 수동 파싱 시작")
+                portfolio_report = parse_step2_report(response_text)
+                logger.info("Step 2: 수동 Pydantic 검증 성공")
+                self._annotate_tickers(portfolio_report)
+                emit("step2_validated", tabs=len(portfolio_report.tabs))
+                
+                # 🆕 성공 시 캐시 저장 (JSON 문자열로 저장)
+                portfolio_json = portfolio_report.model_dump_json()
+                self._cache[cache_key] = portfolio_json
+                logger.info(f"Step 2: 캐시 저장 완료 (키: {cache_key[:16]}...)")
                 
+                return portfolio_report
+                
+            except StreamSchemaError as e:
+                # 생성 도중 구조 오류 - 남은 출력 토큰을 낭비하지 않고 즉시 보정 재시도 (대기 없음)
+                logger.warning(f"Step 2: 구조 오류로 생성 중단 (시도 {attempt + 1}): {str(e)}")
+                emit("step2_aborted", attempt=attempt + 1, path=format_json_path(e.path))
+                correction = e.hint
+                if not await retry.backoff(e, correctable=True):
+                    raise ValueError(f"Step 2 JSON 생성 실패: {str(e)}")
+            except ValidationError as e:
+                # 전체 검증 실패 - 검증 오류를 프롬프트에 전달해 보정 재시도 (대기 없음, 같은 프롬프트 반복 없음)
+                logger.error(f"Step 2: Pydantic 검증 실패 - {str(e)}")
+                correction = str(e)[:_MAX_CORRECTION_LENGTH]
+                if not await retry.backoff(e, correctable=True):
+                    raise ValueError(f"JSON이 스키마와 일치하지 않습니다: {str(e)}")
             except Exception as e:
-                logger.error(f"Step 2 호출 실패 (시도 {attempt + 1}): {str(e)}")
-                if attempt == self.max_retries - 1:
+                if not await retry.backoff(e):
                     raise ValueError(f"Step 2 JSON 생성 실패: {str(e)}")
-                await asyncio.sleep(2 ** attempt)
 
+    async def _stream_step2_json(
+        self, prompt: str, config: GenerateContentConfig, models: Optional[List[str]] = None
+    ) -> str:
+        """
+        Step 2 스트리밍 호출 - 조각마다 ReportStreamGuard로 구조 검증
+        
+        구조 오류가 발견되면 스트림을 닫아 생성을 중단하고 StreamSchemaError를 전파합니다.
+        출력 길이 제한으로 중단되면 이어쓰기 응답을 같은 스캐너에 이어서 입력합니다.
+        
+        Returns:
+            str: 전체 응답 텍스트 (공백 제거)
+        """
+        scanner = IncrementalJsonScanner(STEP2_TABS_KEYS, on_value=ReportStreamGuard())
+        stream = self._stream_with_continuation([prompt], config, "step2", models=models)
+        try:
+            async for text in stream:
+                scanner.feed(text)
+        except StreamSchemaError:
+            logger.info(f"Step 2: 구조 오류 발견 시점까지 {len(scanner.text)}자 생성")
+            raise
+        finally:
+            await self._close_stream(stream)
+        return self._strip_trailing_fence(scanner.text)
+
+    async def _generate_with_continuation(
+        self, contents: List[Union[str, Part]], config: GenerateContentConfig, step: str,
+        models: Optional[List[str]] = None
+    ) -> str:
+        """
+        일괄 생성 호출 - finish_reason이 MAX_TOKENS이면 기존 출력을 모델 턴으로 넣어 이어쓰기 요청
+        
+        이미 생성된 출력은 다시 생성하지 않고 입력 컨텍스트로만 전달하며, 이어쓰기 결과는 중복을 제거해 이어 붙입니다.
+        
+        Returns:
+            str: 이어 붙인 전체 응답 텍스트 (응답이 없으면 빈 문자열)
+        """
+        models = models or self.models.route(step)
+        text = ""
+        request_contents: List[Any] = contents
+        request_config = config
+        for continuation in range(self.max_continuations + 1):
+            response = await self._generate_content_routed(
+                step,
+                models,
+                contents=request_contents,
+                config=request_config
+            )
+            piece = (getattr(response, "text", None) or "") if response else ""
+            text += self._trim_continuation(text, piece) if continuation else piece
+            
+            if not self._is_truncated(response) or not text:
+                break
+            if continuation == self.max_continuations:
+                logger.warning(f"{step}: 이어쓰기 {self.max_continuations}회 후에도 출력 길이 제한 도달 ({len(text)}자)")
+                break
+            logger.warning(
+                f"{step}: 출력 길이 제한으로 중단 ({len(text)}자) - 이어쓰기 요청 {continuation + 1}/{self.max_continuations}"
+            )
+            emit("continuation", step=step, count=continuation + 1, chars=len(text))
+            request_contents = self._continuation_contents(contents, text)
+            request_config = self._continuation_config(config)
+        return text
+
+    async def _stream_with_continuation(
+        self, contents: List[Union[str, Part]], config: GenerateContentConfig, step: str,
+        models: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        스트리밍 호출 - 텍스트 조각을 생성하고, MAX_TOKENS로 중단되면 이어쓰기 스트림을 이어서 생성
+        
+        이어쓰기 응답의 앞부분은 기존 출력과의 중복 제거를 위해 일정 길이만큼 모은 뒤 전달합니다.
+        호출 측은 중단 시 aclose()로 닫아야 진행 중인 스트림도 함께 종료됩니다.
+        """
+        models = models or self.models.route(step)
+        received = ""
+        request_contents: List[Any] = contents
+        request_config = config
+        for continuation in range(self.max_continuations + 1):
+            stream = self._stream_content_routed(
+                step,
+                models,
+                contents=request_contents,
+                config=request_config
+            )
+            truncated = False
+            pending: Optional[str] = "" if continuation else None
+            try:
+                async for chunk in stream:
+                    truncated = truncated or self._is_truncated(chunk)
+                    text = getattr(chunk, "text", None)
+                    if not text:
+                        continue
+                    if pending is not None:
+                        pending += text
+                        if len(pending) < _CONTINUATION_OVERLAP_WINDOW:
+                            continue
+                        text, pending = self._trim_continuation(received, pending), None
+                    received += text
+                    yield text
+                if pending:
+                    text = self._trim_continuation(received, pending)
+                    received += text
+                    yield text
+            finally:
+                await self._close_stream(stream)
+            
+            if not truncated or not received:
+                return
+            if continuation == self.max_continuations:
+                logger.warning(f"{step}: 이어쓰기 {self.max_continuations}회 후에도 출력 길이 제한 도달 ({len(received)}자)")
+                return
+            logger.warning(
+                f"{step}: 출력 길이 제한으로 중단 ({len(received)}자) - 이어쓰기 요청 {continuation + 1}/{self.max_continuations}"
+            )
+            emit("continuation", step=step, count=continuation + 1, chars=len(received))
+            request_contents = self._continuation_contents(contents, received)
+            request_config = self._continuation_config(config)
+
+    async def _generate_content(self, **kwargs) -> Any:
+        """Gemini 일괄 호출 - 회로 확인 → 승인 제어 슬롯 → RPM/TPM 예약 → API 키 배정 후 실행 (모든 generate_content 호출의 단일 경로)"""
+        breaker = self._breaker_for(kwargs.get("model"))
+        breaker.check()
+        estimate = estimate_request_tokens(kwargs.get("contents"), kwargs.get("config"))
+        async with self.admission.slot():
+            reservation = await self.rate_limiter.acquire(estimate)
+            with self._lease_key() as lease:
+                client = self._client_for(lease)
+                with breaker.guard():
+                    response = await self._call_with_prompt_cache(client, client.aio.models.generate_content, kwargs)
+                usage = usage_total_tokens(response)
+                if lease is not None:
+                    lease.record_usage(usage)
+            self.rate_limiter.reconcile(reservation, usage)
+            return response
+
+    async def _generate_content_stream(self, **kwargs) -> AsyncIterator[Any]:
+        """
+        Gemini 스트리밍 호출 - 스트림을 모두 읽거나 닫을 때까지 승인 제어 슬롯 점유
+        
+        슬롯 대기는 첫 조각을 요청할 때 시작되며, 호출 측은 중단 시 aclose()로 닫아야 슬롯이 즉시 반납됩니다.
+        회로 차단기의 지연 시간은 첫 조각까지의 시간으로 기록합니다.
+        키 풀 모드에서는 스트림이 끝날 때까지 같은 키를 사용합니다.
+        """
+        breaker = self._breaker_for(kwargs.get("model"))
+        breaker.check()
+        estimate = estimate_request_tokens(kwargs.get("contents"), kwargs.get("config"))
+        async with self.admission.slot():
+            reservation = await self.rate_limiter.acquire(estimate)
+            with self._lease_key() as lease, breaker.guard() as timer:
+                client = self._client_for(lease)
+                stream = await self._call_with_prompt_cache(client, client.aio.models.generate_content_stream, kwargs)
+                usage: Optional[int] = None
+                try:
+                    async for chunk in stream:
+                        timer.mark_first_byte(breaker.clock())
+                        usage = usage_total_tokens(chunk) or usage  # 사용량은 마지막 조각에 포함
+                        yield chunk
+                finally:
+                    await self._close_stream(stream)
+                    if lease is not None:
+                        lease.record_usage(usage)
+                    self.rate_limiter.reconcile(reservation, usage)
+
+    async def _call_with_prompt_cache(self, client: Any, call: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        """
+        고정 프롬프트를 캐시 참조로 바꿔 호출
+        
+        캐시 콘텐츠가 만료/삭제되어 거절되면 캐시를 버리고 원래 요청으로 한 번 더 호출합니다.
+        """
+        request = await self.prompt_cache.apply(client, kwargs)
+        if request is kwargs:
+            return await self._send(call, kwargs)
+        try:
+            return await self._send(call, request)
+        except Exception as e:
+            if not is_cache_reference_error(e):
+                raise
+            self.prompt_cache.invalidate(request["config"].cached_content)
+            return await self._send(call, kwargs)
+
+    @staticmethod
+    async def _send(call: Callable[..., Any], request: Dict[str, Any]) -> Any:
+        """Gemini API 요청 1건 전송 (작업별 요청 수 집계 중이면 1 증가)"""
+        calls = _api_call_count.get()
+        if calls is not None:
+            calls[0] += 1
+        return await call(**request)
+
+    def _register_cached_prompts(self) -> None:
+        """고정 프롬프트 레지스트리 적재 후 명시적 캐시 대상 등록 (그라운딩, 마크다운, JSON 변환/추출)"""
+        prompts = {
+            "grounding": self._get_grounding_prompt(),
+            "grounding_offline": self._get_offline_grounding_prompt(),
+            "markdown": self._get_portfolio_analysis_prompt(),
+            "markdown_multiple": self._get_multiple_image_prompt(),
+            "step2": self._get_json_generation_instructions(),
+            "extraction": self._get_structured_prompt(),
+        }
+        self._get_full_json_instructions()  # 형식 전환(벤치마크)에 대비해 두 Step 2 지시문 모두 적재
+        self._get_compact_json_instructions()
+        for name, text in prompts.items():
+            registered = self.prompts.get(self._step2_prompt_name() if name == "step2" else name)
+            self.prompt_cache.register(name, text, version=registered.version, tokens=registered.tokens)
+
+    def _breaker_for(self, model: Optional[str]) -> CircuitBreaker:
+        """모델의 회로 차단기 (라우팅 모델은 모델별, 그 밖에는 공용)"""
+        return self.models.breaker_for(model) or self.breaker
+
+    def _routed_calls_allowed(self, step: str, holdings: Optional[int] = None) -> bool:
+        """단계의 모델 체인(폴백 포함) 중 지금 호출을 시작할 수 있는 모델이 있는지"""
+        return any(
+            self._breaker_for(model).allows_calls() for model in self.models.route(step, holdings=holdings)
+        )
+
+    def _lease_key(self) -> ContextManager[Optional[KeyLease]]:
+        """호출 1건의 API 키 배정 (키 풀 모드가 아니면 None)"""
+        if self.key_pool is None:
+            return nullcontext()
+        return self.key_pool.lease()
+
+    def _client_for(self, lease: Optional[KeyLease]) -> Any:
+        """배정된 키의 클라이언트 (키 풀 모드가 아니면 단일 클라이언트)"""
+        return lease.client if lease is not None else self.client
+
+    def _has_spare_capacity(self, model: Optional[str] = None) -> bool:
+        """헤지 요청을 보낼 여유가 있는지 (승인 제어 빈 슬롯 + 호출할 모델의 회로 닫힘)"""
+        return (
+            self.admission.in_flight < self.admission.max_in_flight
+            and not self.admission.queue_depth
+            and self._breaker_for(model).allows_calls()
+        )
+
+    async def _generate_content_hedged(self, step: str, **kwargs) -> Any:
+        """(단계, 모델) 단위 헤지 적용 일괄 호출 (헤지 비활성 시 _generate_content와 동일)"""
+        if not self.hedging.enabled:
+            return await self._generate_content(**kwargs)
+        model = kwargs.get("model")
+        return await hedged_call(
+            self.hedging, step, lambda: self._generate_content(**kwargs),
+            can_hedge=lambda: self._has_spare_capacity(model), model=model
+        )
+
+    def _generate_content_stream_hedged(self, step: str, **kwargs) -> AsyncIterator[Any]:
+        """(단계, 모델) 단위 헤지 적용 스트리밍 호출 (첫 조각 기준, 헤지 비활성 시 _generate_content_stream과 동일)"""
+        if not self.hedging.enabled:
+            return self._generate_content_stream(**kwargs)
+        model = kwargs.get("model")
+        return hedged_stream(
+            self.hedging, step, lambda: self._generate_content_stream(**kwargs),
+            can_hedge=lambda: self._has_spare_capacity(model), model=model
+        )
+
+    async def _generate_content_routed(
+        self, step: str, models: List[str], config: Optional[GenerateContentConfig] = None,
+        hedge: bool = True, **kwargs
+    ) -> Any:
+        """
+        모델 체인 일괄 호출 - 과부하/할당량/회로 열림이면 대기 없이 다음 모델로 전환
+        
+        호출 설정에는 단계/모델별 사고 예산을 적용하고, 응답의 사고 토큰 사용량을 단계별로 집계합니다.
+        
+        Raises:
+            마지막 모델까지 실패하면 마지막 오류 (폴백 대상이 아닌 오류는 즉시 전파)
+        """
+        for index, model in enumerate(models):
+            model_config = self.models.configure(step, model, config)
+            try:
+                if hedge:
+                    response = await self._generate_content_hedged(step, model=model, config=model_config, **kwargs)
+                else:
+                    response = await self._generate_content(model=model, config=model_config, **kwargs)
+            except Exception as e:
+                if index + 1 >= len(models) or not is_fallback_error(e):
+                    raise
+                self.models.record_fallback(step, model, models[index + 1], e)
+                emit("model_fallback", step=step, model=models[index + 1])
+                continue
+            self.models.record_call(step, model)
+            self.models.record_usage(step, getattr(response, "usage_metadata", None))
+            return response
+
+    async def _stream_content_routed(
+        self, step: str, models: List[str], config: Optional[GenerateContentConfig] = None,
+        hedge: bool = True, **kwargs
+    ) -> AsyncIterator[Any]:
+        """
+        모델 체인 스트리밍 호출 - 첫 조각 전에 과부하/할당량/회로 열림이면 다음 모델로 전환
+        
+        첫 조각을 받은 뒤의 오류는 출력 중복을 막기 위해 전환하지 않고 그대로 전파합니다.
+        사고 예산 적용과 사고 토큰 집계는 일괄 호출과 같습니다 (사용량은 마지막 조각 기준).
+        """
+        for index, model in enumerate(models):
+            model_config = self.models.configure(step, model, config)
+            if hedge:
+                stream = self._generate_content_stream_hedged(step, model=model, config=model_config, **kwargs)
+            else:
+                stream = self._generate_content_stream(model=model, config=model_config, **kwargs)
+            usage = None
+            try:
+                try:
+                    first = await stream.__anext__()
+                except StopAsyncIteration:
+                    self.models.record_call(step, model)
+                    return
+                except Exception as e:
+                    if index + 1 >= len(models) or not is_fallback_error(e):
+                        raise
+                    self.models.record_fallback(step, model, models[index + 1], e)
+                    emit("model_fallback", step=step, model=models[index + 1])
+                    continue
+                self.models.record_call(step, model)
+                usage = getattr(first, "usage_metadata", None)
+                yield first
+                async for chunk in stream:
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    yield chunk
+                return
+            finally:
+                await self._close_stream(stream)
+                self.models.record_usage(step, usage)
+
+    @staticmethod
+    def _is_truncated(response: Any) -> bool:
+        """응답(또는 스트림 조각)의 finish_reason이 MAX_TOKENS인지 확인"""
+        try:
+            candidates = getattr(response, "candidates", None)
+            if not candidates:
+                return False
+            return candidates[0].finish_reason == FinishReason.MAX_TOKENS
+        except (TypeError, IndexError, AttributeError):
+            return False
+
+    @staticmethod
+    def _continuation_contents(contents: List[Union[str, Part]], partial: str) -> List[Content]:
+        """이어쓰기 요청 대화 구성: 원래 요청(user) → 중단된 출력(model) → 이어쓰기 지시(user)"""
+        user_parts = [Part.from_text(text=item) if isinstance(item, str) else item for item in contents]
+        return [
+            Content(role="user", parts=user_parts),
+            Content(role="model", parts=[Part.from_text(text=partial)]),
+            Content(role="user", parts=[Part.from_text(text=_CONTINUATION_PROMPT)]),
+        ]
+
+    @staticmethod
+    def _continuation_config(config: GenerateContentConfig) -> GenerateContentConfig:
+        """이어쓰기 설정 - JSON 모드는 완결된 문서만 생성하므로 해제 (조각은 이어 붙인 뒤 검증)"""
+        return config.model_copy(update={"response_mime_type": None})
+
+    @staticmethod
+    def _trim_continuation(received: str, continuation: str) -> str:
+        """이어쓰기 응답에서 앞쪽 코드 블록 표시와 기존 출력 끝부분과의 중복 제거"""
+        text = continuation
+        if text.lstrip().startswith("```"):
+            text = text.lstrip().split("\n", 1)[1] if "\n" in text.lstrip() else ""
+        max_overlap = min(len(received), len(text), _CONTINUATION_OVERLAP_WINDOW)
+        for size in range(max_overlap, _MIN_CONTINUATION_OVERLAP - 1, -1):
+            if received.endswith(text[:size]):
+                return text[size:]
+        return text
+
+    @staticmethod
+    def _strip_trailing_fence(text: str) -> str:
+        """이어쓰기 응답 끝에 붙은 코드 블록 표시 제거"""
+        text = text.strip()
+        if text.endswith("```"):
+            text = text[:-3].rstrip()
+        return text
+
+    @staticmethod
+    async def _close_stream(stream: Any) -> None:
+        """스트리밍 응답 종료 (연결을 닫아 남은 생성 중단)"""
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            try:
+                await aclose()
+            except Exception as e:
+                logger.debug(f"스트림 종료 중 오류 무시: {str(e)}")
+
+    @registered_prompt("extraction")
     def _get_structured_prompt(self) -> str:
         """구조화된 JSON 출력용 프롬프트 (순수 JSON + 태그 래핑)"""
         return """
@@ -998,20 +2124,20 @@ class GeminiService:
 
     async def _call_gemini_structured(self, image_data_list: List[bytes]) -> PortfolioReport:
         """Gemini API 구조화된 출력 호출 (JSON 모드: 서버에서 Pydantic 검증)"""
-        for attempt in range(self.max_retries):
+        retry = self.retry_policy.attempts("구조화된 출력 호출", max_attempts=self.max_retries)
+        for attempt in retry:
             try:
                 logger.info(
                     f"Gemini API 구조화된 출력 호출 시도 {attempt + 1}/{self.max_retries}"
                 )
 
-                contents: List[Union[str, Part]] = []
-                # 1) 이미지 파트
+                # 1) 프롬프트 (고정 접두부, 암묵적 캐시)
+                contents: List[Union[str, Part]] = [self._get_structured_prompt()]
+                # 2) 이미지 파트
                 for i, image_data in enumerate(image_data_list):
                     image_part = Part.from_bytes(data=image_data, mime_type="image/jpeg")
                     contents.append(image_part)
                     logger.debug(f"구조화: 이미지 {i+1}/{len(image_data_list)} 추가")
-                # 2) 프롬프트
-                contents.append(self._get_structured_prompt())
 
                 # 3) Google Search 도구
                 from google.genai import types
@@ -1025,8 +2151,8 @@ class GeminiService:
                 )
 
                 # 5) API 호출
-                response = self.client.models.generate_content(
-                    model=self.model_name, contents=contents, config=config
+                response = await self._generate_content_routed(
+                    "extraction", self.models.route("extraction"), hedge=False, contents=contents, config=config
                 )
 
                 # 6) JSON 텍스트 파싱 및 Pydantic 검증
@@ -1059,6 +2185,7 @@ class GeminiService:
                     try:
                         portfolio_report = PortfolioReport.model_validate_json(response_text)
                         logger.info("PortfolioReport 검증 성공")
+                        self._annotate_tickers(portfolio_report)
                         return portfolio_report
                     except Exception as validation_error:
                         logger.error(f"Pydantic 검증 실패: {str(validation_error)}")
@@ -1069,32 +2196,53 @@ class GeminiService:
                             f"Gemini 응답이 스키마와 일치하지 않습니다: {str(validation_error)}"
                         )
 
-                raise ValueError("Gemini API에서 JSON 응답을 받지 못했습니다.")
+                raise RetryableResponseError("Gemini API에서 JSON 응답을 받지 못했습니다.")
 
             except Exception as e:
-                logger.error(f"구조화된 출력 호출 실패 (시도 {attempt + 1}): {str(e)}")
-                if attempt == self.max_retries - 1:
+                if not await retry.backoff(e):
                     raise
-                await asyncio.sleep(2 ** attempt)
 
-    async def analyze_portfolio_structured(
-        self, image_data_list: List[bytes], format_type: str = "json"
-    ) -> Union[StructuredAnalysisResponse, AnalysisResponse]:
+    def _generate_report_cache_key(self, image_data_list: List[bytes], format_type: str) -> str:
         """
-        포트폴리오 분석 - format에 따라 JSON 또는 마크다운 반환
-        JSON 모드 시 Two-step 전략 사용: 검색·그라운딩 → 구조화 JSON
+        최종 리포트(응답 단위) 캐시 키 생성 - stale-while-revalidate 대상
+        
+        리포트를 만든 단계의 프롬프트 버전을 포함하여, 프롬프트 문구를 고치면 해당 형식의 리포트만 새로 생성됩니다.
         """
-        start_time = time.time()
-        request_id = str(uuid.uuid4())
-
-        # 입력 검증
-        if not image_data_list or len(image_data_list) == 0:
-            raise ValueError("분석할 이미지가 없습니다.")
-        if len(image_data_list) > 5:
-            raise ValueError("최대 5개의 이미지만 분석 가능합니다.")
-        for i, image_data in enumerate(image_data_list):
-            await validate_image(image_data)
-
+        if format_type == "json":
+            version = self.prompts.version("grounding", "grounding_offline", self._step2_prompt_name())
+            version += "c" if self.compact_facts else "r"
+        else:
+            version = self.prompts.version("markdown" if len(image_data_list) == 1 else "markdown_multiple")
+        return f"report_{format_type}_{self._generate_multiple_cache_key(image_data_list)}@{version}"
+
+    async def _compute_report_payload(
+        self,
+        image_data_list: List[bytes],
+        format_type: str,
+        on_grounded: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        리포트 생성 후 리포트 캐시에 저장
+        
+        Args:
+            on_grounded: JSON 모드에서 Step 1 완료 직후 그라운딩 마크다운을 받는 콜백 (미리보기용)
+        
+        Returns:
+            str: JSON 모드는 PortfolioReport JSON 문자열, 마크다운 모드는 마크다운 텍스트
+        """
+        # 요청 1건의 모든 재시도(Step 1 + Step 2)가 하나의 재시도 예산/마감을 공유
+        with self.retry_policy.request_scope():
+            payload = await self._generate_report_payload(image_data_list, format_type, on_grounded)
+        self._cache[self._generate_report_cache_key(image_data_list, format_type)] = payload
+        return payload
+
+    async def _generate_report_payload(
+        self,
+        image_data_list: List[bytes],
+        format_type: str,
+        on_grounded: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """_compute_report_payload 본문 (캐시 저장 전)"""
         if format_type == "json":
             try:
                 logger.info("=== Two-step JSON 생성 시작 ===")
@@ -1103,6 +2251,8 @@ class GeminiService:
                 logger.info("Step 1: 검색·그라운딩 호출")
                 grounded_facts = await self._generate_grounded_facts(image_data_list)
                 logger.info(f"Step 1 완료 - 구조화된 데이터 길이: {len(grounded_facts)}자")
+                if on_grounded is not None:
+                    on_grounded(grounded_facts)
                 
                 # Step 2: 구조화된 JSON 생성 (Step 1 결과를 컨텍스트로)
                 logger.info("Step 2: JSON 스키마 생성 호출")
@@ -1116,28 +2266,138 @@ class GeminiService:
                 logger.error(f"Two-step JSON 생성 실패: {str(ve)}")
                 raise ValueError("AI 응답이 예상 형식과 다릅니다. 다시 시도해 주세요.")
             
-            return StructuredAnalysisResponse(
-                portfolioReport=portfolio_report,
-                processing_time=time.time() - start_time,
-                request_id=request_id,
-                images_processed=len(image_data_list),
-            )
+            payload = portfolio_report.model_dump_json()
         else:
             # 기존 마크다운 출력 재사용 (변경 없음)
             if len(image_data_list) == 1:
-                markdown_content = await self.analyze_portfolio_image(
+                payload = await self.analyze_portfolio_image(
                     image_data_list[0], use_cache=True
                 )
             else:
-                markdown_content = await self.analyze_multiple_portfolio_images(
+                payload = await self.analyze_multiple_portfolio_images(
                     image_data_list
                 )
-            return AnalysisResponse(
-                content=markdown_content,
+        return payload
+
+    def _schedule_report_refresh(self, image_data_list: List[bytes], format_type: str) -> None:
+        """유예 구간 리포트의 백그라운드 갱신 예약 (키당 1개만 실행, 라우팅 모델의 회로가 모두 열려 있으면 생략)"""
+        report_key = self._generate_report_cache_key(image_data_list, format_type)
+        holdings = self._holdings_for_images(image_data_list)
+        steps = ("step1", "step2") if format_type == "json" else ("markdown",)
+        blocked = [step for step in steps if not self._routed_calls_allowed(step, holdings)]
+        if blocked:
+            logger.info(
+                f"Gemini 회로 열림({', '.join(blocked)}) - 유예 구간 결과만 제공하고 백그라운드 갱신 생략 "
+                f"(키: {report_key[:24]}...)"
+            )
+            return
+        running = self._refresh_tasks.get(report_key)
+        if running is not None and not running.done():
+            logger.info(f"리포트 백그라운드 갱신 이미 진행 중 (키: {report_key[:24]}...)")
+            return
+        
+        async def _refresh() -> None:
+            # 백그라운드 갱신은 최초 요청의 진행 이벤트 채널과 분리
+            bind_request(None)
+            try:
+                await self._compute_report_payload(image_data_list, format_type)
+                logger.info(f"리포트 백그라운드 갱신 완료 (키: {report_key[:24]}...)")
+            except Exception as e:
+                # 갱신 실패 시 기존 항목은 하드 만료까지 유예 구간으로 계속 제공
+                logger.warning(f"리포트 백그라운드 갱신 실패 (키: {report_key[:24]}...): {str(e)}")
+            finally:
+                self._refresh_tasks.pop(report_key, None)
+        
+        self._refresh_tasks[report_key] = asyncio.create_task(_refresh())
+        logger.info(f"리포트 백그라운드 갱신 예약 (키: {report_key[:24]}...)")
+
+    async def analyze_portfolio_structured(
+        self,
+        image_data_list: List[bytes],
+        format_type: str = "json",
+        request_id: Optional[str] = None,
+        on_grounded: Optional[Callable[[str], None]] = None
+    ) -> Union[StructuredAnalysisResponse, AnalysisResponse]:
+        """
+        포트폴리오 분석 - format에 따라 JSON 또는 마크다운 반환
+        JSON 모드 시 Two-step 전략 사용: 검색·그라운딩 → 구조화 JSON
+        
+        리포트 캐시는 stale-while-revalidate로 동작합니다:
+        - 신선 구간: 캐시 결과 즉시 반환
+        - 유예 구간: 기존 결과를 stale=True로 즉시 반환하고 백그라운드 갱신 1회 예약
+        - 하드 만료 이후: 동기적으로 다시 생성
+        
+        진행 이벤트는 request_id 채널로 발행됩니다 (GET /api/analyze/{request_id}/events).
+        on_grounded는 JSON 모드에서 Step 1을 새로 실행(또는 Step 1 캐시 적중)할 때 그라운딩 마크다운으로 호출됩니다.
+        """
+        start_time = time.time()
+        request_id = request_id or str(uuid.uuid4())
+        token = bind_request(request_id)
+        try:
+            response = await self._analyze_portfolio_structured(
+                image_data_list, format_type, request_id, start_time, on_grounded
+            )
+            emit("completed", processing_time=round(response.processing_time, 3), stale=response.stale)
+            return response
+        except Exception as e:
+            emit("failed", error=describe_job_error(e))
+            raise
+        finally:
+            reset_request(token)
+
+    async def _analyze_portfolio_structured(
+        self,
+        image_data_list: List[bytes],
+        format_type: str,
+        request_id: str,
+        start_time: float,
+        on_grounded: Optional[Callable[[str], None]] = None
+    ) -> Union[StructuredAnalysisResponse, AnalysisResponse]:
+        """analyze_portfolio_structured 본문 (진행 이벤트 채널 바인딩 이후 실행)"""
+        # 입력 검증
+        if not image_data_list or len(image_data_list) == 0:
+            raise ValueError("분석할 이미지가 없습니다.")
+        if len(image_data_list) > 5:
+            raise ValueError("최대 5개의 이미지만 분석 가능합니다.")
+        for i, image_data in enumerate(image_data_list):
+            await validate_image(image_data)
+        emit("ingest", images=len(image_data_list), total_bytes=sum(len(data) for data in image_data_list))
+
+        report_key = self._generate_report_cache_key(image_data_list, format_type)
+        cached = self._cache.lookup(report_key)
+        stale = False
+        if cached is not None and cached[1] == CACHE_FRESH:
+            logger.info(f"리포트 캐시 적중 (format: {format_type})")
+            emit("cache_hit", level="report", state=cached[1])
+            payload = cached[0]
+        elif cached is not None:
+            logger.info(
+                f"리포트 캐시 유예 구간 적중 (format: {format_type}, "
+                f"경과 {self._cache.age(report_key):.0f}초) - 기존 결과 반환 후 백그라운드 갱신"
+            )
+            emit("cache_hit", level="report", state=cached[1])
+            payload = cached[0]
+            stale = True
+            self._schedule_report_refresh(image_data_list, format_type)
+        else:
+            payload = await self._compute_report_payload(image_data_list, format_type, on_grounded=on_grounded)
+
+        self._record_popularity(image_data_list)
+        if format_type == "json":
+            return StructuredAnalysisResponse(
+                portfolioReport=PortfolioReport.model_validate_json(payload),
                 processing_time=time.time() - start_time,
                 request_id=request_id,
                 images_processed=len(image_data_list),
+                stale=stale,
             )
+        return AnalysisResponse(
+            content=payload,
+            processing_time=time.time() - start_time,
+            request_id=request_id,
+            images_processed=len(image_data_list),
+            stale=stale,
+        )
 
 # 싱글톤 인스턴스
 _gemini_service: Optional[GeminiService] = None
@@ -0,0 +1,267 @@
+"""
+Gemini 헤지 요청 (hedged requests) - 꼬리 지연 시간 단축
+
+이 모듈은 Step 1/Step 2 호출이 최근 지연 시간의 백분위수(GEMINI_HEDGE_PERCENTILE)를 넘도록 끝나지 않으면
+같은 요청을 한 번 더 보내고, 먼저 성공한 응답을 사용한 뒤 나머지 호출은 취소합니다.
+
+- 일괄 호출은 응답 완료까지, 스트리밍 호출은 첫 조각까지의 시간을 기준으로 합니다.
+  (스트리밍은 출력 도중 다른 스트림으로 바꿀 수 없으므로 첫 조각을 먼저 받은 스트림이 승자)
+- 지연 시간 표본은 (단계, 모델)별로 모읍니다. 폴백·소형 모델은 지연 분포가 달라 기준을 섞지 않습니다.
+- (단계, 모델)별 표본이 GEMINI_HEDGE_MIN_SAMPLES개 미만이면 헤지하지 않습니다.
+- 분당 헤지 수(GEMINI_HEDGE_BUDGET)를 넘지 않도록 제한하여 추가 할당량 사용을 제한합니다.
+- 승인 제어에 여유 슬롯이 없거나 해당 모델의 회로가 열려 있으면 헤지하지 않습니다 (호출 측 can_hedge).
+"""
+
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import deque, Counter
+from typing import Optional, Dict, List, Any, Callable, Deque, Awaitable, AsyncIterator, TypeVar, Tuple
+
+from services.progress_events import emit
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+GEMINI_HEDGE_ENABLED = os.getenv("GEMINI_HEDGE_ENABLED", "false").lower() == "true"  # 헤지 사용 여부
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "0.95"))  # 헤지 시작 지연 백분위수
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))  # 단계별 최소 표본 수
+GEMINI_HEDGE_MIN_DELAY = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", "1"))  # 헤지 시작 최소 대기 (초)
+GEMINI_HEDGE_BUDGET = int(os.getenv("GEMINI_HEDGE_BUDGET", "10"))  # 분당 헤지 요청 수
+
+# (단계, 모델)별 지연 시간 표본 수
+_SAMPLE_SIZE = 256
+
+# 스트림 종료 표시 (첫 조각 없이 끝난 스트림)
+_END = object()
+
+T = TypeVar("T")
+
+
+def _percentile(samples, ratio: float) -> float:
+    """표본 백분위수 (최근접 순위)"""
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, int(math.ceil(ratio * len(ordered))) - 1))]
+
+
+class HedgePolicy:
+    """단계별 지연 시간 백분위수 기반 헤지 정책 + 분당 헤지 예산"""
+
+    def __init__(
+        self,
+        enabled: bool = GEMINI_HEDGE_ENABLED,
+        percentile: float = GEMINI_HEDGE_PERCENTILE,
+        min_samples: int = GEMINI_HEDGE_MIN_SAMPLES,
+        min_delay: float = GEMINI_HEDGE_MIN_DELAY,
+        budget_per_minute: int = GEMINI_HEDGE_BUDGET,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = max(1, min_samples)
+        self.min_delay = min_delay
+        self.budget_per_minute = budget_per_minute
+        self.clock = clock
+        self._latencies: Dict[Tuple[str, Optional[str]], Deque[float]] = {}  # (단계, 모델) → 지연 시간
+        self._hedge_times: Deque[float] = deque()
+        # 지표
+        self.hedged: Counter = Counter()
+        self.hedge_wins: Counter = Counter()
+        self.denied = 0
+
+    def hedge_delay(self, step: str, model: Optional[str] = None) -> Optional[float]:
+        """(단계, 모델) 헤지 시작 대기 시간 (표본 부족 시 None)"""
+        samples = self._latencies.get((step, model))
+        if not samples or len(samples) < self.min_samples:
+            return None
+        return max(self.min_delay, _percentile(samples, self.percentile))
+
+    def record(self, step: str, latency: float, model: Optional[str] = None) -> None:
+        self._latencies.setdefault((step, model), deque(maxlen=_SAMPLE_SIZE)).append(latency)
+
+    def try_acquire(self, step: str) -> bool:
+        """분당 헤지 예산 사용 (소진 시 False)"""
+        now = self.clock()
+        while self._hedge_times and now - self._hedge_times[0] >= 60.0:
+            self._hedge_times.popleft()
+        if len(self._hedge_times) >= self.budget_per_minute:
+            self.denied += 1
+            return False
+        self._hedge_times.append(now)
+        self.hedged[step] += 1
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """단계별 헤지 횟수와 모델별 헤지 기준 (지연 시간은 밀리초)"""
+        steps: Dict[str, Dict[str, Any]] = {}
+        for (step, model), samples in self._latencies.items():
+            entry = steps.setdefault(step, {
+                "hedged": self.hedged[step], "hedge_wins": self.hedge_wins[step], "models": {}
+            })
+            delay = self.hedge_delay(step, model)
+            entry["models"][model or "default"] = {
+                "samples": len(samples),
+                "hedge_after_ms": round(delay * 1000, 1) if delay is not None else None,
+            }
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "budget_per_minute": self.budget_per_minute,
+            "hedged": sum(self.hedged.values()),
+            "hedge_wins": sum(self.hedge_wins.values()),
+            "budget_denied": self.denied,
+            "steps": steps,
+        }
+
+
+async def _timed(call: Callable[[], Awaitable[T]], clock: Callable[[], float]) -> Tuple[T, float]:
+    started = clock()
+    result = await call()
+    return result, clock() - started
+
+
+async def _first_chunk(stream: AsyncIterator[Any], clock: Callable[[], float]) -> Tuple[Any, float]:
+    started = clock()
+    try:
+        chunk = await stream.__anext__()
+    except StopAsyncIteration:
+        chunk = _END
+    return chunk, clock() - started
+
+
+async def _race(
+    policy: HedgePolicy,
+    step: str,
+    start: Callable[[], "asyncio.Future"],
+    can_hedge: Optional[Callable[[], bool]],
+    model: Optional[str] = None
+) -> Tuple["asyncio.Future", Dict["asyncio.Future", bool]]:
+    """
+    기본 호출 후 헤지 대기 시간이 지나면 헤지 호출 시작 - 먼저 성공한 태스크 반환
+
+    Returns:
+        (승자 태스크, 전체 태스크 → 헤지 여부)
+
+    Raises:
+        모든 호출이 실패하면 기본 호출의 예외
+    """
+    primary = start()
+    tasks: Dict[asyncio.Future, bool] = {primary: False}
+    delay = policy.hedge_delay(step, model)
+    if delay is not None:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if not done and (can_hedge is None or can_hedge()) and policy.try_acquire(step):
+            logger.info(f"{step}: {delay:.2f}초 내 응답 없음 - 헤지 요청 시작")
+            emit("hedge", step=step, after=round(delay, 2))
+            tasks[start()] = True
+
+    errors: Dict[bool, BaseException] = {}
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in sorted(done, key=lambda t: tasks[t]):  # 동시에 끝나면 기본 호출 우선
+            if task.exception() is None:
+                return task, tasks
+            errors[tasks[task]] = task.exception()
+    raise errors.get(False) or errors[True]
+
+
+async def _cancel(tasks) -> None:
+    """진행 중인 태스크 취소 후 정리 완료까지 대기"""
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def hedged_call(
+    policy: HedgePolicy,
+    step: str,
+    call: Callable[[], Awaitable[T]],
+    can_hedge: Optional[Callable[[], bool]] = None,
+    model: Optional[str] = None
+) -> T:
+    """일괄 호출 헤지 - 먼저 성공한 응답 반환, 나머지 호출 취소 (지연 시간 기준은 (step, model)별)"""
+    tasks: List[asyncio.Future] = []
+
+    def start() -> asyncio.Future:
+        tasks.append(asyncio.ensure_future(_timed(call, policy.clock)))
+        return tasks[-1]
+
+    try:
+        winner, labels = await _race(policy, step, start, can_hedge, model)
+        result, latency = winner.result()
+        policy.record(step, latency, model)
+        if labels[winner]:
+            policy.hedge_wins[step] += 1
+            logger.info(f"{step}: 헤지 요청이 먼저 응답 ({latency:.2f}초)")
+        return result
+    finally:
+        await _cancel(tasks)
+
+
+async def hedged_stream(
+    policy: HedgePolicy,
+    step: str,
+    open_stream: Callable[[], AsyncIterator[Any]],
+    can_hedge: Optional[Callable[[], bool]] = None,
+    model: Optional[str] = None
+) -> AsyncIterator[Any]:
+    """스트리밍 호출 헤지 - 첫 조각을 먼저 받은 스트림을 끝까지 전달, 나머지 스트림은 닫음 (기준은 (step, model)별)"""
+    streams: Dict[asyncio.Future, AsyncIterator[Any]] = {}
+
+    def start() -> asyncio.Future:
+        stream = open_stream()
+        task = asyncio.ensure_future(_first_chunk(stream, policy.clock))
+        streams[task] = stream
+        return task
+
+    winner_stream: Optional[AsyncIterator[Any]] = None
+    try:
+        try:
+            winner, labels = await _race(policy, step, start, can_hedge, model)
+            winner_stream = streams.pop(winner)
+        finally:
+            # 패자 스트림 정리 (첫 조각 대기 중이면 취소 후 닫기)
+            await _cancel(list(streams))
+            for stream in streams.values():
+                await _aclose(stream)
+
+        chunk, latency = winner.result()
+        policy.record(step, latency, model)
+        if labels[winner]:
+            policy.hedge_wins[step] += 1
+            logger.info(f"{step}: 헤지 스트림이 먼저 첫 조각 수신 ({latency:.2f}초)")
+        if chunk is _END:
+            return
+        yield chunk
+        async for chunk in winner_stream:
+            yield chunk
+    finally:
+        if winner_stream is not None:
+            await _aclose(winner_stream)
+
+
+async def _aclose(stream: Any) -> None:
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+# 싱글톤 인스턴스
+_hedge_policy: Optional[HedgePolicy] = None
+
+
+def get_hedge_policy() -> HedgePolicy:
+    """HedgePolicy 싱글톤 인스턴스 반환"""
+    global _hedge_policy
+    if _hedge_policy is None:
+        _hedge_policy = HedgePolicy()
+    return _hedge_policy
+
+
+def peek_hedge_policy() -> Optional[HedgePolicy]:
+    """생성된 HedgePolicy 반환 (없으면 None, 헬스 체크용)"""
+    return _hedge_policy
@@ -0,0 +1,282 @@
+"""
+비동기 분석 작업 관리 - 제한된 워커 풀
+
+이 모듈은 장시간 실행되는 Two-step 분석을 HTTP 연결과 분리하기 위한 작업 큐를 제공합니다.
+작업은 고정 크기 워커 풀에서 실행되며, 대기 큐가 가득 차면 즉시 거절되어
+API 응답 지연이 Gemini 지연과 무관하게 유지됩니다.
+
+작업 상태는 프로세스 메모리에 보관하므로 서버는 단일 프로세스(uvicorn 워커 1개)로 실행해야 합니다.
+여러 워커로 실행하면 GET/DELETE /api/analyze/jobs/{job_id}가 작업을 등록하지 않은 워커로 전달되어 404가 됩니다.
+시작 시 WEB_CONCURRENCY와 호스트 단위 잠금 파일(JOB_LOCK_PATH)로 두 번째 워커를 감지해 시작을 거부합니다.
+동시 처리량은 JOB_WORKERS(프로세스 내 작업 워커 수)로 조절하세요.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+import tempfile
+from typing import Optional, Dict, List, Any, Callable, Awaitable, IO
+
+try:
+    import fcntl
+except ImportError:  # Windows - 잠금 파일 확인 생략 (WEB_CONCURRENCY만 확인)
+    fcntl = None
+
+from models.portfolio import AnalysisStatus
+from services.errors import GeminiCapacityError
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # 동시 실행 작업 수
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "20"))  # 대기 큐 최대 길이
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))  # 종료된 작업 보관 시간 (초)
+JOB_LOCK_PATH = os.getenv(
+    "JOB_LOCK_PATH", os.path.join(tempfile.gettempdir(), "portfolio-analysis-jobs.lock")
+)  # 단일 워커 확인용 잠금 파일 (빈 값이면 확인 생략)
+
+FINISHED_STATUSES = {AnalysisStatus.COMPLETED, AnalysisStatus.FAILED, AnalysisStatus.CANCELLED}
+
+
+class JobQueueFullError(Exception):
+    """작업 대기 큐 초과"""
+
+    def __init__(self, message: str, retry_after: int = 30):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class MultipleWorkersError(RuntimeError):
+    """작업 관리자가 두 번째 서버 프로세스에서 시작됨 (작업 상태는 프로세스 메모리에 보관)"""
+
+
+class AnalysisJob:
+    """분석 작업 상태"""
+
+    def __init__(self, runner: Callable[["AnalysisJob"], Awaitable[Any]], format_type: str):
+        self.job_id = str(uuid.uuid4())
+        self.format_type = format_type
+        self.status = AnalysisStatus.PENDING
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.preview: Optional[str] = None  # 최종 결과 전 미리보기 (JSON 모드의 Step 1 마크다운)
+        self.preview_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._runner: Optional[Callable[["AnalysisJob"], Awaitable[Any]]] = runner
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def set_preview(self, preview: str) -> None:
+        """미리보기 기록 (종료된 작업은 무시)"""
+        if self.finished:
+            return
+        self.preview = preview
+        self.preview_at = time.time()
+        logger.info(f"분석 작업 미리보기 준비 (작업 ID: {self.job_id}, {len(preview)}자)")
+
+    def _finish(self, status: AnalysisStatus) -> None:
+        self.status = status
+        self.finished_at = time.time()
+        self._runner = None  # 이미지 데이터 등 클로저 참조 해제
+        self._task = None
+
+
+def describe_job_error(exc: Exception) -> str:
+    """작업 실패 사유를 사용자 메시지로 변환 (POST /api/analyze 오류 매핑과 동일)"""
+    if isinstance(exc, TimeoutError):
+        return "분석 요청 시간이 초과되었습니다. 잠시 후 다시 시도해 주세요."
+    if isinstance(exc, (ValueError, GeminiCapacityError)):
+        return str(exc)
+    return "AI 분석 서비스에 일시적인 문제가 있습니다. 잠시 후 다시 시도해 주세요."
+
+
+class JobManager:
+    """제한된 워커 풀 기반 작업 관리자"""
+
+    def __init__(
+        self,
+        max_workers: int = JOB_WORKERS,
+        max_queue: int = JOB_QUEUE_SIZE,
+        result_ttl: int = JOB_RESULT_TTL
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock_file: Optional[IO] = None
+
+    def claim_single_worker(self, lock_path: Optional[str] = JOB_LOCK_PATH) -> None:
+        """
+        단일 서버 프로세스 확인 (앱 시작 시 호출, 종료 시 shutdown()에서 잠금 해제)
+
+        Raises:
+            MultipleWorkersError: WEB_CONCURRENCY가 2 이상이거나 같은 호스트의 다른 프로세스가 잠금을 보유한 경우
+        """
+        workers = int(os.getenv("WEB_CONCURRENCY", "1") or "1")
+        if workers > 1:
+            raise MultipleWorkersError(
+                f"분석 작업 상태는 프로세스 메모리에 보관되어 서버 워커는 1개여야 합니다 (WEB_CONCURRENCY={workers}). "
+                "동시 처리량은 JOB_WORKERS로 조절하세요."
+            )
+        if fcntl is None or not lock_path or self._lock_file is not None:
+            return
+        lock_file = open(lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise MultipleWorkersError(
+                f"다른 서버 프로세스가 분석 작업 잠금({lock_path})을 보유 중입니다. "
+                "분석 작업 상태는 프로세스 메모리에 보관되어 서버 워커는 1개여야 합니다 (--workers 1)."
+            )
+        self._lock_file = lock_file
+
+    def _release_single_worker(self) -> None:
+        """단일 프로세스 잠금 해제"""
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _ensure_workers(self) -> None:
+        """현재 이벤트 루프에 워커 풀 준비 (지연 시작)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.max_workers)
+        ]
+        logger.info(f"작업 워커 풀 시작 - 워커 {self.max_workers}개, 대기 큐 {self.max_queue}개")
+
+    async def submit(
+        self, runner: Callable[[AnalysisJob], Awaitable[Any]], format_type: str = "json"
+    ) -> AnalysisJob:
+        """
+        작업 등록
+
+        Args:
+            runner: 작업 본문 (AnalysisJob을 받아 결과를 반환하는 코루틴 함수)
+            format_type: 출력 형식
+
+        Raises:
+            JobQueueFullError: 대기 큐가 가득 찬 경우
+        """
+        self._prune()
+        self._ensure_workers()
+
+        job = AnalysisJob(runner, format_type)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError("분석 요청이 많아 대기열이 가득 찼습니다. 잠시 후 다시 시도해 주세요.")
+
+        self._jobs[job.job_id] = job
+        logger.info(f"분석 작업 등록 (작업 ID: {job.job_id}, 대기 {self._queue.qsize()}개)")
+        return job
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        """작업 조회"""
+        return self._jobs.get(job_id)
+
+    def queue_position(self, job: AnalysisJob) -> Optional[int]:
+        """대기 중인 작업의 대기 순번 (1부터)"""
+        if job.status != AnalysisStatus.PENDING:
+            return None
+        pending = [j for j in self._jobs.values() if j.status == AnalysisStatus.PENDING]
+        pending.sort(key=lambda j: j.created_at)
+        return pending.index(job) + 1
+
+    def cancel(self, job_id: str) -> Optional[AnalysisJob]:
+        """
+        작업 취소 (대기 중이면 건너뛰고, 실행 중이면 태스크 취소)
+
+        Returns:
+            Optional[AnalysisJob]: 작업 (없으면 None). 이미 종료된 작업은 상태 변경 없음
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job._task is not None:
+            job._task.cancel()
+        job._finish(AnalysisStatus.CANCELLED)
+        logger.info(f"분석 작업 취소 (작업 ID: {job_id})")
+        return job
+
+    async def _worker(self, index: int) -> None:
+        """작업 실행 워커"""
+        while True:
+            job: AnalysisJob = await self._queue.get()
+            try:
+                if job.finished:
+                    continue  # 대기 중 취소된 작업
+
+                job.status = AnalysisStatus.PROCESSING
+                job.started_at = time.time()
+                job._task = asyncio.create_task(job._runner(job))
+                try:
+                    result = await job._task
+                except asyncio.CancelledError:
+                    if job.status == AnalysisStatus.CANCELLED:
+                        continue
+                    raise  # 워커 자체 종료
+                except Exception as e:
+                    logger.error(f"분석 작업 실패 (작업 ID: {job.job_id}): {str(e)}")
+                    job.error = describe_job_error(e)
+                    job._finish(AnalysisStatus.FAILED)
+                    continue
+
+                if not job.finished:
+                    job.result = result
+                    job._finish(AnalysisStatus.COMPLETED)
+                    logger.info(
+                        f"분석 작업 완료 (작업 ID: {job.job_id}, "
+                        f"{job.finished_at - job.started_at:.2f}초, 워커 {index})"
+                    )
+            finally:
+                self._queue.task_done()
+
+    def _prune(self) -> None:
+        """보관 시간이 지난 종료 작업 제거"""
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def shutdown(self) -> None:
+        """워커 풀 종료 (실행 중 작업 취소)"""
+        for job in list(self._jobs.values()):
+            if not job.finished:
+                self.cancel(job.job_id)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+        self._release_single_worker()
+
+
+# 싱글톤 인스턴스
+_job_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """JobManager 싱글톤 인스턴스 반환"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = JobManager()
+    return _job_manager
@@ -0,0 +1,233 @@
+"""
+Gemini API 키 풀 - 키별 클라이언트, 최소 부하 배정, 할당량 초과 키 일시 제외
+
+이 모듈은 GEMINI_API_KEYS(쉼표 구분)에 여러 키가 지정되면 키마다 genai.Client를 하나씩 만들고,
+모든 Gemini 호출을 그중 가장 여유 있는 키로 배정합니다. 할당량은 키(프로젝트) 단위이므로
+키를 추가한 만큼 처리량이 늘어납니다.
+
+- 배정: 사용 가능한 키 중 진행 중 호출 수 → 최근 1분 토큰 사용량 → 최근 1분 요청 수가 가장 적은 키
+- 제외: 할당량 오류(429)를 받은 키는 GEMINI_KEY_EJECT_SECONDS 동안 배정하지 않음
+  (연속 오류 시 두 배씩 늘려 GEMINI_KEY_MAX_EJECT_SECONDS까지, 응답의 retryDelay가 더 길면 그 값 사용)
+- 모든 키가 제외된 상태면 ApiKeyPoolExhaustedError로 즉시 거절 (API 계층에서 429 + Retry-After)
+- 키별 요청/토큰 사용량과 제외 상태를 /health에 보고 (키는 끝 4자리만 표시)
+
+GEMINI_API_KEYS가 비어 있거나 키가 하나면 기존처럼 GEMINI_API_KEY 단일 클라이언트를 사용합니다.
+"""
+
+import os
+import math
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Any, Callable, Deque, Iterator, Tuple
+
+from google import genai
+from google.genai import errors as genai_errors
+
+from services.errors import GeminiCapacityError
+from services.retry_policy import classify_error, ERROR_QUOTA
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+GEMINI_KEY_EJECT_SECONDS = float(os.getenv("GEMINI_KEY_EJECT_SECONDS", "60"))  # 할당량 오류 키 제외 시간 (초)
+GEMINI_KEY_MAX_EJECT_SECONDS = float(os.getenv("GEMINI_KEY_MAX_EJECT_SECONDS", "600"))  # 연속 오류 시 최대 제외 시간 (초)
+
+# 키별 사용량 집계 구간 (초)
+_USAGE_WINDOW = 60.0
+
+
+class ApiKeyPoolExhaustedError(GeminiCapacityError):
+    """모든 API 키가 할당량 초과로 제외된 상태"""
+
+
+def load_api_keys() -> List[str]:
+    """설정된 API 키 목록 (GEMINI_API_KEYS 우선, 없으면 GEMINI_API_KEY, 중복 제거)"""
+    keys: List[str] = []
+    for key in os.getenv("GEMINI_API_KEYS", "").split(","):
+        key = key.strip()
+        if key and key not in keys:
+            keys.append(key)
+    if not keys and os.getenv("GEMINI_API_KEY"):
+        keys.append(os.getenv("GEMINI_API_KEY"))
+    return keys
+
+
+def _retry_delay(exc: BaseException) -> Optional[float]:
+    """할당량 오류 응답의 RetryInfo.retryDelay (초, 없으면 None)"""
+    if not isinstance(exc, genai_errors.APIError) or not isinstance(exc.details, dict):
+        return None
+    for detail in exc.details.get("error", {}).get("details") or []:
+        delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+        if isinstance(delay, str) and delay.endswith("s"):
+            try:
+                return float(delay[:-1])
+            except ValueError:
+                return None
+    return None
+
+
+class ApiKey:
+    """풀에 등록된 키 1개의 클라이언트와 사용량/제외 상태"""
+
+    def __init__(self, index: int, key: str, client: Any):
+        self.index = index
+        self.label = f"key-{index + 1} (…{key[-4:]})"
+        self.client = client
+        self.in_flight = 0
+        self.ejected_until = 0.0
+        self.consecutive_quota_errors = 0
+        self._usage: Deque[Tuple[float, int]] = deque()  # (완료 시각, 토큰 수)
+        # 지표
+        self.requests = 0
+        self.tokens = 0
+        self.quota_errors = 0
+        self.failures = 0
+        self.ejections = 0
+
+    def recent(self, now: float) -> Tuple[int, int]:
+        """최근 1분 (요청 수, 토큰 수)"""
+        while self._usage and now - self._usage[0][0] > _USAGE_WINDOW:
+            self._usage.popleft()
+        return len(self._usage), sum(tokens for _, tokens in self._usage)
+
+
+class KeyLease:
+    """호출 1건에 배정된 키 (호출 측은 client로 요청하고 record_usage로 사용 토큰 보고)"""
+
+    __slots__ = ("key", "client", "usage")
+
+    def __init__(self, key: ApiKey):
+        self.key = key
+        self.client = key.client
+        self.usage: Optional[int] = None
+
+    def record_usage(self, tokens: Optional[int]) -> None:
+        self.usage = tokens
+
+
+class ApiKeyPool:
+    """여러 API 키의 최소 부하 배정 + 할당량 초과 키 일시 제외"""
+
+    def __init__(
+        self,
+        keys: List[str],
+        client_factory: Callable[[str], Any] = None,
+        eject_seconds: float = GEMINI_KEY_EJECT_SECONDS,
+        max_eject_seconds: float = GEMINI_KEY_MAX_EJECT_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if not keys:
+            raise ValueError("API 키 풀에 사용할 키가 없습니다.")
+        factory = client_factory or (lambda key: genai.Client(api_key=key))
+        self.keys = [ApiKey(index, key, factory(key)) for index, key in enumerate(keys)]
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max(max_eject_seconds, eject_seconds)
+        self.clock = clock
+        # 지표
+        self.rejected = 0
+
+    def _select(self) -> ApiKey:
+        """
+        사용 가능한 키 중 부하가 가장 적은 키 선택
+
+        Raises:
+            ApiKeyPoolExhaustedError: 모든 키가 제외된 상태
+        """
+        now = self.clock()
+        available = [key for key in self.keys if key.ejected_until <= now]
+        if not available:
+            self.rejected += 1
+            retry_after = max(1, math.ceil(min(key.ejected_until for key in self.keys) - now))
+            raise ApiKeyPoolExhaustedError(
+                f"모든 Gemini API 키가 할당량 초과 상태입니다. {retry_after}초 후 다시 시도해 주세요.",
+                retry_after=retry_after
+            )
+
+        def load(key: ApiKey) -> Tuple[int, int, int]:
+            requests, tokens = key.recent(now)
+            return key.in_flight, tokens, requests
+
+        return min(available, key=load)
+
+    @contextmanager
+    def lease(self) -> Iterator[KeyLease]:
+        """
+        호출 1건에 키 배정 - 완료 시 사용량 기록, 할당량 오류면 해당 키 일시 제외
+
+        Raises:
+            ApiKeyPoolExhaustedError: 모든 키가 제외된 상태
+        """
+        key = self._select()
+        lease = KeyLease(key)
+        key.in_flight += 1
+        try:
+            yield lease
+        except BaseException as e:
+            if isinstance(e, Exception) and not isinstance(e, GeminiCapacityError):
+                key.failures += 1
+                if classify_error(e) == ERROR_QUOTA:
+                    self._eject(key, e)
+            raise
+        else:
+            key.consecutive_quota_errors = 0
+        finally:
+            key.in_flight -= 1
+            key.requests += 1
+            key.tokens += lease.usage or 0
+            key._usage.append((self.clock(), lease.usage or 0))
+
+    def _eject(self, key: ApiKey, error: BaseException) -> None:
+        key.quota_errors += 1
+        key.consecutive_quota_errors += 1
+        key.ejections += 1
+        seconds = min(self.max_eject_seconds, self.eject_seconds * 2 ** (key.consecutive_quota_errors - 1))
+        seconds = max(seconds, _retry_delay(error) or 0.0)
+        key.ejected_until = self.clock() + seconds
+        available = sum(1 for candidate in self.keys if candidate.ejected_until <= self.clock())
+        logger.warning(f"Gemini API {key.label} 할당량 초과 - {seconds:.0f}초 동안 제외 (사용 가능 키 {available}/{len(self.keys)})")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """키별 사용량/제외 상태 (키 원문은 포함하지 않음)"""
+        now = self.clock()
+        keys = []
+        for key in self.keys:
+            requests, tokens = key.recent(now)
+            keys.append({
+                "key": key.label,
+                "in_flight": key.in_flight,
+                "requests": key.requests,
+                "tokens": key.tokens,
+                "requests_last_minute": requests,
+                "tokens_last_minute": tokens,
+                "quota_errors": key.quota_errors,
+                "failures": key.failures,
+                "ejected_for": max(0, math.ceil(key.ejected_until - now)) or None,
+            })
+        return {
+            "keys": len(self.keys),
+            "available": sum(1 for key in self.keys if key.ejected_until <= now),
+            "rejected": self.rejected,
+            "usage": keys,
+        }
+
+
+# 싱글톤 인스턴스
+_api_key_pool: Optional[ApiKeyPool] = None
+
+
+def get_api_key_pool() -> Optional[ApiKeyPool]:
+    """ApiKeyPool 싱글톤 인스턴스 반환 (키가 2개 이상 설정된 경우에만, 아니면 None)"""
+    global _api_key_pool
+    if _api_key_pool is None:
+        keys = load_api_keys()
+        if len(keys) > 1:
+            _api_key_pool = ApiKeyPool(keys)
+            logger.info(f"Gemini API 키 풀 사용 - 키 {len(keys)}개")
+    return _api_key_pool
+
+
+def peek_api_key_pool() -> Optional[ApiKeyPool]:
+    """생성된 ApiKeyPool 반환 (없으면 None, 헬스 체크용)"""
+    return _api_key_pool
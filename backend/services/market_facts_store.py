@@ -0,0 +1,165 @@
+"""
+로컬 시장 정보 저장소 - 티커별 분석 스니펫 (SQLite)
+
+이 모듈은 티커별 최신 시장 정보 스니펫과 갱신 시각을 SQLite에 보관합니다.
+신선한 스니펫이 있는 티커는 Google Search 그라운딩 대신 프롬프트 컨텍스트로 주입되며,
+오래되었거나 없는 티커에 대해서만 검색 그라운딩이 활성화됩니다.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional, Dict, List, Tuple, Iterable
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+MARKET_FACTS_DB_PATH = os.getenv("MARKET_FACTS_DB_PATH", ":memory:")  # 파일 경로 지정 시 재시작 후에도 유지
+MARKET_FACTS_MAX_AGE = int(os.getenv("MARKET_FACTS_MAX_AGE", "21600"))  # 신선도 기준 (초, 기본 6시간)
+MARKET_FACTS_IMAGE_TICKERS_TTL = int(os.getenv("MARKET_FACTS_IMAGE_TICKERS_TTL", "604800"))  # 이미지 → 티커 기록 보관 (초, 기본 7일)
+MARKET_FACTS_IMAGE_TICKERS_MAX = int(os.getenv("MARKET_FACTS_IMAGE_TICKERS_MAX", "10000"))  # 이미지 → 티커 기록 최대 항목 수
+
+# 그라운딩 컨텍스트로 주입할 수 있는 출처 (검색 그라운딩 결과만, 모델이 쓴 리포트 본문은 제외)
+GROUNDED_SOURCES = ("grounding",)
+
+
+class MarketFact(BaseModel):
+    """티커별 시장 정보 스니펫"""
+    ticker: str = Field(..., description="정규화된 티커")
+    snippet: str = Field(..., description="최신 시장 정보 / 종목 분석 요약")
+    source: str = Field(default="report", description="출처: report (분석 리포트), grounding (검색 그라운딩 결과/갱신)")
+    updated_at: float = Field(..., description="갱신 시각 (epoch 초)")
+
+    def age(self, now: Optional[float] = None) -> float:
+        """스니펫 경과 시간 (초)"""
+        return (now if now is not None else time.time()) - self.updated_at
+
+
+class MarketFactsStore:
+    """SQLite 기반 티커별 시장 정보 저장소"""
+
+    def __init__(self, db_path: str = MARKET_FACTS_DB_PATH):
+        """저장소 초기화 (테이블이 없으면 생성)"""
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS market_facts (
+                    ticker TEXT PRIMARY KEY,
+                    snippet TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+        logger.info(f"시장 정보 저장소 초기화 완료 (경로: {db_path})")
+
+    def upsert(
+        self,
+        ticker: str,
+        snippet: str,
+        source: str = "report",
+        updated_at: Optional[float] = None
+    ) -> None:
+        """티커 스니펫 저장 (기존 항목은 덮어씀)"""
+        if not ticker or not snippet:
+            return
+        timestamp = updated_at if updated_at is not None else time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO market_facts (ticker, snippet, source, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(ticker) DO UPDATE SET
+                    snippet = excluded.snippet,
+                    source = excluded.source,
+                    updated_at = excluded.updated_at
+                """,
+                (ticker.upper(), snippet.strip(), source, timestamp)
+            )
+
+    def get(self, ticker: str) -> Optional[MarketFact]:
+        """단일 티커 조회"""
+        return self.get_many([ticker]).get(ticker.upper())
+
+    def get_many(self, tickers: Iterable[str]) -> Dict[str, MarketFact]:
+        """여러 티커 조회 (저장소에 있는 항목만 반환)"""
+        keys = [t.upper() for t in tickers if t]
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ticker, snippet, source, updated_at FROM market_facts WHERE ticker IN ({placeholders})",
+                keys
+            ).fetchall()
+        return {
+            row[0]: MarketFact(ticker=row[0], snippet=row[1], source=row[2], updated_at=row[3])
+            for row in rows
+        }
+
+    def partition(
+        self,
+        tickers: Iterable[str],
+        max_age: int = MARKET_FACTS_MAX_AGE,
+        now: Optional[float] = None,
+        sources: Optional[Iterable[str]] = None
+    ) -> Tuple[Dict[str, MarketFact], List[str]]:
+        """
+        티커를 신선한 항목과 갱신 필요 항목으로 분리
+
+        Args:
+            sources: 허용할 출처 (지정 시 다른 출처의 항목은 없는 것으로 취급, None이면 모두 허용)
+
+        Returns:
+            Tuple[Dict[str, MarketFact], List[str]]: (신선한 스니펫, 없거나 오래된 티커 목록)
+        """
+        keys = [t.upper() for t in tickers if t]
+        facts = self.get_many(keys)
+        fresh: Dict[str, MarketFact] = {}
+        stale: List[str] = []
+        for ticker in keys:
+            fact = facts.get(ticker)
+            if fact is not None and sources is not None and fact.source not in sources:
+                fact = None
+            if fact is not None and fact.age(now) <= max_age:
+                fresh[ticker] = fact
+            elif ticker not in stale:
+                stale.append(ticker)
+        return fresh, stale
+
+    def stale_tickers(self, max_age: int = MARKET_FACTS_MAX_AGE, now: Optional[float] = None) -> List[str]:
+        """저장된 티커 중 갱신이 필요한 티커 목록 (오래된 순)"""
+        cutoff = (now if now is not None else time.time()) - max_age
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ticker FROM market_facts WHERE updated_at < ? ORDER BY updated_at ASC",
+                (cutoff,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM market_facts").fetchone()[0]
+
+    def close(self) -> None:
+        """DB 연결 종료"""
+        with self._lock:
+            self._conn.close()
+
+
+# 싱글톤 인스턴스
+_market_facts_store: Optional[MarketFactsStore] = None
+
+
+def get_market_facts_store() -> MarketFactsStore:
+    """MarketFactsStore 싱글톤 인스턴스 반환"""
+    global _market_facts_store
+    if _market_facts_store is None:
+        _market_facts_store = MarketFactsStore()
+    return _market_facts_store
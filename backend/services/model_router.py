@@ -0,0 +1,243 @@
+"""
+Gemini 단계별 모델 라우팅 + 폴백 체인 + 사고(thinking) 예산
+
+이 모듈은 호출 단계(step1: 검색·그라운딩, step2: JSON 변환, markdown: 마크다운 분석(일괄·스트리밍),
+extraction: 단일 호출 JSON 추출, refresh: 시장 정보 갱신)마다 사용할 모델을 정하고,
+과부하(503)·할당량(429)·회로 열림으로 호출이 거절되면 GEMINI_MODEL_FALLBACKS 순서대로 다음 모델을 사용합니다.
+
+- 단계별 모델: GEMINI_MODEL_STEP1 / GEMINI_MODEL_STEP2 / GEMINI_MODEL_MARKDOWN / GEMINI_MODEL_EXTRACTION /
+  GEMINI_MODEL_REFRESH (비어 있으면 GEMINI_MODEL)
+  모델 설정은 라우터를 만들 때 읽으며, 기본 모델은 GeminiService의 model_name을 그대로 사용합니다.
+  Step 2는 이미지·검색 없이 텍스트를 JSON으로 옮기는 작업이라 가벼운 모델로도 충분한 경우가 많습니다.
+- 소형 포트폴리오: 종목 수를 아는 경우 GEMINI_SMALL_PORTFOLIO_MAX_HOLDINGS개 이하이면 Step 1/Step 2/마크다운에 GEMINI_MODEL_SMALL 사용
+- 폴백: 모델 할당량/과부하는 모델 단위이므로 다른 모델로 바로 전환 (대기 없음),
+  그 밖의 오류(요청 오류, 로컬 용량 거절)는 폴백하지 않고 재시도 정책에 맡깁니다.
+- 기본 모델(GEMINI_MODEL) 이외의 라우팅 모델은 모델별 회로 차단기를 사용하여,
+  기본 모델 장애로 열린 회로가 폴백 호출까지 막지 않도록 합니다.
+- 사고(thinking) 예산: 단계별 GEMINI_THINKING_BUDGET_*을 호출 모델에 맞게 thinking_config로 설정
+  (Step 2·JSON 추출은 결정론적 형식 변환이라 기본 0, 빈 값은 모델 기본값, -1은 자동).
+  usage_metadata의 사고 토큰(thoughts_token_count)을 단계별로 집계합니다.
+- 암묵적 컨텍스트 캐시: 호출 측이 고정 프롬프트를 contents 맨 앞에 두면 Gemini 2.5가 요청 간 공유 접두부
+  (Flash 1,024 / Pro 2,048 토큰 이상)를 자동 캐시합니다. 캐시 적중 토큰(cached_content_token_count)과
+  입력 대비 적중률을 단계별로 집계합니다.
+"""
+
+import os
+import logging
+from collections import Counter
+from typing import Optional, Dict, List, Any, Iterable
+
+from google.genai import errors as genai_errors
+from google.genai.types import GenerateContentConfig, ThinkingConfig
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.errors import GeminiCapacityError
+from services.retry_policy import classify_error, ERROR_QUOTA
+
+logger = logging.getLogger(__name__)
+
+# 설정값 (모델 이름은 라우터 생성 시 환경변수에서 읽음)
+DEFAULT_GEMINI_MODEL = "gemini-2.5-flash"  # GEMINI_MODEL 미설정 시 기본 모델
+GEMINI_SMALL_PORTFOLIO_MAX_HOLDINGS = int(os.getenv("GEMINI_SMALL_PORTFOLIO_MAX_HOLDINGS", "5"))  # 소형 기준 종목 수
+
+# 단계 → 단계별 모델 환경변수 (빈 값이면 기본 모델)
+_STEP_MODEL_ENV = {
+    "step1": "GEMINI_MODEL_STEP1",
+    "step2": "GEMINI_MODEL_STEP2",
+    "markdown": "GEMINI_MODEL_MARKDOWN",
+    "extraction": "GEMINI_MODEL_EXTRACTION",
+    "refresh": "GEMINI_MODEL_REFRESH",
+}
+
+
+def _optional_int(name: str, default: str) -> Optional[int]:
+    value = os.getenv(name, default).strip()
+    return int(value) if value else None
+
+
+# 단계별 사고 예산 (토큰, None이면 모델 기본값, 0이면 사고 비활성, -1이면 자동)
+GEMINI_THINKING_BUDGETS: Dict[str, Optional[int]] = {
+    "step1": _optional_int("GEMINI_THINKING_BUDGET_STEP1", ""),
+    "step2": _optional_int("GEMINI_THINKING_BUDGET_STEP2", "0"),
+    "extraction": _optional_int("GEMINI_THINKING_BUDGET_EXTRACTION", "0"),
+    "refresh": _optional_int("GEMINI_THINKING_BUDGET_REFRESH", ""),
+    "markdown": _optional_int("GEMINI_THINKING_BUDGET_MARKDOWN", ""),
+}
+
+# 소형 포트폴리오 모델을 적용할 단계
+_SMALL_PORTFOLIO_STEPS = ("step1", "step2", "markdown")
+
+# 사고를 끌 수 없는 모델의 최소 예산 (Gemini 2.5 Pro)
+_MIN_PRO_THINKING_BUDGET = 128
+
+
+def _split_models(value: str) -> List[str]:
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+
+def default_model() -> str:
+    """기본 모델 (GEMINI_MODEL)"""
+    return os.getenv("GEMINI_MODEL", DEFAULT_GEMINI_MODEL)
+
+
+def thinking_budget_for(model: str, budget: Optional[int]) -> Optional[int]:
+    """모델이 허용하는 사고 예산 (사고 미지원 모델이거나 미설정이면 None)"""
+    if budget is None or model.startswith(("gemini-1.", "gemini-2.0")):
+        return None
+    if "pro" in model and 0 <= budget < _MIN_PRO_THINKING_BUDGET:
+        return _MIN_PRO_THINKING_BUDGET
+    return budget
+
+
+def is_fallback_error(exc: BaseException) -> bool:
+    """다른 모델로 전환할 오류인지 (모델 과부하 503, 할당량 429, 회로 열림)"""
+    if isinstance(exc, CircuitOpenError):
+        return True
+    if isinstance(exc, GeminiCapacityError):
+        return False  # 로컬 승인 제어/RPM/키 풀 거절은 모델과 무관
+    if isinstance(exc, genai_errors.APIError):
+        return exc.code in (429, 503)
+    text = str(exc).lower()
+    return classify_error(exc) == ERROR_QUOTA or "overloaded" in text or "unavailable" in text
+
+
+class ModelRouter:
+    """단계별 모델 선택 + 폴백 체인 + 라우팅 모델별 회로 차단기"""
+
+    def __init__(
+        self,
+        default: Optional[str] = None,
+        step_models: Optional[Dict[str, str]] = None,
+        small_model: Optional[str] = None,
+        small_max_holdings: int = GEMINI_SMALL_PORTFOLIO_MAX_HOLDINGS,
+        fallbacks: Optional[Iterable[str]] = None,
+        thinking_budgets: Optional[Dict[str, Optional[int]]] = None
+    ):
+        self.default = default or default_model()
+        if step_models is None:
+            step_models = {step: os.getenv(name, "") for step, name in _STEP_MODEL_ENV.items()}
+        self.step_models = {step: model for step, model in step_models.items() if model}
+        self.small_model = os.getenv("GEMINI_MODEL_SMALL", "") if small_model is None else small_model
+        self.small_max_holdings = small_max_holdings
+        if fallbacks is None:
+            fallbacks = _split_models(os.getenv("GEMINI_MODEL_FALLBACKS", ""))
+        self.fallbacks = list(fallbacks)
+        self.thinking_budgets = dict(GEMINI_THINKING_BUDGETS if thinking_budgets is None else thinking_budgets)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # 지표
+        self.calls: Counter = Counter()
+        self.fallback_calls: Counter = Counter()
+        self.usage: Dict[str, Counter] = {}
+
+    def route(self, step: str, holdings: Optional[int] = None) -> List[str]:
+        """
+        단계의 모델 체인 (첫 모델부터 시도, 폴백 오류 시 다음 모델)
+
+        Args:
+            step: 호출 단계 (step1, step2, markdown, extraction, refresh)
+            holdings: 포트폴리오 종목 수 (모르면 None - 소형 포트폴리오 모델 미적용)
+        """
+        primary = self.step_models.get(step, self.default)
+        if (
+            self.small_model
+            and step in _SMALL_PORTFOLIO_STEPS
+            and holdings
+            and holdings <= self.small_max_holdings
+        ):
+            primary = self.small_model
+        chain = [primary]
+        for model in self.fallbacks:
+            if model not in chain:
+                chain.append(model)
+        return chain
+
+    def configure(self, step: str, model: str, config: Optional[GenerateContentConfig]) -> Optional[GenerateContentConfig]:
+        """호출 설정에 단계/모델별 사고 예산 적용 (호출 측이 이미 지정했거나 예산이 없으면 그대로)"""
+        budget = thinking_budget_for(model, self.thinking_budgets.get(step))
+        if budget is None or config is None or config.thinking_config is not None:
+            return config
+        return config.model_copy(update={"thinking_config": ThinkingConfig(thinking_budget=budget)})
+
+    def breaker_for(self, model: Optional[str]) -> Optional[CircuitBreaker]:
+        """라우팅 모델 전용 회로 차단기 (기본 모델이나 라우팅 대상이 아닌 모델은 None - 공용 차단기 사용)"""
+        if not model or model == self.default:
+            return None
+        if model not in self._breakers:
+            routed = set(self.step_models.values()) | set(self.fallbacks) | ({self.small_model} - {""})
+            if model not in routed:
+                return None
+            self._breakers[model] = CircuitBreaker()
+        return self._breakers[model]
+
+    def record_call(self, step: str, model: str) -> None:
+        self.calls[f"{step}:{model}"] += 1
+
+    def record_usage(self, step: str, usage_metadata: Any) -> None:
+        """응답 usage_metadata의 입력/캐시 적중/출력/사고 토큰을 단계별로 집계"""
+        if usage_metadata is None:
+            return
+        counter = self.usage.setdefault(step, Counter())
+        counter["responses"] += 1
+        for field in (
+            "prompt_token_count", "cached_content_token_count", "candidates_token_count", "thoughts_token_count"
+        ):
+            value = getattr(usage_metadata, field, None)
+            if isinstance(value, int):
+                counter[field] += value
+
+    def record_fallback(self, step: str, failed: str, fallback: str, error: BaseException) -> None:
+        self.fallback_calls[f"{failed}->{fallback}"] += 1
+        logger.warning(f"{step}: {failed} 호출 실패 ({type(error).__name__}) - {fallback} 모델로 전환")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """단계별 라우팅 설정과 모델별 호출/폴백 횟수, 라우팅 모델 회로 상태"""
+        return {
+            "default": self.default,
+            "routes": {step: self.route(step)[0] for step in ("step1", "step2", "refresh")},
+            "small_model": self.small_model or None,
+            "small_max_holdings": self.small_max_holdings,
+            "fallbacks": self.fallbacks,
+            "calls": dict(self.calls),
+            "fallback_calls": dict(self.fallback_calls),
+            "circuits": {model: breaker.state for model, breaker in self._breakers.items()},
+            "thinking_budgets": self.thinking_budgets,
+            "usage": {
+                step: {
+                    "responses": counter["responses"],
+                    "input_tokens": counter["prompt_token_count"],
+                    "cached_tokens": counter["cached_content_token_count"],
+                    "cache_hit_ratio": round(
+                        counter["cached_content_token_count"] / counter["prompt_token_count"], 3
+                    ) if counter["prompt_token_count"] else 0.0,
+                    "output_tokens": counter["candidates_token_count"],
+                    "thought_tokens": counter["thoughts_token_count"],
+                    "thought_tokens_avg": round(counter["thoughts_token_count"] / counter["responses"], 1),
+                }
+                for step, counter in self.usage.items()
+            },
+        }
+
+
+# 싱글톤 인스턴스
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router(default: Optional[str] = None) -> ModelRouter:
+    """
+    ModelRouter 싱글톤 인스턴스 반환
+
+    Args:
+        default: 기본 모델 (GeminiService의 model_name, 이미 생성된 라우터와 다르면 이 값으로 맞춤)
+    """
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter(default=default)
+    elif default and _model_router.default != default:
+        logger.info(f"모델 라우터 기본 모델 변경: {_model_router.default} → {default}")
+        _model_router.default = default
+    return _model_router
+
+
+def peek_model_router() -> Optional[ModelRouter]:
+    """생성된 ModelRouter 반환 (없으면 None, 헬스 체크용)"""
+    return _model_router
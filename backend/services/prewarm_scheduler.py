@@ -0,0 +1,202 @@
+"""
+인기 티커 프리워밍 스케줄러
+
+이 모듈은 완료된 분석 리포트에서 티커 인기도를 집계하고, 비혼잡 시간대에
+인기 티커의 시장 정보 스니펫(종목별 분석 + 그라운딩 정보)을 미리 갱신합니다.
+하루 Gemini 호출 예산 내에서만 동작하여 피크 시간 요청이 신선한 저장소 항목을 사용하도록 합니다.
+
+리포트 단위 결과 캐시(그라운딩 결과, Step 2 리포트)는 업로드 이미지 해시를 키로 쓰므로 미리 채울 수 없고,
+티커 단위로 재사용되는 시장 정보 저장소만 갱신합니다. 예산은 실제로 보낸 Gemini 요청 수(실패·모델 폴백 포함)로 차감합니다.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import Optional, Dict, List, Tuple, Iterable, Set
+
+from services.market_facts_store import GROUNDED_SOURCES
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "false").lower() == "true"
+PREWARM_INTERVAL = int(os.getenv("PREWARM_INTERVAL", "900"))  # 점검 주기 (초)
+PREWARM_OFFPEAK_HOURS = os.getenv("PREWARM_OFFPEAK_HOURS", "1-6")  # 비혼잡 시간대 (로컬 시각, 시작-끝)
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "20"))  # 갱신 대상 인기 티커 수
+PREWARM_GEMINI_BUDGET = int(os.getenv("PREWARM_GEMINI_BUDGET", "50"))  # 하루 최대 Gemini 호출 수
+PREWARM_REFRESH_AGE = int(os.getenv("PREWARM_REFRESH_AGE", "10800"))  # 이보다 오래된 스니펫을 미리 갱신 (초)
+POPULARITY_HALF_LIFE = float(os.getenv("POPULARITY_HALF_LIFE", "86400"))  # 인기도 반감기 (초)
+
+
+def parse_offpeak_hours(spec: str) -> Set[int]:
+    """
+    비혼잡 시간대 표기 파싱
+
+    Args:
+        spec: "1-6" (1시~5시), "22-4" (자정 넘김), "1-6,13" 처럼 쉼표로 여러 구간 지정
+
+    Returns:
+        Set[int]: 비혼잡 시간(0-23) 집합
+    """
+    hours: Set[int] = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(x) % 24 for x in part.split("-", 1))
+            hour = start
+            while hour != end:
+                hours.add(hour)
+                hour = (hour + 1) % 24
+        else:
+            hours.add(int(part) % 24)
+    return hours
+
+
+class TickerPopularity:
+    """지수 감쇠 기반 티커 인기도 집계"""
+
+    def __init__(self, half_life: float = POPULARITY_HALF_LIFE):
+        self.half_life = half_life
+        self._scores: Dict[str, Tuple[float, float]] = {}  # 티커 → (점수, 마지막 갱신 시각)
+
+    def _decayed(self, score: float, updated_at: float, now: float) -> float:
+        return score * 0.5 ** ((now - updated_at) / self.half_life)
+
+    def record(self, tickers: Iterable[str], now: Optional[float] = None) -> None:
+        """완료된 리포트의 티커 집계 (리포트당 티커별 1회)"""
+        now = now if now is not None else time.time()
+        for ticker in set(tickers):
+            score, updated_at = self._scores.get(ticker, (0.0, now))
+            self._scores[ticker] = (self._decayed(score, updated_at, now) + 1.0, now)
+
+    def top(self, n: int, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """인기 상위 n개 티커 (점수 내림차순)"""
+        now = now if now is not None else time.time()
+        ranked = [
+            (ticker, self._decayed(score, updated_at, now))
+            for ticker, (score, updated_at) in self._scores.items()
+        ]
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked[:n]
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class PrewarmScheduler:
+    """비혼잡 시간대 인기 티커 프리워밍 스케줄러 (asyncio 백그라운드 태스크)"""
+
+    def __init__(
+        self,
+        gemini_service,
+        popularity: Optional[TickerPopularity] = None,
+        interval: int = PREWARM_INTERVAL,
+        offpeak_hours: str = PREWARM_OFFPEAK_HOURS,
+        top_n: int = PREWARM_TOP_N,
+        daily_budget: int = PREWARM_GEMINI_BUDGET,
+        refresh_age: int = PREWARM_REFRESH_AGE,
+    ):
+        self.gemini_service = gemini_service
+        self.popularity = popularity or gemini_service.popularity
+        self.interval = interval
+        self.offpeak_hours = parse_offpeak_hours(offpeak_hours)
+        self.top_n = top_n
+        self.daily_budget = daily_budget
+        self.refresh_age = refresh_age
+
+        self._budget_day: Optional[date] = None
+        self._calls_used = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def is_off_peak(self, now: Optional[datetime] = None) -> bool:
+        """현재 비혼잡 시간대인지 확인"""
+        return (now or datetime.now()).hour in self.offpeak_hours
+
+    def remaining_budget(self, today: Optional[date] = None) -> int:
+        """오늘 남은 Gemini 호출 예산"""
+        today = today or date.today()
+        if self._budget_day != today:
+            self._budget_day = today
+            self._calls_used = 0
+        return max(0, self.daily_budget - self._calls_used)
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """
+        프리워밍 1회 실행
+
+        Returns:
+            int: 갱신된 티커 수
+        """
+        now = now or datetime.now()
+        if not self.is_off_peak(now):
+            return 0
+
+        budget = self.remaining_budget(now.date())
+        if budget <= 0:
+            logger.info("프리워밍: 오늘 Gemini 예산 소진, 건너뜀")
+            return 0
+
+        popular = [ticker for ticker, _ in self.popularity.top(self.top_n, now.timestamp())]
+        if not popular:
+            return 0
+
+        # 인기 순서를 유지하며 곧 만료될(또는 없는) 스니펫만 갱신
+        _, due = self.gemini_service.facts_store.partition(
+            popular, max_age=self.refresh_age, now=now.timestamp(), sources=GROUNDED_SOURCES
+        )
+        batch = due[:budget]
+        if not batch:
+            return 0
+
+        logger.info(f"프리워밍 시작: {len(batch)}개 티커 (남은 예산 {budget}회) - {', '.join(batch)}")
+        refreshed, calls = await self.gemini_service.refresh_market_facts(batch, max_calls=budget)
+        self._calls_used += calls  # 실패·폴백 요청도 예산을 소모
+        return refreshed
+
+    async def _loop(self) -> None:
+        """주기적 프리워밍 루프"""
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 프리워밍 실패는 서비스에 영향을 주지 않음
+                logger.error(f"프리워밍 실행 실패: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """백그라운드 태스크 시작"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            logger.info(
+                f"프리워밍 스케줄러 시작 - 주기 {self.interval}초, 비혼잡 {sorted(self.offpeak_hours)}시, "
+                f"상위 {self.top_n}개, 일 예산 {self.daily_budget}회"
+            )
+
+    async def stop(self) -> None:
+        """백그라운드 태스크 종료"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("프리워밍 스케줄러 종료")
+
+
+# 싱글톤 인스턴스
+_ticker_popularity: Optional[TickerPopularity] = None
+
+
+def get_ticker_popularity() -> TickerPopularity:
+    """TickerPopularity 싱글톤 인스턴스 반환"""
+    global _ticker_popularity
+    if _ticker_popularity is None:
+        _ticker_popularity = TickerPopularity()
+    return _ticker_popularity
@@ -0,0 +1,238 @@
+"""
+분석 진행 상황 이벤트 - 프로세스 내 pub/sub
+
+이 모듈은 분석 파이프라인의 단계별 진행 이벤트를 요청 ID 단위로 발행/구독하는 경량 브로커를 제공합니다.
+GeminiService는 현재 요청 ID(contextvar)에 대해 `emit()`으로 이벤트를 발행하고,
+SSE 엔드포인트(GET /api/analyze/{request_id}/events)는 지난 이벤트를 재생한 뒤 실시간 이벤트를 전달합니다.
+
+요청 ID는 서버가 발급한 uuid4만 사용합니다 (POST /api/analyze/events 발급 ID, 작업 ID, 헤더 없는 요청의 생성 ID).
+발급 시 채널을 미리 열어 두므로 구독자가 분석 요청보다 먼저 연결할 수 있고,
+SSE 엔드포인트는 열린 채널만 구독을 허용하여 다른 사용자의 진행 상황을 추측한 ID로 엿볼 수 없습니다.
+종료된 채널은 보관 시간(PROGRESS_HISTORY_TTL) 동안 재생용으로 유지되며, 만료 채널 정리는 채널 생성 시에만 수행합니다.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import contextvars
+from typing import Optional, Dict, List, Set, Any, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+PROGRESS_HISTORY_TTL = int(os.getenv("PROGRESS_HISTORY_TTL", "600"))  # 종료된 채널 보관 시간 (초)
+PROGRESS_HISTORY_LIMIT = int(os.getenv("PROGRESS_HISTORY_LIMIT", "100"))  # 채널당 보관 이벤트 수
+PROGRESS_KEEPALIVE = int(os.getenv("PROGRESS_KEEPALIVE", "15"))  # SSE keep-alive 주기 (초)
+
+# 종료 단계 (이 이벤트 이후 스트림 종료)
+TERMINAL_STAGES = {"completed", "failed"}
+
+# 현재 처리 중인 요청 ID (emit 대상)
+_current_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "progress_request_id", default=None
+)
+
+
+class ProgressEvent:
+    """진행 이벤트"""
+
+    __slots__ = ("seq", "stage", "data", "timestamp")
+
+    def __init__(self, seq: int, stage: str, data: Dict[str, Any]):
+        self.seq = seq
+        self.stage = stage
+        self.data = data
+        self.timestamp = time.time()
+
+    @property
+    def terminal(self) -> bool:
+        return self.stage in TERMINAL_STAGES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"seq": self.seq, "stage": self.stage, "timestamp": self.timestamp, **self.data}
+
+
+class _Channel:
+    """요청 ID별 이벤트 채널"""
+
+    def __init__(self):
+        self.history: List[ProgressEvent] = []
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.next_seq = 1
+        self.closed = False
+        self.updated_at = time.time()
+
+
+class ProgressBroker:
+    """프로세스 내 진행 이벤트 브로커"""
+
+    def __init__(self, history_ttl: int = PROGRESS_HISTORY_TTL, history_limit: int = PROGRESS_HISTORY_LIMIT):
+        self.history_ttl = history_ttl
+        self.history_limit = history_limit
+        self._channels: Dict[str, _Channel] = {}
+
+    def _channel(self, request_id: str) -> _Channel:
+        channel = self._channels.get(request_id)
+        if channel is None:
+            self._prune()  # 발행마다가 아니라 채널 생성 시에만 정리 (요청당 1회)
+            channel = self._channels[request_id] = _Channel()
+        return channel
+
+    def open(self, request_id: Optional[str] = None) -> str:
+        """
+        채널 열기 (분석 요청 전 구독 가능)
+
+        Args:
+            request_id: 서버가 발급한 ID (작업 ID 등), None이면 uuid4 발급
+
+        Returns:
+            str: 요청 ID
+        """
+        request_id = request_id or str(uuid.uuid4())
+        self._channel(request_id)
+        return request_id
+
+    def has_channel(self, request_id: str) -> bool:
+        """열린(발급된) 채널인지 확인"""
+        return request_id in self._channels
+
+    def publish(self, request_id: str, stage: str, **data: Any) -> ProgressEvent:
+        """
+        이벤트 발행 (이벤트 루프 스레드에서 호출)
+
+        종료 단계(completed/failed) 이벤트는 채널을 닫고 구독자 스트림을 종료시킵니다.
+        """
+        channel = self._channel(request_id)
+        if channel.closed:
+            # 같은 ID로 재요청된 경우 새 실행으로 간주
+            channel.closed = False
+            channel.history.clear()
+
+        event = ProgressEvent(channel.next_seq, stage, data)
+        channel.next_seq += 1
+        channel.history.append(event)
+        if len(channel.history) > self.history_limit:
+            del channel.history[0]
+        channel.updated_at = event.timestamp
+        channel.closed = event.terminal
+
+        for queue in channel.subscribers:
+            queue.put_nowait(event)
+        return event
+
+    def history(self, request_id: str) -> List[ProgressEvent]:
+        """채널의 지난 이벤트 목록"""
+        channel = self._channels.get(request_id)
+        return list(channel.history) if channel else []
+
+    async def subscribe(
+        self,
+        request_id: str,
+        keepalive: float = PROGRESS_KEEPALIVE,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Optional[ProgressEvent]]:
+        """
+        이벤트 구독 - 지난 이벤트 재생 후 실시간 이벤트 전달
+
+        종료 이벤트를 전달하면 끝나며, keepalive 동안 이벤트가 없으면 None을 내보냅니다.
+
+        Args:
+            request_id: 요청 ID
+            keepalive: keep-alive 주기 (초)
+            timeout: 전체 구독 시간 제한 (초, None이면 제한 없음)
+        """
+        channel = self._channel(request_id)
+        queue: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.add(queue)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            for event in list(channel.history):
+                yield event
+                if event.terminal:
+                    return
+
+            while True:
+                wait = keepalive
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        return
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=wait)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event.terminal:
+                    return
+        finally:
+            channel.subscribers.discard(queue)
+            channel.updated_at = time.time()
+
+    def _prune(self) -> None:
+        """보관 시간이 지난 채널 제거 (구독자가 있으면 유지)"""
+        cutoff = time.time() - self.history_ttl
+        expired = [
+            request_id for request_id, channel in self._channels.items()
+            if not channel.subscribers and channel.updated_at < cutoff
+        ]
+        for request_id in expired:
+            del self._channels[request_id]
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+
+def bind_request(request_id: Optional[str]) -> contextvars.Token:
+    """현재 컨텍스트의 이벤트 대상 요청 ID 설정 (reset_request로 복원)"""
+    return _current_request_id.set(request_id)
+
+
+def reset_request(token: contextvars.Token) -> None:
+    """bind_request 이전 상태로 복원"""
+    _current_request_id.reset(token)
+
+
+def current_request_id() -> Optional[str]:
+    """현재 컨텍스트의 요청 ID"""
+    return _current_request_id.get()
+
+
+def emit(stage: str, **data: Any) -> None:
+    """현재 요청 ID 채널에 이벤트 발행 (요청 ID가 없으면 무시, 발행 실패는 분석에 영향 없음)"""
+    request_id = _current_request_id.get()
+    if request_id is None:
+        return
+    try:
+        get_progress_broker().publish(request_id, stage, **data)
+    except Exception as e:
+        logger.warning(f"진행 이벤트 발행 실패 (ID: {request_id}, 단계: {stage}): {str(e)}")
+
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """SSE 메시지 직렬화 (data는 JSON 한 줄)"""
+    payload = json.dumps(data, ensure_ascii=False)
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {payload}\n\n"
+
+
+def format_sse_event(event: Optional[ProgressEvent]) -> str:
+    """진행 이벤트 SSE 직렬화 (None은 keep-alive 주석)"""
+    if event is None:
+        return ": keep-alive\n\n"
+    return format_sse(event.stage, event.to_dict(), event_id=event.seq)
+
+
+# 싱글톤 인스턴스
+_progress_broker: Optional[ProgressBroker] = None
+
+
+def get_progress_broker() -> ProgressBroker:
+    """ProgressBroker 싱글톤 인스턴스 반환"""
+    global _progress_broker
+    if _progress_broker is None:
+        _progress_broker = ProgressBroker()
+    return _progress_broker
@@ -0,0 +1,123 @@
+"""
+고정 프롬프트 레지스트리 (공백 최소화, 버전, 토큰 추정치)
+
+이 모듈은 GeminiService의 고정 프롬프트(그라운딩, 마크다운, Step 2 지시문, JSON 추출)를 시작 시 1회 적재하여
+공백을 최소화한 문구, 버전 id, 입력 토큰 추정치를 함께 보관합니다.
+프롬프트 메서드는 @registered_prompt로 감싸 첫 호출 때 원문을 등록하고, 이후에는 레지스트리 문구를 반환합니다.
+
+- 공백 최소화: 공통 들여쓰기와 줄 끝 공백 제거, 연속 빈 줄은 1줄로 축소,
+  JSON 예시 줄({ } [ ] "로 시작)의 들여쓰기 제거 (마크다운 중첩 목록 들여쓰기는 유지)
+- 버전 id: 최소화된 문구의 해시 앞 8자리. 결과 캐시 키에 해당 단계 프롬프트 버전을 넣어,
+  문구를 고치면 그 프롬프트를 쓰는 캐시 항목만 무효화됩니다 (전체 캐시 비우기 없음).
+- 토큰 추정치: 등록 시 계산해 두고 명시적 컨텍스트 캐시의 최소 토큰 판단과 헬스 체크에 사용합니다.
+"""
+
+import re
+import hashlib
+import logging
+import textwrap
+import functools
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Callable
+
+from services.rate_limiter import estimate_input_tokens
+
+logger = logging.getLogger(__name__)
+
+_BLANK_LINES = re.compile(r"\n{3,}")
+_JSON_LINE = re.compile(r"^\s+(?=[{}\[\]\"])")
+
+
+@dataclass(frozen=True)
+class RegisteredPrompt:
+    """등록된 고정 프롬프트 1건"""
+    name: str
+    text: str  # 공백 최소화 문구
+    version: str  # 최소화 문구 해시 앞 8자리
+    tokens: int  # 최소화 문구 입력 토큰 추정치
+    source_tokens: int  # 원문 입력 토큰 추정치
+
+
+def minify_prompt(text: str) -> str:
+    """
+    프롬프트 공백 최소화 (문구와 JSON 예시의 유효성은 유지)
+
+    앞뒤 빈 줄은 제거하고 끝에 줄바꿈 1개를 남겨, 뒤에 붙는 컨텍스트와 입력 데이터가 다음 줄에서 시작합니다.
+    """
+    lines = [_JSON_LINE.sub("", line.rstrip()) for line in textwrap.dedent(text).splitlines()]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip("\n") + "\n"
+
+
+class PromptRegistry:
+    """이름 → 최소화 프롬프트/버전/토큰 추정치"""
+
+    def __init__(self):
+        self._prompts: Dict[str, RegisteredPrompt] = {}
+
+    def register(self, name: str, source: str) -> RegisteredPrompt:
+        """원문 등록 (공백 최소화, 버전·토큰 계산, 같은 이름이면 교체)"""
+        text = minify_prompt(source)
+        prompt = RegisteredPrompt(
+            name=name,
+            text=text,
+            version=hashlib.sha256(text.encode("utf-8")).hexdigest()[:8],
+            tokens=estimate_input_tokens([text]),
+            source_tokens=estimate_input_tokens([source])
+        )
+        self._prompts[name] = prompt
+        logger.info(
+            f"프롬프트 등록: {name} v{prompt.version} ({prompt.source_tokens} → {prompt.tokens} 토큰, 추정)"
+        )
+        return prompt
+
+    def get(self, name: str) -> Optional[RegisteredPrompt]:
+        """등록된 프롬프트 (없으면 None)"""
+        return self._prompts.get(name)
+
+    def version(self, *names: str) -> str:
+        """프롬프트 버전 id (여러 이름이면 '.'로 연결, 미등록은 '0')"""
+        return ".".join(self._prompts[name].version if name in self._prompts else "0" for name in names)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """프롬프트별 버전과 최소화 전후 토큰 추정치"""
+        return {
+            name: {"version": prompt.version, "tokens": prompt.tokens, "source_tokens": prompt.source_tokens}
+            for name, prompt in sorted(self._prompts.items())
+        }
+
+
+def registered_prompt(name: str) -> Callable[[Callable[[Any], str]], Callable[[Any], str]]:
+    """
+    고정 프롬프트 메서드 데코레이터
+
+    첫 호출 때 메서드가 반환한 원문을 레지스트리에 등록하고, 이후에는 등록된 최소화 문구를 반환합니다.
+    메서드는 인스턴스 상태와 무관한 고정 문구만 반환해야 합니다.
+    """
+    def decorator(build: Callable[[Any], str]) -> Callable[[Any], str]:
+        @functools.wraps(build)
+        def getter(self) -> str:
+            registry = get_prompt_registry()
+            prompt = registry.get(name)
+            if prompt is None:
+                prompt = registry.register(name, build(self))
+            return prompt.text
+        getter.prompt_name = name
+        return getter
+    return decorator
+
+
+# 싱글톤 인스턴스
+_prompt_registry: Optional[PromptRegistry] = None
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """PromptRegistry 싱글톤 인스턴스 반환"""
+    global _prompt_registry
+    if _prompt_registry is None:
+        _prompt_registry = PromptRegistry()
+    return _prompt_registry
+
+
+def peek_prompt_registry() -> Optional[PromptRegistry]:
+    """생성된 PromptRegistry 반환 (없으면 None, 헬스 체크용)"""
+    return _prompt_registry
@@ -0,0 +1,377 @@
+"""
+Gemini 요청/토큰 한도(RPM/TPM) 선제 제한 - 이중 토큰 버킷
+
+이 모듈은 Gemini 호출 전에 요청 수(RPM)와 토큰 수(TPM) 버킷에서 예약을 받아,
+할당량 오류(429)가 발생한 뒤 반응하는 대신 처리량을 한도 바로 아래로 유지합니다.
+
+- 호출마다 입력 토큰(이미지 타일 + 텍스트 길이)과 출력 예산을 추정해 TPM 버킷에서 예약
+- 버킷은 부족분을 빚으로 기록하는 가상 스케줄링 방식이라 대기 순서가 도착 순서(FIFO)로 유지됨
+- 응답의 usage_metadata로 실제 사용량을 받아 추정치와의 차이를 버킷에 정산
+- 예상 대기 시간이 GEMINI_RATE_MAX_WAIT를 넘으면 예약하지 않고 RateLimitExceededError로 거절
+
+버킷 용량은 분당 한도 × GEMINI_RATE_BURST로 작게 유지하여, 임의의 60초 구간 사용량이
+(headroom + burst) × 한도를 넘지 않도록 합니다.
+
+GEMINI_RATE_LIMIT_DB를 지정하면 같은 호스트의 모든 워커 프로세스가 SQLite 파일 하나의 버킷 상태를
+공유합니다 (SharedRateLimiter). 지정하지 않으면 프로세스마다 독립된 버킷을 사용합니다.
+"""
+
+import os
+import math
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Deque, Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows - SQLite 잠금 대기만 사용
+    fcntl = None
+
+from google.genai.types import Content, Part
+
+from services.errors import GeminiCapacityError
+from services.key_pool import load_api_keys
+from utils.image_utils import estimate_image_tokens
+
+logger = logging.getLogger(__name__)
+
+# 설정값 (0이면 해당 버킷 비활성)
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "1000"))  # 분당 요청 한도 (키당)
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))  # 분당 토큰 한도 (키당)
+GEMINI_RATE_HEADROOM = float(os.getenv("GEMINI_RATE_HEADROOM", "0.9"))  # 한도 대비 지속 처리량 비율
+GEMINI_RATE_BURST = float(os.getenv("GEMINI_RATE_BURST", "0.1"))  # 버킷 용량 (분당 한도 대비 비율)
+GEMINI_RATE_MAX_WAIT = float(os.getenv("GEMINI_RATE_MAX_WAIT", "60"))  # 예약 대기 최대 시간 (초)
+GEMINI_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("GEMINI_OUTPUT_TOKEN_ESTIMATE", "8192"))  # 호출당 출력 예산 추정
+GEMINI_RATE_LIMIT_DB = os.getenv("GEMINI_RATE_LIMIT_DB", "")  # 워커 간 공유 버킷 SQLite 경로 (빈 값이면 프로세스 내부)
+
+# 텍스트 토큰 추정 (한국어 위주 프롬프트 기준 보수적 비율, 실제 사용량으로 정산)
+_CHARS_PER_TOKEN = 2.0
+
+# 추정 정확도 지표에 사용할 최근 표본 수
+_SAMPLE_SIZE = 256
+
+
+class RateLimitExceededError(GeminiCapacityError):
+    """RPM/TPM 예약 대기 시간 초과 예상으로 거절"""
+
+
+def _text_tokens(text: str) -> int:
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+def _part_tokens(part: Part) -> int:
+    tokens = 0
+    if part.text:
+        tokens += _text_tokens(part.text)
+    if part.inline_data is not None and part.inline_data.data:
+        tokens += estimate_image_tokens(part.inline_data.data)
+    return tokens
+
+
+def estimate_input_tokens(contents: Optional[Iterable[Any]]) -> int:
+    """요청 contents의 입력 토큰 추정 (문자열, Part, Content 지원)"""
+    total = 0
+    for item in contents or []:
+        if isinstance(item, str):
+            total += _text_tokens(item)
+        elif isinstance(item, Part):
+            total += _part_tokens(item)
+        elif isinstance(item, Content):
+            total += sum(_part_tokens(part) for part in item.parts or [])
+    return total
+
+
+def estimate_request_tokens(contents: Optional[Iterable[Any]], config: Any = None) -> int:
+    """호출 1회의 토큰 예약량 추정 (입력 + 출력 예산)"""
+    max_output = getattr(config, "max_output_tokens", None)
+    output_budget = GEMINI_OUTPUT_TOKEN_ESTIMATE
+    if isinstance(max_output, int) and max_output > 0:
+        output_budget = min(max_output, GEMINI_OUTPUT_TOKEN_ESTIMATE)
+    return estimate_input_tokens(contents) + output_budget
+
+
+def usage_total_tokens(response: Any) -> Optional[int]:
+    """응답(또는 마지막 스트림 조각)의 실제 사용 토큰 (없으면 None)"""
+    usage = getattr(response, "usage_metadata", None)
+    total = getattr(usage, "total_token_count", None)
+    return total if isinstance(total, int) else None
+
+
+class TokenBucket:
+    """분당 한도 토큰 버킷 (부족분은 음수 잔량으로 기록)"""
+
+    def __init__(self, per_minute: float, burst: float, now: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute * burst)
+        self.tokens = self.capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """amount를 사용할 수 있을 때까지 대기 시간 (용량을 넘는 양은 버킷이 가득 찰 때까지)"""
+        deficit = min(amount, self.capacity) - self.tokens
+        return max(0.0, deficit / self.rate)
+
+    def adjust(self, delta: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class Reservation:
+    """예약 결과 (정산 시 사용)"""
+
+    __slots__ = ("tokens", "waited")
+
+    def __init__(self, tokens: int, waited: float):
+        self.tokens = tokens
+        self.waited = waited
+
+
+class GeminiRateLimiter:
+    """RPM/TPM 이중 토큰 버킷 제한기 (프로세스 내부)"""
+
+    def __init__(
+        self,
+        rpm: int = GEMINI_RPM,
+        tpm: int = GEMINI_TPM,
+        headroom: float = GEMINI_RATE_HEADROOM,
+        burst: float = GEMINI_RATE_BURST,
+        max_wait: float = GEMINI_RATE_MAX_WAIT,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.headroom = headroom
+        self.max_wait = max_wait
+        self.clock = clock
+        now = clock()
+        self._requests = TokenBucket(rpm * headroom, burst, now) if rpm > 0 else None
+        self._tokens = TokenBucket(tpm * headroom, burst, now) if tpm > 0 else None
+        # 지표
+        self.reserved = 0
+        self.delayed = 0
+        self.rejected = 0
+        self._waits: Deque[float] = deque(maxlen=_SAMPLE_SIZE)
+        self._estimate_ratios: Deque[float] = deque(maxlen=_SAMPLE_SIZE)
+
+    @property
+    def enabled(self) -> bool:
+        return self._requests is not None or self._tokens is not None
+
+    def _reserve(self, tokens: int) -> float:
+        """
+        요청 1건 + tokens 예약 후 대기 시간 반환 (최대 대기 초과 시 예약하지 않음)
+
+        하위 클래스(프로세스 간 공유 저장소)는 이 메서드와 _adjust를 원자적으로 구현합니다.
+        """
+        now = self.clock()
+        wait = 0.0
+        for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time(amount))
+        if wait <= self.max_wait:
+            for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                if bucket is not None:
+                    bucket.adjust(-amount)
+        return wait
+
+    def _adjust(self, requests: float, tokens: float) -> None:
+        """예약 반환/정산 (양수는 반환, 음수는 추가 차감)"""
+        now = self.clock()
+        for bucket, delta in ((self._requests, requests), (self._tokens, tokens)):
+            if bucket is not None and delta:
+                bucket.refill(now)
+                bucket.adjust(delta)
+
+    async def acquire(self, tokens: int) -> Reservation:
+        """
+        요청 1건 + 추정 토큰 예약 (필요 시 대기)
+
+        Raises:
+            RateLimitExceededError: 예상 대기 시간이 max_wait 초과
+        """
+        if not self.enabled:
+            return Reservation(0, 0.0)
+        wait = self._reserve(tokens)
+        if wait > self.max_wait:
+            self.rejected += 1
+            retry_after = math.ceil(wait)
+            logger.warning(f"Gemini RPM/TPM 예약 대기 {wait:.1f}초 예상 - 거절 (추정 {tokens}토큰)")
+            raise RateLimitExceededError(
+                f"요청이 많아 분석을 시작하지 못했습니다. {retry_after}초 후 다시 시도해 주세요.",
+                retry_after=retry_after
+            )
+        self.reserved += 1
+        self._waits.append(wait)
+        if wait > 0:
+            self.delayed += 1
+            logger.info(f"Gemini RPM/TPM 한도 근접 - {wait:.2f}초 대기 (추정 {tokens}토큰)")
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # 대기 중 취소 - 예약 반환
+                self._adjust(1, tokens)
+                raise
+        return Reservation(tokens, wait)
+
+    def reconcile(self, reservation: Reservation, actual_tokens: Optional[int]) -> None:
+        """실제 사용 토큰으로 예약 정산 (추정보다 적으면 반환, 많으면 추가 차감)"""
+        if actual_tokens is None or not reservation.tokens:
+            return
+        self._estimate_ratios.append(actual_tokens / reservation.tokens)
+        self._adjust(0, reservation.tokens - actual_tokens)
+
+    def _available(self) -> Dict[str, Optional[float]]:
+        now = self.clock()
+        available: Dict[str, Optional[float]] = {}
+        for name, bucket in (("requests", self._requests), ("tokens", self._tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+            available[name] = round(bucket.tokens, 1) if bucket is not None else None
+        return available
+
+    def snapshot(self) -> Dict[str, Any]:
+        """현재 상태 및 지표 (대기 시간은 최근 표본 기준, 밀리초)"""
+        waits = list(self._waits)
+        ratios = list(self._estimate_ratios)
+        available = self._available()
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "headroom": self.headroom,
+            "available_requests": available["requests"],
+            "available_tokens": available["tokens"],
+            "reserved": self.reserved,
+            "delayed": self.delayed,
+            "rejected": self.rejected,
+            "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "wait_ms_max": round(max(waits) * 1000, 1) if waits else 0.0,
+            "actual_to_estimate": round(sum(ratios) / len(ratios), 3) if ratios else None,
+        }
+
+
+class SharedRateLimiter(GeminiRateLimiter):
+    """
+    호스트 공유 RPM/TPM 제한기 - 버킷 상태를 SQLite 파일에 두고 모든 워커가 함께 사용
+
+    예약/정산은 BEGIN IMMEDIATE 트랜잭션 안에서 상태를 읽고-계산하고-기록하므로 프로세스 간에도 원자적이며,
+    계산은 프로세스 내부 제한기와 같은 TokenBucket 로직을 그대로 사용합니다.
+    버킷 상태는 휘발성이므로 WAL + synchronous=OFF로 디스크 동기화를 생략합니다.
+    SQLite의 잠금 대기는 재시도 간격이 수십~수백 ms까지 늘어나므로, 경합 시 꼬리 지연을 줄이기 위해
+    트랜잭션 전에 별도 잠금 파일(<db>.lock)의 flock을 잡아 대기자가 즉시 깨어나도록 합니다.
+    시각은 프로세스 간에 비교 가능한 time.time()을 사용합니다.
+    """
+
+    def __init__(self, db_path: str = GEMINI_RATE_LIMIT_DB, clock: Callable[[], float] = time.time, **kwargs):
+        super().__init__(clock=clock, **kwargs)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._lock_file = open(f"{db_path}.lock", "a") if fcntl is not None and db_path != ":memory:" else None
+        self._conn = sqlite3.connect(db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+            """
+        )
+        logger.info(f"공유 RPM/TPM 제한기 초기화 완료 (경로: {db_path})")
+
+    def _buckets(self):
+        return (("requests", self._requests), ("tokens", self._tokens))
+
+    @contextmanager
+    def _host_lock(self) -> Iterator[None]:
+        """호스트 단위 배타 잠금 (flock 미지원 환경에서는 SQLite 잠금만 사용)"""
+        if self._lock_file is None:
+            yield
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _locked(self, operation: Callable[[], Any]) -> Any:
+        """공유 상태를 읽어 operation 실행 후 기록 (프로세스 간 원자적)"""
+        with self._lock, self._host_lock():
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = {
+                    name: (tokens, updated)
+                    for name, tokens, updated in self._conn.execute("SELECT name, tokens, updated FROM rate_buckets")
+                }
+                for name, bucket in self._buckets():
+                    if bucket is not None and name in rows:
+                        bucket.tokens, bucket.updated = rows[name]
+                result = operation()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO rate_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    [(name, bucket.tokens, bucket.updated) for name, bucket in self._buckets() if bucket is not None]
+                )
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _reserve(self, tokens: int) -> float:
+        return self._locked(lambda: super(SharedRateLimiter, self)._reserve(tokens))
+
+    def _adjust(self, requests: float, tokens: float) -> None:
+        self._locked(lambda: super(SharedRateLimiter, self)._adjust(requests, tokens))
+
+    def _available(self) -> Dict[str, Optional[float]]:
+        return self._locked(lambda: super(SharedRateLimiter, self)._available())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """현재 상태 및 지표 (잔량은 호스트 공유, 예약/대기 지표는 이 프로세스 기준)"""
+        snapshot = super().snapshot()
+        snapshot["shared_db"] = self.db_path
+        return snapshot
+
+    def close(self) -> None:
+        """DB 연결 종료"""
+        with self._lock:
+            self._conn.close()
+            if self._lock_file is not None:
+                self._lock_file.close()
+
+
+# 싱글톤 인스턴스
+_rate_limiter: Optional[GeminiRateLimiter] = None
+
+
+def get_rate_limiter() -> GeminiRateLimiter:
+    """
+    GeminiRateLimiter 싱글톤 인스턴스 반환 (GEMINI_RATE_LIMIT_DB 지정 시 호스트 공유)
+
+    GEMINI_RPM/GEMINI_TPM은 키당 한도이므로 API 키 풀 사용 시 키 개수만큼 늘립니다.
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        keys = max(1, len(load_api_keys()))
+        limits = {"rpm": GEMINI_RPM * keys, "tpm": GEMINI_TPM * keys}
+        if GEMINI_RATE_LIMIT_DB:
+            _rate_limiter = SharedRateLimiter(GEMINI_RATE_LIMIT_DB, **limits)
+        else:
+            _rate_limiter = GeminiRateLimiter(**limits)
+    return _rate_limiter
+
+
+def peek_rate_limiter() -> Optional[GeminiRateLimiter]:
+    """생성된 GeminiRateLimiter 반환 (없으면 None, 헬스 체크용)"""
+    return _rate_limiter
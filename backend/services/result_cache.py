@@ -0,0 +1,105 @@
+"""
+분석 결과 캐시 - stale-while-revalidate 신선도 구간 지원
+
+이 모듈은 GeminiService의 결과 캐시를 제공합니다. 각 항목은 저장 시각을 기준으로
+신선(fresh) → 유예(stale) → 만료(expired) 구간을 거칩니다.
+
+- 기존 dict 방식 접근(`key in cache`, `cache[key]`)은 신선한 항목만 적중으로 취급합니다.
+- `lookup()`은 유예 구간의 항목도 반환하여 호출 측이 즉시 응답 후 백그라운드 갱신할 수 있게 합니다.
+- 하드 만료(신선 + 유예 기간)를 지난 항목은 조회 시 제거됩니다.
+- max_entries를 지정하면 저장 시 가장 오래전에 저장된 항목부터 제거하여 항목 수를 제한합니다.
+"""
+
+import os
+import time
+import logging
+from typing import Optional, Dict, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+CACHE_FRESH_TTL = int(os.getenv("CACHE_FRESH_TTL", "3600"))  # 신선 구간 (초, 기본 1시간)
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", "21600"))  # 유예 구간 (초, 신선 구간 이후 추가 6시간)
+
+# 조회 상태
+CACHE_FRESH = "fresh"
+CACHE_STALE = "stale"
+
+_MISSING = object()
+
+
+class ResultCache:
+    """신선도 구간이 있는 결과 캐시 (dict 호환 인터페이스)"""
+
+    def __init__(self, fresh_ttl: int = CACHE_FRESH_TTL, stale_ttl: int = CACHE_STALE_TTL, max_entries: int = 0):
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries  # 0이면 제한 없음
+        self._entries: Dict[str, Tuple[str, float]] = {}  # 키 → (값, 저장 시각)
+
+    def _state(self, key: str, now: Optional[float] = None) -> Optional[str]:
+        """항목 상태 반환 (없거나 하드 만료 시 None, 만료 항목은 제거)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = (now if now is not None else time.time()) - entry[1]
+        if age <= self.fresh_ttl:
+            return CACHE_FRESH
+        if age <= self.fresh_ttl + self.stale_ttl:
+            return CACHE_STALE
+        del self._entries[key]
+        return None
+
+    def lookup(self, key: str, now: Optional[float] = None) -> Optional[Tuple[str, str]]:
+        """
+        유예 구간을 포함한 조회
+
+        Returns:
+            Optional[Tuple[str, str]]: (값, 상태: CACHE_FRESH | CACHE_STALE), 없거나 만료 시 None
+        """
+        state = self._state(key, now)
+        if state is None:
+            return None
+        return self._entries[key][0], state
+
+    def age(self, key: str, now: Optional[float] = None) -> Optional[float]:
+        """항목 경과 시간 (초)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return (now if now is not None else time.time()) - entry[1]
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._state(key) == CACHE_FRESH
+
+    def __getitem__(self, key: str) -> str:
+        if self._state(key) != CACHE_FRESH:
+            raise KeyError(key)
+        return self._entries[key][0]
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self._entries.pop(key, None)  # 다시 저장한 항목은 가장 최근 항목으로
+        self._entries[key] = (value, time.time())
+        while self.max_entries and len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def __delitem__(self, key: str) -> None:
+        del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """신선한 항목만 반환"""
+        return self[key] if key in self else default
+
+    def pop(self, key: str, default: Any = _MISSING) -> Any:
+        """항목 제거 후 값 반환 (상태 무관)"""
+        if key in self._entries:
+            return self._entries.pop(key)[0]
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,277 @@
+"""
+Gemini 호출 재시도 정책 - 오류 분류, decorrelated jitter, 요청 단위 재시도 예산, 전역 재시도 비율 제한
+
+이 모듈은 GeminiService의 모든 재시도 루프가 공유하는 단일 재시도 엔진입니다.
+
+- 오류 분류: retryable(일시 장애) / quota(할당량 429) / invalid(요청 오류, 재시도 무의미) / schema(출력 형식 오류)
+  - invalid는 재시도하지 않으며, schema는 보정 지시를 추가하는 호출 측(Step 2)에서만 대기 없이 재시도합니다.
+  - GeminiCapacityError(로컬 승인 제어/RPM/회로 차단기 거절)는 분류하지 않고 그대로 전파합니다.
+- 대기: decorrelated jitter (다음 대기 = min(최대, uniform(기본, 직전 대기 × 3))), quota는 더 긴 기본 대기 사용
+- 요청 단위 예산: 한 요청(Step 1 + Step 2 등)이 공유하는 재시도 횟수와 마감 시각(GEMINI_TIMEOUT),
+  대기 후 마감을 넘기는 재시도는 하지 않음
+- 전역 비율 제한: 최근 구간의 재시도 수가 최초 시도 수 × GEMINI_RETRY_RATIO를 넘지 않도록 제한하여
+  장애 시 재시도가 부하를 증폭시키지 않게 함
+
+사용:
+    retry = self.retry_policy.attempts("Step 1", max_attempts=self.max_retries)
+    for attempt in retry:
+        try:
+            return await ...
+        except Exception as e:
+            if not await retry.backoff(e):
+                raise ValueError(...)
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import contextvars
+from collections import deque, Counter
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Deque, Iterator
+
+from google.genai import errors as genai_errors
+from pydantic import ValidationError
+
+from services.errors import GeminiCapacityError
+from services.progress_events import emit
+from utils.report_guard import StreamSchemaError
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))  # 루프당 최대 시도 수
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "600"))  # 요청 단위 마감 (초)
+GEMINI_RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_BASE_DELAY", "1"))  # 재시도 기본 대기 (초)
+GEMINI_RETRY_MAX_DELAY = float(os.getenv("GEMINI_RETRY_MAX_DELAY", "20"))  # 재시도 최대 대기 (초)
+GEMINI_RETRY_QUOTA_DELAY = float(os.getenv("GEMINI_RETRY_QUOTA_DELAY", "5"))  # 할당량 오류 기본 대기 (초)
+GEMINI_RETRY_REQUEST_BUDGET = int(os.getenv("GEMINI_RETRY_REQUEST_BUDGET", "4"))  # 요청당 재시도 횟수 (전 단계 합계)
+GEMINI_RETRY_RATIO = float(os.getenv("GEMINI_RETRY_RATIO", "0.2"))  # 최초 시도 대비 재시도 비율 상한
+GEMINI_RETRY_MIN_RETRIES = int(os.getenv("GEMINI_RETRY_MIN_RETRIES", "5"))  # 비율과 무관하게 허용할 구간당 재시도 수
+GEMINI_RETRY_WINDOW = float(os.getenv("GEMINI_RETRY_WINDOW", "60"))  # 비율 집계 구간 (초)
+
+# 오류 분류
+ERROR_RETRYABLE = "retryable"
+ERROR_QUOTA = "quota"
+ERROR_INVALID = "invalid"
+ERROR_SCHEMA = "schema"
+
+
+class RetryableResponseError(ValueError):
+    """응답 내용 문제(빈 응답, 너무 짧은 응답) - 다시 생성하면 달라질 수 있어 재시도 대상"""
+
+
+def classify_error(exc: BaseException) -> str:
+    """재시도 판단용 오류 분류"""
+    if isinstance(exc, (StreamSchemaError, ValidationError, json.JSONDecodeError)):
+        return ERROR_SCHEMA
+    if isinstance(exc, genai_errors.ClientError):
+        return ERROR_QUOTA if exc.code == 429 else ERROR_INVALID
+    if isinstance(exc, RetryableResponseError):
+        return ERROR_RETRYABLE
+    if isinstance(exc, ValueError):
+        return ERROR_INVALID
+    text = str(exc).lower()
+    if "resource_exhausted" in text or "quota" in text:
+        return ERROR_QUOTA
+    return ERROR_RETRYABLE
+
+
+class RetryBudget:
+    """요청 1건의 재시도 예산 (같은 요청의 모든 재시도 루프가 공유)"""
+
+    __slots__ = ("deadline", "retries_left")
+
+    def __init__(self, deadline: float, retries_left: int):
+        self.deadline = deadline
+        self.retries_left = retries_left
+
+
+# 현재 요청의 재시도 예산
+_current_budget: contextvars.ContextVar[Optional[RetryBudget]] = contextvars.ContextVar(
+    "retry_budget", default=None
+)
+
+
+class RetryAttempts:
+    """재시도 루프 1회분 상태 - 시도 번호를 생성하고, 실패 시 backoff()로 재시도 여부 결정 및 대기"""
+
+    def __init__(self, policy: "RetryPolicy", label: str, max_attempts: int, budget: RetryBudget):
+        self.policy = policy
+        self.label = label
+        self.max_attempts = max(1, max_attempts)
+        self.budget = budget
+        self.attempt = 0
+        self.last_kind: Optional[str] = None
+        self._delay = 0.0
+
+    def __iter__(self) -> Iterator[int]:
+        for attempt in range(self.max_attempts):
+            self.attempt = attempt
+            self.policy._record_attempt(retry=attempt > 0)
+            yield attempt
+
+    async def backoff(self, exc: BaseException, correctable: bool = False) -> bool:
+        """
+        실패한 시도의 재시도 여부 결정 - 재시도하면 대기 후 True, 포기하면 False
+
+        Args:
+            exc: 실패 원인
+            correctable: schema 오류를 보정 지시와 함께 다시 시도할 수 있는지 (대기 없이 재시도)
+
+        Raises:
+            GeminiCapacityError: 로컬 용량 거절은 재시도 없이 그대로 전파
+        """
+        if isinstance(exc, GeminiCapacityError):
+            raise exc
+        kind = classify_error(exc)
+        self.last_kind = kind
+        policy = self.policy
+        policy.failures[kind] += 1
+        logger.warning(f"{self.label} 실패 ({kind}, 시도 {self.attempt + 1}/{self.max_attempts}): {str(exc)[:300]}")
+
+        if kind == ERROR_INVALID or (kind == ERROR_SCHEMA and not correctable):
+            return False
+        if self.attempt + 1 >= self.max_attempts:
+            return False
+        if self.budget.retries_left <= 0:
+            policy.exhausted += 1
+            logger.warning(f"{self.label}: 요청 재시도 예산 소진 - 재시도 중단")
+            return False
+
+        delay = 0.0 if kind == ERROR_SCHEMA else self._next_delay(kind)
+        if policy.clock() + delay >= self.budget.deadline:
+            policy.exhausted += 1
+            logger.warning(f"{self.label}: 재시도 대기 {delay:.1f}초 후 요청 마감 초과 - 재시도 중단")
+            return False
+        if not policy._allow_retry():
+            policy.throttled += 1
+            logger.warning(f"{self.label}: 전역 재시도 비율 상한 도달 - 재시도 중단")
+            return False
+
+        self.budget.retries_left -= 1
+        emit("retry", step=self.label, attempt=self.attempt + 2, kind=kind, delay=round(delay, 2))
+        if delay > 0:
+            logger.info(f"{self.label}: {delay:.2f}초 후 재시도 ({kind})")
+            await asyncio.sleep(delay)
+        return True
+
+    def _next_delay(self, kind: str) -> float:
+        """decorrelated jitter 대기 시간"""
+        base = self.policy.quota_delay if kind == ERROR_QUOTA else self.policy.base_delay
+        upper = max(base, self._delay * 3)
+        self._delay = min(self.policy.max_delay, self.policy.rng.uniform(base, upper))
+        return self._delay
+
+
+class RetryPolicy:
+    """Gemini 호출 재시도 엔진 (프로세스 공유, 전역 재시도 비율 집계)"""
+
+    def __init__(
+        self,
+        max_attempts: int = GEMINI_MAX_RETRIES,
+        timeout: float = GEMINI_TIMEOUT,
+        base_delay: float = GEMINI_RETRY_BASE_DELAY,
+        max_delay: float = GEMINI_RETRY_MAX_DELAY,
+        quota_delay: float = GEMINI_RETRY_QUOTA_DELAY,
+        request_budget: int = GEMINI_RETRY_REQUEST_BUDGET,
+        ratio: float = GEMINI_RETRY_RATIO,
+        min_retries: int = GEMINI_RETRY_MIN_RETRIES,
+        window: float = GEMINI_RETRY_WINDOW,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None
+    ):
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max(max_delay, base_delay)
+        self.quota_delay = quota_delay
+        self.request_budget = request_budget
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self._first_attempts: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        # 지표
+        self.failures: Counter = Counter()
+        self.throttled = 0
+        self.exhausted = 0
+
+    def new_budget(self, timeout: Optional[float] = None) -> RetryBudget:
+        """새 요청 단위 재시도 예산"""
+        return RetryBudget(self.clock() + (self.timeout if timeout is None else timeout), self.request_budget)
+
+    @contextmanager
+    def request_scope(self, budget: Optional[RetryBudget] = None) -> Iterator[RetryBudget]:
+        """
+        요청 단위 예산 바인딩 (이미 바인딩된 예산이 있으면 그대로 공유)
+
+        비동기 제너레이터에서는 yield를 사이에 두지 않는 구간에서만 사용합니다.
+        """
+        current = _current_budget.get()
+        if current is not None and budget is None:
+            yield current
+            return
+        budget = budget or self.new_budget()
+        token = _current_budget.set(budget)
+        try:
+            yield budget
+        finally:
+            _current_budget.reset(token)
+
+    def attempts(self, label: str, max_attempts: Optional[int] = None, budget: Optional[RetryBudget] = None) -> RetryAttempts:
+        """재시도 루프 생성 (예산 미지정 시 현재 요청 예산, 없으면 이 루프 전용 예산)"""
+        budget = budget or _current_budget.get() or self.new_budget()
+        return RetryAttempts(self, label, self.max_attempts if max_attempts is None else max_attempts, budget)
+
+    def _evict(self, now: float) -> None:
+        for samples in (self._first_attempts, self._retries):
+            while samples and now - samples[0] > self.window:
+                samples.popleft()
+
+    def _record_attempt(self, retry: bool) -> None:
+        now = self.clock()
+        self._evict(now)
+        (self._retries if retry else self._first_attempts).append(now)
+
+    def _allow_retry(self) -> bool:
+        """전역 재시도 비율 상한 확인 (시도 기록 전)"""
+        self._evict(self.clock())
+        return len(self._retries) < max(self.min_retries, self.ratio * len(self._first_attempts))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """최근 구간 재시도 비율 및 누적 실패 분류"""
+        self._evict(self.clock())
+        first, retries = len(self._first_attempts), len(self._retries)
+        return {
+            "window_seconds": self.window,
+            "attempts": first,
+            "retries": retries,
+            "retry_ratio": round(retries / first, 3) if first else 0.0,
+            "ratio_cap": self.ratio,
+            "throttled": self.throttled,
+            "budget_exhausted": self.exhausted,
+            "failures": dict(self.failures),
+        }
+
+
+# 싱글톤 인스턴스
+_retry_policy: Optional[RetryPolicy] = None
+
+
+def get_retry_policy() -> RetryPolicy:
+    """RetryPolicy 싱글톤 인스턴스 반환"""
+    global _retry_policy
+    if _retry_policy is None:
+        _retry_policy = RetryPolicy()
+    return _retry_policy
+
+
+def peek_retry_policy() -> Optional[RetryPolicy]:
+    """생성된 RetryPolicy 반환 (없으면 None, 헬스 체크용)"""
+    return _retry_policy
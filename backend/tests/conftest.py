@@ -0,0 +1,66 @@
+"""
+테스트 공통 설정
+
+프로세스 단위 Gemini 호출 제어(승인 제어, RPM/TPM 제한기, 회로 차단기, 재시도 정책, 헤지 정책, API 키 풀, 모델 라우터, 컨텍스트 캐시) 싱글톤을 테스트마다 새로 만들어
+앞선 테스트의 호출 이력이 다음 테스트의 대기 시간에 영향을 주지 않도록 합니다.
+
+gemini_service는 결과 캐시·시장 정보 저장소를 격리하고 클라이언트를 Mock으로 바꾼 GeminiService입니다.
+생성 시 환경변수는 gemini_env 픽스처를 재정의하거나 parametrize로 지정하고,
+그 밖의 구성(회로 차단기, 재시도 정책 등)은 각 테스트의 픽스처에서 필요한 속성만 교체합니다.
+"""
+
+import pytest
+from unittest.mock import patch, Mock
+
+import services.admission_control as admission_control
+import services.rate_limiter as rate_limiter
+import services.circuit_breaker as circuit_breaker
+import services.retry_policy as retry_policy
+import services.hedging as hedging
+import services.key_pool as key_pool
+import services.model_router as model_router
+import services.context_cache as context_cache
+import services.prompt_registry as prompt_registry
+from services.gemini_service import GeminiService
+from services.market_facts_store import MarketFactsStore
+from services.result_cache import ResultCache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_gemini_call_controls():
+    admission_control._admission_controller = None
+    rate_limiter._rate_limiter = None
+    circuit_breaker._circuit_breaker = None
+    retry_policy._retry_policy = None
+    hedging._hedge_policy = None
+    key_pool._api_key_pool = None
+    model_router._model_router = None
+    context_cache._prompt_cache = None
+    prompt_registry._prompt_registry = None
+    yield
+    admission_control._admission_controller = None
+    rate_limiter._rate_limiter = None
+    circuit_breaker._circuit_breaker = None
+    retry_policy._retry_policy = None
+    hedging._hedge_policy = None
+    key_pool._api_key_pool = None
+    model_router._model_router = None
+    context_cache._prompt_cache = None
+    prompt_registry._prompt_registry = None
+
+
+@pytest.fixture
+def gemini_env():
+    """GeminiService 생성 시 추가 환경변수 (테스트 모듈/클래스에서 재정의하거나 parametrize로 지정)"""
+    return {}
+
+
+@pytest.fixture
+def gemini_service(gemini_env):
+    """격리된 GeminiService (빈 결과 캐시, 인메모리 시장 정보 저장소, Mock 클라이언트)"""
+    with patch.dict('os.environ', {'GEMINI_API_KEY': 'test_api_key', **gemini_env}):
+        service = GeminiService()
+    service._cache = ResultCache()
+    service.facts_store = MarketFactsStore(":memory:")
+    service.client = Mock()
+    return service
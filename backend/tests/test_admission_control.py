@@ -0,0 +1,180 @@
+"""
+Gemini 호출 승인 제어 테스트
+
+이 모듈은 AdmissionController와 GeminiService/API 계층의 용량 초과 처리(429)를 테스트합니다.
+"""
+
+import asyncio
+import pytest
+from io import BytesIO
+from unittest.mock import patch, Mock, AsyncMock
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from main import app
+from services.admission_control import AdmissionController, AdmissionRejectedError, AdmissionTimeoutError
+from services.errors import GeminiCapacityError
+from services.gemini_service import get_gemini_service
+
+
+class TestAdmissionController:
+    """AdmissionController 테스트 클래스"""
+
+    @pytest.mark.asyncio
+    async def test_fifo_handoff(self):
+        """한도까지 즉시 승인, 이후 대기자는 도착 순서대로 슬롯 획득"""
+        controller = AdmissionController(max_in_flight=1, max_queue=5, wait_timeout=1)
+        order = []
+
+        async def worker(name):
+            async with controller.slot():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await controller.acquire()
+        tasks = [asyncio.create_task(worker(name)) for name in ("a", "b", "c")]
+        await asyncio.sleep(0.01)
+        assert controller.queue_depth == 3
+        controller.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["a", "b", "c"]
+        assert controller.in_flight == 0
+        assert controller.admitted == 4
+
+    @pytest.mark.asyncio
+    async def test_queue_full_rejected(self):
+        """대기열이 가득 차면 즉시 거절 (Retry-After 포함)"""
+        controller = AdmissionController(max_in_flight=1, max_queue=1, wait_timeout=1)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            await controller.acquire()
+
+        assert isinstance(exc_info.value, GeminiCapacityError)
+        assert exc_info.value.retry_after >= 1
+        assert controller.rejected == 1
+        controller.release()
+        await waiter
+
+    @pytest.mark.asyncio
+    async def test_wait_timeout_and_cancel_do_not_leak_slots(self):
+        """대기 시간 초과/취소된 대기자는 대기열에서 빠지고 슬롯을 점유하지 않음"""
+        controller = AdmissionController(max_in_flight=1, max_queue=5, wait_timeout=0.02)
+        await controller.acquire()
+
+        with pytest.raises(AdmissionTimeoutError):
+            await controller.acquire()
+        cancelled = asyncio.create_task(controller.acquire(timeout=5))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+        assert controller.queue_depth == 0
+        controller.release()
+        assert controller.in_flight == 0
+        assert controller.timed_out == 1
+
+    @pytest.mark.asyncio
+    async def test_snapshot_metrics(self):
+        """대기열 깊이와 대기 시간 지표"""
+        controller = AdmissionController(max_in_flight=1, max_queue=5, wait_timeout=1)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.02)
+        assert controller.snapshot()["queue_depth"] == 1
+
+        controller.release()
+        await waiter
+        snapshot = controller.snapshot()
+        assert snapshot["in_flight"] == 1
+        assert snapshot["queue_depth"] == 0
+        assert snapshot["wait_ms_max"] >= 15
+
+
+class TestServiceAdmission:
+    """GeminiService 승인 제어 적용 테스트"""
+
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_bounded(self, gemini_service):
+        """동시 호출 수가 한도를 넘지 않음"""
+        gemini_service.admission = AdmissionController(max_in_flight=2, max_queue=10, wait_timeout=1)
+        active = 0
+        peak = 0
+
+        async def generate_content(**kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return Mock(text="응답")
+
+        gemini_service.client.aio.models.generate_content = AsyncMock(side_effect=generate_content)
+
+        await asyncio.gather(*[gemini_service._generate_content(model="m", contents=["p"]) for _ in range(6)])
+
+        assert peak == 2
+        assert gemini_service.admission.admitted == 6
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.asyncio.sleep', new_callable=AsyncMock)
+    async def test_capacity_error_not_retried(self, mock_sleep, gemini_service):
+        """용량 부족은 Step 1 재시도 루프를 거치지 않고 그대로 전파"""
+        gemini_service.admission = AdmissionController(max_in_flight=1, max_queue=0, wait_timeout=1)
+        await gemini_service.admission.acquire()
+        gemini_service.client.aio.models.generate_content = AsyncMock()
+
+        with pytest.raises(GeminiCapacityError):
+            await gemini_service._generate_grounded_facts([b"image"])
+
+        gemini_service.client.aio.models.generate_content.assert_not_called()
+        mock_sleep.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_closed_stream_releases_slot(self, gemini_service):
+        """스트림을 끝까지 읽지 않고 닫아도 슬롯 반납"""
+        gemini_service.admission = AdmissionController(max_in_flight=1, max_queue=0, wait_timeout=1)
+
+        async def chunks():
+            for text in ("a", "b", "c"):
+                yield Mock(text=text)
+
+        gemini_service.client.aio.models.generate_content_stream = AsyncMock(return_value=chunks())
+        stream = gemini_service._generate_content_stream(model="m", contents=["p"])
+        await stream.__anext__()
+        assert gemini_service.admission.in_flight == 1
+
+        await stream.aclose()
+        assert gemini_service.admission.in_flight == 0
+
+
+class TestAdmissionAPI:
+    """API 계층 429 변환 테스트"""
+
+    @pytest.fixture
+    def image_files(self):
+        img = Image.new('RGB', (500, 500), color='red')
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=85)
+        return {"files": ("test.jpg", buffer.getvalue(), "image/jpeg")}
+
+    def test_capacity_error_maps_to_429(self, image_files):
+        """용량 부족 → 429 + Retry-After"""
+        service = Mock()
+        service.analyze_portfolio_structured = AsyncMock(
+            side_effect=AdmissionRejectedError("요청이 많아 분석을 시작하지 못했습니다.", retry_after=7)
+        )
+        app.dependency_overrides[get_gemini_service] = lambda: service
+        try:
+            response = TestClient(app).post("/api/analyze", files=image_files)
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "7"
+        assert "요청이 많아" in response.json()["detail"]
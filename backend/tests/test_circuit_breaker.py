@@ -0,0 +1,211 @@
+"""
+Gemini 회로 차단기 테스트
+
+이 모듈은 CircuitBreaker의 상태 전환(닫힘/열림/반열림)과 GeminiService/API 계층 적용을 테스트합니다.
+"""
+
+import pytest
+from io import BytesIO
+from unittest.mock import patch, Mock, AsyncMock
+from fastapi.testclient import TestClient
+from google.genai import errors as genai_errors
+from PIL import Image
+
+from main import app
+from services.circuit_breaker import (
+    CircuitBreaker, CircuitOpenError, CIRCUIT_CLOSED, CIRCUIT_OPEN, CIRCUIT_HALF_OPEN
+)
+from services.errors import GeminiCapacityError
+from services.gemini_service import get_gemini_service
+
+
+class FakeClock:
+    """수동 진행 시계"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _call(breaker: CircuitBreaker, clock: FakeClock, error: Exception = None, latency: float = 0.1) -> None:
+    """보호 구간에서 latency초 걸린 호출 1회 (error가 있으면 실패)"""
+    try:
+        with breaker.guard():
+            clock.now += latency
+            if error is not None:
+                raise error
+    except type(error) if error is not None else ():
+        pass
+
+
+class TestCircuitBreaker:
+    """CircuitBreaker 테스트 클래스"""
+
+    def test_opens_on_error_rate_and_fails_fast(self, clock):
+        """최소 호출 수 이후 오류율이 임계값을 넘으면 열림, 이후 즉시 거절"""
+        breaker = CircuitBreaker(min_calls=4, error_rate=0.5, open_seconds=30, clock=clock)
+        _call(breaker, clock)
+        _call(breaker, clock, RuntimeError("503"))
+        _call(breaker, clock)
+        assert breaker.state == CIRCUIT_CLOSED
+        _call(breaker, clock, RuntimeError("503"))
+
+        assert breaker.state == CIRCUIT_OPEN
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.check()
+        assert isinstance(exc_info.value, GeminiCapacityError)
+        assert exc_info.value.retry_after == 30
+        assert breaker.snapshot()["rejected"] == 1
+
+    def test_window_expires_old_failures(self, clock):
+        """집계 구간을 지난 실패는 오류율에서 제외"""
+        breaker = CircuitBreaker(window=60, min_calls=2, error_rate=0.5, clock=clock)
+        _call(breaker, clock, RuntimeError("503"))
+        clock.now += 61
+        _call(breaker, clock)
+        _call(breaker, clock)
+
+        assert breaker.state == CIRCUIT_CLOSED
+        assert breaker.snapshot()["calls"] == 2
+
+    def test_slow_calls_open_circuit(self, clock):
+        """느린 호출 비율이 임계값을 넘으면 열림"""
+        breaker = CircuitBreaker(min_calls=2, slow_call=10, slow_rate=1.0, clock=clock)
+        _call(breaker, clock, latency=15)
+        _call(breaker, clock, latency=12)
+
+        assert breaker.state == CIRCUIT_OPEN
+
+    def test_client_errors_not_counted(self, clock):
+        """429 이외의 4xx 요청 오류는 백엔드 실패로 집계하지 않음"""
+        breaker = CircuitBreaker(min_calls=2, error_rate=0.5, clock=clock)
+        for _ in range(3):
+            _call(breaker, clock, genai_errors.ClientError(400, {"error": {"message": "bad request"}}))
+        assert breaker.state == CIRCUIT_CLOSED
+
+        _call(breaker, clock, genai_errors.ClientError(429, {"error": {"message": "quota"}}))
+        _call(breaker, clock, genai_errors.ClientError(429, {"error": {"message": "quota"}}))
+        _call(breaker, clock, genai_errors.ClientError(429, {"error": {"message": "quota"}}))
+        assert breaker.state == CIRCUIT_OPEN
+
+    def test_half_open_probe_success_closes(self, clock):
+        """열림 시간이 지나면 시험 호출 1건만 허용, 성공 시 닫힘"""
+        breaker = CircuitBreaker(min_calls=1, error_rate=0.5, open_seconds=30, probes=1, clock=clock)
+        _call(breaker, clock, RuntimeError("503"))
+        clock.now += 31
+        assert breaker.state == CIRCUIT_HALF_OPEN
+
+        with breaker.guard():
+            with pytest.raises(CircuitOpenError):
+                breaker.check()  # 시험 호출 진행 중 - 추가 호출 거절
+        assert breaker.state == CIRCUIT_CLOSED
+        assert breaker.snapshot()["calls"] == 0
+
+    def test_half_open_probe_failure_reopens(self, clock):
+        """시험 호출 실패 시 다시 열림"""
+        breaker = CircuitBreaker(min_calls=1, error_rate=0.5, open_seconds=30, clock=clock)
+        _call(breaker, clock, RuntimeError("503"))
+        clock.now += 31
+        _call(breaker, clock, RuntimeError("503"))
+
+        assert breaker.state == CIRCUIT_OPEN
+        assert breaker.opened == 2
+
+    def test_cancelled_probe_released(self, clock):
+        """응답 전에 중단된 시험 호출은 집계 없이 시험 슬롯만 반납"""
+        breaker = CircuitBreaker(min_calls=1, error_rate=0.5, open_seconds=30, clock=clock)
+        _call(breaker, clock, RuntimeError("503"))
+        clock.now += 31
+        with pytest.raises(GeneratorExit):
+            with breaker.guard():
+                raise GeneratorExit()
+
+        assert breaker.state == CIRCUIT_HALF_OPEN
+        assert breaker.allows_calls()
+
+
+class TestServiceCircuitBreaker:
+    """GeminiService 회로 차단기 적용 테스트"""
+
+    @pytest.fixture
+    def service(self, gemini_service, clock):
+        gemini_service.breaker = CircuitBreaker(min_calls=2, error_rate=0.5, open_seconds=30, clock=clock)
+        return gemini_service
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.asyncio.sleep', new_callable=AsyncMock)
+    async def test_open_circuit_skips_retry_schedule(self, _mock_sleep, service):
+        """연속 실패로 회로가 열리면 남은 재시도 없이 즉시 거절"""
+        service.client.aio.models.generate_content = AsyncMock(side_effect=RuntimeError("503 UNAVAILABLE"))
+
+        with pytest.raises(CircuitOpenError):
+            await service._generate_grounded_facts([b"image"])
+
+        # 재시도 3회 중 2회 실패로 열림 → 세 번째 시도는 Gemini 호출 없이 거절
+        assert service.client.aio.models.generate_content.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_latency_measured_to_first_chunk(self, service, clock):
+        """스트리밍 호출은 첫 조각까지의 시간으로 지연 시간 기록"""
+        async def chunks():
+            clock.now += 2
+            yield Mock(text="a")
+            clock.now += 100
+            yield Mock(text="b")
+
+        service.client.aio.models.generate_content_stream = AsyncMock(return_value=chunks())
+        async for _ in service._generate_content_stream(model="m", contents=["p"]):
+            pass
+
+        assert service.breaker.snapshot()["latency_ms_avg"] == 2000.0
+
+    def test_open_circuit_serves_stale_without_refresh(self, service, clock):
+        """회로가 열려 있으면 유예 구간 결과만 제공하고 백그라운드 갱신은 예약하지 않음"""
+        for _ in range(2):
+            _call(service.breaker, clock, RuntimeError("503"))
+
+        service._schedule_report_refresh([b"image"], "json")
+
+        assert service._refresh_tasks == {}
+
+
+class TestCircuitBreakerAPI:
+    """API 계층 변환 테스트"""
+
+    @pytest.fixture
+    def image_files(self):
+        img = Image.new('RGB', (500, 500), color='red')
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=85)
+        return {"files": ("test.jpg", buffer.getvalue(), "image/jpeg")}
+
+    def test_open_circuit_maps_to_503(self, image_files):
+        """회로 열림 → 503 + Retry-After"""
+        service = Mock()
+        service.analyze_portfolio_structured = AsyncMock(
+            side_effect=CircuitOpenError("AI 분석 서비스가 일시적으로 불안정합니다.", retry_after=12)
+        )
+        app.dependency_overrides[get_gemini_service] = lambda: service
+        try:
+            response = TestClient(app).post("/api/analyze", files=image_files)
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "12"
+
+    def test_health_reports_circuit_state(self, clock):
+        """/health에 회로 상태 포함"""
+        import services.circuit_breaker as circuit_breaker
+        circuit_breaker._circuit_breaker = CircuitBreaker(clock=clock)
+
+        response = TestClient(app).get("/health")
+
+        assert response.json()["gemini_circuit"]["state"] == CIRCUIT_CLOSED
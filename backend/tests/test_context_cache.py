@@ -0,0 +1,238 @@
+"""
+Gemini 명시적 컨텍스트 캐시 테스트
+
+이 모듈은 로컬 가짜 caches API로 PromptCache의 지연 생성·재사용, 만료 전 TTL 연장, 생성 실패 시 프롬프트 직접 전송과
+GeminiService 호출 경로의 캐시 참조 적용/무효화를 테스트합니다.
+"""
+
+import pytest
+from unittest.mock import Mock, AsyncMock
+from fastapi.testclient import TestClient
+from google.genai import errors as genai_errors
+from google.genai.types import GenerateContentConfig, Tool, GoogleSearch, CachedContent
+
+from main import app
+from services.context_cache import PromptCache
+
+STATIC_PROMPT = "고정 분석 지시문입니다. " * 200
+
+
+class FakeClock:
+    """수동 진행 시계"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeCaches:
+    """client.aio.caches 로컬 가짜 (생성된 캐시 콘텐츠와 호출 이력 보관)"""
+
+    def __init__(self):
+        self.contents = {}
+        self.creates = []
+        self.updates = []
+        self.fail_create = None
+        self.fail_update = None
+
+    async def create(self, *, model, config):
+        if self.fail_create is not None:
+            raise self.fail_create
+        name = f"cachedContents/{len(self.creates) + 1}"
+        self.creates.append((model, config))
+        self.contents[name] = config
+        return CachedContent(name=name, model=model)
+
+    async def update(self, *, name, config):
+        if self.fail_update is not None:
+            raise self.fail_update
+        self.updates.append((name, config.ttl))
+        return CachedContent(name=name)
+
+
+def _client() -> Mock:
+    client = Mock()
+    client.aio.caches = FakeCaches()
+    return client
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _cache(clock, **kwargs) -> PromptCache:
+    options = dict(enabled=True, ttl=3600, refresh_margin=300, min_tokens=100, retry_seconds=600, clock=clock)
+    options.update(kwargs)
+    cache = PromptCache(**options)
+    cache.register("grounding", STATIC_PROMPT)
+    return cache
+
+
+def _request(*contents, config=None):
+    return {"model": "gemini-2.5-flash", "contents": list(contents), "config": config}
+
+
+class TestPromptCache:
+    """PromptCache 테스트 클래스"""
+
+    @pytest.mark.asyncio
+    async def test_created_lazily_and_reused(self, clock):
+        cache = _cache(clock)
+        client = _client()
+        config = GenerateContentConfig(temperature=0.2, tools=[Tool(google_search=GoogleSearch())])
+
+        first = await cache.apply(client, _request(STATIC_PROMPT, "image", config=config))
+        second = await cache.apply(client, _request(STATIC_PROMPT, "other image", config=config))
+
+        assert len(client.aio.caches.creates) == 1
+        assert client.aio.caches.creates[0][1].tools  # 도구는 캐시에 함께 저장
+        assert first["contents"] == ["image"] and second["contents"] == ["other image"]
+        assert second["config"].cached_content == "cachedContents/1"
+        assert second["config"].tools is None and second["config"].temperature == 0.2
+        assert config.cached_content is None  # 원본 설정은 변경하지 않음
+        assert cache.snapshot()["hits"] == {"grounding": 2}
+
+    @pytest.mark.asyncio
+    async def test_prefix_prompt_keeps_variable_tail(self, clock):
+        """첫 문자열이 고정 프롬프트로 시작하면 나머지(입력 데이터)만 전송"""
+        cache = _cache(clock)
+
+        request = await cache.apply(_client(), _request(STATIC_PROMPT + "\n## 입력 데이터\nAAPL"))
+
+        assert request["contents"] == ["\n## 입력 데이터\nAAPL"]
+        assert request["config"].cached_content == "cachedContents/1"
+
+    @pytest.mark.asyncio
+    async def test_refreshed_before_ttl_runs_out(self, clock):
+        cache = _cache(clock)
+        client = _client()
+        await cache.apply(client, _request(STATIC_PROMPT, "image"))
+
+        clock.now += 3600 - 200  # 남은 TTL 200초 < 연장 기준 300초
+        request = await cache.apply(client, _request(STATIC_PROMPT, "image"))
+
+        assert client.aio.caches.updates == [("cachedContents/1", "3600s")]
+        assert request["config"].cached_content == "cachedContents/1"
+        clock.now += 3000
+        await cache.apply(client, _request(STATIC_PROMPT, "image"))
+        assert len(client.aio.caches.updates) == 1 and len(client.aio.caches.creates) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_or_expiry_recreates(self, clock):
+        cache = _cache(clock)
+        client = _client()
+        await cache.apply(client, _request(STATIC_PROMPT, "image"))
+
+        client.aio.caches.fail_update = genai_errors.ClientError(404, {"error": {"message": "not found"}})
+        clock.now += 3500
+        request = await cache.apply(client, _request(STATIC_PROMPT, "image"))
+        assert request["config"].cached_content == "cachedContents/2"
+
+        clock.now += 4000  # 만료 후에는 연장 없이 새로 생성
+        request = await cache.apply(client, _request(STATIC_PROMPT, "image"))
+        assert request["config"].cached_content == "cachedContents/3"
+
+    @pytest.mark.asyncio
+    async def test_create_failure_falls_back_inline(self, clock):
+        """생성 실패 시 원래 요청 그대로, 재시도 간격 동안 다시 만들지 않음"""
+        cache = _cache(clock)
+        client = _client()
+        client.aio.caches.fail_create = genai_errors.ClientError(
+            400, {"error": {"message": "Cached content is too small"}}
+        )
+        original = _request(STATIC_PROMPT, "image")
+
+        assert await cache.apply(client, original) is original
+        client.aio.caches.fail_create = None
+        assert await cache.apply(client, original) is original
+        assert cache.failures == 1
+
+        clock.now += 601
+        assert (await cache.apply(client, original))["contents"] == ["image"]
+
+    @pytest.mark.asyncio
+    async def test_skipped_when_disabled_small_or_unregistered(self, clock):
+        client = _client()
+        original = _request(STATIC_PROMPT, "image")
+
+        assert await _cache(clock, enabled=False).apply(client, original) is original
+        assert await _cache(clock, min_tokens=100_000).apply(client, original) is original
+        unregistered = _request("다른 프롬프트", "image")
+        assert await _cache(clock).apply(client, unregistered) is unregistered
+        assert client.aio.caches.creates == []
+
+    @pytest.mark.asyncio
+    async def test_caches_per_client_and_model(self, clock):
+        """API 키(클라이언트)와 모델마다 별도 캐시"""
+        cache = _cache(clock)
+        first, second = _client(), _client()
+        await cache.apply(first, _request(STATIC_PROMPT, "image"))
+        await cache.apply(second, _request(STATIC_PROMPT, "image"))
+        await cache.apply(first, {**_request(STATIC_PROMPT, "image"), "model": "gemini-2.5-pro"})
+
+        assert len(first.aio.caches.creates) == 2 and len(second.aio.caches.creates) == 1
+
+
+class TestServicePromptCache:
+    """GeminiService 캐시 참조 적용 테스트"""
+
+    @pytest.fixture
+    def service(self, gemini_service, clock):
+        gemini_service.client = _client()
+        gemini_service.prompt_cache = PromptCache(enabled=True, min_tokens=100, clock=clock)
+        gemini_service._register_cached_prompts()
+        return gemini_service
+
+    @pytest.mark.asyncio
+    async def test_step1_references_cached_grounding_prompt(self, service):
+        service.client.aio.models.generate_content = AsyncMock(return_value=Mock(text="분석 " * 200, candidates=None))
+
+        await service._generate_grounded_facts([b"image"])
+
+        call = service.client.aio.models.generate_content.call_args.kwargs
+        assert call["config"].cached_content == "cachedContents/1"
+        assert not call["config"].tools
+        assert service._get_grounding_prompt() not in call["contents"]
+        model, cache_config = service.client.aio.caches.creates[0]
+        assert cache_config.contents == [service._get_grounding_prompt()] and cache_config.tools
+
+    @pytest.mark.asyncio
+    async def test_step2_stream_sends_only_input_data(self, service):
+        captured = []
+
+        async def chunks():
+            yield Mock(text="{}", candidates=None, usage_metadata=None)
+
+        async def generate_content_stream(model, contents, config):
+            captured.append((contents, config))
+            return chunks()
+
+        service.client.aio.models.generate_content_stream = generate_content_stream
+
+        await service._stream_step2_json(service._get_json_generation_prompt("## 포트폴리오\n- AAPL"), service._get_step2_config())
+
+        contents, config = captured[0]
+        assert config.cached_content and "AAPL" in contents[0]
+        assert "출력 JSON 구조" not in contents[0]
+
+    @pytest.mark.asyncio
+    async def test_rejected_cache_reference_resent_inline(self, service):
+        """만료/삭제된 캐시 참조가 거절되면 캐시를 버리고 원래 요청으로 재호출"""
+        service.client.aio.models.generate_content = AsyncMock(side_effect=[
+            genai_errors.ClientError(403, {"error": {"message": "CachedContent not found (or permission denied)"}}),
+            Mock(text="분석 " * 200, candidates=None),
+        ])
+
+        await service._generate_grounded_facts([b"image"])
+
+        retry = service.client.aio.models.generate_content.call_args_list[1].kwargs
+        assert retry["contents"][0] == service._get_grounding_prompt()
+        assert service.prompt_cache.snapshot()["invalidated"] == 1
+
+    def test_health_reports_context_cache(self, service):
+        response = TestClient(app).get("/health")
+
+        assert response.json()["gemini_context_cache"]["enabled"] is False
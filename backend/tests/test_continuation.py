@@ -0,0 +1,99 @@
+"""
+출력 길이 제한(MAX_TOKENS) 이어쓰기 테스트
+
+이 모듈은 Step 1/Step 2가 중단된 출력을 처음부터 다시 생성하지 않고 이어쓰기 요청으로 완성하는지 테스트합니다.
+"""
+
+import pytest
+from unittest.mock import patch, Mock, AsyncMock
+from google.genai.types import FinishReason, GenerateContentConfig
+
+from services.gemini_service import GeminiService
+from tests.test_json_stream import SAMPLE_JSON, _chunk_responses, _stream_of
+from tests.test_market_facts_store import SAMPLE_GROUNDED_MARKDOWN
+
+
+def _response(text: str, finish_reason=FinishReason.STOP):
+    """finish_reason을 가진 응답(또는 스트림 조각) 대역"""
+    return Mock(text=text, candidates=[Mock(finish_reason=finish_reason)])
+
+
+@pytest.fixture
+def gemini_env():
+    return {'GEMINI_MAX_CONTINUATIONS': '2'}
+
+
+class TestTrimContinuation:
+    """이어쓰기 응답 정리 테스트"""
+
+    def test_removes_overlap_with_received_tail(self):
+        assert GeminiService._trim_continuation("...abcdefghijkl", "efghijklmnop") == "mnop"
+
+    def test_removes_leading_code_fence(self):
+        assert GeminiService._trim_continuation('{"a": ', '```json\n1}') == "1}"
+
+    def test_short_coincidental_overlap_kept(self):
+        """최소 길이 미만 일치는 중복으로 보지 않음"""
+        assert GeminiService._trim_continuation('"score": 7', '7, "x": 1}') == '7, "x": 1}'
+
+
+class TestStep1Continuation:
+    """Step 1 일괄 호출 이어쓰기 테스트"""
+
+    @pytest.mark.asyncio
+    async def test_truncated_output_is_continued_not_regenerated(self, gemini_service):
+        """MAX_TOKENS 중단 시 기존 출력을 모델 턴으로 넣어 이어쓰기, 중복 제거 후 연결"""
+        full = SAMPLE_GROUNDED_MARKDOWN * 5
+        cut = len(full) // 2
+        gemini_service.client.aio.models.generate_content = AsyncMock(side_effect=[
+            _response(full[:cut], FinishReason.MAX_TOKENS),
+            _response(full[cut - 20:]),  # 끝부분 20자 반복 후 이어쓰기
+        ])
+
+        result = await gemini_service._generate_grounded_facts([b"image"])
+
+        assert result == full.strip()
+        calls = gemini_service.client.aio.models.generate_content.call_args_list
+        assert len(calls) == 2
+        user_turn, model_turn, instruction = calls[1].kwargs["contents"]
+        assert model_turn.role == "model"
+        assert model_turn.parts[0].text == full[:cut]
+        assert "이어서" in instruction.parts[0].text
+
+    @pytest.mark.asyncio
+    async def test_continuations_bounded(self, gemini_service):
+        """이어쓰기 횟수 제한 (GEMINI_MAX_CONTINUATIONS)"""
+        gemini_service.client.aio.models.generate_content = AsyncMock(side_effect=[
+            _response(text * 10, FinishReason.MAX_TOKENS) for text in ("가", "나", "다", "라")
+        ])
+
+        text = await gemini_service._generate_with_continuation(["프롬프트"], GenerateContentConfig(), "step1")
+
+        assert gemini_service.client.aio.models.generate_content.await_count == 3
+        assert text == "가" * 10 + "나" * 10 + "다" * 10
+
+
+class TestStep2Continuation:
+    """Step 2 스트리밍 이어쓰기 테스트"""
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.asyncio.sleep', new_callable=AsyncMock)
+    async def test_truncated_json_stitched_and_validated(self, mock_sleep, gemini_service):
+        """중단된 JSON을 이어쓰기로 완성 (JSON 모드 해제, 코드 블록 표시 제거), 재생성 없음"""
+        cut = len(SAMPLE_JSON) * 2 // 3
+        first = _chunk_responses(SAMPLE_JSON[:cut], 100)
+        first[-1].candidates = [Mock(finish_reason=FinishReason.MAX_TOKENS)]
+        second = _chunk_responses("```json\n" + SAMPLE_JSON[cut - 40:] + "\n```", 100)
+        gemini_service.client.aio.models.generate_content_stream = AsyncMock(side_effect=[
+            _stream_of(first),
+            _stream_of(second),
+        ])
+
+        report = await gemini_service._generate_structured_json("그라운딩 결과")
+
+        assert [tab.tabId for tab in report.tabs] == ["dashboard", "deepDive", "allStockScores", "keyStockAnalysis"]
+        calls = gemini_service.client.aio.models.generate_content_stream.call_args_list
+        assert len(calls) == 2
+        assert calls[0].kwargs["config"].response_mime_type == "application/json"
+        assert calls[1].kwargs["config"].response_mime_type is None
+        assert calls[1].kwargs["contents"][1].parts[0].text == SAMPLE_JSON[:cut]
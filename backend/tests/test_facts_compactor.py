@@ -0,0 +1,83 @@
+"""
+Step 2 입력(그라운딩 결과) 압축 테스트
+
+이 모듈은 compact_grounded_facts의 장식 제거·내용 보존과 GeminiService Step 2 프롬프트 적용을 테스트합니다.
+"""
+
+import re
+from unittest.mock import patch
+
+from services.rate_limiter import estimate_input_tokens
+from utils import facts_compactor
+from utils.facts_compactor import compact_grounded_facts
+
+GROUNDED_MARKDOWN = """
+---
+
+### **포트폴리오 종합 스코어**
+
+* **포트폴리오 종합 리니아 스코어: 72 / 100**
+
+**2. 개별 종목 리니아 스코어**
+| 주식 | Overall (100점 만점) | 펀더멘탈 | 기술 잠재력 | 거시경제 | 시장심리 | CEO/리더십 |
+| :--- | :--- | :--- | :--- | :--- | :--- | :--- |
+| **팔란티어 (PLTR)** | 78 | 70 | 95 | 75 | 85 | 85 |
+| **브로드컴 (AVGO)** | 82 | 85 | 80 | 80 | 80 | 85 |
+
+**1. 팔란티어 테크놀로지스 (PLTR) - Overall: 78 / 100**
+* **펀더멘탈 (70/100):** 꾸준한 매출 성장과 최근 GAAP 기준 흑자 전환 성공은 긍정적입니다.
+
+### **심층 분석 설명**
+
+* **1.1 성장 잠재력 분석 (88 / 100): 미래 기술에 대한 강력한 베팅**
+    포트폴리오는 기술 잠재력이 매우 높은 종목들에 집중적으로 투자되어 있습니다.
+
+* **💪 강점**
+    * **선구적인 미래 기술 투자:** 양자 컴퓨팅, AI 등 미래 성장 동력에 대한 과감한 투자
+
+---
+"""
+
+
+class TestCompactGroundedFacts:
+    """compact_grounded_facts 테스트 클래스"""
+
+    def test_decorations_removed(self):
+        compacted = compact_grounded_facts(GROUNDED_MARKDOWN)
+
+        assert "**" not in compacted and "###" not in compacted and "💪" not in compacted
+        assert ":---" not in compacted and "\n\n" not in compacted and "---" not in compacted
+        assert "팔란티어 (PLTR)|78|70|95|75|85|85" in compacted.splitlines()
+        assert "- 1.1 성장 잠재력 분석 (88/100): 미래 기술에 대한 강력한 베팅" in compacted.splitlines()
+        assert " - 선구적인 미래 기술 투자: 양자 컴퓨팅, AI 등 미래 성장 동력에 대한 과감한 투자" in compacted.splitlines()
+
+    def test_scores_and_text_preserved(self):
+        compacted = compact_grounded_facts(GROUNDED_MARKDOWN)
+
+        assert re.findall(r"\d+", compacted) == re.findall(r"\d+", GROUNDED_MARKDOWN)
+        assert "꾸준한 매출 성장과 최근 GAAP 기준 흑자 전환 성공은 긍정적입니다." in compacted
+        assert estimate_input_tokens([compacted]) < estimate_input_tokens([GROUNDED_MARKDOWN]) * 0.85
+
+    def test_plain_text_unchanged(self):
+        assert compact_grounded_facts("분석 결과 없음") == "분석 결과 없음"
+
+    def test_content_mismatch_returns_original(self):
+        """변환이 내용을 잃으면 원문 사용"""
+        with patch.object(facts_compactor, "_compact_line", side_effect=lambda raw: ""):
+            assert compact_grounded_facts(GROUNDED_MARKDOWN) == GROUNDED_MARKDOWN
+
+
+class TestServiceStep2Facts:
+    """Step 2 프롬프트의 입력 압축 적용 테스트"""
+
+
+    def test_prompt_embeds_compacted_facts(self, gemini_service):
+        prompt = gemini_service._get_json_generation_prompt(GROUNDED_MARKDOWN)
+
+        assert compact_grounded_facts(GROUNDED_MARKDOWN) in prompt
+        assert "| :--- |" not in prompt
+
+    def test_compaction_can_be_disabled(self, gemini_service):
+        gemini_service.compact_facts = False
+
+        assert GROUNDED_MARKDOWN in gemini_service._get_json_generation_prompt(GROUNDED_MARKDOWN)
@@ -0,0 +1,191 @@
+"""
+Gemini 헤지 요청 테스트
+
+이 모듈은 HedgePolicy의 헤지 기준/예산과 hedged_call/hedged_stream의 승자 선택·패자 취소,
+GeminiService Step 1/Step 2 적용을 테스트합니다.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch, Mock
+
+from services.admission_control import AdmissionController
+from services.hedging import HedgePolicy, hedged_call, hedged_stream
+
+
+def _policy(samples: int = 5, latency: float = 0.01, model: str = None, **kwargs) -> HedgePolicy:
+    """표본이 채워진 헤지 정책 (step1/model 헤지 기준 ≈ latency초)"""
+    options = dict(enabled=True, percentile=0.9, min_samples=5, min_delay=0.0, budget_per_minute=10)
+    options.update(kwargs)
+    policy = HedgePolicy(**options)
+    for _ in range(samples):
+        policy.record("step1", latency, model)
+    return policy
+
+
+class TestHedgePolicy:
+    """HedgePolicy 테스트 클래스"""
+
+    def test_delay_requires_samples_and_uses_percentile(self):
+        policy = _policy(samples=4)
+        assert policy.hedge_delay("step1") is None
+
+        for latency in (1.0, 2.0, 3.0, 4.0, 5.0, 6.0):
+            policy.record("step1", latency)
+        assert policy.hedge_delay("step1") == 5.0  # 표본 10개 중 90번째 백분위수
+
+    def test_samples_kept_per_model(self):
+        """폴백 모델의 지연 시간은 기본 모델의 헤지 기준에 섞이지 않음"""
+        policy = _policy(samples=5, latency=1.0, model="gemini-2.5-flash")
+        for _ in range(5):
+            policy.record("step1", 30.0, "gemini-2.5-flash-lite")
+
+        assert policy.hedge_delay("step1", "gemini-2.5-flash") == 1.0
+        assert policy.hedge_delay("step1", "gemini-2.5-flash-lite") == 30.0
+        assert set(policy.snapshot()["steps"]["step1"]["models"]) == {"gemini-2.5-flash", "gemini-2.5-flash-lite"}
+
+    def test_budget_per_minute(self):
+        now = [0.0]
+        policy = HedgePolicy(enabled=True, budget_per_minute=2, clock=lambda: now[0])
+
+        assert policy.try_acquire("step1") and policy.try_acquire("step2")
+        assert not policy.try_acquire("step1")
+        now[0] = 60.0
+        assert policy.try_acquire("step1")
+        assert policy.snapshot()["budget_denied"] == 1
+
+
+class TestHedgedCall:
+    """hedged_call 테스트 클래스"""
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_and_primary_cancelled(self):
+        """기본 호출이 기준 시간 내 응답하지 않으면 헤지, 먼저 온 응답 사용 후 나머지 취소"""
+        policy = _policy()
+        cancelled = []
+        delays = iter([1.0, 0.01])
+
+        async def call():
+            delay = next(delays)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        assert await hedged_call(policy, "step1", call) == 0.01
+        assert cancelled == [1.0]
+        snapshot = policy.snapshot()
+        assert snapshot["hedged"] == 1 and snapshot["hedge_wins"] == 1
+
+    @pytest.mark.asyncio
+    async def test_hedge_rescues_failed_primary(self):
+        """헤지 이후 기본 호출이 실패해도 헤지 응답 사용"""
+        policy = _policy()
+        calls = []
+
+        async def call():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                await asyncio.sleep(0.05)
+                raise RuntimeError("503")
+            await asyncio.sleep(0.1)
+            return "hedge"
+
+        assert await hedged_call(policy, "step1", call) == "hedge"
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_capacity_or_budget(self):
+        """여유 슬롯이 없거나 예산이 소진되면 헤지하지 않음"""
+        policy = _policy(samples=20, budget_per_minute=0)
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "primary"
+
+        assert await hedged_call(policy, "step1", call, can_hedge=lambda: False) == "primary"
+        assert await hedged_call(policy, "step1", call) == "primary"
+        assert len(calls) == 2
+        assert policy.snapshot()["budget_denied"] == 1
+
+    @pytest.mark.asyncio
+    async def test_primary_error_raised_when_all_fail(self):
+        policy = _policy()
+
+        async def call():
+            raise RuntimeError("503")
+
+        with pytest.raises(RuntimeError):
+            await hedged_call(policy, "step1", call)
+        assert policy.snapshot()["hedged"] == 0
+
+
+class TestHedgedStream:
+    """hedged_stream 테스트 클래스"""
+
+    @pytest.mark.asyncio
+    async def test_first_chunk_winner_streamed_and_loser_closed(self):
+        """첫 조각을 먼저 받은 스트림을 끝까지 전달, 나머지 스트림은 닫음"""
+        policy = _policy()
+        closed = []
+        first_delays = iter([1.0, 0.01])
+
+        async def stream():
+            delay = next(first_delays)
+            try:
+                await asyncio.sleep(delay)
+                for text in ("a", "b", "c"):
+                    yield f"{text}{delay}"
+            finally:
+                closed.append(delay)
+
+        chunks = [chunk async for chunk in hedged_stream(policy, "step1", stream)]
+
+        assert chunks == ["a0.01", "b0.01", "c0.01"]
+        assert sorted(closed) == [0.01, 1.0]
+        assert policy.snapshot()["hedge_wins"] == 1
+
+
+class TestServiceHedging:
+    """GeminiService 헤지 적용 테스트"""
+
+    @pytest.fixture
+    def service(self, gemini_service):
+        gemini_service.admission = AdmissionController(max_in_flight=4, max_queue=4, wait_timeout=1)
+        gemini_service.hedging = _policy(model=gemini_service.model_name)
+        return gemini_service
+
+    @pytest.mark.asyncio
+    async def test_step1_call_hedged_and_slots_released(self, service):
+        delays = iter([1.0, 0.01])
+
+        async def generate_content(**kwargs):
+            delay = next(delays)
+            await asyncio.sleep(delay)
+            return Mock(text=f"응답 {delay}", candidates=None)
+
+        service.client.aio.models.generate_content = generate_content
+
+        text = await service._generate_with_continuation(["프롬프트"], Mock(max_output_tokens=100), "step1")
+
+        assert text == "응답 0.01"
+        assert service.admission.in_flight == 0
+
+    def test_spare_capacity_checks_model_breaker(self, service):
+        """헤지 여유는 호출할 모델의 회로 기준 (기본 회로가 닫혀 있어도 폴백 모델 회로가 열리면 헤지 안 함)"""
+        fallback = "gemini-2.5-flash-lite"
+        breaker = Mock()
+        breaker.allows_calls.return_value = False
+
+        with patch.object(service.models, "breaker_for", side_effect=lambda model: breaker if model == fallback else None):
+            assert service._has_spare_capacity(service.model_name)
+            assert not service._has_spare_capacity(fallback)
+
+    def test_disabled_hedging_passes_through(self, service):
+        service.hedging = HedgePolicy(enabled=False)
+        stream = service._generate_content_stream_hedged("step2", model="m", contents=["p"])
+
+        assert stream.__qualname__ == "GeminiService._generate_content_stream"
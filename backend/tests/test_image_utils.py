@@ -11,7 +11,7 @@ from PIL import Image
 from io import BytesIO
 from utils.image_utils import (
     validate_image, optimize_image, get_image_info,
-    is_supported_image_type, guess_content_type
+    is_supported_image_type, guess_content_type, estimate_image_tokens
 )
 
 class TestImageUtils:
@@ -156,6 +156,15 @@ class TestImageUtils:
         assert guess_content_type("file.pdf") == None
         assert guess_content_type("") == None
         assert guess_content_type("no_extension") == None
+    
+    def test_estimate_image_tokens(self, sample_image_data, small_image_data):
+        """Gemini 타일 기준 토큰 추정 (384px 이하 1타일, 그 외 짧은 변/1.5 타일 분할)"""
+        assert estimate_image_tokens(small_image_data) == 258
+        assert estimate_image_tokens(sample_image_data) == 4 * 258  # 500px → 333px 타일 2x2
+        wide = BytesIO()
+        Image.new('RGB', (2048, 1024), color='white').save(wide, format='PNG')
+        assert estimate_image_tokens(wide.getvalue()) == 4 * 2 * 258  # 682px 타일 4x2
+        assert estimate_image_tokens(b"not_an_image") == 258
 
 @pytest.mark.asyncio
 async def test_image_utils_integration():
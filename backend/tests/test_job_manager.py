@@ -0,0 +1,301 @@
+"""
+비동기 분석 작업 테스트
+
+이 모듈은 JobManager 워커 풀과 /api/analyze/jobs 엔드포인트를 테스트합니다.
+"""
+
+import time
+import asyncio
+import pytest
+from io import BytesIO
+from unittest.mock import Mock, AsyncMock, patch
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from main import app
+from models.portfolio import AnalysisStatus, AnalysisResponse, SAMPLE_MARKDOWN_CONTENT
+from services.gemini_service import get_gemini_service
+from services.job_manager import JobManager, JobQueueFullError, MultipleWorkersError, get_job_manager
+
+
+async def _wait_finished(job, timeout: float = 2.0):
+    """작업 종료 대기"""
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+
+class TestJobManager:
+    """JobManager 테스트 클래스"""
+
+    @pytest.mark.asyncio
+    async def test_job_completes(self):
+        """작업 실행 후 결과 보관"""
+        manager = JobManager(max_workers=1, max_queue=5)
+
+        async def runner(job):
+            return "결과"
+
+        job = await manager.submit(runner)
+        await _wait_finished(job)
+
+        assert job.status == AnalysisStatus.COMPLETED
+        assert job.result == "결과"
+        assert job.started_at is not None and job.finished_at is not None
+        await manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_failure_is_mapped_to_message(self):
+        """실패 시 사용자 메시지로 변환"""
+        manager = JobManager(max_workers=1, max_queue=5)
+
+        async def runner(job):
+            raise TimeoutError("내부 타임아웃")
+
+        job = await manager.submit(runner)
+        await _wait_finished(job)
+
+        assert job.status == AnalysisStatus.FAILED
+        assert "시간이 초과" in job.error
+        await manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_bounded_workers_and_queue(self):
+        """워커 수만큼만 동시 실행, 대기 큐 초과 시 거절"""
+        manager = JobManager(max_workers=1, max_queue=1)
+        release = asyncio.Event()
+
+        async def runner(job):
+            await release.wait()
+            return job.job_id
+
+        first = await manager.submit(runner)
+        await asyncio.sleep(0.01)  # 첫 작업이 워커에 배정될 때까지 대기
+        second = await manager.submit(runner)
+
+        assert first.status == AnalysisStatus.PROCESSING
+        assert second.status == AnalysisStatus.PENDING
+        assert manager.queue_position(second) == 1
+        with pytest.raises(JobQueueFullError):
+            await manager.submit(runner)
+
+        release.set()
+        await _wait_finished(second)
+        assert first.status == AnalysisStatus.COMPLETED
+        assert second.status == AnalysisStatus.COMPLETED
+        await manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancel_running_and_pending(self):
+        """실행 중/대기 중 작업 취소"""
+        manager = JobManager(max_workers=1, max_queue=5)
+        started = asyncio.Event()
+        calls = []
+
+        async def runner(job):
+            calls.append(job.job_id)
+            started.set()
+            await asyncio.sleep(10)
+
+        running = await manager.submit(runner)
+        pending = await manager.submit(runner)
+        await started.wait()
+
+        manager.cancel(pending.job_id)
+        manager.cancel(running.job_id)
+        await asyncio.sleep(0.05)
+
+        assert running.status == AnalysisStatus.CANCELLED
+        assert pending.status == AnalysisStatus.CANCELLED
+        assert calls == [running.job_id]  # 대기 중 취소된 작업은 실행되지 않음
+        await manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_prune_expired_jobs(self):
+        """보관 시간이 지난 종료 작업 제거"""
+        manager = JobManager(max_workers=1, max_queue=5, result_ttl=60)
+
+        async def runner(job):
+            return None
+
+        job = await manager.submit(runner)
+        await _wait_finished(job)
+        job.finished_at -= 120
+        manager._prune()
+
+        assert manager.get(job.job_id) is None
+        await manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_second_worker_refused(self, tmp_path):
+        """같은 호스트의 두 번째 서버 프로세스는 시작 거부, 종료 후에는 다시 시작 가능"""
+        lock_path = str(tmp_path / "jobs.lock")
+        first, second = JobManager(), JobManager()
+        first.claim_single_worker(lock_path)
+
+        with pytest.raises(MultipleWorkersError):
+            second.claim_single_worker(lock_path)
+
+        await first.shutdown()
+        second.claim_single_worker(lock_path)
+        await second.shutdown()
+
+    def test_web_concurrency_refused(self):
+        """WEB_CONCURRENCY가 2 이상이면 시작 거부"""
+        with patch.dict('os.environ', {'WEB_CONCURRENCY': '4'}):
+            with pytest.raises(MultipleWorkersError):
+                JobManager().claim_single_worker("")
+
+
+class TestJobAPI:
+    """/api/analyze/jobs 엔드포인트 테스트"""
+
+    @pytest.fixture
+    def image_files(self):
+        img = Image.new('RGB', (500, 500), color='red')
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=85)
+        return {"files": ("test.jpg", buffer.getvalue(), "image/jpeg")}
+
+    @pytest.fixture
+    def gemini_service(self):
+        service = Mock()
+        service.analyze_portfolio_structured = AsyncMock(return_value=AnalysisResponse(
+            content=SAMPLE_MARKDOWN_CONTENT,
+            processing_time=1.0,
+            request_id="job-test",
+            images_processed=1
+        ))
+        return service
+
+    @pytest.fixture
+    def client(self, gemini_service):
+        manager = JobManager(max_workers=1, max_queue=1)
+        app.dependency_overrides[get_gemini_service] = lambda: gemini_service
+        app.dependency_overrides[get_job_manager] = lambda: manager
+        with TestClient(app) as client:
+            client.manager = manager
+            yield client
+            client.portal.call(manager.shutdown)
+        app.dependency_overrides.clear()
+
+    def _poll(self, client, status_url, timeout: float = 2.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            data = client.get(status_url).json()
+            if data["status"] not in ("pending", "processing"):
+                return data
+            time.sleep(0.02)
+        return data
+
+    def test_submit_and_poll_result(self, client, image_files):
+        """202 + Location 헤더, 완료 후 결과 조회"""
+        response = client.post("/api/analyze/jobs", files=image_files)
+
+        assert response.status_code == 202
+        data = response.json()
+        assert response.headers["location"] == data["status_url"]
+        assert data["status"] in ("pending", "processing")
+
+        final = self._poll(client, data["status_url"])
+        assert final["status"] == "completed"
+        assert "**AI 총평:**" in final["result"]["content"]
+
+    def test_invalid_upload_rejected_before_queueing(self, client):
+        """업로드 검증은 등록 시점에 수행"""
+        files = {"files": ("test.txt", b"not_an_image", "text/plain")}
+        response = client.post("/api/analyze/jobs", files=files)
+        assert response.status_code == 400
+        assert not client.manager._jobs
+
+    def test_unknown_job_returns_404(self, client):
+        assert client.get("/api/analyze/jobs/unknown").status_code == 404
+        assert client.delete("/api/analyze/jobs/unknown").status_code == 404
+
+    def test_cancel_and_queue_full(self, client, gemini_service, image_files):
+        """취소 및 대기열 초과 시 429 + Retry-After"""
+        async def slow_analysis(**kwargs):
+            await asyncio.sleep(10)
+
+        gemini_service.analyze_portfolio_structured = AsyncMock(side_effect=slow_analysis)
+
+        running = client.post("/api/analyze/jobs", files=image_files).json()
+        time.sleep(0.05)  # 첫 작업이 워커에 배정될 때까지 대기
+        pending = client.post("/api/analyze/jobs", files=image_files).json()
+        rejected = client.post("/api/analyze/jobs", files=image_files)
+
+        assert rejected.status_code == 429
+        assert rejected.headers["retry-after"] == "30"
+
+        cancelled = client.delete(f"/api/analyze/jobs/{running['job_id']}")
+        assert cancelled.status_code == 200
+        assert cancelled.json()["status"] == "cancelled"
+        assert client.delete(f"/api/analyze/jobs/{running['job_id']}").status_code == 409
+        assert client.delete(f"/api/analyze/jobs/{pending['job_id']}").json()["status"] == "cancelled"
+
+    def test_preview_exposed_before_result(self, client, gemini_service, image_files):
+        """preview=true: Step 1 마크다운을 먼저 노출하고 최종 결과는 같은 작업에 추가"""
+        release = asyncio.Event()
+        final = gemini_service.analyze_portfolio_structured.return_value
+
+        async def two_phase(**kwargs):
+            kwargs["on_grounded"]("**1. 포트폴리오 종합 리니아 스코어: 72 / 100**")
+            await release.wait()
+            return final
+
+        gemini_service.analyze_portfolio_structured = AsyncMock(side_effect=two_phase)
+
+        job = client.post("/api/analyze/jobs?format=json&preview=true", files=image_files).json()
+        deadline = time.monotonic() + 2
+        status = client.get(job["status_url"]).json()
+        while status["preview"] is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+            status = client.get(job["status_url"]).json()
+
+        assert status["status"] == "processing"
+        assert "리니아 스코어" in status["preview"]
+        assert status["preview_at"] is not None
+        assert status["result"] is None
+
+        client.portal.call(release.set)
+        final_status = self._poll(client, job["status_url"])
+        assert final_status["status"] == "completed"
+        assert final_status["preview"] is not None
+        assert final_status["result"] is not None
+
+    def test_preview_not_requested(self, client, gemini_service, image_files):
+        """preview 미지정 시 콜백 미전달"""
+        job = client.post("/api/analyze/jobs?format=json", files=image_files).json()
+        self._poll(client, job["status_url"])
+        assert gemini_service.analyze_portfolio_structured.call_args.kwargs["on_grounded"] is None
+
+
+class TestGroundedCallback:
+    """analyze_portfolio_structured on_grounded 콜백 테스트"""
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_callback_receives_step1_before_step2(self, mock_validate):
+        """Step 1 완료 직후(Step 2 전) 그라운딩 마크다운 전달"""
+        from services.gemini_service import GeminiService
+        from services.result_cache import ResultCache
+        from models.portfolio import PortfolioReport
+        from tests.test_json_stream import SAMPLE_JSON
+
+        with patch.dict('os.environ', {'GEMINI_API_KEY': 'test_api_key'}):
+            service = GeminiService()
+        service._cache = ResultCache()
+        order = []
+        service._generate_grounded_facts = AsyncMock(return_value="그라운딩 마크다운")
+
+        async def step2(grounded_facts):
+            order.append("step2")
+            return PortfolioReport.model_validate_json(SAMPLE_JSON)
+
+        service._generate_structured_json = AsyncMock(side_effect=step2)
+
+        await service.analyze_portfolio_structured(
+            [b"img"], format_type="json", on_grounded=lambda text: order.append(text)
+        )
+
+        assert order == ["그라운딩 마크다운", "step2"]
@@ -0,0 +1,188 @@
+"""
+탭 단위 JSON 스트리밍 테스트
+
+이 모듈은 IncrementalJsonScanner와 GeminiService.stream_portfolio_structured를 테스트합니다.
+"""
+
+import json
+import pytest
+from unittest.mock import patch, Mock, AsyncMock
+
+from utils.json_stream import IncrementalJsonScanner
+
+SAMPLE_REPORT = {
+    "version": "1.0",
+    "reportDate": "2025-09-30",
+    "tabs": [
+        {
+            "tabId": "dashboard",
+            "tabTitle": "총괄 요약",
+            "content": {
+                "overallScore": {"title": "포트폴리오 종합 스코어", "score": 72, "maxScore": 100},
+                "coreCriteriaScores": [
+                    {"criterion": "성장 잠재력", "score": 88, "maxScore": 100},
+                    {"criterion": "안정성 및 방어력", "score": 55, "maxScore": 100},
+                    {"criterion": "전략적 일관성", "score": 74, "maxScore": 100},
+                ],
+                "strengths": ["강점 \"인용\" 포함 }]"],
+                "weaknesses": ["약점1"],
+            },
+        },
+        {
+            "tabId": "deepDive",
+            "tabTitle": "심층 분석",
+            "content": {
+                "inDepthAnalysis": [
+                    {"title": "성장 잠재력", "score": 80, "description": "a" * 60},
+                    {"title": "안정성 및 방어력", "score": 60, "description": "b" * 60},
+                    {"title": "전략적 일관성", "score": 70, "description": "c" * 60},
+                ],
+                "opportunities": {
+                    "title": "기회 및 개선 방안",
+                    "items": [{"summary": "요약1", "details": "d" * 40}],
+                },
+            },
+        },
+        {
+            "tabId": "allStockScores",
+            "tabTitle": "종목 스코어",
+            "content": {
+                "scoreTable": {
+                    "headers": ["주식", "Overall", "펀더멘탈", "기술 잠재력", "거시경제", "시장심리", "CEO/리더십"],
+                    "rows": [{
+                        "주식": "팔란티어 (PLTR)", "Overall": 78, "펀더멘탈": 70, "기술 잠재력": 95,
+                        "거시경제": 75, "시장심리": 85, "CEO/리더십": 85,
+                    }],
+                }
+            },
+        },
+        {
+            "tabId": "keyStockAnalysis",
+            "tabTitle": "핵심 종목",
+            "content": {
+                "analysisCards": [{
+                    "stockName": "팔란티어 (PLTR)",
+                    "overallScore": 78,
+                    "detailedScores": [
+                        {"category": category, "score": 70, "analysis": "x" * 40}
+                        for category in ["펀더멘탈", "기술 잠재력", "거시경제", "시장심리", "CEO/리더십"]
+                    ],
+                }]
+            },
+        },
+    ],
+}
+SAMPLE_JSON = json.dumps(SAMPLE_REPORT, ensure_ascii=False, indent=2)
+
+
+def _chunk_responses(text: str, size: int):
+    return [Mock(text=text[i:i + size]) for i in range(0, len(text), size)]
+
+
+def _stream_of(chunks):
+    async def iterate():
+        for chunk in chunks:
+            yield chunk
+    return iterate()
+
+
+class TestIncrementalJsonScanner:
+    """IncrementalJsonScanner 테스트 클래스"""
+
+    @pytest.mark.parametrize("size", [1, 5, 64, len(SAMPLE_JSON)])
+    def test_emits_each_tab_once_regardless_of_chunking(self, size):
+        """조각 크기와 무관하게 각 탭을 완성 시점에 한 번씩 추출"""
+        scanner = IncrementalJsonScanner("tabs")
+        completed = []
+        for i in range(0, len(SAMPLE_JSON), size):
+            completed.extend(scanner.feed(SAMPLE_JSON[i:i + size]))
+
+        assert [index for index, _ in completed] == [0, 1, 2, 3]
+        assert [json.loads(raw) for _, raw in completed] == SAMPLE_REPORT["tabs"]
+        assert scanner.complete
+        assert scanner.text == SAMPLE_JSON
+
+    def test_tab_available_before_document_ends(self):
+        """첫 탭은 두 번째 탭이 생성되기 전에 추출"""
+        scanner = IncrementalJsonScanner("tabs")
+        cut = SAMPLE_JSON.index('"deepDive"')
+        completed = scanner.feed(SAMPLE_JSON[:cut])
+        assert [index for index, _ in completed] == [0]
+        assert not scanner.complete
+
+    def test_path_tracking(self):
+        """현재 경로 (키, 배열 인덱스) 추적"""
+        scanner = IncrementalJsonScanner("tabs")
+        scanner.feed(SAMPLE_JSON[:SAMPLE_JSON.index('"strengths"') + len('"strengths": [')])
+        assert scanner.path == ("tabs", 0, "content", "strengths")
+
+    def test_ignores_scalar_elements_and_nested_same_key(self):
+        """스칼라 원소는 건너뛰고 인덱스는 유지"""
+        scanner = IncrementalJsonScanner("tabs")
+        completed = scanner.feed('{"tabs": [1, {"a": {"tabs": [2]}}, "x", {"b": []}]}')
+        assert completed == [(1, '{"a": {"tabs": [2]}}'), (3, '{"b": []}')]
+
+
+class TestStreamPortfolioStructured:
+    """stream_portfolio_structured 테스트 클래스"""
+
+    @pytest.fixture
+    def service(self, gemini_service):
+        gemini_service._generate_grounded_facts = AsyncMock(return_value="# 그라운딩 결과" * 100)
+        return gemini_service
+
+    async def _collect(self, service, images):
+        return [event async for event in service.stream_portfolio_structured(images, request_id="tab-test")]
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_tabs_streamed_then_report(self, mock_validate, service):
+        """탭별 검증 후 즉시 전달, 마지막에 리포트 + 캐시 저장"""
+        service.client.aio.models.generate_content_stream = AsyncMock(
+            return_value=_stream_of(_chunk_responses(SAMPLE_JSON, 97))
+        )
+
+        events = await self._collect(service, [b"img"])
+
+        names = [name for name, _ in events]
+        assert names == ["started", "grounded", "tab", "tab", "tab", "tab", "report"]
+        tabs = [data for name, data in events if name == "tab"]
+        assert [tab["tab"]["tabId"] for tab in tabs] == ["dashboard", "deepDive", "allStockScores", "keyStockAnalysis"]
+        assert tabs[2]["tab"]["content"]["scoreTable"]["rows"][0]["기술 잠재력"] == 95
+        assert tabs[3]["tab"]["content"]["analysisCards"][0]["ticker"] == "PLTR"
+
+        report_key = service._generate_report_cache_key([b"img"], "json")
+        assert report_key in service._cache
+        assert events[-1][1]["portfolioReport"]["tabs"][0]["tabId"] == "dashboard"
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_invalid_tab_falls_back_to_batch_step2(self, mock_validate, service):
+        """탭 검증 실패 시 일괄 Step 2로 전환, 남은 탭과 리포트 전달"""
+        broken = SAMPLE_REPORT["tabs"][1]["content"]["inDepthAnalysis"][0]
+        bad_report = json.loads(SAMPLE_JSON)
+        bad_report["tabs"][1]["content"]["inDepthAnalysis"] = [broken]  # 3개 필요
+        service.client.aio.models.generate_content_stream = AsyncMock(
+            return_value=_stream_of(_chunk_responses(json.dumps(bad_report, ensure_ascii=False), 50))
+        )
+        from models.portfolio import PortfolioReport
+        service._generate_structured_json = AsyncMock(return_value=PortfolioReport.model_validate_json(SAMPLE_JSON))
+
+        events = await self._collect(service, [b"img"])
+
+        tabs = [data["index"] for name, data in events if name == "tab"]
+        assert tabs == [0, 1, 2, 3]  # 0번은 스트리밍, 나머지는 일괄 결과에서 전달
+        assert events[-1][0] == "report"
+        service._generate_structured_json.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_cached_report_streams_all_tabs(self, mock_validate, service):
+        """리포트 캐시 적중 시 Gemini 호출 없이 탭과 리포트 전달"""
+        service._cache[service._generate_report_cache_key([b"img"], "json")] = SAMPLE_JSON
+        service.client.aio.models.generate_content_stream = AsyncMock()
+
+        events = await self._collect(service, [b"img"])
+
+        assert [name for name, _ in events] == ["started", "tab", "tab", "tab", "tab", "report"]
+        service._generate_grounded_facts.assert_not_called()
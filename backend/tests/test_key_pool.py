@@ -0,0 +1,205 @@
+"""
+Gemini API 키 풀 테스트
+
+이 모듈은 ApiKeyPool의 최소 부하 배정, 할당량 초과 키 제외/복귀, 키별 사용량 보고와
+GeminiService 호출 경로 적용을 테스트합니다.
+"""
+
+import pytest
+from unittest.mock import patch, Mock, AsyncMock
+from fastapi.testclient import TestClient
+from google.genai import errors as genai_errors
+
+from main import app
+from services.gemini_service import GeminiService
+from services.key_pool import ApiKeyPool, ApiKeyPoolExhaustedError, load_api_keys, get_api_key_pool
+from services.rate_limiter import get_rate_limiter, GEMINI_RPM
+from services.market_facts_store import MarketFactsStore
+from services.result_cache import ResultCache
+from services.errors import GeminiCapacityError
+
+
+class FakeClock:
+    """수동 진행 시계"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _quota_error(retry_delay: str = None) -> genai_errors.ClientError:
+    error = {"code": 429, "message": "quota", "status": "RESOURCE_EXHAUSTED"}
+    if retry_delay:
+        error["details"] = [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": retry_delay}]
+    return genai_errors.ClientError(429, {"error": error})
+
+
+def _pool(clock, count: int = 3, **kwargs) -> ApiKeyPool:
+    keys = [f"test-key-{index:04d}" for index in range(count)]
+    return ApiKeyPool(keys, client_factory=lambda key: Mock(name=key), clock=clock, **kwargs)
+
+
+def _use(pool: ApiKeyPool, tokens: int = 100, error: Exception = None) -> str:
+    """키 1개를 배정받아 호출 1회 (error가 있으면 실패) 후 배정된 키 표시 반환"""
+    try:
+        with pool.lease() as lease:
+            label = lease.key.label
+            if error is not None:
+                raise error
+            lease.record_usage(tokens)
+    except type(error) if error is not None else ():
+        pass
+    return label
+
+
+class TestLoadApiKeys:
+    """키 설정 읽기 테스트"""
+
+    def test_pool_keys_take_precedence(self):
+        with patch.dict('os.environ', {'GEMINI_API_KEYS': 'a1, b2,a1,', 'GEMINI_API_KEY': 'single'}):
+            assert load_api_keys() == ["a1", "b2"]
+
+    def test_falls_back_to_single_key(self):
+        with patch.dict('os.environ', {'GEMINI_API_KEYS': '', 'GEMINI_API_KEY': 'single'}):
+            assert load_api_keys() == ["single"]
+            assert get_api_key_pool() is None
+
+
+class TestApiKeyPool:
+    """ApiKeyPool 테스트 클래스"""
+
+    def test_least_loaded_key_selected(self, clock):
+        """진행 중 호출 수 → 최근 토큰 사용량 순으로 가장 여유 있는 키 배정"""
+        pool = _pool(clock)
+        _use(pool, tokens=500)  # key-1
+        _use(pool, tokens=300)  # key-2
+        _use(pool, tokens=100)  # key-3
+        assert _use(pool) == pool.keys[2].label
+
+        with pool.lease() as first, pool.lease() as second:
+            assert first.key is not second.key
+
+    def test_quota_error_ejects_key_until_expiry(self, clock):
+        """할당량 오류를 받은 키는 제외 시간 동안 배정하지 않음"""
+        pool = _pool(clock, count=2, eject_seconds=60)
+        ejected = _use(pool, error=_quota_error())
+
+        assert {_use(pool) for _ in range(3)} == {pool.keys[1].label}
+        assert ejected == pool.keys[0].label
+        clock.now += 61
+        assert _use(pool) == ejected
+
+    def test_consecutive_quota_errors_back_off(self, clock):
+        """연속 할당량 오류 시 제외 시간 두 배, 응답의 retryDelay가 더 길면 그 값 사용"""
+        pool = _pool(clock, count=1, eject_seconds=10, max_eject_seconds=15)
+        key = pool.keys[0]
+        _use(pool, error=_quota_error())
+        clock.now += 10
+        _use(pool, error=_quota_error())
+        assert key.ejected_until - clock.now == 15  # 20초 → 최대 15초
+
+        clock.now += 15
+        _use(pool, error=_quota_error(retry_delay="42s"))
+        assert key.ejected_until - clock.now == 42
+
+    def test_all_keys_ejected_rejects_with_retry_after(self, clock):
+        pool = _pool(clock, count=2, eject_seconds=30)
+        _use(pool, error=_quota_error())
+        clock.now += 10
+        _use(pool, error=_quota_error())
+
+        with pytest.raises(ApiKeyPoolExhaustedError) as exc_info:
+            with pool.lease():
+                pass
+        assert isinstance(exc_info.value, GeminiCapacityError)
+        assert exc_info.value.retry_after == 20
+
+    def test_other_errors_do_not_eject(self, clock):
+        """할당량 이외의 오류는 실패로만 집계"""
+        pool = _pool(clock, count=1)
+        _use(pool, error=RuntimeError("503 UNAVAILABLE"))
+        _use(pool, error=genai_errors.ClientError(400, {"error": {"message": "bad request"}}))
+
+        assert _use(pool) == pool.keys[0].label
+        assert pool.keys[0].failures == 2 and pool.keys[0].quota_errors == 0
+
+    def test_snapshot_reports_usage_without_raw_keys(self, clock):
+        pool = _pool(clock, count=2)
+        _use(pool, tokens=120)
+        _use(pool, tokens=80)
+        clock.now += 61
+        _use(pool, tokens=50)
+
+        snapshot = pool.snapshot()
+        assert snapshot["keys"] == 2 and snapshot["available"] == 2
+        assert sum(key["tokens"] for key in snapshot["usage"]) == 250
+        assert sum(key["tokens_last_minute"] for key in snapshot["usage"]) == 50
+        assert "test-key-0000" not in str(snapshot)
+
+
+class TestServiceKeyPool:
+    """GeminiService 키 풀 적용 테스트"""
+
+    @pytest.fixture
+    def service(self):
+        with patch.dict('os.environ', {'GEMINI_API_KEYS': 'test-key-a,test-key-b', 'GEMINI_API_KEY': ''}):
+            with patch('services.key_pool.genai.Client', side_effect=lambda api_key: Mock(name=api_key)):
+                service = GeminiService()
+        service._cache = ResultCache()
+        service.facts_store = MarketFactsStore(":memory:")
+        return service
+
+    def test_pool_mode_and_rate_limits_scale_with_keys(self, service):
+        assert len(service.key_pool.keys) == 2
+        assert service.api_key == "test-key-a"
+        with patch.dict('os.environ', {'GEMINI_API_KEYS': 'test-key-a,test-key-b'}):
+            assert get_rate_limiter().rpm == GEMINI_RPM * 2
+
+    @pytest.mark.asyncio
+    async def test_quota_error_retried_on_other_key(self, service):
+        """할당량 오류를 받은 키는 제외되고 재시도는 다른 키로 배정"""
+        first, second = (key.client for key in service.key_pool.keys)
+        first.aio.models.generate_content = AsyncMock(side_effect=_quota_error())
+        second.aio.models.generate_content = AsyncMock(
+            return_value=Mock(text="분석 " * 200, candidates=None, usage_metadata=Mock(total_token_count=321))
+        )
+
+        with patch('services.retry_policy.asyncio.sleep', new_callable=AsyncMock):
+            text = await service._generate_grounded_facts([b"image"])
+
+        assert text.startswith("분석")
+        usage = {key["key"]: key for key in service.key_pool.snapshot()["usage"]}
+        assert usage[service.key_pool.keys[0].label]["quota_errors"] == 1
+        assert usage[service.key_pool.keys[1].label]["tokens"] == 321
+
+    @pytest.mark.asyncio
+    async def test_stream_holds_key_until_closed(self, service):
+        async def chunks():
+            yield Mock(text="a", usage_metadata=None)
+            yield Mock(text="b", usage_metadata=Mock(total_token_count=77))
+
+        for key in service.key_pool.keys:
+            key.client.aio.models.generate_content_stream = AsyncMock(return_value=chunks())
+
+        stream = service._generate_content_stream(model="m", contents=["p"])
+        await stream.__anext__()
+        assert sum(key.in_flight for key in service.key_pool.keys) == 1
+        async for _ in stream:
+            pass
+
+        assert sum(key.in_flight for key in service.key_pool.keys) == 0
+        assert sum(key.tokens for key in service.key_pool.keys) == 77
+
+    def test_health_reports_key_usage(self, service):
+        response = TestClient(app).get("/health")
+
+        keys = response.json()["gemini_keys"]
+        assert keys["keys"] == 2
+        assert "test-key-a" not in response.text
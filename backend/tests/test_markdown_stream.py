@@ -0,0 +1,148 @@
+"""
+마크다운 토큰 스트리밍 테스트
+
+이 모듈은 GeminiService.stream_portfolio_markdown과 POST /api/analyze/stream을 테스트합니다.
+"""
+
+import json
+import pytest
+from io import BytesIO
+from unittest.mock import patch, Mock, AsyncMock
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from main import app
+from models.portfolio import SAMPLE_MARKDOWN_CONTENT
+from services.gemini_service import REQUIRED_MARKDOWN_SECTIONS, get_gemini_service
+
+
+def _chunks(text: str, size: int):
+    """텍스트를 고정 크기 조각 응답으로 분할"""
+    return [Mock(text=text[i:i + size]) for i in range(0, len(text), size)]
+
+
+def _stream_of(chunks, fail_after: int = None):
+    """generate_content_stream 대역 (비동기 이터레이터 반환)"""
+    async def iterate():
+        for i, chunk in enumerate(chunks):
+            if fail_after is not None and i == fail_after:
+                raise ConnectionError("스트림 끊김")
+            yield chunk
+    return iterate()
+
+
+
+
+async def _collect(gemini_service, images):
+    return [event async for event in gemini_service.stream_portfolio_markdown(images, request_id="stream-test")]
+
+
+class TestStreamPortfolioMarkdown:
+    """stream_portfolio_markdown 테스트 클래스"""
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_relays_chunks_and_detects_sections(self, mock_validate, gemini_service):
+        """조각 전달, 조각 경계에 걸친 섹션도 감지, 일괄 분석과 같은 키로 캐시"""
+        gemini_service.client.aio.models.generate_content_stream = AsyncMock(
+            return_value=_stream_of(_chunks(SAMPLE_MARKDOWN_CONTENT, 7))
+        )
+        images = [b"img1", b"img2"]
+
+        events = await _collect(gemini_service, images)
+
+        names = [name for name, _ in events]
+        assert names[0] == "started" and names[-1] == "done"
+        text = "".join(data["text"] for name, data in events if name == "delta")
+        assert text == SAMPLE_MARKDOWN_CONTENT
+        sections = [data["section"] for name, data in events if name == "section"]
+        assert sorted(sections) == sorted(REQUIRED_MARKDOWN_SECTIONS)
+        assert events[-1][1]["missing_sections"] == []
+        assert events[-1][1]["cached"] is False
+
+        validated = SAMPLE_MARKDOWN_CONTENT.strip()
+        assert gemini_service._cache[gemini_service._generate_markdown_cache_key(images)] == validated
+        assert gemini_service._cache[gemini_service._generate_report_cache_key(images, "markdown")] == validated
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_cached_report_served_without_gemini(self, mock_validate, gemini_service):
+        """리포트 캐시 적중 시 전체 텍스트를 한 번에 전달"""
+        images = [b"img1", b"img2"]
+        gemini_service._cache[gemini_service._generate_report_cache_key(images, "markdown")] = SAMPLE_MARKDOWN_CONTENT
+        gemini_service.client.aio.models.generate_content_stream = AsyncMock()
+
+        events = await _collect(gemini_service, images)
+
+        gemini_service.client.aio.models.generate_content_stream.assert_not_called()
+        assert events[1] == ("delta", {"text": SAMPLE_MARKDOWN_CONTENT})
+        assert events[-1][1]["cached"] is True
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    @patch('services.gemini_service.asyncio.sleep', new_callable=AsyncMock)
+    async def test_retries_only_before_first_chunk(self, mock_sleep, mock_validate, gemini_service):
+        """첫 조각 전 실패는 재시도, 이후 실패는 전파"""
+        chunks = _chunks(SAMPLE_MARKDOWN_CONTENT, 50)
+        gemini_service.client.aio.models.generate_content_stream = AsyncMock(side_effect=[
+            _stream_of(chunks, fail_after=0),
+            _stream_of(chunks, fail_after=2),
+        ])
+
+        with pytest.raises(ConnectionError):
+            await _collect(gemini_service, [b"img1", b"img2"])
+
+        assert gemini_service.client.aio.models.generate_content_stream.await_count == 2
+
+
+class TestStreamEndpoint:
+    """POST /api/analyze/stream 테스트"""
+
+    @pytest.fixture
+    def image_files(self):
+        img = Image.new('RGB', (500, 500), color='red')
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=85)
+        return {"files": ("test.jpg", buffer.getvalue(), "image/jpeg")}
+
+    def _parse(self, body: str):
+        events = []
+        for block in body.strip().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in block.split("\n"))
+            events.append((lines["event"], json.loads(lines["data"])))
+        return events
+
+    def test_streams_sse_events(self, gemini_service, image_files):
+        """SSE 형식으로 started/delta/done 전달"""
+        gemini_service.client.aio.models.generate_content_stream = AsyncMock(
+            return_value=_stream_of(_chunks(SAMPLE_MARKDOWN_CONTENT, 200))
+        )
+        app.dependency_overrides[get_gemini_service] = lambda: gemini_service
+        try:
+            client = TestClient(app)
+            with client.stream("POST", "/api/analyze/stream", files=image_files) as response:
+                assert response.status_code == 200
+                assert response.headers["content-type"].startswith("text/event-stream")
+                body = "".join(response.iter_text())
+        finally:
+            app.dependency_overrides.clear()
+
+        events = self._parse(body)
+        assert events[0][0] == "started"
+        assert events[-1][0] == "done"
+        assert "".join(data["text"] for name, data in events if name == "delta") == SAMPLE_MARKDOWN_CONTENT
+
+    def test_stream_failure_becomes_error_event(self, gemini_service, image_files):
+        """스트림 중 실패는 error 이벤트로 전달"""
+        gemini_service.client.aio.models.generate_content_stream = AsyncMock(
+            return_value=_stream_of(_chunks(SAMPLE_MARKDOWN_CONTENT, 200), fail_after=1)
+        )
+        app.dependency_overrides[get_gemini_service] = lambda: gemini_service
+        try:
+            response = TestClient(app).post("/api/analyze/stream", files=image_files)
+        finally:
+            app.dependency_overrides.clear()
+
+        events = self._parse(response.text)
+        assert events[-1][0] == "error"
+        assert "일시적인 문제" in events[-1][1]["error"]
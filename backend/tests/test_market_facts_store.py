@@ -0,0 +1,169 @@
+"""
+로컬 시장 정보 저장소 테스트
+
+이 모듈은 MarketFactsStore와 GeminiService의 그라운딩 계획(검색 생략 여부)을 테스트합니다.
+"""
+
+import time
+import pytest
+from unittest.mock import patch, Mock, AsyncMock
+from models.portfolio import SAMPLE_MARKDOWN_CONTENT
+from services.market_facts_store import MarketFactsStore
+
+SAMPLE_GROUNDED_MARKDOWN = """
+**2. 개별 종목 리니아 스코어**
+| 주식 | Overall (100점 만점) | 펀더멘탈 | 기술 잠재력 | 거시경제 | 시장심리 | CEO/리더십 |
+| :--- | :--- | :--- | :--- | :--- | :--- | :--- |
+| **팔란티어 (PLTR)** | 78 | 70 | 95 | 75 | 85 | 85 |
+
+**3. 개별 종목 분석 설명 (분석 카드)**
+
+**1. 팔란티어 (PLTR) - Overall: 78 / 100**
+* **펀더멘탈 (70/100):** 꾸준한 매출 성장과 최근 GAAP 기준 흑자 전환 성공은 긍정적입니다.
+* **기술 잠재력 (95/100):** 빅데이터 분석 및 AI 분야 독보적인 기술력을 보유하고 있습니다.
+
+### **심층 분석 설명**
+"""
+
+
+class TestMarketFactsStore:
+    """MarketFactsStore 테스트 클래스"""
+
+    @pytest.fixture
+    def store(self):
+        """인메모리 저장소"""
+        return MarketFactsStore(":memory:")
+
+    def test_upsert_and_get(self, store):
+        """저장 후 조회 (티커 대소문자 정규화)"""
+        store.upsert("pltr", "최신 스니펫")
+        fact = store.get("PLTR")
+        assert fact is not None
+        assert fact.snippet == "최신 스니펫"
+        assert fact.source == "report"
+        assert len(store) == 1
+
+    def test_upsert_overwrites(self, store):
+        """같은 티커는 덮어쓰기"""
+        store.upsert("PLTR", "이전", updated_at=1.0)
+        store.upsert("PLTR", "이후", source="grounding")
+        fact = store.get("PLTR")
+        assert fact.snippet == "이후"
+        assert fact.source == "grounding"
+        assert fact.updated_at > 1.0
+
+    def test_partition_fresh_and_stale(self, store):
+        """신선/오래된/없는 티커 분리"""
+        now = time.time()
+        store.upsert("PLTR", "신선", updated_at=now - 10)
+        store.upsert("AVGO", "오래됨", updated_at=now - 10_000)
+        fresh, stale = store.partition(["PLTR", "AVGO", "NVDA"], max_age=3600, now=now)
+        assert list(fresh) == ["PLTR"]
+        assert stale == ["AVGO", "NVDA"]
+
+    def test_partition_by_source(self, store):
+        """허용 출처가 아닌 항목은 없는 것으로 취급"""
+        store.upsert("PLTR", "검색 결과", source="grounding")
+        store.upsert("AVGO", "리포트 요약", source="report")
+        fresh, stale = store.partition(["PLTR", "AVGO"], sources=("grounding",))
+        assert list(fresh) == ["PLTR"]
+        assert stale == ["AVGO"]
+
+    def test_stale_tickers_oldest_first(self, store):
+        """갱신 대상은 오래된 순"""
+        now = time.time()
+        store.upsert("A", "a", updated_at=now - 5000)
+        store.upsert("B", "b", updated_at=now - 9000)
+        store.upsert("C", "c", updated_at=now)
+        assert store.stale_tickers(max_age=3600, now=now) == ["B", "A"]
+
+    def test_file_persistence(self, tmp_path):
+        """파일 DB는 재시작 후에도 유지"""
+        path = str(tmp_path / "facts.sqlite3")
+        store = MarketFactsStore(path)
+        store.upsert("PLTR", "영속 스니펫")
+        store.close()
+        assert MarketFactsStore(path).get("PLTR").snippet == "영속 스니펫"
+
+
+class TestGroundingPlan:
+    """GeminiService 그라운딩 계획 테스트"""
+
+
+    def test_unknown_images_use_search(self, gemini_service):
+        """처음 보는 이미지는 Google Search 사용"""
+        context, use_search = gemini_service._plan_grounding([b"new_image"])
+        assert context is None
+        assert use_search is True
+
+    def test_known_fresh_tickers_skip_search(self, gemini_service):
+        """이미 분석된 이미지의 종목이 모두 신선하면 검색 생략 + 컨텍스트 주입"""
+        gemini_service._record_grounding_results([b"image"], SAMPLE_GROUNDED_MARKDOWN, grounded=True)
+        context, use_search = gemini_service._plan_grounding([b"image"])
+        assert use_search is False
+        assert "PLTR" in context
+        assert "흑자 전환" in context
+
+    def test_stale_tickers_keep_search(self, gemini_service):
+        """오래된 스니펫이 있으면 검색 유지"""
+        gemini_service._record_grounding_results([b"image"], SAMPLE_GROUNDED_MARKDOWN, grounded=True)
+        gemini_service.facts_store.upsert("PLTR", "오래된 스니펫", updated_at=time.time() - gemini_service.facts_max_age - 1)
+        context, use_search = gemini_service._plan_grounding([b"image"])
+        assert use_search is True
+        assert context is None
+
+    def test_injected_results_do_not_refresh_snippets(self, gemini_service):
+        """컨텍스트 주입으로 생성된 결과는 스니펫 갱신 시각을 덮어쓰지 않음"""
+        gemini_service._record_grounding_results([b"image"], SAMPLE_GROUNDED_MARKDOWN, grounded=False)
+        assert gemini_service._known_tickers_for_images([b"image"]) == ["PLTR"]
+        assert gemini_service.facts_store.get("PLTR") is None
+
+    def test_report_snippets_not_used_as_grounding(self, gemini_service):
+        """모델이 쓴 리포트 출처 스니펫은 그라운딩 컨텍스트로 되먹임하지 않음"""
+        gemini_service._record_grounding_results([b"image"], SAMPLE_GROUNDED_MARKDOWN, grounded=False)
+        gemini_service.facts_store.upsert("PLTR", "리포트 본문 요약", source="report")
+
+        context, use_search = gemini_service._plan_grounding([b"image"])
+
+        assert use_search is True
+        assert context is None
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_markdown_report_records_tickers_only(self, mock_validate, gemini_service):
+        """마크다운 리포트(검색 사용)는 종목만 기록하고 스니펫은 저장하지 않음"""
+        with patch.object(gemini_service, '_call_gemini_api_multiple', new_callable=AsyncMock) as mock_call:
+            mock_call.return_value = SAMPLE_MARKDOWN_CONTENT + SAMPLE_GROUNDED_MARKDOWN
+            await gemini_service.analyze_multiple_portfolio_images([b"img1", b"img2"])
+
+        assert gemini_service._known_tickers_for_images([b"img1", b"img2"]) == ["PLTR"]
+        assert len(gemini_service.facts_store) == 0
+
+    @pytest.mark.asyncio
+    async def test_step1_without_search_tool(self, gemini_service):
+        """Step 1: 신선한 저장소 스니펫이 있으면 tools 없이 호출"""
+        gemini_service._record_grounding_results([b"image"], SAMPLE_GROUNDED_MARKDOWN, grounded=True)
+        response = Mock()
+        response.text = SAMPLE_GROUNDED_MARKDOWN * 5
+        gemini_service.client = Mock()
+        gemini_service.client.aio.models.generate_content = AsyncMock(return_value=response)
+
+        await gemini_service._generate_grounded_facts([b"image"])
+
+        call = gemini_service.client.aio.models.generate_content.call_args
+        assert not call.kwargs["config"].tools
+        assert "로컬 시장 정보 저장소" in call.kwargs["contents"][-1]
+        assert call.kwargs["contents"][0] == gemini_service._get_offline_grounding_prompt()
+        assert "Google Search" not in call.kwargs["contents"][0]
+
+    def test_image_tickers_expire_and_are_bounded(self, gemini_service):
+        """이미지별 종목 기록은 TTL·항목 수 제한 (무한히 늘지 않음)"""
+        gemini_service._image_tickers.max_entries = 2
+        for image in (b"image1", b"image2", b"image3"):
+            gemini_service._record_grounding_results([image], SAMPLE_GROUNDED_MARKDOWN, grounded=False)
+        assert len(gemini_service._image_tickers) == 2
+        assert gemini_service._known_tickers_for_images([b"image1"]) is None
+
+        key = gemini_service._generate_multiple_cache_key([b"image3"])
+        gemini_service._image_tickers._entries[key] = (["PLTR"], time.time() - gemini_service._image_tickers.fresh_ttl - 1)
+        assert gemini_service._known_tickers_for_images([b"image3"]) is None
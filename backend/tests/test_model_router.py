@@ -0,0 +1,256 @@
+"""
+Gemini 모델 라우팅/폴백 테스트
+
+이 모듈은 ModelRouter의 단계별 모델 선택·소형 포트폴리오 라우팅·폴백 오류 판정·사고 예산·캐시 적중 집계와
+GeminiService 일괄/스트리밍 호출의 폴백 체인 적용, 암묵적 캐시용 프롬프트 배치를 테스트합니다.
+"""
+
+import pytest
+from unittest.mock import patch, Mock, AsyncMock
+from google.genai import errors as genai_errors
+from google.genai.types import GenerateContentConfig, ThinkingConfig
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.errors import GeminiCapacityError
+from services.gemini_service import GeminiService
+from services.model_router import ModelRouter, is_fallback_error
+
+
+def _router(**kwargs) -> ModelRouter:
+    options = dict(
+        default="flash",
+        step_models={"step2": "flash-lite"},
+        small_model="flash-lite",
+        small_max_holdings=3,
+        fallbacks=["flash-lite", "pro"],
+        thinking_budgets={"step1": None, "step2": 0},
+    )
+    options.update(kwargs)
+    return ModelRouter(**options)
+
+
+class TestModelRouter:
+    """ModelRouter 테스트 클래스"""
+
+    def test_step_routes_and_fallback_chain(self):
+        router = _router()
+
+        assert router.route("step1") == ["flash", "flash-lite", "pro"]
+        assert router.route("step2") == ["flash-lite", "pro"]
+        assert router.route("refresh") == ["flash", "flash-lite", "pro"]
+
+    def test_small_portfolio_uses_small_model(self):
+        """종목 수를 알고 기준 이하일 때만 소형 모델 사용"""
+        router = _router(fallbacks=[])
+
+        assert router.route("step1", holdings=2) == ["flash-lite"]
+        assert router.route("step1", holdings=4) == ["flash"]
+        assert router.route("step1", holdings=None) == ["flash"]
+        assert router.route("refresh", holdings=1) == ["flash"]
+
+    def test_fallback_errors(self):
+        assert is_fallback_error(genai_errors.ServerError(503, {"error": {"message": "overloaded"}}))
+        assert is_fallback_error(genai_errors.ClientError(429, {"error": {"message": "quota"}}))
+        assert is_fallback_error(CircuitOpenError("open", retry_after=3))
+        assert not is_fallback_error(genai_errors.ServerError(500, {"error": {"message": "internal"}}))
+        assert not is_fallback_error(genai_errors.ClientError(400, {"error": {"message": "bad request"}}))
+        assert not is_fallback_error(GeminiCapacityError("admission"))
+
+    def test_routed_models_get_own_breaker(self):
+        router = _router()
+
+        assert router.breaker_for("flash") is None
+        assert router.breaker_for("unknown") is None
+        assert router.breaker_for("pro") is router.breaker_for("pro")
+
+
+class TestThinkingBudget:
+    """단계별 사고 예산 테스트"""
+
+    def test_budget_applied_per_step_and_model(self):
+        router = _router(thinking_budgets={"step1": None, "step2": 0})
+        config = GenerateContentConfig(temperature=0.0)
+
+        assert router.configure("step2", "gemini-2.5-flash", config).thinking_config.thinking_budget == 0
+        assert router.configure("step2", "gemini-2.5-pro", config).thinking_config.thinking_budget == 128
+        assert router.configure("step2", "gemini-2.0-flash", config).thinking_config is None
+        assert router.configure("step1", "gemini-2.5-flash", config).thinking_config is None
+        assert config.thinking_config is None  # 원본 설정은 변경하지 않음
+
+    def test_explicit_thinking_config_kept(self):
+        router = _router()
+        config = GenerateContentConfig(thinking_config=ThinkingConfig(thinking_budget=512))
+
+        assert router.configure("step2", "gemini-2.5-flash", config).thinking_config.thinking_budget == 512
+
+    def test_thought_tokens_reported_per_step(self):
+        router = _router()
+        router.record_usage("step2", Mock(prompt_token_count=1000, candidates_token_count=300, thoughts_token_count=None))
+        router.record_usage("step1", Mock(prompt_token_count=2000, candidates_token_count=900, thoughts_token_count=600))
+
+        usage = router.snapshot()["usage"]
+        assert usage["step2"]["thought_tokens"] == 0
+        assert usage["step1"]["thought_tokens"] == 600 and usage["step1"]["output_tokens"] == 900
+
+    def test_cached_tokens_reported_per_step(self):
+        """암묵적 캐시 적중 토큰과 입력 대비 적중률 집계"""
+        router = _router()
+        router.record_usage("step2", Mock(prompt_token_count=2000, cached_content_token_count=1500))
+        router.record_usage("step2", Mock(prompt_token_count=2000, cached_content_token_count=None))
+
+        usage = router.snapshot()["usage"]["step2"]
+        assert usage["cached_tokens"] == 1500
+        assert usage["cache_hit_ratio"] == 0.375
+
+
+class TestServiceRouting:
+    """GeminiService 폴백 체인 적용 테스트"""
+
+    @pytest.fixture
+    def service(self, gemini_service):
+        gemini_service.models = _router()
+        return gemini_service
+
+    @pytest.mark.asyncio
+    async def test_overloaded_model_falls_back_without_wait(self, service):
+        async def generate_content(model, **kwargs):
+            if model == "flash":
+                raise genai_errors.ServerError(503, {"error": {"message": "model overloaded"}})
+            return Mock(text=f"{model} 응답", candidates=None)
+
+        service.client.aio.models.generate_content = generate_content
+
+        text = await service._generate_with_continuation(["프롬프트"], Mock(max_output_tokens=100), "step1")
+
+        assert text == "flash-lite 응답"
+        snapshot = service.models.snapshot()
+        assert snapshot["fallback_calls"] == {"flash->flash-lite": 1}
+        assert snapshot["calls"] == {"step1:flash-lite": 1}
+
+    @pytest.mark.asyncio
+    async def test_open_primary_circuit_routes_to_fallback(self, service):
+        """기본 모델 회로가 열려 있으면 호출 없이 폴백 모델 사용 (폴백 모델은 별도 회로)"""
+        service.breaker = CircuitBreaker(min_calls=1, error_rate=0.5)
+        with pytest.raises(RuntimeError):
+            with service.breaker.guard():
+                raise RuntimeError("503")
+        service.client.aio.models.generate_content = AsyncMock(return_value=Mock(text="응답", candidates=None))
+
+        await service._generate_with_continuation(["프롬프트"], Mock(max_output_tokens=100), "step1")
+
+        assert service.client.aio.models.generate_content.await_args.kwargs["model"] == "flash-lite"
+
+    @pytest.mark.asyncio
+    async def test_non_fallback_error_not_rerouted(self, service):
+        service.client.aio.models.generate_content = AsyncMock(
+            side_effect=genai_errors.ClientError(400, {"error": {"message": "bad request"}})
+        )
+
+        with pytest.raises(genai_errors.ClientError):
+            await service._generate_with_continuation(["프롬프트"], Mock(max_output_tokens=100), "step1")
+        assert service.client.aio.models.generate_content.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_falls_back_before_first_chunk(self, service):
+        async def chunks(model):
+            yield Mock(text=f"{model}-a", candidates=None)
+            yield Mock(text=f"{model}-b", candidates=None)
+
+        async def generate_content_stream(model, **kwargs):
+            if model == "flash-lite":
+                raise genai_errors.ClientError(429, {"error": {"message": "RESOURCE_EXHAUSTED"}})
+            return chunks(model)
+
+        service.client.aio.models.generate_content_stream = generate_content_stream
+
+        received = [text async for text in service._stream_with_continuation(["프롬프트"], Mock(), "step2")]
+
+        assert received == ["pro-a", "pro-b"]
+        assert service.admission.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_step2_call_disables_thinking(self, service):
+        """Step 2 호출 설정에 사고 예산 0 적용, 사고 토큰 사용량 집계"""
+        service.models = _router(default="gemini-2.5-flash", step_models={}, fallbacks=[])
+        captured = {}
+
+        async def chunks():
+            yield Mock(text="{}", candidates=None, usage_metadata=Mock(
+                prompt_token_count=10, candidates_token_count=2, thoughts_token_count=0
+            ))
+
+        async def generate_content_stream(model, contents, config):
+            captured["config"] = config
+            return chunks()
+
+        service.client.aio.models.generate_content_stream = generate_content_stream
+
+        await service._stream_step2_json("프롬프트", service._get_step2_config())
+
+        assert captured["config"].thinking_config.thinking_budget == 0
+        assert service.models.snapshot()["usage"]["step2"]["responses"] == 1
+
+
+class TestServiceDefaultModel:
+    """GeminiService 설정 모델과 라우터 기본 모델 일치 테스트"""
+
+    def test_router_follows_configured_model(self):
+        env = {'GEMINI_API_KEY': 'test_api_key', 'GEMINI_MODEL': 'gemini-2.5-pro', 'GEMINI_MODEL_FALLBACKS': 'gemini-2.5-flash'}
+        with patch.dict('os.environ', env):
+            service = GeminiService()
+
+        assert service.models.route("step1") == ["gemini-2.5-pro", "gemini-2.5-flash"]
+        assert service.models.route("step2")[0] == service.model_name
+        assert service._breaker_for(service.model_name) is service.breaker
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("gemini_env", [{'GEMINI_MODEL_FALLBACKS': 'gemini-2.5-flash-lite'}])
+    async def test_batch_markdown_falls_back_on_overload(self, gemini_service):
+        """일괄 마크다운도 GEMINI_MODEL_FALLBACKS 순서로 폴백 (스트리밍과 같은 markdown 단계)"""
+        service = gemini_service
+        models = []
+
+        async def generate_content(model, **kwargs):
+            models.append(model)
+            if model == service.model_name:
+                raise genai_errors.ServerError(503, {"error": {"message": "model overloaded"}})
+            return Mock(text="마크다운 분석", candidates=None)
+
+        service.client.aio.models.generate_content = generate_content
+
+        assert await service._call_gemini_api_multiple([b"img1", b"img2"]) == "마크다운 분석"
+        assert models == [service.model_name, "gemini-2.5-flash-lite"]
+        assert service.models.snapshot()["fallback_calls"]
+        assert service.models.route("markdown") == service.models.route("extraction")
+
+    def test_existing_router_aligned_with_service_model(self):
+        with patch.dict('os.environ', {'GEMINI_API_KEY': 'test_api_key'}):
+            first = GeminiService()
+        with patch.dict('os.environ', {'GEMINI_API_KEY': 'test_api_key', 'GEMINI_MODEL': 'gemini-2.5-pro'}):
+            second = GeminiService()
+
+        assert second.models is first.models and second.models.default == "gemini-2.5-pro"
+
+
+class TestPromptPrefixOrder:
+    """암묵적 컨텍스트 캐시용 프롬프트 배치 테스트 (고정 프롬프트 먼저, 요청별 내용은 뒤)"""
+
+
+    def test_step2_prompt_shares_prefix_across_inputs(self, gemini_service):
+        first = gemini_service._get_json_generation_prompt("## 포트폴리오 A\n- AAPL")
+        second = gemini_service._get_json_generation_prompt("## 포트폴리오 B\n- MSFT", correction="필드 누락")
+        static = first.split("## 입력 데이터")[0]
+
+        assert len(static) > len(first) * 0.8
+        assert second.startswith(static)
+        assert second.rindex("MSFT") < second.index("이전 시도 오류")
+
+    @pytest.mark.asyncio
+    async def test_step1_prompt_before_images(self, gemini_service):
+        gemini_service.client.aio.models.generate_content = AsyncMock(return_value=Mock(text="분석 " * 200, candidates=None))
+
+        await gemini_service._generate_grounded_facts([b"image-1", b"image-2"])
+
+        contents = gemini_service.client.aio.models.generate_content.call_args.kwargs["contents"]
+        assert contents[0] == gemini_service._get_grounding_prompt()
+        assert len(contents) == 3
@@ -0,0 +1,134 @@
+"""
+프리워밍 스케줄러 테스트
+
+이 모듈은 티커 인기도 집계와 비혼잡 시간대 프리워밍 스케줄러의 단위 테스트를 제공합니다.
+"""
+
+import time
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, AsyncMock
+from google.genai import errors as genai_errors
+from services.market_facts_store import MarketFactsStore
+from services.prewarm_scheduler import TickerPopularity, PrewarmScheduler, parse_offpeak_hours
+
+
+def test_parse_offpeak_hours():
+    """비혼잡 시간대 파싱 (자정 넘김, 여러 구간)"""
+    assert parse_offpeak_hours("1-4") == {1, 2, 3}
+    assert parse_offpeak_hours("22-2") == {22, 23, 0, 1}
+    assert parse_offpeak_hours("1-3,13") == {1, 2, 13}
+
+
+def test_popularity_ranking_with_decay():
+    """인기도: 빈도순 정렬, 오래된 집계는 감쇠"""
+    popularity = TickerPopularity(half_life=100)
+    now = time.time()
+    popularity.record(["OLD"] * 3, now=now - 1000)  # 리포트당 1회만 집계
+    popularity.record(["OLD"], now=now - 1000)
+    popularity.record(["PLTR", "AVGO"], now=now)
+    popularity.record(["PLTR"], now=now)
+
+    ranked = [ticker for ticker, _ in popularity.top(3, now=now)]
+    assert ranked == ["PLTR", "AVGO", "OLD"]
+
+
+class TestPrewarmScheduler:
+    """PrewarmScheduler 테스트 클래스"""
+
+    @pytest.fixture
+    def service(self):
+        """저장소와 갱신 함수만 가진 서비스 대역"""
+        service = Mock()
+        service.facts_store = MarketFactsStore(":memory:")
+        service.refresh_market_facts = AsyncMock(side_effect=lambda tickers, max_calls=None: (len(tickers), len(tickers)))
+        return service
+
+    @pytest.fixture
+    def popularity(self):
+        popularity = TickerPopularity()
+        for tickers in (["PLTR", "AVGO", "NVDA"], ["PLTR", "AVGO"], ["PLTR"]):
+            popularity.record(tickers)
+        return popularity
+
+    @pytest.mark.asyncio
+    async def test_skips_peak_hours(self, service, popularity):
+        """피크 시간에는 갱신하지 않음"""
+        scheduler = PrewarmScheduler(service, popularity, offpeak_hours="1-6")
+        refreshed = await scheduler.run_once(datetime(2025, 10, 1, 10, 0))
+        assert refreshed == 0
+        service.refresh_market_facts.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_refreshes_popular_stale_tickers_in_order(self, service, popularity):
+        """비혼잡 시간: 인기 순서대로, 신선한 티커는 제외"""
+        now = datetime(2025, 10, 1, 3, 0)
+        service.facts_store.upsert("AVGO", "신선", source="grounding", updated_at=now.timestamp())
+        scheduler = PrewarmScheduler(service, popularity, offpeak_hours="1-6")
+
+        refreshed = await scheduler.run_once(now)
+
+        assert refreshed == 2
+        service.refresh_market_facts.assert_awaited_once_with(["PLTR", "NVDA"], max_calls=scheduler.daily_budget)
+
+    @pytest.mark.asyncio
+    async def test_daily_budget(self, service, popularity):
+        """하루 예산을 넘지 않고, 날짜가 바뀌면 예산 초기화"""
+        scheduler = PrewarmScheduler(service, popularity, offpeak_hours="1-6", daily_budget=2)
+
+        assert await scheduler.run_once(datetime(2025, 10, 1, 2, 0)) == 2
+        assert await scheduler.run_once(datetime(2025, 10, 1, 3, 0)) == 0
+        assert await scheduler.run_once(datetime(2025, 10, 2, 2, 0)) == 2
+
+    @pytest.mark.asyncio
+    async def test_budget_charged_by_calls_sent(self, service, popularity):
+        """예산은 티커 수가 아니라 실제로 보낸 요청 수(폴백 포함)로 차감"""
+        service.refresh_market_facts = AsyncMock(return_value=(1, 3))
+        scheduler = PrewarmScheduler(service, popularity, offpeak_hours="1-6", daily_budget=10)
+        now = datetime(2025, 10, 1, 2, 0)
+
+        assert await scheduler.run_once(now) == 1
+        assert scheduler.remaining_budget(now.date()) == 7
+
+    @pytest.mark.asyncio
+    async def test_start_and_stop(self, service, popularity):
+        """백그라운드 태스크 시작/종료"""
+        scheduler = PrewarmScheduler(service, popularity, interval=3600)
+        scheduler.start()
+        await asyncio.sleep(0)
+        assert scheduler._task is not None and not scheduler._task.done()
+        await scheduler.stop()
+        assert scheduler._task is None
+
+
+class TestRefreshMarketFacts:
+    """GeminiService.refresh_market_facts 요청 수 보고 테스트"""
+
+    @pytest.fixture
+    def gemini_env(self):
+        return {'GEMINI_MODEL_FALLBACKS': 'gemini-2.5-flash-lite'}
+
+    @staticmethod
+    def _overloaded_default(gemini_service):
+        """기본 모델은 503, 폴백 모델은 성공"""
+        async def generate_content(model, **kwargs):
+            if model == gemini_service.model_name:
+                raise genai_errors.ServerError(503, {"error": {"message": "model overloaded"}})
+            return Mock(text="시장 정보", candidates=None)
+        return generate_content
+
+    @pytest.mark.asyncio
+    async def test_reports_fallback_calls(self, gemini_service):
+        """모델 폴백 요청도 보낸 요청 수에 포함"""
+        gemini_service.client.aio.models.generate_content = self._overloaded_default(gemini_service)
+
+        assert await gemini_service.refresh_market_facts(["PLTR", "NVDA"]) == (2, 4)
+        assert gemini_service.facts_store.get("PLTR") is not None
+
+    @pytest.mark.asyncio
+    async def test_stops_at_max_calls(self, gemini_service):
+        """요청 상한에 도달하면 남은 티커는 다음 주기로 미룸"""
+        gemini_service.client.aio.models.generate_content = self._overloaded_default(gemini_service)
+
+        assert await gemini_service.refresh_market_facts(["PLTR", "NVDA", "AVGO"], max_calls=3) == (2, 4)
@@ -0,0 +1,192 @@
+"""
+분석 진행 이벤트 테스트
+
+이 모듈은 ProgressBroker pub/sub, GeminiService 단계별 이벤트 발행, SSE 엔드포인트를 테스트합니다.
+"""
+
+import json
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+
+from main import app
+from models.portfolio import SAMPLE_MARKDOWN_CONTENT
+from services import progress_events
+from services.progress_events import ProgressBroker, emit, bind_request, reset_request, format_sse_event
+
+
+@pytest.fixture
+def broker():
+    """격리된 브로커 (싱글톤 교체)"""
+    broker = ProgressBroker()
+    with patch.object(progress_events, "_progress_broker", broker):
+        yield broker
+
+
+class TestProgressBroker:
+    """ProgressBroker 테스트 클래스"""
+
+    @pytest.mark.asyncio
+    async def test_replay_then_live_until_terminal(self, broker):
+        """지난 이벤트 재생 후 실시간 이벤트, 종료 이벤트에서 끝남"""
+        broker.publish("req", "ingest", images=1)
+        received = []
+
+        async def consume():
+            async for event in broker.subscribe("req", keepalive=1):
+                received.append(event.stage)
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        broker.publish("req", "step1_started")
+        broker.publish("req", "completed")
+        await asyncio.wait_for(task, timeout=1)
+
+        assert received == ["ingest", "step1_started", "completed"]
+
+    @pytest.mark.asyncio
+    async def test_subscribe_before_publish_and_keepalive(self, broker):
+        """발행 전 구독 가능, 이벤트가 없으면 keep-alive(None)"""
+        stream = broker.subscribe("early", keepalive=0.01)
+        assert await stream.__anext__() is None
+        broker.publish("early", "failed", error="오류")
+        event = await stream.__anext__()
+        assert event.stage == "failed" and event.data["error"] == "오류"
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+
+    def test_emit_uses_bound_request(self, broker):
+        """emit은 바인딩된 요청 ID로만 발행"""
+        emit("ignored")
+        assert len(broker) == 0
+
+        token = bind_request("bound")
+        try:
+            emit("cache_hit", level="report")
+        finally:
+            reset_request(token)
+
+        assert [event.stage for event in broker.history("bound")] == ["cache_hit"]
+
+    def test_prune_only_on_channel_creation(self, broker):
+        """만료 채널 정리는 발행마다가 아니라 새 채널 생성 시에만"""
+        broker.publish("old", "completed")
+        broker._channels["old"].updated_at -= broker.history_ttl + 1
+
+        with patch.object(broker, "_prune", wraps=broker._prune) as prune:
+            broker.publish("req", "ingest")
+            broker.publish("req", "step1_started")
+
+        assert prune.call_count == 1 and not broker.has_channel("old")
+
+    def test_open_issues_unguessable_ids(self, broker):
+        """발급 ID는 uuid4, 지정 ID(작업 ID)는 그대로 채널만 열기"""
+        first, second = broker.open(), broker.open()
+
+        assert first != second and len(first) == 36
+        assert broker.open("job-id") == "job-id" and broker.has_channel("job-id")
+
+    def test_format_sse_event(self, broker):
+        """SSE 직렬화 (한글 유지)"""
+        event = broker.publish("req", "step1_finished", chars=1234, note="완료")
+        message = format_sse_event(event)
+        assert message.startswith("id: 1\nevent: step1_finished\ndata: ")
+        assert message.endswith("\n\n")
+        data = json.loads(message.split("data: ", 1)[1])
+        assert data["chars"] == 1234 and data["note"] == "완료"
+        assert format_sse_event(None) == ": keep-alive\n\n"
+
+
+class TestPipelineEvents:
+    """GeminiService 단계별 이벤트 발행 테스트"""
+
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_markdown_pipeline_stages(self, mock_validate, gemini_service, broker):
+        """마크다운 분석: ingest → step1 → completed, 재요청 시 cache_hit"""
+        with patch.object(gemini_service, '_call_gemini_api_multiple', new_callable=AsyncMock) as mock_call:
+            mock_call.return_value = SAMPLE_MARKDOWN_CONTENT
+            response = await gemini_service.analyze_portfolio_structured(
+                [b"img1", b"img2"], format_type="markdown", request_id="req-1"
+            )
+            await gemini_service.analyze_portfolio_structured(
+                [b"img1", b"img2"], format_type="markdown", request_id="req-2"
+            )
+
+        assert response.request_id == "req-1"
+        stages = [event.stage for event in broker.history("req-1")]
+        assert stages == ["ingest", "step1_started", "step1_finished", "completed"]
+        finished = broker.history("req-1")[2]
+        assert finished.data["chars"] == len(SAMPLE_MARKDOWN_CONTENT)
+
+        cached = broker.history("req-2")
+        assert [event.stage for event in cached] == ["ingest", "cache_hit", "completed"]
+        assert cached[1].data == {"level": "report", "state": "fresh"}
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_failure_emits_failed(self, mock_validate, gemini_service, broker):
+        """실패 시 failed 이벤트 (사용자 메시지)"""
+        with patch.object(gemini_service, '_compute_report_payload', new_callable=AsyncMock) as mock_compute:
+            mock_compute.side_effect = TimeoutError("내부")
+            with pytest.raises(TimeoutError):
+                await gemini_service.analyze_portfolio_structured([b"img"], format_type="json", request_id="req-f")
+
+        last = broker.history("req-f")[-1]
+        assert last.stage == "failed"
+        assert "시간이 초과" in last.data["error"]
+
+
+class TestEventsEndpoint:
+    """GET /api/analyze/{request_id}/events 테스트"""
+
+    def test_replays_finished_request(self, broker):
+        """종료된 요청은 재생 후 스트림 종료"""
+        broker.publish("done-1", "ingest", images=1)
+        broker.publish("done-1", "completed", processing_time=1.0, stale=False)
+
+        client = TestClient(app)
+        with client.stream("GET", "/api/analyze/done-1/events") as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join(response.iter_text())
+
+        assert "event: ingest" in body
+        assert body.rstrip().endswith('"stale": false}')
+
+    def test_issued_channel_streams(self, broker):
+        """발급받은 ID로 구독 (분석 요청 전 연결 가능)"""
+        client = TestClient(app)
+        issued = client.post("/api/analyze/events")
+        assert issued.status_code == 201
+        request_id = issued.json()["request_id"]
+        assert issued.json()["events_url"] == f"/api/analyze/{request_id}/events"
+
+        broker.publish(request_id, "completed", processing_time=1.0, stale=False)
+        with client.stream("GET", f"/api/analyze/{request_id}/events") as response:
+            assert response.status_code == 200
+            assert "event: completed" in "".join(response.iter_text())
+
+    def test_unissued_request_id_not_subscribable(self, broker):
+        """발급되지 않은 ID는 구독 불가 (추측한 ID로 엿보기 방지)"""
+        client = TestClient(app)
+        assert client.get("/api/analyze/guessed-id/events").status_code == 404
+        assert not broker.has_channel("guessed-id")
+
+    def test_analyze_rejects_unissued_header(self, broker):
+        client = TestClient(app)
+        files = {"files": ("test.jpg", b"data", "image/jpeg")}
+        response = client.post("/api/analyze", files=files, headers={"X-Request-ID": "my-own-id"})
+        assert response.status_code == 400
+
+    def test_rejects_invalid_request_id(self):
+        client = TestClient(app)
+        assert client.get("/api/analyze/bad id!/events").status_code == 400
+
+    def test_analyze_rejects_invalid_header(self):
+        client = TestClient(app)
+        files = {"files": ("test.jpg", b"data", "image/jpeg")}
+        response = client.post("/api/analyze", files=files, headers={"X-Request-ID": "bad id!"})
+        assert response.status_code == 400
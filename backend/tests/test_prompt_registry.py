@@ -0,0 +1,125 @@
+"""
+고정 프롬프트 레지스트리 테스트
+
+이 모듈은 프롬프트 공백 최소화, 버전/토큰 추정치 계산과 GeminiService의 레지스트리 사용
+(프롬프트 문구 반환, 캐시 키의 프롬프트 버전, 명시적 캐시 등록)을 테스트합니다.
+"""
+
+import json
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from main import app
+from services.prompt_registry import PromptRegistry, minify_prompt, get_prompt_registry
+
+INDENTED_PROMPT = """
+        당신은 포트폴리오 분석 전문가입니다.
+
+        **3대 핵심 기준 스코어:**
+            * **강점:** [1-2문장]
+
+
+
+        출력 예시:
+        {
+          "tabs": [
+            {"tabId": "dashboard", "score": 72}
+          ]
+        }
+        """
+
+
+class TestMinifyPrompt:
+    """공백 최소화 테스트"""
+
+    def test_indentation_and_blank_lines_removed(self):
+        text = minify_prompt(INDENTED_PROMPT)
+
+        assert text.startswith("당신은") and text.endswith("}\n")
+        assert "\n\n\n" not in text and "   \n" not in text
+        assert '\n"tabs": [\n{"tabId"' in text
+
+    def test_nested_markdown_list_kept(self):
+        assert "\n    * **강점:** [1-2문장]\n" in minify_prompt(INDENTED_PROMPT)
+
+    def test_json_example_still_valid(self):
+        text = minify_prompt(INDENTED_PROMPT)
+        assert json.loads(text[text.index("{"):]) == {"tabs": [{"tabId": "dashboard", "score": 72}]}
+
+
+class TestPromptRegistry:
+    """버전과 토큰 추정치 테스트"""
+
+    def test_version_changes_only_with_text(self):
+        registry = PromptRegistry()
+        first = registry.register("grounding", INDENTED_PROMPT)
+
+        assert registry.register("grounding", INDENTED_PROMPT.replace("        ", "    ")).version == first.version
+        assert registry.register("grounding", INDENTED_PROMPT + "추가 규칙").version != first.version
+        assert first.tokens < first.source_tokens
+
+    def test_combined_and_unknown_versions(self):
+        registry = PromptRegistry()
+        registry.register("a", "A")
+        registry.register("b", "B")
+
+        assert registry.version("a", "b") == f"{registry.get('a').version}.{registry.get('b').version}"
+        assert registry.version("없음") == "0"
+
+
+class TestServicePrompts:
+    """GeminiService 레지스트리 사용 테스트"""
+
+
+    def test_prompts_loaded_once_at_startup(self, gemini_service):
+        names = {
+            "grounding", "grounding_offline", "markdown", "markdown_multiple", "step2_full", "step2_compact", "extraction"
+        }
+        assert set(gemini_service.prompts.snapshot()) == names
+        assert gemini_service._get_multiple_image_prompt() == gemini_service.prompts.get("markdown_multiple").text
+        assert not gemini_service._get_multiple_image_prompt().startswith(" ")
+
+        with patch.object(gemini_service.prompts, "register") as register:
+            gemini_service._get_grounding_prompt()
+            gemini_service._get_json_generation_instructions()
+        register.assert_not_called()
+
+    def test_prompt_edit_changes_only_its_cache_keys(self, gemini_service):
+        images = [b"img1", b"img2"]
+        before = (
+            gemini_service._generate_grounded_cache_key(images),
+            gemini_service._generate_report_cache_key(images, "json"),
+            gemini_service._generate_report_cache_key(images, "markdown"),
+            gemini_service._generate_markdown_cache_key(images),
+        )
+
+        gemini_service.prompts.register("grounding", gemini_service._get_grounding_prompt() + "새 규칙")
+
+        after = (
+            gemini_service._generate_grounded_cache_key(images),
+            gemini_service._generate_report_cache_key(images, "json"),
+            gemini_service._generate_report_cache_key(images, "markdown"),
+            gemini_service._generate_markdown_cache_key(images),
+        )
+        assert after[:2] != before[:2] and after[2:] == before[2:]
+
+    def test_step2_key_follows_format_and_compaction(self, gemini_service):
+        keys = {gemini_service._generate_step2_cache_key("## 포트폴리오")}
+        gemini_service.compact_facts = False
+        keys.add(gemini_service._generate_step2_cache_key("## 포트폴리오"))
+        gemini_service.step2_format = "full"
+        keys.add(gemini_service._generate_step2_cache_key("## 포트폴리오"))
+
+        assert len(keys) == 3
+
+    def test_context_cache_uses_registry_version(self, gemini_service):
+        gemini_service._register_cached_prompts()
+
+        assert gemini_service.prompt_cache._versions["grounding"] == (
+            get_prompt_registry().get("grounding").version, get_prompt_registry().get("grounding").tokens
+        )
+
+    def test_health_reports_prompt_versions(self, gemini_service):
+        response = TestClient(app).get("/health")
+
+        assert response.json()["gemini_prompts"]["grounding"]["version"] == gemini_service.prompts.get("grounding").version
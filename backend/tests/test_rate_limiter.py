@@ -0,0 +1,196 @@
+"""
+RPM/TPM 토큰 버킷 제한기 테스트
+
+이 모듈은 GeminiRateLimiter의 예약/대기/정산과 GeminiService 호출 경로 적용을 테스트합니다.
+"""
+
+import asyncio
+import pytest
+from io import BytesIO
+from unittest.mock import patch, Mock, AsyncMock
+from google.genai.types import GenerateContentConfig, Part
+from PIL import Image
+
+from services.gemini_service import GeminiService
+from services.rate_limiter import (
+    GeminiRateLimiter, SharedRateLimiter, RateLimitExceededError, estimate_request_tokens,
+    GEMINI_OUTPUT_TOKEN_ESTIMATE
+)
+from services.errors import GeminiCapacityError
+
+
+class FakeClock:
+    """고정 시각 시계 (asyncio.sleep은 대기 시간만 기록, 시간은 명시적으로 진행)"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(round(seconds, 3))
+
+
+@pytest.fixture
+def clock():
+    clock = FakeClock()
+    with patch('services.rate_limiter.asyncio.sleep', side_effect=clock.sleep):
+        yield clock
+
+
+class TestEstimate:
+    """토큰 추정 테스트"""
+
+    def test_request_estimate_includes_image_tiles_and_output_budget(self):
+        buffer = BytesIO()
+        Image.new('RGB', (300, 300)).save(buffer, format='JPEG')
+        contents = [Part.from_bytes(data=buffer.getvalue(), mime_type="image/jpeg"), "가" * 100]
+
+        estimate = estimate_request_tokens(contents, GenerateContentConfig(max_output_tokens=32768))
+
+        assert estimate == 258 + 50 + GEMINI_OUTPUT_TOKEN_ESTIMATE
+        assert estimate_request_tokens(["a" * 10], GenerateContentConfig(max_output_tokens=100)) == 5 + 100
+
+
+class TestGeminiRateLimiter:
+    """GeminiRateLimiter 테스트 클래스"""
+
+    @pytest.mark.asyncio
+    async def test_rpm_spacing_is_fifo(self, clock):
+        """버킷 용량까지 즉시, 이후 요청은 도착 순서대로 1/rate 간격으로 예약"""
+        limiter = GeminiRateLimiter(rpm=60, tpm=0, headroom=1.0, burst=0.05, clock=clock)  # 용량 3, 초당 1건
+
+        for _ in range(5):
+            await limiter.acquire(0)
+
+        assert clock.sleeps == [1.0, 2.0]
+        assert limiter.snapshot()["delayed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_tpm_wait_and_reconcile_refund(self, clock):
+        """TPM 부족 시 대기, 실제 사용량이 적으면 정산으로 반환"""
+        limiter = GeminiRateLimiter(rpm=0, tpm=60_000, headroom=1.0, burst=0.1, clock=clock)  # 용량 6000, 초당 1000
+
+        first = await limiter.acquire(5000)
+        limiter.reconcile(first, 1000)  # 4000 반환 → 잔량 5000
+        await limiter.acquire(5000)
+        assert clock.sleeps == []
+
+        await limiter.acquire(3000)  # 잔량 0 → 3초 대기
+        assert clock.sleeps == [3.0]
+        assert limiter.snapshot()["actual_to_estimate"] == 0.2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_waiters_stay_under_quota(self, clock):
+        """동시 예약도 누적 부족분 기준으로 대기 (합계 처리량이 한도를 넘지 않음)"""
+        limiter = GeminiRateLimiter(rpm=0, tpm=60_000, headroom=1.0, burst=0.1, clock=clock)
+
+        reservations = await asyncio.gather(*[limiter.acquire(3000) for _ in range(4)])
+
+        assert sorted(r.waited for r in reservations) == [0.0, 0.0, 3.0, 6.0]
+
+    @pytest.mark.asyncio
+    async def test_excessive_wait_rejected_without_reserving(self, clock):
+        """예상 대기가 최대값을 넘으면 예약 없이 거절"""
+        limiter = GeminiRateLimiter(rpm=60, tpm=0, headroom=1.0, burst=0.05, max_wait=1.5, clock=clock)
+        for _ in range(4):
+            await limiter.acquire(0)
+
+        with pytest.raises(RateLimitExceededError) as exc_info:
+            await limiter.acquire(0)
+
+        assert isinstance(exc_info.value, GeminiCapacityError)
+        assert exc_info.value.retry_after == 2
+        clock.now += 1.0
+        await limiter.acquire(0)  # 거절된 예약은 잔량에 영향 없음
+        assert clock.sleeps == [1.0, 1.0]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_wait_returns_reservation(self):
+        """대기 중 취소되면 예약 반환"""
+        limiter = GeminiRateLimiter(rpm=60, tpm=0, headroom=1.0, burst=0.02)  # 용량 1
+        await limiter.acquire(0)
+        waiter = asyncio.create_task(limiter.acquire(0))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert limiter.snapshot()["available_requests"] > -0.5
+
+
+class TestSharedRateLimiter:
+    """SharedRateLimiter (워커 간 공유) 테스트 클래스"""
+
+    @pytest.fixture
+    def workers(self, tmp_path, clock):
+        """같은 DB 파일을 공유하는 두 워커의 제한기"""
+        db_path = str(tmp_path / "rate.sqlite3")
+        limiters = [
+            SharedRateLimiter(db_path, rpm=60, tpm=60_000, headroom=1.0, burst=0.05, clock=clock)  # 요청 용량 3
+            for _ in range(2)
+        ]
+        yield limiters
+        for limiter in limiters:
+            limiter.close()
+
+    @pytest.mark.asyncio
+    async def test_workers_share_quota(self, workers, clock):
+        """한 워커의 예약이 다른 워커의 잔량/대기 시간에 반영"""
+        first, second = workers
+        await first.acquire(0)
+        await first.acquire(0)
+        await second.acquire(0)
+        assert clock.sleeps == []
+
+        await second.acquire(0)  # 공유 용량 3 소진 → 1초 대기
+        await first.acquire(0)
+        assert clock.sleeps == [1.0, 2.0]
+        assert first.snapshot()["available_requests"] == second.snapshot()["available_requests"] == -2.0
+
+    @pytest.mark.asyncio
+    async def test_reconcile_refund_visible_to_other_worker(self, workers, clock):
+        """정산으로 반환된 토큰을 다른 워커가 사용"""
+        first, second = workers  # 토큰 용량 3000, 초당 1000
+        reservation = await first.acquire(3000)
+        first.reconcile(reservation, 1000)
+
+        await second.acquire(2000)
+        assert clock.sleeps == []
+        clock.now += 1.0
+        assert second.snapshot()["available_tokens"] == 1000.0
+
+    @pytest.mark.asyncio
+    async def test_rejected_reservation_not_persisted(self, workers, clock):
+        """최대 대기 초과로 거절된 예약은 공유 상태에 기록되지 않음"""
+        first, second = workers
+        first.max_wait = 0.5
+        for _ in range(3):
+            await first.acquire(0)
+
+        with pytest.raises(RateLimitExceededError):
+            await first.acquire(0)
+        assert second.snapshot()["available_requests"] == 0.0
+
+
+class TestServiceRateLimit:
+    """GeminiService 호출 경로 적용 테스트"""
+
+    @pytest.mark.asyncio
+    async def test_call_reserves_and_reconciles_usage(self):
+        with patch.dict('os.environ', {'GEMINI_API_KEY': 'test_api_key'}):
+            service = GeminiService()
+        service.rate_limiter = GeminiRateLimiter(rpm=100, tpm=1_000_000)
+        response = Mock(text="응답", usage_metadata=Mock(total_token_count=500))
+        service.client = Mock()
+        service.client.aio.models.generate_content = AsyncMock(return_value=response)
+
+        await service._generate_content(
+            model="m", contents=["a" * 1000], config=GenerateContentConfig(max_output_tokens=500)
+        )
+
+        snapshot = service.rate_limiter.snapshot()
+        assert snapshot["reserved"] == 1
+        assert snapshot["actual_to_estimate"] == 0.5  # 추정 1000 (입력 500 + 출력 500) 대비 실제 500
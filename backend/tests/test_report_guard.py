@@ -0,0 +1,137 @@
+"""
+Step 2 스트리밍 구조 검증 테스트
+
+이 모듈은 ReportStreamGuard와 GeminiService._generate_structured_json의 조기 중단·보정 재시도를 테스트합니다.
+"""
+
+import json
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from utils.json_stream import IncrementalJsonScanner
+from utils.report_guard import ReportStreamGuard, StreamSchemaError
+from tests.test_json_stream import SAMPLE_JSON, _chunk_responses, _stream_of
+
+
+def _scan(text: str, size: int = 16):
+    """가드를 연결한 스캐너로 조각 입력, 중단 시점까지 입력된 글자 수 반환"""
+    scanner = IncrementalJsonScanner("tabs", on_value=ReportStreamGuard())
+    for i in range(0, len(text), size):
+        scanner.feed(text[i:i + size])
+    return len(scanner.text)
+
+
+def _mutated(mutate) -> str:
+    report = json.loads(SAMPLE_JSON)
+    mutate(report)
+    return json.dumps(report, ensure_ascii=False, indent=2)
+
+
+class TestReportStreamGuard:
+    """ReportStreamGuard 테스트 클래스"""
+
+    def test_valid_report_passes(self):
+        """정상 리포트는 끝까지 통과"""
+        assert _scan(SAMPLE_JSON) == len(SAMPLE_JSON)
+
+    def test_wrong_tab_order_aborts_early(self):
+        """탭 순서 오류는 해당 tabId 시점에 중단"""
+        def swap(report):
+            report["tabs"][0], report["tabs"][1] = report["tabs"][1], report["tabs"][0]
+        text = _mutated(swap)
+
+        with pytest.raises(StreamSchemaError) as exc_info:
+            _scan(text)
+
+        assert exc_info.value.path == ("tabs", 0, "tabId")
+        assert "dashboard" in str(exc_info.value)
+
+    def test_opportunities_as_array_aborts(self):
+        """객체 자리의 배열 (opportunities) 즉시 중단"""
+        def to_array(report):
+            report["tabs"][1]["content"]["opportunities"] = report["tabs"][1]["content"]["opportunities"]["items"]
+        text = _mutated(to_array)
+
+        with pytest.raises(StreamSchemaError) as exc_info:
+            _scan(text)
+
+        assert exc_info.value.path == ("tabs", 1, "content", "opportunities")
+        assert "tabs[1].content.opportunities" in exc_info.value.hint
+
+    def test_null_score_aborts(self):
+        """필수 점수 null 중단"""
+        def null_score(report):
+            report["tabs"][0]["content"]["coreCriteriaScores"][1]["score"] = None
+        text = _mutated(null_score)
+
+        with pytest.raises(StreamSchemaError) as exc_info:
+            _scan(text)
+
+        assert exc_info.value.path == ("tabs", 0, "content", "coreCriteriaScores", 1, "score")
+
+    def test_optional_and_scalar_mismatch_left_to_pydantic(self):
+        """Optional 필드 null, 숫자 문자열, 추가 필드는 통과 (최종 검증에서 판단)"""
+        def relax(report):
+            report["tabs"][3]["content"]["analysisCards"][0]["ticker"] = None
+            report["tabs"][0]["content"]["overallScore"]["score"] = "72"
+            report["tabs"][0]["extra"] = [1, 2]
+        text = _mutated(relax)
+        assert _scan(text) == len(text)
+
+    def test_too_many_tabs_aborts(self):
+        """탭 개수 초과 중단"""
+        text = _mutated(lambda report: report["tabs"].append(report["tabs"][0]))
+        with pytest.raises(StreamSchemaError) as exc_info:
+            _scan(text)
+        assert exc_info.value.path == ("tabs", 4)
+
+
+class TestStep2EarlyAbort:
+    """_generate_structured_json 조기 중단 테스트"""
+
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.asyncio.sleep', new_callable=AsyncMock)
+    async def test_structural_error_cancels_and_retries_with_hint(self, mock_sleep, gemini_service):
+        """구조 오류 시 나머지 조각을 읽지 않고 스트림 종료, 대기 없이 보정 프롬프트로 재시도"""
+        def swap(report):
+            report["tabs"][0], report["tabs"][1] = report["tabs"][1], report["tabs"][0]
+        bad_chunks = _chunk_responses(_mutated(swap), 32)
+        consumed = []
+
+        async def bad_stream():
+            for chunk in bad_chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        gemini_service.client.aio.models.generate_content_stream = AsyncMock(side_effect=[
+            bad_stream(),
+            _stream_of(_chunk_responses(SAMPLE_JSON, 64)),
+        ])
+
+        report = await gemini_service._generate_structured_json("그라운딩 결과")
+
+        assert [tab.tabId for tab in report.tabs][0] == "dashboard"
+        assert len(consumed) < len(bad_chunks) // 4
+        mock_sleep.assert_not_awaited()
+
+        first_prompt = gemini_service.client.aio.models.generate_content_stream.call_args_list[0].kwargs["contents"][0]
+        retry_prompt = gemini_service.client.aio.models.generate_content_stream.call_args_list[1].kwargs["contents"][0]
+        assert "이전 시도 오류" not in first_prompt
+        assert "이전 시도 오류" in retry_prompt and "tabs[0].tabId" in retry_prompt
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.asyncio.sleep', new_callable=AsyncMock)
+    async def test_validation_error_passed_to_retry_prompt(self, mock_sleep, gemini_service):
+        """전체 검증 실패 시 검증 오류를 보정 프롬프트에 포함"""
+        def short_analysis(report):
+            report["tabs"][1]["content"]["inDepthAnalysis"] = report["tabs"][1]["content"]["inDepthAnalysis"][:1]
+        gemini_service.client.aio.models.generate_content_stream = AsyncMock(side_effect=[
+            _stream_of(_chunk_responses(_mutated(short_analysis), 64)),
+            _stream_of(_chunk_responses(SAMPLE_JSON, 64)),
+        ])
+
+        await gemini_service._generate_structured_json("그라운딩 결과")
+
+        retry_prompt = gemini_service.client.aio.models.generate_content_stream.call_args_list[1].kwargs["contents"][0]
+        assert "inDepthAnalysis" in retry_prompt.split("이전 시도 오류")[1]
@@ -0,0 +1,146 @@
+"""
+Step 2 압축 출력 형식 테스트
+
+이 모듈은 압축 형식 → PortfolioReport 확장, 형식 자동 판별, 압축 형식 스트리밍 구조 검증과
+GeminiService Step 2 경로의 압축 응답 처리를 테스트합니다.
+"""
+
+import json
+import pytest
+from unittest.mock import patch, AsyncMock
+from pydantic import ValidationError
+
+from utils.json_stream import IncrementalJsonScanner
+from utils.report_guard import ReportStreamGuard, StreamSchemaError
+from utils.report_wire import parse_step2_report, parse_step2_tab, STEP2_TABS_KEYS
+from tests.test_json_stream import SAMPLE_JSON, _chunk_responses, _stream_of
+
+COMPACT_REPORT = {
+    "d": "2025-09-30",
+    "t": [
+        {"o": 72, "c": [88, 55, 74], "s": ["강점 \"인용\" 포함 }]"], "w": ["약점1"]},
+        {
+            "a": [
+                {"h": "AI 플랫폼 확장", "s": 80, "d": "a" * 60},
+                {"h": "안정성 및 방어력 분석: 변동성", "s": 60, "d": "b" * 60},
+                {"h": "테마 일관성", "s": 70, "d": "c" * 60},
+            ],
+            "p": [{"m": "요약1", "d": "d" * 40}],
+        },
+        {"r": [{"n": "팔란티어 (PLTR)", "s": [78, 70, 95, 75, 85, 85]}]},
+        {"k": [{"n": "팔란티어 (PLTR)", "o": 78, "s": [70, 71, 72, 73, 74], "a": ["x" * 40] * 5}]},
+    ],
+}
+COMPACT_JSON = json.dumps(COMPACT_REPORT, ensure_ascii=False, separators=(",", ":"))
+
+
+def _compact(mutate) -> str:
+    report = json.loads(COMPACT_JSON)
+    mutate(report)
+    return json.dumps(report, ensure_ascii=False)
+
+
+class TestCompactReport:
+    """압축 형식 확장 테스트"""
+
+    def test_expands_to_full_report(self):
+        report = parse_step2_report(COMPACT_JSON)
+
+        dashboard, deep_dive, scores, key_stocks = (tab.content for tab in report.tabs)
+        assert [tab.tabId for tab in report.tabs] == ["dashboard", "deepDive", "allStockScores", "keyStockAnalysis"]
+        assert report.tabs[0].tabTitle == "총괄 요약" and report.version == "1.0"
+        assert [(item.criterion, item.score, item.maxScore) for item in dashboard.coreCriteriaScores][1] == (
+            "안정성 및 방어력", 55, 100
+        )
+        assert deep_dive.inDepthAnalysis[0].title == "성장 잠재력 분석: AI 플랫폼 확장"
+        assert deep_dive.inDepthAnalysis[1].title == "안정성 및 방어력 분석: 변동성"
+        assert deep_dive.opportunities.title == "기회 및 개선 방안"
+        assert scores.scoreTable.headers[3] == "기술 잠재력"
+        assert scores.scoreTable.rows[0].model_dump(by_alias=True)["CEO/리더십"] == 85
+        assert [(item.category, item.score) for item in key_stocks.analysisCards[0].detailedScores][-1] == ("CEO/리더십", 74)
+
+    def test_full_format_still_accepted(self):
+        assert parse_step2_report(SAMPLE_JSON).tabs[2].content.scoreTable.rows[0].Overall == 78
+
+    def test_compact_output_is_much_shorter(self):
+        """같은 리포트의 압축 형식은 전체 형식(공백 제거)의 절반 이하"""
+        full = parse_step2_report(COMPACT_JSON).model_dump_json(by_alias=True, exclude_none=True)
+        assert len(COMPACT_JSON) < len(full) * 0.5
+
+    @pytest.mark.parametrize("mutate", [
+        lambda report: report["t"][0]["c"].pop(),  # 핵심 기준 점수 2개
+        lambda report: report["t"][2]["r"][0]["s"].append(50),  # 종목 점수 7개
+        lambda report: report["t"][3]["k"][0]["a"].pop(),  # 분석 4개
+        lambda report: report["t"][1]["a"][0].update(d="짧음"),  # 전체 형식 최소 길이
+    ])
+    def test_invalid_compact_report_raises_validation_error(self, mutate):
+        with pytest.raises(ValidationError):
+            parse_step2_report(_compact(mutate))
+
+    def test_streamed_tabs_expanded_by_position(self):
+        scanner = IncrementalJsonScanner(STEP2_TABS_KEYS)
+        tabs = [parse_step2_tab(index, raw) for index, raw in scanner.feed(COMPACT_JSON)]
+
+        assert [tab.tabId for tab in tabs] == ["dashboard", "deepDive", "allStockScores", "keyStockAnalysis"]
+        assert parse_step2_tab(0, json.dumps(json.loads(SAMPLE_JSON)["tabs"][0])).tabTitle == "총괄 요약"
+
+
+class TestCompactStreamGuard:
+    """압축 형식 스트리밍 구조 검증 테스트"""
+
+    def _scan(self, text: str) -> None:
+        scanner = IncrementalJsonScanner(STEP2_TABS_KEYS, on_value=ReportStreamGuard())
+        for i in range(0, len(text), 16):
+            scanner.feed(text[i:i + 16])
+
+    def test_valid_compact_report_passes(self):
+        self._scan(COMPACT_JSON)
+
+    def test_wrong_container_aborts(self):
+        with pytest.raises(StreamSchemaError) as exc_info:
+            self._scan(_compact(lambda report: report["t"][1].update(p={"m": "요약"})))
+        assert str(exc_info.value).startswith("t[1].p:")
+
+    def test_null_score_and_extra_tab_abort(self):
+        with pytest.raises(StreamSchemaError):
+            self._scan(_compact(lambda report: report["t"][2]["r"][0]["s"].__setitem__(1, None)))
+        with pytest.raises(StreamSchemaError):
+            self._scan(_compact(lambda report: report["t"].append({})))
+
+
+class TestServiceCompactStep2:
+    """GeminiService Step 2 압축 응답 처리 테스트"""
+
+
+    def test_prompt_requests_compact_format(self, gemini_service):
+        prompt = gemini_service._get_json_generation_prompt("## 포트폴리오")
+        assert '"t":[' in prompt and "coreCriteriaScores" not in prompt
+
+        gemini_service.step2_format = "full"
+        assert "coreCriteriaScores" in gemini_service._get_json_generation_prompt("## 포트폴리오")
+
+    @pytest.mark.asyncio
+    async def test_compact_stream_validated_and_expanded(self, gemini_service):
+        gemini_service.client.aio.models.generate_content_stream = AsyncMock(
+            return_value=_stream_of(_chunk_responses(COMPACT_JSON, 37))
+        )
+
+        report = await gemini_service._generate_structured_json("그라운딩 결과")
+
+        assert report.tabs[3].content.analysisCards[0].ticker == "PLTR"
+        assert report.tabs[2].content.scoreTable.rows[0].ticker == "PLTR"
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_compact_tabs_streamed_to_client(self, mock_validate, gemini_service):
+        gemini_service._generate_grounded_facts = AsyncMock(return_value="# 그라운딩 결과" * 100)
+        gemini_service.client.aio.models.generate_content_stream = AsyncMock(
+            return_value=_stream_of(_chunk_responses(COMPACT_JSON, 41))
+        )
+
+        events = [event async for event in gemini_service.stream_portfolio_structured([b"img"], request_id="wire-test")]
+
+        tabs = [data["tab"] for name, data in events if name == "tab"]
+        assert [tab["tabId"] for tab in tabs] == ["dashboard", "deepDive", "allStockScores", "keyStockAnalysis"]
+        assert tabs[2]["content"]["scoreTable"]["rows"][0]["기술 잠재력"] == 95
+        assert events[-1][0] == "report"
@@ -0,0 +1,141 @@
+"""
+결과 캐시 (stale-while-revalidate) 테스트
+
+이 모듈은 ResultCache의 신선도 구간과 analyze_portfolio_structured의 SWR 동작을 테스트합니다.
+"""
+
+import time
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+from services.result_cache import ResultCache, CACHE_FRESH, CACHE_STALE
+from services.circuit_breaker import CIRCUIT_OPEN
+from services.model_router import ModelRouter
+from models.portfolio import SAMPLE_MARKDOWN_CONTENT
+
+
+class TestResultCache:
+    """ResultCache 테스트 클래스"""
+
+    def test_fresh_entry_behaves_like_dict(self):
+        """신선한 항목은 dict처럼 조회"""
+        cache = ResultCache(fresh_ttl=60, stale_ttl=60)
+        cache["k"] = "v"
+        assert "k" in cache
+        assert cache["k"] == "v"
+        assert cache.lookup("k") == ("v", CACHE_FRESH)
+
+    def test_stale_entry_hidden_from_dict_access(self):
+        """유예 구간 항목은 dict 접근에서 미적중, lookup에서는 반환"""
+        cache = ResultCache(fresh_ttl=60, stale_ttl=60)
+        cache["k"] = "v"
+        cache._entries["k"] = ("v", time.time() - 90)
+        assert "k" not in cache
+        with pytest.raises(KeyError):
+            cache["k"]
+        assert cache.get("k") is None
+        assert cache.lookup("k") == ("v", CACHE_STALE)
+
+    def test_hard_expiry_removes_entry(self):
+        """하드 만료 이후에는 제거"""
+        cache = ResultCache(fresh_ttl=60, stale_ttl=60)
+        cache["k"] = "v"
+        cache._entries["k"] = ("v", time.time() - 200)
+        assert cache.lookup("k") is None
+        assert len(cache) == 0
+
+    def test_pop_and_clear(self):
+        """pop/clear 지원"""
+        cache = ResultCache()
+        cache["a"] = "1"
+        cache["b"] = "2"
+        assert cache.pop("a") == "1"
+        assert cache.pop("a", None) is None
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_max_entries_evicts_oldest(self):
+        """항목 수 제한 시 가장 오래전에 저장된 항목부터 제거 (다시 저장하면 최신)"""
+        cache = ResultCache(max_entries=2)
+        cache["a"] = "1"
+        cache["b"] = "2"
+        cache["a"] = "1"
+        cache["c"] = "3"
+        assert "b" not in cache
+        assert cache.get("a") == "1" and cache.get("c") == "3"
+        assert len(cache) == 2
+
+
+class TestStaleWhileRevalidate:
+    """analyze_portfolio_structured SWR 동작 테스트"""
+
+    @pytest.fixture
+    def service(self, gemini_service):
+        gemini_service._cache = ResultCache(fresh_ttl=60, stale_ttl=60)
+        return gemini_service
+
+    def _age_all_entries(self, service, seconds):
+        """캐시 항목 저장 시각을 과거로 이동"""
+        for key, (value, created_at) in list(service._cache._entries.items()):
+            service._cache._entries[key] = (value, created_at - seconds)
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_fresh_hit_does_not_recompute(self, mock_validate, service):
+        """신선 구간: 재생성 없이 반환"""
+        with patch.object(service, 'analyze_portfolio_image', new_callable=AsyncMock) as mock_analyze:
+            mock_analyze.return_value = SAMPLE_MARKDOWN_CONTENT
+            await service.analyze_portfolio_structured([b"img"], format_type="markdown")
+            second = await service.analyze_portfolio_structured([b"img"], format_type="markdown")
+
+        assert mock_analyze.await_count == 1
+        assert second.stale is False
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_stale_hit_returns_immediately_and_refreshes_once(self, mock_validate, service):
+        """유예 구간: 기존 결과 즉시 반환(stale=True) + 백그라운드 갱신 1회"""
+        refreshed = SAMPLE_MARKDOWN_CONTENT + "\n갱신됨"
+        with patch.object(service, 'analyze_portfolio_image', new_callable=AsyncMock) as mock_analyze:
+            mock_analyze.return_value = SAMPLE_MARKDOWN_CONTENT
+            await service.analyze_portfolio_structured([b"img"], format_type="markdown")
+            self._age_all_entries(service, 90)
+
+            mock_analyze.return_value = refreshed
+            first = await service.analyze_portfolio_structured([b"img"], format_type="markdown")
+            second = await service.analyze_portfolio_structured([b"img"], format_type="markdown")
+            assert first.stale is True and second.stale is True
+            assert first.content == SAMPLE_MARKDOWN_CONTENT.strip()
+            assert len(service._refresh_tasks) == 1
+
+            await asyncio.gather(*service._refresh_tasks.values())
+            third = await service.analyze_portfolio_structured([b"img"], format_type="markdown")
+
+        assert mock_analyze.await_count == 2  # 최초 1회 + 백그라운드 갱신 1회
+        assert third.stale is False
+        assert "갱신됨" in third.content
+
+    def test_refresh_skipped_when_routed_model_circuit_open(self, service):
+        """라우팅 모델(폴백 포함)의 회로가 모두 열려 있으면 백그라운드 갱신 생략"""
+        service.models = ModelRouter(default="flash", step_models={"step2": "flash-lite"}, small_model="", fallbacks=[])
+        service._breaker_for("flash-lite")._state = CIRCUIT_OPEN
+        service._breaker_for("flash-lite")._opened_at = time.monotonic()
+
+        with patch.object(service, "_compute_report_payload", new_callable=AsyncMock):
+            service._schedule_report_refresh([b"img"], "json")
+        assert service._refresh_tasks == {}
+        assert service.breaker.allows_calls()
+
+    @pytest.mark.asyncio
+    @patch('services.gemini_service.validate_image', new_callable=AsyncMock)
+    async def test_expired_entry_recomputes_synchronously(self, mock_validate, service):
+        """하드 만료 이후: 동기 재생성"""
+        with patch.object(service, 'analyze_portfolio_image', new_callable=AsyncMock) as mock_analyze:
+            mock_analyze.return_value = SAMPLE_MARKDOWN_CONTENT
+            await service.analyze_portfolio_structured([b"img"], format_type="markdown")
+            self._age_all_entries(service, 500)
+            result = await service.analyze_portfolio_structured([b"img"], format_type="markdown")
+
+        assert mock_analyze.await_count == 2
+        assert result.stale is False
+        assert not service._refresh_tasks
@@ -0,0 +1,205 @@
+"""
+Gemini 재시도 정책 테스트
+
+이 모듈은 RetryPolicy의 오류 분류, decorrelated jitter, 요청 단위 예산, 전역 재시도 비율 상한과
+GeminiService 재시도 루프 적용을 테스트합니다.
+"""
+
+import random
+import pytest
+from unittest.mock import patch, AsyncMock
+from google.genai import errors as genai_errors
+from pydantic import BaseModel
+
+from services.errors import GeminiCapacityError
+from services.retry_policy import (
+    RetryPolicy, RetryableResponseError, classify_error,
+    ERROR_RETRYABLE, ERROR_QUOTA, ERROR_INVALID, ERROR_SCHEMA
+)
+from utils.report_guard import StreamSchemaError
+
+
+class FakeClock:
+    """수동 진행 시계 (asyncio.sleep 시 시간 진행)"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    clock = FakeClock()
+    with patch('services.retry_policy.asyncio.sleep', side_effect=clock.sleep):
+        yield clock
+
+
+def _policy(clock, **kwargs) -> RetryPolicy:
+    options = dict(
+        max_attempts=5, timeout=600, base_delay=1, max_delay=20, quota_delay=5,
+        request_budget=10, ratio=1.0, min_retries=100, window=60, clock=clock, rng=random.Random(7)
+    )
+    options.update(kwargs)
+    return RetryPolicy(**options)
+
+
+async def _run(policy: RetryPolicy, errors, correctable: bool = False, label: str = "테스트"):
+    """errors를 순서대로 발생시키는 재시도 루프 - (시도 횟수, 성공 여부)"""
+    retry = policy.attempts(label)
+    calls = 0
+    for attempt in retry:
+        calls += 1
+        try:
+            if attempt < len(errors):
+                raise errors[attempt]
+            return calls, True
+        except Exception as e:
+            if not await retry.backoff(e, correctable=correctable):
+                return calls, False
+    return calls, False
+
+
+class _Model(BaseModel):
+    value: int
+
+
+class TestClassification:
+    """오류 분류 테스트"""
+
+    def test_classify_error(self):
+        try:
+            _Model.model_validate({"value": "x"})
+        except Exception as e:
+            validation_error = e
+
+        assert classify_error(StreamSchemaError("tabs[0]", "순서 오류")) == ERROR_SCHEMA
+        assert classify_error(validation_error) == ERROR_SCHEMA
+        assert classify_error(genai_errors.ClientError(429, {"error": {"message": "quota"}})) == ERROR_QUOTA
+        assert classify_error(genai_errors.ClientError(400, {"error": {"message": "bad"}})) == ERROR_INVALID
+        assert classify_error(genai_errors.ServerError(503, {"error": {"message": "unavailable"}})) == ERROR_RETRYABLE
+        assert classify_error(RetryableResponseError("빈 응답")) == ERROR_RETRYABLE
+        assert classify_error(ValueError("이미지 처리 실패")) == ERROR_INVALID
+        assert classify_error(TimeoutError()) == ERROR_RETRYABLE
+        assert classify_error(RuntimeError("429 RESOURCE_EXHAUSTED")) == ERROR_QUOTA
+
+
+class TestRetryPolicy:
+    """RetryPolicy 테스트 클래스"""
+
+    @pytest.mark.asyncio
+    async def test_decorrelated_jitter_bounds(self, clock):
+        """대기 시간은 [기본, 직전 × 3] 범위에서 무작위, 최대값 이하"""
+        policy = _policy(clock, max_attempts=8, max_delay=10)
+
+        calls, ok = await _run(policy, [RuntimeError("503")] * 7)
+
+        assert (calls, ok) == (8, True)
+        previous = 1.0
+        for delay in clock.sleeps:
+            assert 1.0 <= delay <= min(10.0, max(1.0, previous * 3))
+            previous = delay
+        assert len(set(clock.sleeps)) > 1
+
+    @pytest.mark.asyncio
+    async def test_quota_uses_longer_base_delay(self, clock):
+        policy = _policy(clock)
+
+        await _run(policy, [genai_errors.ClientError(429, {"error": {"message": "quota"}})])
+
+        assert clock.sleeps[0] >= 5
+
+    @pytest.mark.asyncio
+    async def test_invalid_not_retried_and_schema_only_when_correctable(self, clock):
+        """요청 오류는 재시도 없음, 스키마 오류는 보정 가능할 때만 대기 없이 재시도"""
+        policy = _policy(clock)
+        schema_error = StreamSchemaError("tabs[0]", "순서 오류")
+
+        assert await _run(policy, [ValueError("잘못된 입력")]) == (1, False)
+        assert await _run(policy, [schema_error]) == (1, False)
+        assert await _run(policy, [schema_error, schema_error], correctable=True) == (3, True)
+        assert clock.sleeps == []
+
+    @pytest.mark.asyncio
+    async def test_capacity_error_propagates(self, clock):
+        policy = _policy(clock)
+
+        with pytest.raises(GeminiCapacityError):
+            await _run(policy, [GeminiCapacityError("대기열 초과", retry_after=3)])
+
+    @pytest.mark.asyncio
+    async def test_request_budget_shared_across_loops(self, clock):
+        """같은 요청의 재시도 루프들은 재시도 횟수 예산을 공유"""
+        policy = _policy(clock, request_budget=2)
+
+        with policy.request_scope():
+            assert await _run(policy, [RuntimeError("503")], label="Step 1") == (2, True)
+            assert await _run(policy, [RuntimeError("503")] * 3, label="Step 2") == (2, False)
+
+        assert policy.snapshot()["budget_exhausted"] == 1
+        assert await _run(policy, [RuntimeError("503")]) == (2, True)  # 새 요청은 새 예산
+
+    @pytest.mark.asyncio
+    async def test_retry_not_started_past_deadline(self, clock):
+        """대기 후 요청 마감을 넘기는 재시도는 하지 않음"""
+        policy = _policy(clock, timeout=10, base_delay=4, max_delay=4)
+
+        with policy.request_scope():
+            clock.now += 5
+            calls, ok = await _run(policy, [RuntimeError("503")] * 3)
+
+        assert (calls, ok) == (2, False)
+        assert clock.sleeps == [4]
+
+    @pytest.mark.asyncio
+    async def test_global_retry_ratio_cap(self, clock):
+        """최근 구간 재시도 수가 최초 시도 × 비율을 넘지 않음"""
+        policy = _policy(clock, ratio=0.5, min_retries=0)
+
+        results = [await _run(policy, [RuntimeError("503")] * 2) for _ in range(4)]
+
+        assert sum(calls - 1 for calls, _ in results) == 2  # 최초 시도 4회 × 0.5
+        assert policy.snapshot()["throttled"] >= 2
+        clock.now += 61
+        assert await _run(policy, [RuntimeError("503")]) == (2, True)
+
+
+class TestServiceRetry:
+    """GeminiService 재시도 루프 적용 테스트"""
+
+    @pytest.fixture
+    def service(self, gemini_service, clock):
+        gemini_service.retry_policy = _policy(clock)
+        return gemini_service
+
+    @pytest.mark.asyncio
+    async def test_request_errors_not_retried(self, service, clock):
+        """4xx 요청 오류는 Step 1에서 재시도하지 않음"""
+        service.client.aio.models.generate_content = AsyncMock(
+            side_effect=genai_errors.ClientError(400, {"error": {"message": "invalid argument"}})
+        )
+
+        with pytest.raises(ValueError, match="Step 1"):
+            await service._generate_grounded_facts([b"image"])
+
+        assert service.client.aio.models.generate_content.await_count == 1
+        assert clock.sleeps == []
+
+    @pytest.mark.asyncio
+    async def test_multiple_quota_retried_then_reported(self, service, clock):
+        """다중 이미지 호출의 할당량 오류는 대기 후 재시도, 소진 시 사용자 메시지로 변환"""
+        service.client.aio.models.generate_content = AsyncMock(
+            side_effect=genai_errors.ClientError(429, {"error": {"message": "RESOURCE_EXHAUSTED"}})
+        )
+
+        with pytest.raises(ValueError, match="한도를 초과"):
+            await service._call_gemini_api_multiple([b"image1", b"image2"], use_search=False)
+
+        assert service.client.aio.models.generate_content.await_count == service.max_retries
+        assert all(delay >= 5 for delay in clock.sleeps)
@@ -0,0 +1,129 @@
+"""
+티커 해석기 테스트
+
+이 모듈은 종목명 → 티커 해석 유틸리티의 단위 테스트를 제공합니다.
+"""
+
+import time
+import pytest
+from utils.ticker_resolver import (
+    TickerResolver, get_ticker_resolver, normalize_stock_name, TICKER_SYMBOLS_PATH
+)
+
+
+class TestTickerResolver:
+    """TickerResolver 테스트 클래스"""
+
+    @pytest.fixture
+    def resolver(self):
+        """번들 심볼 사전으로 로드한 해석기"""
+        return TickerResolver.from_file()
+
+    def test_normalize_stock_name(self):
+        """정규화: 대소문자/공백/마크다운 강조 제거"""
+        assert normalize_stock_name("**Palantir Technologies**") == "palantirtechnologies"
+        assert normalize_stock_name("SK 하이닉스") == "sk하이닉스"
+        assert normalize_stock_name("") == ""
+
+    @pytest.mark.parametrize("name", [
+        "팔란티어 (PLTR)",
+        "Palantir",
+        "PLTR",
+        "pltr",
+        "**팔란티어**",
+        "팔란티어 테크놀로지스 (PLTR)",
+        "Palantir Technologies Inc.",
+    ])
+    def test_resolve_aliases_to_same_ticker(self, resolver, name):
+        """한국어/영어 별칭과 티커 표기가 같은 티커로 해석"""
+        assert resolver.resolve(name) == "PLTR"
+
+    def test_resolve_korean_listed_stocks(self, resolver):
+        """국내 종목 해석 (종목명, 6자리 코드)"""
+        assert resolver.resolve("삼성전자") == "005930"
+        assert resolver.resolve("삼성전자 (005930)") == "005930"
+        assert resolver.resolve("SK하이닉스") == "000660"
+
+    def test_resolve_unknown_parenthesized_symbol(self, resolver):
+        """사전에 없는 종목도 괄호 안 티커 표기는 그대로 사용"""
+        assert resolver.resolve("어떤 신규 상장사 (ZZZZ)") == "ZZZZ"
+
+    @pytest.mark.parametrize("name,ticker", [
+        ("Apple (USD)", "AAPL"),
+        ("KODEX 200 (ETF)", "069500"),
+        ("Apple Hospitality (REIT)", None),
+        ("애플 (ADR)", "AAPL"),
+    ])
+    def test_parenthesized_tag_not_ticker(self, resolver, name, ticker):
+        """통화·자산 유형 괄호 표기는 티커로 쓰지 않고 이름으로 해석"""
+        assert resolver.resolve(name) == ticker
+
+    def test_parenthesized_symbol_after_name(self, resolver):
+        """사전에 없는 괄호 표기보다 해석되는 이름을 우선"""
+        assert resolver.resolve("Apple (APPL)") == "AAPL"
+
+    def test_resolve_unknown_name(self, resolver):
+        """해석 불가 종목명은 None"""
+        assert resolver.resolve("존재하지않는종목") is None
+        assert resolver.resolve("") is None
+
+    def test_ticker_is_exact_match_only(self, resolver):
+        """짧은 티커는 접두사 일치에 사용되지 않음 (MA → MARA 오탐 방지)"""
+        assert resolver.resolve("MA") == "MA"
+        assert resolver.resolve("MARAX") is None
+
+    @pytest.mark.parametrize("name", [
+        "메타버스 ETF",
+        "인텔리아 테라퓨틱스",
+        "애플리케이션",
+        "Apple Hospitality REIT",
+    ])
+    def test_prefix_of_other_word_not_matched(self, resolver, name):
+        """별칭이 다른 단어·회사명의 일부일 뿐이면 해석하지 않음"""
+        assert resolver.resolve(name) is None
+
+    @pytest.mark.parametrize("name,ticker", [
+        ("amd inc", "AMD"),
+        ("Intel Corp.", "INTC"),
+        ("AppleInc", "AAPL"),
+        ("Alphabet Class A", "GOOGL"),
+        ("삼성전자 보통주", "005930"),
+    ])
+    def test_corporate_suffix_allowed(self, resolver, name, ticker):
+        """법인·주식 종류 접미사가 붙은 이름은 해석"""
+        assert resolver.resolve(name) == ticker
+
+    @pytest.mark.parametrize("name,ticker", [
+        ("Alphabet Class A", "GOOGL"),
+        ("Alphabet Class C", "GOOG"),
+        ("Alphabet Inc. Class C", "GOOG"),
+        ("알파벳 C", "GOOG"),
+        ("Alphabet", "GOOGL"),
+        ("Berkshire Hathaway Class B", "BRK.B"),
+    ])
+    def test_share_class_distinguished(self, resolver, name, ticker):
+        """종류별 항목이 있는 종목은 주식 종류를 구분, 없으면 종류 표기를 무시"""
+        assert resolver.resolve(name) == ticker
+
+    def test_resolve_many_dedupes(self, resolver):
+        """여러 표기의 동일 종목은 하나의 티커로 집계"""
+        tickers = resolver.resolve_many(["팔란티어 (PLTR)", "Palantir", "브로드컴 (AVGO)", "없는종목"])
+        assert tickers == ["PLTR", "AVGO"]
+
+    def test_display_name(self, resolver):
+        """대표 표시명 반환"""
+        assert resolver.display_name("PLTR") == "팔란티어"
+        assert resolver.display_name("UNKNOWN") == "UNKNOWN"
+
+    def test_load_time(self):
+        """사전 로드는 수 밀리초 내 완료"""
+        start = time.perf_counter()
+        resolver = TickerResolver.from_file(TICKER_SYMBOLS_PATH)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        assert len(resolver) > 50
+        assert elapsed_ms < 100
+
+
+def test_get_ticker_resolver_singleton():
+    """TickerResolver 싱글톤 테스트"""
+    assert get_ticker_resolver() is get_ticker_resolver()
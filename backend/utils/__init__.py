@@ -9,13 +9,28 @@ from .image_utils import (
     optimize_image,
     get_image_info,
     is_supported_image_type,
-    guess_content_type
+    guess_content_type,
+    estimate_image_tokens
 )
+from .ticker_resolver import (
+    TickerResolver,
+    get_ticker_resolver,
+    normalize_stock_name
+)
+from .json_stream import IncrementalJsonScanner
+from .report_guard import ReportStreamGuard, StreamSchemaError
 
 __all__ = [
     "validate_image",
     "optimize_image", 
     "get_image_info",
     "is_supported_image_type",
-    "guess_content_type"
+    "guess_content_type",
+    "estimate_image_tokens",
+    "TickerResolver",
+    "get_ticker_resolver",
+    "normalize_stock_name",
+    "IncrementalJsonScanner",
+    "ReportStreamGuard",
+    "StreamSchemaError"
 ]
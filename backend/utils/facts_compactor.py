@@ -0,0 +1,62 @@
+"""
+Step 1 그라운딩 결과 압축기 (Step 2 입력용)
+
+이 모듈은 Step 1 마크다운을 Step 2 프롬프트에 넣기 전에 장식 요소만 걷어내 입력 토큰을 줄입니다.
+점수와 분석 문장은 그대로 두고, 줄 단위로 다음 표기만 바꿉니다.
+
+- 굵게(**), 제목 표시(###), 이모지, 가로줄(---), 빈 줄 제거
+- 글머리표(* / -)는 "- "로 통일하고 들여쓰기는 한 칸으로 축소 (중첩 항목은 " - ")
+- 표: 정렬 행(| :--- |) 제거, 셀 앞뒤 공백과 바깥쪽 |를 제거해 "a|b|c"로 표기
+- 점수 표기 "78 / 100" → "78/100"
+
+변환 후 글자·숫자 토큰 순서가 원문과 같은지 확인하며, 다르면 원문을 그대로 반환합니다 (내용 손실 방지).
+"""
+
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+_EMOJI = re.compile("[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\uFE0F\u200D]")
+_HEADING = re.compile(r"^#{1,6}\s*")
+_BULLET = re.compile(r"^[*+\-]\s+")
+_HORIZONTAL_RULE = re.compile(r"^(-{3,}|\*{3,}|_{3,})$")
+_TABLE_ALIGNMENT = re.compile(r"^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$")
+_SCORE = re.compile(r"(\d+)\s+/\s+(\d+)")
+_SPACES = re.compile(r"[ \t]{2,}")
+_WORDS = re.compile(r"[^\W_]+")
+
+
+def _content_signature(text: str) -> list:
+    """글자·숫자 토큰 순서 (장식 기호와 공백 제외)"""
+    return _WORDS.findall(_EMOJI.sub("", text))
+
+
+def _compact_line(raw: str) -> str:
+    stripped = raw.strip()
+    if not stripped or _HORIZONTAL_RULE.match(stripped) or _TABLE_ALIGNMENT.match(stripped):
+        return ""
+    nested = raw[:1] in (" ", "\t")
+    line = _SCORE.sub(r"\1/\2", _EMOJI.sub("", stripped).replace("**", ""))
+    if line.startswith("|"):
+        return "|".join(cell.strip() for cell in line.strip().strip("|").split("|"))
+    if _HEADING.match(line):
+        return "# " + _SPACES.sub(" ", _HEADING.sub("", line)).strip()
+    if _BULLET.match(line):
+        return (" - " if nested else "- ") + _SPACES.sub(" ", _BULLET.sub("", line)).strip()
+    return _SPACES.sub(" ", line).strip()
+
+
+def compact_grounded_facts(markdown: str) -> str:
+    """
+    Step 1 마크다운 → 장식 없는 압축 텍스트
+
+    Returns:
+        str: 압축 텍스트 (내용 검사에 실패하면 원문)
+    """
+    lines = [_compact_line(raw) for raw in markdown.splitlines()]
+    compacted = "\n".join(line for line in lines if line.strip(" -#|"))
+    if _content_signature(compacted) != _content_signature(markdown):
+        logger.warning("그라운딩 결과 압축 중 내용 불일치 - 원문 사용")
+        return markdown
+    return compacted
@@ -5,6 +5,7 @@
 """
 
 import os
+import math
 from typing import Tuple, Optional
 from io import BytesIO
 from PIL import Image, ImageOps
@@ -17,6 +18,7 @@ MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
 ALLOWED_MIME_TYPES = os.getenv("ALLOWED_IMAGE_TYPES", "image/jpeg,image/png,image/jpg").split(",")
 MAX_IMAGE_DIMENSION = 2048  # 최대 이미지 크기
 JPEG_QUALITY = 85  # JPEG 압축 품질
+IMAGE_TILE_TOKENS = 258  # Gemini 이미지 타일당 입력 토큰
 
 async def validate_image(image_data: bytes, filename: Optional[str] = None) -> None:
     """
@@ -152,6 +154,24 @@ async def get_image_info(image_data: bytes) -> dict:
         logger.error(f"이미지 정보 추출 실패: {str(e)}")
         return {}
 
+def estimate_image_tokens(image_data: bytes) -> int:
+    """
+    Gemini 입력 토큰 추정 (이미지 1장)
+    
+    양변이 384px 이하이면 타일 1개, 그 외에는 짧은 변/1.5 (256~768px)를 타일 크기로 분할하며
+    타일당 258 토큰입니다. 헤더만 읽으므로 디코딩 비용이 없습니다.
+    """
+    try:
+        with Image.open(BytesIO(image_data)) as img:
+            width, height = img.size
+    except Exception as e:
+        logger.debug(f"이미지 토큰 추정 실패 - 타일 1개로 간주: {str(e)}")
+        return IMAGE_TILE_TOKENS
+    if width <= 384 and height <= 384:
+        return IMAGE_TILE_TOKENS
+    tile = min(768, max(256, int(min(width, height) / 1.5)))
+    return math.ceil(width / tile) * math.ceil(height / tile) * IMAGE_TILE_TOKENS
+
 # 지원되는 MIME 타입 확인
 def is_supported_image_type(content_type: str) -> bool:
     """지원되는 이미지 타입인지 확인"""
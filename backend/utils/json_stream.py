@@ -0,0 +1,176 @@
+"""
+스트리밍 JSON 점진적 스캐너
+
+이 모듈은 Gemini가 조각 단위로 생성하는 JSON 텍스트를 매번 다시 파싱하지 않고 각 문자를 한 번만 훑어,
+지정한 키의 배열(예: "tabs", 여러 키 지정 가능)에서 원소 객체가 완성되는 즉시 해당 원문을 돌려줍니다.
+문자열/이스케이프 상태와 현재 경로(객체 키, 배열 인덱스)를 추적합니다.
+
+원소의 스키마 검증은 호출 측에서 수행합니다. 스캐너는 JSON 문법 오류를 검출하지 않으며,
+완성된 원소 원문을 json.loads로 파싱할 때 오류가 드러납니다.
+on_value 콜백을 지정하면 값이 시작될 때마다(문자열은 닫힐 때) (경로, 종류, 값)으로 호출되어
+구조 검증기가 전체 응답을 기다리지 않고 오류를 발견할 수 있습니다. 콜백에서 발생한 예외는 feed()로 전파됩니다.
+"""
+
+import json
+from typing import Optional, List, Tuple, Union, Any, Callable
+
+PathKey = Union[str, int]
+JsonPath = Tuple[PathKey, ...]
+
+# 값 종류 (on_value 콜백의 kind)
+KIND_OBJECT = "object"
+KIND_ARRAY = "array"
+KIND_STRING = "string"
+KIND_NUMBER = "number"
+KIND_BOOLEAN = "boolean"
+KIND_NULL = "null"
+
+ValueCallback = Callable[[JsonPath, str, Any], None]
+
+
+class _Frame:
+    """컨테이너(객체/배열) 스캔 상태"""
+
+    __slots__ = ("kind", "key", "index", "awaiting", "pending_key", "element_start")
+
+    def __init__(self, kind: str, key: Optional[PathKey]):
+        self.kind = kind  # "{" 또는 "["
+        self.key = key  # 부모에서의 키 (객체 키 또는 배열 인덱스)
+        self.index = -1  # 배열: 현재 원소 인덱스
+        self.awaiting = True  # 객체: 다음 문자열이 키인지 / 배열: 다음 값이 새 원소인지
+        self.pending_key: Optional[str] = None  # 객체: 현재 값의 키
+        self.element_start: Optional[int] = None  # 대상 배열: 현재 원소 시작 위치
+
+
+class IncrementalJsonScanner:
+    """지정 키 배열의 완성된 원소를 점진적으로 추출하는 스캐너"""
+
+    def __init__(self, array_key: Union[str, Tuple[str, ...]] = "tabs", on_value: Optional[ValueCallback] = None):
+        self.array_key = array_key
+        self._array_keys = (array_key,) if isinstance(array_key, str) else tuple(array_key)
+        self.on_value = on_value
+        self._text = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_path: Optional[JsonPath] = None  # 값 문자열의 경로 (키 문자열이면 None)
+        self._in_scalar = False
+        self._started = False
+
+    @property
+    def text(self) -> str:
+        """지금까지 입력된 전체 텍스트"""
+        return self._text
+
+    @property
+    def path(self) -> JsonPath:
+        """현재 스캔 위치의 경로 (예: ("tabs", 1, "content"))"""
+        path: List[PathKey] = [frame.key for frame in self._stack[1:]]
+        if self._stack:
+            top = self._stack[-1]
+            if top.kind == "[" and top.index >= 0:
+                path.append(top.index)
+            elif top.kind == "{" and top.pending_key is not None:
+                path.append(top.pending_key)
+        return tuple(path)
+
+    @property
+    def complete(self) -> bool:
+        """최상위 컨테이너가 닫혔는지 여부"""
+        return self._started and not self._stack
+
+    def feed(self, chunk: str) -> List[Tuple[int, str]]:
+        """
+        조각 입력 후 새로 완성된 대상 배열 원소 반환
+
+        Returns:
+            List[Tuple[int, str]]: (원소 인덱스, 원소 JSON 원문) 목록
+        """
+        self._text += chunk
+        text = self._text
+        stack = self._stack
+        completed: List[Tuple[int, str]] = []
+
+        for pos in range(self._pos, len(text)):
+            if self._started and not stack:
+                break  # 최상위 컨테이너 종료 후 텍스트 (코드 블록 표시 등) 무시
+            char = text[pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_path is None:
+                        top = stack[-1]
+                        top.pending_key = json.loads(text[self._string_start:pos + 1])
+                        top.awaiting = False
+                    elif self.on_value is not None:
+                        self.on_value(self._string_path, KIND_STRING, json.loads(text[self._string_start:pos + 1]))
+                continue
+
+            if self._in_scalar:
+                if char not in ",}] \t\r\n":
+                    continue
+                self._in_scalar = False
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+                top = stack[-1] if stack else None
+                if top is not None and top.kind == "{" and top.awaiting:
+                    self._string_path = None  # 객체 키
+                else:
+                    self._string_path = self._start_value(pos, char)
+            elif char in "{[":
+                path = self._start_value(pos, char)
+                if self.on_value is not None:
+                    self.on_value(path, KIND_OBJECT if char == "{" else KIND_ARRAY, None)
+                parent = stack[-1] if stack else None
+                key: Optional[PathKey] = None
+                if parent is not None:
+                    key = parent.index if parent.kind == "[" else parent.pending_key
+                stack.append(_Frame(char, key))
+                self._started = True
+            elif char in "}]":
+                if not stack:
+                    continue
+                stack.pop()
+                parent = stack[-1] if stack else None
+                if parent is not None and parent.element_start is not None:
+                    completed.append((parent.index, text[parent.element_start:pos + 1]))
+                    parent.element_start = None
+            elif char == ",":
+                if stack:
+                    stack[-1].awaiting = True
+                    stack[-1].pending_key = None
+            elif char not in ": \t\r\n":
+                # 숫자/true/false/null (첫 문자에서만 처리)
+                self._in_scalar = True
+                path = self._start_value(pos, char)
+                if self.on_value is not None:
+                    kind = KIND_NULL if char == "n" else KIND_BOOLEAN if char in "tf" else KIND_NUMBER
+                    self.on_value(path, kind, None)
+
+        self._pos = len(text)
+        return completed
+
+    def _start_value(self, pos: int, char: str) -> JsonPath:
+        """
+        값 시작 처리 (배열 새 원소면 인덱스 증가, 대상 배열의 컨테이너 원소면 시작 위치 기록)
+
+        Returns:
+            JsonPath: 시작된 값의 경로
+        """
+        if self._stack:
+            top = self._stack[-1]
+            if top.kind == "[" and top.awaiting:
+                top.awaiting = False
+                top.index += 1
+                if top.key in self._array_keys and char in "{[":
+                    top.element_start = pos
+        return self.path if self.on_value is not None else ()
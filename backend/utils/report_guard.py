@@ -0,0 +1,160 @@
+"""
+Step 2 JSON 스트리밍 구조 검증기
+
+이 모듈은 IncrementalJsonScanner의 on_value 콜백으로 연결되어, Gemini가 PortfolioReport JSON을
+생성하는 도중 복구할 수 없는 구조 오류를 발견하는 즉시 StreamSchemaError를 발생시킵니다.
+
+검사 대상 (Pydantic 모델 필드 타입에서 경로별 기대 형태를 도출):
+- 탭 순서: tabs[i].tabId는 TAB_ORDER[i]와 일치해야 함
+- 컨테이너 형태: 객체/배열 자리에 다른 형태 (예: opportunities를 배열로 생성)
+- 필수 값 null: Optional이 아닌 필드에 null (예: score: null)
+
+압축 출력 형식(utils.report_wire, 최상위 "t")도 같은 방식으로 검사합니다 (탭 형식은 위치로 결정, 탭 ID 없음).
+
+문자열/숫자 간 불일치나 범위·길이 오류는 Pydantic 최종 검증에 맡깁니다 (부분 출력으로 판단 불가).
+"""
+
+import inspect
+from typing import Optional, Dict, FrozenSet, Tuple, Any, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from models.portfolio import PortfolioReport, Tab, TAB_ORDER, TAB_CONTENT_MODELS
+from utils.json_stream import JsonPath, KIND_OBJECT, KIND_ARRAY, KIND_NULL
+from utils.report_wire import CompactPortfolioReport, COMPACT_TABS_KEY, COMPACT_TAB_MODELS
+
+# 경로별 기대 형태: "object" | "array" | "scalar" | "null"
+_SCALAR = "scalar"
+_UNKNOWN = None  # 스키마에 없는 경로 (추가 필드 등) - 검사하지 않음
+
+
+def format_json_path(path: JsonPath) -> str:
+    """경로 표기 (예: tabs[1].content.opportunities)"""
+    text = ""
+    for key in path:
+        if isinstance(key, int):
+            text += f"[{key}]"
+        else:
+            text += f".{key}" if text else str(key)
+    return text or "$"
+
+
+class StreamSchemaError(ValueError):
+    """스트리밍 중 발견된 복구 불가 구조 오류"""
+
+    def __init__(self, message: str, path: JsonPath):
+        super().__init__(f"{format_json_path(path)}: {message}")
+        self.path = path
+
+    @property
+    def hint(self) -> str:
+        """보정 재시도 프롬프트에 추가할 지시문"""
+        return f"이전 출력의 {self} 문제로 생성이 중단되었습니다. 출력 JSON 구조를 정확히 따르세요."
+
+
+def _annotation_kinds(annotation: Any) -> Optional[FrozenSet[str]]:
+    """필드 타입 → 허용 형태 집합 (판단 불가 시 None)"""
+    if annotation is Any:
+        return _UNKNOWN
+    if annotation is type(None):
+        return frozenset({KIND_NULL})
+    origin = get_origin(annotation)
+    if origin is Union:
+        kinds = set()
+        for arg in get_args(annotation):
+            arg_kinds = _annotation_kinds(arg)
+            if arg_kinds is None:
+                return _UNKNOWN
+            kinds |= arg_kinds
+        return frozenset(kinds)
+    if origin in (list, tuple, set):
+        return frozenset({KIND_ARRAY})
+    if origin is dict:
+        return frozenset({KIND_OBJECT})
+    if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+        return frozenset({KIND_OBJECT})
+    if annotation in (str, int, float, bool):
+        return frozenset({_SCALAR})
+    return _UNKNOWN
+
+
+def _strip_optional(annotation: Any) -> Any:
+    """Optional[X] → X"""
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _model_field(model: type, key: str) -> Any:
+    """모델 필드 타입 조회 (별칭 우선)"""
+    for name, field in model.model_fields.items():
+        if field.alias == key or name == key:
+            return field.annotation
+    return _UNKNOWN
+
+
+class ReportStreamGuard:
+    """PortfolioReport 스트리밍 구조 검증기 (IncrementalJsonScanner on_value 콜백)"""
+
+    def __init__(self, model: type = PortfolioReport, compact_model: type = CompactPortfolioReport):
+        self.model = model
+        self.compact_model = compact_model
+        self._kinds_cache: Dict[Tuple, Optional[FrozenSet[str]]] = {}
+
+    def __call__(self, path: JsonPath, kind: str, value: Any) -> None:
+        if len(path) >= 2 and path[0] in ("tabs", COMPACT_TABS_KEY) and isinstance(path[1], int):
+            tab_index = path[1]
+            if tab_index >= len(TAB_ORDER):
+                raise StreamSchemaError(f"탭은 {len(TAB_ORDER)}개여야 합니다.", path[:2])
+            if len(path) == 3 and path[2] == "tabId" and value is not None and value != TAB_ORDER[tab_index]:
+                raise StreamSchemaError(
+                    f"탭 순서 오류 - '{TAB_ORDER[tab_index]}'가 와야 하지만 '{value}'가 생성되었습니다.", path
+                )
+
+        expected = self._expected_kinds(path)
+        if expected is None:
+            return
+        actual = kind if kind in (KIND_OBJECT, KIND_ARRAY, KIND_NULL) else _SCALAR
+        if actual not in expected:
+            raise StreamSchemaError(
+                f"{self._describe(expected)} 자리에 {self._describe({actual})}이 생성되었습니다.", path
+            )
+
+    def _expected_kinds(self, path: JsonPath) -> Optional[FrozenSet[str]]:
+        """경로의 허용 형태 (배열 인덱스는 탭 인덱스만 구분하여 캐시)"""
+        cache_key = tuple(
+            key if not isinstance(key, int) or depth == 1 else 0
+            for depth, key in enumerate(path)
+        )
+        if cache_key not in self._kinds_cache:
+            self._kinds_cache[cache_key] = self._resolve_kinds(path)
+        return self._kinds_cache[cache_key]
+
+    def _resolve_kinds(self, path: JsonPath) -> Optional[FrozenSet[str]]:
+        compact = bool(path) and path[0] == COMPACT_TABS_KEY
+        annotation: Any = self.compact_model if compact else self.model
+        for depth, key in enumerate(path):
+            annotation = _strip_optional(annotation)
+            if isinstance(key, int):
+                if get_origin(annotation) not in (list, tuple, set):
+                    return _UNKNOWN
+                # 압축 탭 모델은 탭 순서로 결정 (t[i] → TAB_ORDER[i])
+                annotation = COMPACT_TAB_MODELS[TAB_ORDER[key]] if compact and depth == 1 else get_args(annotation)[0]
+            elif inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+                if annotation is Tab and key == "content":
+                    # 탭 컨텐츠 모델은 탭 순서로 결정 (tabs[i] → TAB_ORDER[i])
+                    annotation = TAB_CONTENT_MODELS[TAB_ORDER[path[1]]]
+                else:
+                    annotation = _model_field(annotation, key)
+                if annotation is _UNKNOWN:
+                    return _UNKNOWN
+            else:
+                return _UNKNOWN
+        return _annotation_kinds(annotation)
+
+    @staticmethod
+    def _describe(kinds) -> str:
+        names = {KIND_OBJECT: "객체", KIND_ARRAY: "배열", KIND_NULL: "null", _SCALAR: "값"}
+        return "/".join(names[kind] for kind in sorted(kinds))
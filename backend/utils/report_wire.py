@@ -0,0 +1,217 @@
+"""
+Step 2 압축 출력 형식 (wire format) + 로컬 확장기
+
+이 모듈은 Gemini가 Step 2에서 생성하는 JSON의 출력 토큰을 줄이기 위한 압축 형식을 정의하고,
+서버에서 전체 PortfolioReport 형식으로 확장합니다. 출력 토큰은 호출 지연 시간의 대부분을 차지합니다.
+
+- 짧은 키: 행/카드마다 반복되는 긴 필드명(coreCriteriaScores, detailedScores, "기술 잠재력" 등) 대신 1~2글자 키
+- 위치 기반 점수 배열: 기준/카테고리 이름은 고정 순서(CORE_CRITERIA, STOCK_SCORE_COLUMNS, DETAIL_CATEGORIES)로 생략
+- 상수 생략: tabId/tabTitle(탭 순서로 결정), headers, maxScore, version, 섹션 제목
+
+압축 형식 (탭은 TAB_ORDER 순서):
+    {"d": "YYYY-MM-DD", "t": [
+      {"o": 종합, "c": [핵심 기준 3개], "s": [강점], "w": [약점]},
+      {"a": [{"h": 소제목, "s": 점수, "d": 분석} × 3], "p": [{"m": 요약, "d": 상세}]},
+      {"r": [{"n": 종목명, "s": [Overall, 펀더멘탈, 기술 잠재력, 거시경제, 시장심리, CEO/리더십]}]},
+      {"k": [{"n": 종목명, "o": 종합, "s": [카테고리 5개], "a": [카테고리별 분석 5개]}]}
+    ]}
+
+모델이 전체 형식으로 응답해도 그대로 받아들입니다 (parse_step2_report / parse_step2_tab이 형식 자동 판별).
+압축 형식 검증 오류(개수 불일치 등)는 Pydantic ValidationError로 드러나 보정 재시도 대상이 됩니다.
+"""
+
+import json
+from typing import List, Dict, Any, Union
+
+from pydantic import BaseModel, Field, model_validator
+
+from models.portfolio import PortfolioReport, Tab, TAB_ORDER
+
+# 압축 형식의 탭 배열 키
+COMPACT_TABS_KEY = "t"
+# Step 2 스트리밍 스캐너 대상 키 (전체 형식, 압축 형식)
+STEP2_TABS_KEYS = ("tabs", COMPACT_TABS_KEY)
+
+# 생략된 상수
+TAB_TITLES = {
+    "dashboard": "총괄 요약",
+    "deepDive": "포트폴리오 심층 분석",
+    "allStockScores": "개별 종목 스코어",
+    "keyStockAnalysis": "핵심 종목 상세 분석",
+}
+OVERALL_SCORE_TITLE = "포트폴리오 종합 리니아 스코어"
+OPPORTUNITIES_TITLE = "기회 및 개선 방안"
+CORE_CRITERIA = ["성장 잠재력", "안정성 및 방어력", "전략적 일관성"]
+STOCK_SCORE_COLUMNS = ["Overall", "펀더멘탈", "기술 잠재력", "거시경제", "시장심리", "CEO/리더십"]
+DETAIL_CATEGORIES = STOCK_SCORE_COLUMNS[1:]
+MAX_SCORE = 100
+
+
+class CompactDashboard(BaseModel):
+    """탭 1 압축 형식: o=종합 점수, c=핵심 기준 점수(CORE_CRITERIA 순), s=강점, w=약점"""
+    o: int
+    c: List[int] = Field(..., min_length=len(CORE_CRITERIA), max_length=len(CORE_CRITERIA))
+    s: List[str]
+    w: List[str]
+
+    def expand(self) -> Dict[str, Any]:
+        return {
+            "overallScore": {"title": OVERALL_SCORE_TITLE, "score": self.o, "maxScore": MAX_SCORE},
+            "coreCriteriaScores": [
+                {"criterion": criterion, "score": score, "maxScore": MAX_SCORE}
+                for criterion, score in zip(CORE_CRITERIA, self.c)
+            ],
+            "strengths": self.s,
+            "weaknesses": self.w,
+        }
+
+
+class CompactInsight(BaseModel):
+    """심층 분석 항목: h=소제목, s=점수, d=분석"""
+    h: str
+    s: int
+    d: str
+
+
+class CompactOpportunity(BaseModel):
+    """기회 항목: m=요약, d=상세 설명"""
+    m: str
+    d: str
+
+
+class CompactDeepDive(BaseModel):
+    """탭 2 압축 형식: a=핵심 기준별 심층 분석(CORE_CRITERIA 순), p=기회 및 개선 방안"""
+    a: List[CompactInsight] = Field(..., min_length=len(CORE_CRITERIA), max_length=len(CORE_CRITERIA))
+    p: List[CompactOpportunity]
+
+    def expand(self) -> Dict[str, Any]:
+        return {
+            "inDepthAnalysis": [
+                {
+                    # 기준명은 생략하고 소제목만 생성 (모델이 기준명을 붙였으면 그대로)
+                    "title": item.h if item.h.startswith(criterion) else f"{criterion} 분석: {item.h}",
+                    "score": item.s,
+                    "description": item.d,
+                }
+                for criterion, item in zip(CORE_CRITERIA, self.a)
+            ],
+            "opportunities": {
+                "title": OPPORTUNITIES_TITLE,
+                "items": [{"summary": item.m, "details": item.d} for item in self.p],
+            },
+        }
+
+
+class CompactScoreRow(BaseModel):
+    """종목 스코어 행: n=종목명, s=점수(STOCK_SCORE_COLUMNS 순)"""
+    n: str
+    s: List[int] = Field(..., min_length=len(STOCK_SCORE_COLUMNS), max_length=len(STOCK_SCORE_COLUMNS))
+
+
+class CompactAllStockScores(BaseModel):
+    """탭 3 압축 형식: r=종목 스코어 행"""
+    r: List[CompactScoreRow]
+
+    def expand(self) -> Dict[str, Any]:
+        return {
+            "scoreTable": {
+                "headers": ["주식"] + STOCK_SCORE_COLUMNS,
+                "rows": [{"주식": row.n, **dict(zip(STOCK_SCORE_COLUMNS, row.s))} for row in self.r],
+            }
+        }
+
+
+class CompactAnalysisCard(BaseModel):
+    """종목 분석 카드: n=종목명, o=종합 점수, s=카테고리 점수, a=카테고리별 분석 (DETAIL_CATEGORIES 순)"""
+    n: str
+    o: int
+    s: List[int] = Field(..., min_length=len(DETAIL_CATEGORIES), max_length=len(DETAIL_CATEGORIES))
+    a: List[str] = Field(..., min_length=len(DETAIL_CATEGORIES), max_length=len(DETAIL_CATEGORIES))
+
+
+class CompactKeyStockAnalysis(BaseModel):
+    """탭 4 압축 형식: k=핵심 종목 분석 카드"""
+    k: List[CompactAnalysisCard] = Field(..., min_length=1)
+
+    def expand(self) -> Dict[str, Any]:
+        return {
+            "analysisCards": [
+                {
+                    "stockName": card.n,
+                    "overallScore": card.o,
+                    "detailedScores": [
+                        {"category": category, "score": score, "analysis": analysis}
+                        for category, score, analysis in zip(DETAIL_CATEGORIES, card.s, card.a)
+                    ],
+                }
+                for card in self.k
+            ]
+        }
+
+
+# 탭별 압축 컨텐츠 모델 (TAB_ORDER와 같은 순서)
+COMPACT_TAB_MODELS = {
+    "dashboard": CompactDashboard,
+    "deepDive": CompactDeepDive,
+    "allStockScores": CompactAllStockScores,
+    "keyStockAnalysis": CompactKeyStockAnalysis,
+}
+CompactTab = Union[CompactDashboard, CompactDeepDive, CompactAllStockScores, CompactKeyStockAnalysis]
+
+
+class CompactPortfolioReport(BaseModel):
+    """압축 리포트: d=리포트 날짜, t=탭 4개 (TAB_ORDER 순)"""
+    d: str
+    t: List[CompactTab] = Field(..., min_length=len(TAB_ORDER), max_length=len(TAB_ORDER))
+
+    @model_validator(mode="before")
+    @classmethod
+    def infer_tab_models_from_order(cls, data: Any) -> Any:
+        # 탭 형식은 위치로 결정 (t[i] → TAB_ORDER[i])
+        if not isinstance(data, dict) or not isinstance(data.get(COMPACT_TABS_KEY), list):
+            return data
+        tabs = data[COMPACT_TABS_KEY]
+        data[COMPACT_TABS_KEY] = [
+            COMPACT_TAB_MODELS[TAB_ORDER[index]].model_validate(tab)
+            if index < len(TAB_ORDER) and isinstance(tab, dict) else tab
+            for index, tab in enumerate(tabs)
+        ]
+        return data
+
+    def expand(self) -> Dict[str, Any]:
+        """전체 PortfolioReport 형식 dict"""
+        return {
+            "version": "1.0",
+            "reportDate": self.d,
+            "tabs": [expand_tab(index, tab) for index, tab in enumerate(self.t)],
+        }
+
+
+def expand_tab(index: int, tab: BaseModel) -> Dict[str, Any]:
+    """압축 탭 → 전체 Tab 형식 dict"""
+    tab_id = TAB_ORDER[index]
+    return {"tabId": tab_id, "tabTitle": TAB_TITLES[tab_id], "content": tab.expand()}
+
+
+def parse_step2_report(text: str) -> PortfolioReport:
+    """
+    Step 2 응답(압축/전체 형식) → 검증된 PortfolioReport
+
+    Raises:
+        ValidationError: 압축 형식 또는 전체 형식 검증 실패 (JSON 문법 오류 포함)
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return PortfolioReport.model_validate_json(text)  # JSON 문법 오류를 ValidationError로 보고
+    if isinstance(data, dict) and COMPACT_TABS_KEY in data and "tabs" not in data:
+        return PortfolioReport.model_validate(CompactPortfolioReport.model_validate(data).expand())
+    return PortfolioReport.model_validate(data)
+
+
+def parse_step2_tab(index: int, raw_tab: str) -> Tab:
+    """스트리밍으로 완성된 탭 원문(압축/전체 형식) → 검증된 Tab"""
+    data = json.loads(raw_tab)
+    if isinstance(data, dict) and "tabId" not in data and index < len(TAB_ORDER):
+        data = expand_tab(index, COMPACT_TAB_MODELS[TAB_ORDER[index]].model_validate(data))
+    return Tab.model_validate(data)
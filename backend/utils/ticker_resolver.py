@@ -0,0 +1,225 @@
+"""
+종목명 → 티커 해석 유틸리티
+
+이 모듈은 스크린샷에서 추출된 자유 텍스트 종목명("팔란티어 (PLTR)", "Palantir", "PLTR")을
+정규화된 티커로 변환합니다. 번들된 심볼 사전(data/ticker_symbols.json)을 시작 시 한 번 로드하여
+해시 인덱스(정확 일치)와 트라이(최장 접두사 일치)를 구성하며, 조회는 입력 길이에 비례(O(length))합니다.
+
+접두사 일치는 별칭 뒤에 법인·주식 종류 접미사(inc, corp, 우 등)만 남는 경우에만 인정합니다.
+"메타버스 ETF"(메타), "애플리케이션"(애플), "Apple Hospitality REIT"(apple) 같은 단어 일부·다른 회사 일치를 막기 위함입니다.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import unicodedata
+from typing import Optional, Dict, List, Iterable
+
+logger = logging.getLogger(__name__)
+
+# 설정값
+TICKER_SYMBOLS_PATH = os.getenv(
+    "TICKER_SYMBOLS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ticker_symbols.json")
+)
+MIN_PREFIX_ALIAS_LENGTH = 2  # 접두사 일치에 사용할 별칭 최소 길이 (정규화 기준)
+
+# 괄호 안 티커 표기: "(PLTR)", "(BRK.B)", "(005930)"
+_PARENTHESIZED_SYMBOL = re.compile(r"[(\[]\s*([A-Z]{1,5}(?:[.\-][A-Z])?|\d{6})\s*[)\]]")
+# 정규화 시 제거할 문자 (공백, 구두점, 마크다운 강조 등). '.', '&'는 BRK.B, S&P 표기를 위해 유지
+_STRIP_CHARS = re.compile(r"[\s*_`'\"(),\-·:/]+")
+_LOOKS_LIKE_TICKER = re.compile(r"^(?:[A-Z]{1,5}(?:\.[A-Z])?|\d{6})$")
+# 괄호 안에 자주 표기되지만 티커가 아닌 통화·자산 유형·시장 표기 ("Apple (USD)", "KODEX 200 (ETF)")
+_NON_TICKER_TAGS = frozenset({
+    "USD", "KRW", "JPY", "EUR", "CNY", "HKD", "GBP",
+    "ETF", "ETN", "ELW", "ADR", "ADS", "REIT", "REITS", "SPAC",
+    "KRX", "NYSE", "AMEX", "OTC", "KOSPI",
+})
+# 띄어 쓴 법인·주식 종류 단어 ("AMD Inc", "주식회사 카카오"), 이름 앞뒤에서 제거 후 정확 일치
+_CORPORATE_WORD = re.compile(
+    r"^(?:inc|incorporated|corp|corporation|co|company|ltd|limited|plc|llc|holdings?|group|"
+    r"adrs?|ads|common|stock|shares?|주식회사|주|우|우선주|보통주|홀딩스|그룹)\.?$"
+)
+# 주식 종류 표기 ("Class C", "B"), 종류별 항목이 있는 종목(알파벳 A/C)에서는 종류를 구분
+_SHARE_CLASS = re.compile(r"^[abc]$")
+# 별칭에 붙여 쓴 접미사 ("AppleInc", "삼성전자보통주"), 접두사 일치 후 남은 부분이 이것뿐일 때만 인정
+_ATTACHED_SUFFIX = re.compile(r"^(?:(?:inc|corp|corporation|ltd|plc|llc|우선주|보통주|우)\.?)+$")
+
+_TERMINAL = "$"  # 트라이 노드의 종결 표시 키
+
+
+def normalize_stock_name(name: str) -> str:
+    """종목명 정규화 (NFKC, 소문자, 공백/구두점 제거)"""
+    if not name:
+        return ""
+    normalized = unicodedata.normalize("NFKC", name).lower()
+    return _STRIP_CHARS.sub("", normalized)
+
+
+class TickerResolver:
+    """심볼 사전 기반 종목명 → 티커 해석기"""
+
+    def __init__(self, symbols: Iterable[List[str]]):
+        """
+        해석기 초기화
+
+        Args:
+            symbols: [티커, 별칭1, 별칭2, ...] 형식의 심볼 목록
+        """
+        self._exact: Dict[str, str] = {}
+        self._trie: Dict = {}
+        self._display_names: Dict[str, str] = {}
+        self._share_class_bases: set = set()  # 주식 종류별 별칭("alphabet c")이 있는 이름 (정규화)
+
+        for entry in symbols:
+            if not entry:
+                continue
+            ticker = entry[0].upper()
+            aliases = entry[1:]
+            self._display_names[ticker] = aliases[0] if aliases else ticker
+
+            # 티커 자체는 정확 일치만 허용 (접두사 일치 시 "MA" → "MARA" 같은 오탐 방지)
+            self._exact.setdefault(normalize_stock_name(ticker), ticker)
+            for alias in aliases:
+                key = normalize_stock_name(alias)
+                if not key:
+                    continue
+                self._exact.setdefault(key, ticker)
+                words = alias.split()
+                if len(words) > 1 and _SHARE_CLASS.match(words[-1].lower()):
+                    self._share_class_bases.add(normalize_stock_name(" ".join(words[:-1])))
+                if len(key) >= MIN_PREFIX_ALIAS_LENGTH:
+                    self._insert_prefix(key, ticker)
+
+    def _insert_prefix(self, key: str, ticker: str) -> None:
+        """트라이에 별칭 삽입"""
+        node = self._trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(_TERMINAL, ticker)
+
+    def _longest_prefix(self, key: str) -> Optional[str]:
+        """정규화된 문자열의 최장 접두사 별칭 티커 (남은 부분이 법인·주식 종류 접미사일 때만)"""
+        node = self._trie
+        matched: Optional[str] = None
+        for length, char in enumerate(key, start=1):
+            node = node.get(char)
+            if node is None:
+                break
+            if _TERMINAL in node and (length == len(key) or _ATTACHED_SUFFIX.match(key[length:])):
+                matched = node[_TERMINAL]
+        return matched
+
+    def _strip_corporate_words(self, name: str) -> Optional[str]:
+        """
+        앞뒤 법인 단어를 뺀 이름의 정확 일치 티커 ("AMD Inc" → AMD)
+
+        주식 종류("Class C")는 종류별 별칭이 있는 이름이면 구분하고("Alphabet Class C" → GOOG),
+        없으면 무시합니다("Berkshire Hathaway Class B" → BRK.B).
+        """
+        all_words = [word for word in (normalize_stock_name(part) for part in _STRIP_CHARS.split(name)) if word]
+        words = [word for word in all_words if word != "class"]
+        share_class = words.pop() if len(words) > 1 and _SHARE_CLASS.match(words[-1]) else ""
+        start, end = 0, len(words)
+        while start < end and _CORPORATE_WORD.match(words[start]):
+            start += 1
+        while end > start and _CORPORATE_WORD.match(words[end - 1]):
+            end -= 1
+        if start == end or (start, end, len(words)) == (0, len(all_words), len(all_words)):
+            return None
+        core = "".join(words[start:end])
+        if share_class and core in self._share_class_bases:
+            return self._exact.get(core + share_class)
+        return self._exact.get(core)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        자유 텍스트 종목명을 티커로 변환
+
+        Args:
+            name: 추출된 종목명 (예: "팔란티어 (PLTR)", "Palantir", "**PLTR**")
+
+        Returns:
+            Optional[str]: 정규화된 티커 (해석 불가 시 None)
+        """
+        if not name:
+            return None
+
+        # 1) 전체 문자열 정확 일치
+        key = normalize_stock_name(name)
+        if key in self._exact:
+            return self._exact[key]
+
+        # 2) 괄호 안 티커 표기 중 사전에 있는 것 우선 ("팔란티어 테크놀로지스 (PLTR)")
+        symbols = [
+            match.group(1).upper() for match in _PARENTHESIZED_SYMBOL.finditer(name)
+            if match.group(1).upper() not in _NON_TICKER_TAGS
+        ]
+        for symbol in symbols:
+            symbol_key = normalize_stock_name(symbol)
+            if symbol_key in self._exact:
+                return self._exact[symbol_key]
+
+        # 3) 괄호 부분을 제거한 이름으로 정확 일치 → 법인 단어 제거 후 정확 일치 → 최장 접두사 일치
+        bare_name = _PARENTHESIZED_SYMBOL.sub("", name)
+        bare_key = normalize_stock_name(bare_name)
+        if bare_key in self._exact:
+            return self._exact[bare_key]
+        if bare_key:
+            ticker = self._strip_corporate_words(bare_name) or self._longest_prefix(bare_key)
+            if ticker:
+                return ticker
+
+        # 4) 이름을 해석할 수 없을 때만 사전에 없는 괄호 안 티커 표기 사용 (통화·자산 유형 표기 제외)
+        for symbol in symbols:
+            if _LOOKS_LIKE_TICKER.match(symbol):
+                return symbol
+        return None
+
+    def resolve_many(self, names: Iterable[str]) -> List[str]:
+        """여러 종목명을 해석하여 중복 없는 티커 목록 반환 (입력 순서 유지)"""
+        tickers: List[str] = []
+        for name in names:
+            ticker = self.resolve(name)
+            if ticker and ticker not in tickers:
+                tickers.append(ticker)
+        return tickers
+
+    def display_name(self, ticker: str) -> str:
+        """티커의 대표 표시명 반환 (사전에 없으면 티커 그대로)"""
+        return self._display_names.get(ticker.upper(), ticker)
+
+    def __len__(self) -> int:
+        return len(self._display_names)
+
+    @classmethod
+    def from_file(cls, path: str = TICKER_SYMBOLS_PATH) -> "TickerResolver":
+        """사전 컴파일된 심볼 파일에서 해석기 로드"""
+        start_time = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        resolver = cls(payload.get("symbols", []))
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        logger.info(
+            f"티커 사전 로드 완료: {len(resolver)}개 종목, "
+            f"버전 {payload.get('version')}, {elapsed_ms:.1f}ms"
+        )
+        return resolver
+
+
+# 싱글톤 인스턴스
+_ticker_resolver: Optional[TickerResolver] = None
+
+
+def get_ticker_resolver() -> TickerResolver:
+    """TickerResolver 싱글톤 인스턴스 반환"""
+    global _ticker_resolver
+    if _ticker_resolver is None:
+        try:
+            _ticker_resolver = TickerResolver.from_file()
+        except (OSError, ValueError) as e:
+            logger.error(f"티커 사전 로드 실패, 빈 사전으로 진행: {str(e)}")
+            _ticker_resolver = TickerResolver([])
+    return _ticker_resolver
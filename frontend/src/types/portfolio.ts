@@ -20,6 +20,7 @@ export interface AnalysisResponse {
   processing_time: number;  // 처리 시간 (초)
   request_id: string;       // 요청 ID
   images_processed?: number; // 처리된 이미지 수 (옵셔널, 하위 호환성)
+  stale?: boolean;          // 유예 구간 캐시 결과 여부 (백그라운드 갱신 진행 중)
 }
 
 /**
@@ -166,6 +167,7 @@ export interface StructuredAnalysisResponse {
   processing_time: number;
   request_id: string;
   images_processed: number;
+  stale?: boolean;
 }
 
 // Union 타입 정의